@@ -0,0 +1,537 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫增量備份 (BackupStore)
+
+備份以內容定址的區塊 (chunk) 保存，未變更的區塊在備份間共用：
+- 影片、女優依 ID 雜湊分桶，關聯與其影片存放在同一分桶
+- 每個區塊以 SHA256 命名並壓縮存放於 objects/，相同內容只寫一次
+- BACKUP_MANIFEST.json 記錄每份備份引用的區塊與頂層欄位
+
+任何一份備份都可由其引用的區塊完整重建。刪除備份只修改 manifest，
+再以一次掃描清除不再被引用的區塊。
+
+比較兩份備份（或備份與目前資料）時逐一分桶進行：兩邊雜湊相同的
+區塊直接略過，記憶體中同時只有一對分桶的記錄。
+"""
+
+import os
+import gzip
+import zlib
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Union
+
+from src.models import json_codec
+from src.models.json_locks import SharedFileLock
+from src.models.json_types import (
+    JSONDatabaseDict,
+    BackupError,
+    CorruptedDataError,
+    ISO_DATETIME_FORMAT,
+    BACKUP_MANIFEST_NAME,
+    BACKUP_OBJECT_DIR_NAME,
+    BACKUP_CHUNK_COUNT,
+    WRITE_LOCK_TIMEOUT,
+)
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 區塊化保存的頂層欄位（其餘欄位直接存放在 manifest）
+_CHUNKED_KEYS = ('videos', 'actresses', 'links', 'statistics', 'data_hash')
+
+# 可比較的容器（依序輸出差異）
+DIFF_KINDS = ('videos', 'actresses', 'links')
+
+# 比較來源：備份 ID，或含 videos/actresses/links 的資料庫字典（例如目前資料的快照）
+DiffSource = Union[str, Mapping[str, Any]]
+
+
+@dataclass(frozen=True)
+class RecordChange:
+    """記錄差異
+
+    Attributes:
+        kind: 容器名稱 ('videos' / 'actresses' / 'links')
+        key: 記錄 ID；關聯為 (video_id, actress_id)
+        change: 'added' / 'removed' / 'changed'
+        old: 比較基準中的記錄（新增時為 None）
+        new: 比較目標中的記錄（刪除時為 None）
+    """
+    kind: str
+    key: Any
+    change: str
+    old: Optional[Dict[str, Any]] = None
+    new: Optional[Dict[str, Any]] = None
+
+
+class _DataBuckets:
+    """將資料庫字典依備份的分桶方式分組（只保存 ID 或位置）"""
+
+    def __init__(self, store: "BackupStore", data: Mapping[str, Any]):
+        self._store = store
+        self._data = data
+        self._groups: Dict[str, Dict[str, list]] = {}
+
+    def names(self, kind: str) -> List[str]:
+        return list(self._group(kind))
+
+    def _group(self, kind: str) -> Dict[str, list]:
+        if kind not in self._groups:
+            groups: Dict[str, list] = {}
+            if kind == 'links':
+                for position, link in enumerate(self._data.get('links', ())):
+                    groups.setdefault(f"links-{self._store._bucket(link.get('video_id'))}", []).append(position)
+            else:
+                for key in self._data.get(kind, {}):
+                    groups.setdefault(f"{kind}-{self._store._bucket(key)}", []).append(key)
+            self._groups[kind] = groups
+        return self._groups[kind]
+
+    def read(self, kind: str, name: str) -> Any:
+        members = self._group(kind).get(name, [])
+        if kind == 'links':
+            links = self._data.get('links', ())
+            return [links[position] for position in members]
+        records = self._data.get(kind, {})
+        return {key: records[key] for key in members}
+
+
+class BackupStore:
+    """增量備份儲存類別
+
+    manifest 格式:
+        {
+            "format": "json_db_backups", "version": 1,
+            "backups": [
+                {"id": "backup_<時間>", "created_at": "...", "root": {...},
+                 "chunks": {"order": sha, "videos-00": sha, "links-00": sha,
+                            "actresses-00": sha, "statistics": sha},
+                 "videos": n, "actresses": n, "links": n, "stored_bytes": n},
+                ...
+            ]
+        }
+
+    order 區塊記錄影片與女優的原始順序，重建時據此還原插入順序。
+    空的區塊不保存。
+
+    Attributes:
+        backup_dir: 備份目錄
+        object_dir: 區塊目錄
+        manifest_path: manifest 檔案路徑
+        chunk_count: 影片/女優分桶數
+        compress: 是否以 gzip 壓縮新寫入的區塊
+    """
+
+    MANIFEST_FORMAT = "json_db_backups"
+    MANIFEST_VERSION = 1
+    ORDER_CHUNK = "order"
+    STATISTICS_CHUNK = "statistics"
+
+    def __init__(self, backup_dir: Path, chunk_count: int = BACKUP_CHUNK_COUNT, compress: bool = True):
+        """
+        初始化 BackupStore
+
+        Args:
+            backup_dir: 備份目錄
+            chunk_count: 影片/女優分桶數
+            compress: 是否壓縮區塊
+        """
+        self.backup_dir = Path(backup_dir)
+        self.object_dir = self.backup_dir / BACKUP_OBJECT_DIR_NAME
+        self.manifest_path = self.backup_dir / BACKUP_MANIFEST_NAME
+        self.chunk_count = chunk_count
+        self.compress = compress
+        # manifest 的讀取-修改-寫入：程序內以 _mutex、跨程序以檔案鎖互斥
+        self._mutex = threading.Lock()
+        self._file_lock = SharedFileLock(self.backup_dir / "backup.lock", timeout=WRITE_LOCK_TIMEOUT)
+
+    # ========================================================================
+    # manifest
+    # ========================================================================
+
+    def read_manifest(self) -> Dict[str, Any]:
+        """
+        讀取 manifest（不存在時回傳空 manifest）
+
+        Raises:
+            CorruptedDataError: 若 manifest 格式錯誤
+        """
+        if not self.manifest_path.exists():
+            return {'format': self.MANIFEST_FORMAT, 'version': self.MANIFEST_VERSION, 'backups': []}
+
+        try:
+            manifest = json_codec.load_file(self.manifest_path)
+        except Exception as e:
+            raise CorruptedDataError(f"備份 manifest 無法解析: {e}")
+        if manifest.get('format') != self.MANIFEST_FORMAT:
+            raise CorruptedDataError(f"不是備份 manifest: {self.manifest_path}")
+        return manifest
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        """原子替換 manifest（提交點）"""
+        temp_file = self.backup_dir / f"{BACKUP_MANIFEST_NAME}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(json_codec.dumps(manifest, indent=True))
+            f.flush()
+            os.fsync(f.fileno())
+        temp_file.replace(self.manifest_path)
+
+    def list_ids(self) -> List[str]:
+        """列出備份 ID（依建立時間排序）"""
+        return [entry['id'] for entry in self.read_manifest()['backups']]
+
+    def has(self, backup_id: str) -> bool:
+        """備份 ID 是否存在"""
+        return backup_id in self.list_ids()
+
+    # ========================================================================
+    # 區塊
+    # ========================================================================
+
+    def _entry(self, backup_id: str) -> Dict[str, Any]:
+        """
+        取得 manifest 中的備份項目
+
+        Raises:
+            BackupError: 若備份不存在
+        """
+        for entry in self.read_manifest()['backups']:
+            if entry['id'] == backup_id:
+                return entry
+        raise BackupError(f"備份不存在: {backup_id}")
+
+    def _bucket(self, key: Optional[str]) -> str:
+        return f"{zlib.crc32((key or '').encode('utf-8')) % self.chunk_count:02x}"
+
+    def _split(self, data: JSONDatabaseDict) -> Dict[str, Any]:
+        """
+        將資料庫切分為區塊
+
+        Args:
+            data: 資料庫字典
+
+        Returns:
+            {區塊名稱: 內容}（不含空區塊）
+        """
+        videos = data.get('videos', {})
+        actresses = data.get('actresses', {})
+        chunks: Dict[str, Any] = {
+            self.ORDER_CHUNK: {'videos': list(videos), 'actresses': list(actresses)},
+        }
+
+        for video_id, video in videos.items():
+            chunks.setdefault(f"videos-{self._bucket(video_id)}", {})[video_id] = video
+        for actress_id, actress in actresses.items():
+            chunks.setdefault(f"actresses-{self._bucket(actress_id)}", {})[actress_id] = actress
+        for link in data.get('links', []):
+            chunks.setdefault(f"links-{self._bucket(link.get('video_id'))}", []).append(link)
+        if data.get('statistics'):
+            chunks[self.STATISTICS_CHUNK] = data['statistics']
+        return chunks
+
+    def _object_path(self, digest: str, compressed: bool) -> Path:
+        suffix = '.json.gz' if compressed else '.json'
+        return self.object_dir / digest[:2] / f"{digest}{suffix}"
+
+    def _put_object(self, payload: bytes) -> Tuple[str, int]:
+        """
+        保存區塊（內容已存在時不重複寫入）
+
+        Args:
+            payload: 區塊的 JSON 位元組
+
+        Returns:
+            (SHA256, 實際寫入的位元組數)
+        """
+        digest = hashlib.sha256(payload).hexdigest()
+        if self._object_path(digest, True).exists() or self._object_path(digest, False).exists():
+            return digest, 0
+
+        path = self._object_path(digest, self.compress)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        encoded = gzip.compress(payload, compresslevel=6, mtime=0) if self.compress else payload
+        temp_file = path.with_name(f"{path.name}.tmp")
+        with open(temp_file, 'wb') as f:
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        temp_file.replace(path)
+        return digest, len(encoded)
+
+    def _get_object(self, digest: str) -> Any:
+        """
+        讀取區塊並驗證內容雜湊
+
+        Raises:
+            CorruptedDataError: 若區塊遺失或損壞
+        """
+        compressed = self._object_path(digest, True)
+        if compressed.exists():
+            with open(compressed, 'rb') as f:
+                payload = gzip.decompress(f.read())
+        else:
+            plain = self._object_path(digest, False)
+            if not plain.exists():
+                raise CorruptedDataError(f"備份區塊遺失: {digest}")
+            with open(plain, 'rb') as f:
+                payload = f.read()
+
+        if hashlib.sha256(payload).hexdigest() != digest:
+            raise CorruptedDataError(f"備份區塊雜湊不符: {digest}")
+        return json_codec.loads(payload)
+
+    # ========================================================================
+    # 建立、重建與刪除
+    # ========================================================================
+
+    def create(self, data: JSONDatabaseDict, taken: Iterable[str] = ()) -> str:
+        """
+        建立增量備份
+
+        只寫出內容尚未存在的區塊，最後原子替換 manifest。
+
+        Args:
+            data: 資料庫字典（備份期間不可被修改）
+            taken: 其他已使用的備份名稱（例如舊格式備份檔），避免 ID 衝突
+
+        Returns:
+            備份 ID
+
+        Raises:
+            BackupError: 若備份失敗
+        """
+        with self._mutex:
+            self._file_lock.acquire()
+            try:
+                manifest = self.read_manifest()
+                used = {entry['id'] for entry in manifest['backups']} | set(taken)
+                now = datetime.now(timezone.utc)
+                backup_id = f"backup_{now.strftime('%Y-%m-%d_%H-%M-%S')}"
+                suffix = 1
+                base_id = backup_id
+                while backup_id in used:
+                    backup_id = f"{base_id}_{suffix}"
+                    suffix += 1
+
+                chunk_refs: Dict[str, str] = {}
+                stored_bytes = 0
+                for name, content in self._split(data).items():
+                    digest, written = self._put_object(json_codec.dumps(content))
+                    chunk_refs[name] = digest
+                    stored_bytes += written
+
+                manifest['backups'].append({
+                    'id': backup_id,
+                    'created_at': now.strftime(ISO_DATETIME_FORMAT),
+                    'root': {key: value for key, value in data.items() if key not in _CHUNKED_KEYS},
+                    'data_hash': data.get('data_hash'),
+                    'chunks': chunk_refs,
+                    'videos': len(data.get('videos', {})),
+                    'actresses': len(data.get('actresses', {})),
+                    'links': len(data.get('links', [])),
+                    'stored_bytes': stored_bytes,
+                })
+                self._write_manifest(manifest)
+
+                logger.debug(
+                    f"✅ 增量備份 {backup_id}: {len(chunk_refs)} 個區塊, 新寫入 {stored_bytes} 位元組"
+                )
+                return backup_id
+
+            except CorruptedDataError as e:
+                raise BackupError(f"備份失敗: {e}")
+            finally:
+                self._file_lock.release()
+
+    def load(self, backup_id: str) -> JSONDatabaseDict:
+        """
+        由區塊重建備份時的完整資料庫字典
+
+        Args:
+            backup_id: 備份 ID
+
+        Returns:
+            資料庫字典
+
+        Raises:
+            BackupError: 若備份不存在
+            CorruptedDataError: 若區塊遺失或損壞
+        """
+        with self._mutex:
+            self._file_lock.acquire(shared=True)
+            try:
+                entry = self._entry(backup_id)
+                chunks = {name: self._get_object(digest) for name, digest in entry['chunks'].items()}
+            finally:
+                self._file_lock.release()
+
+        records: Dict[str, Dict[str, Any]] = {'videos': {}, 'actresses': {}}
+        links: List[Dict[str, Any]] = []
+        for name in sorted(chunks):
+            kind = name.split('-', 1)[0]
+            if kind in records:
+                records[kind].update(chunks[name])
+            elif kind == 'links':
+                links.extend(chunks[name])
+
+        order = chunks.get(self.ORDER_CHUNK, {'videos': [], 'actresses': []})
+        data = dict(entry['root'])
+        data['videos'] = {video_id: records['videos'][video_id] for video_id in order['videos']}
+        data['actresses'] = {
+            actress_id: records['actresses'][actress_id] for actress_id in order['actresses']
+        }
+        data['links'] = links
+        data['statistics'] = chunks.get(self.STATISTICS_CHUNK, {})
+        if entry.get('data_hash'):
+            data['data_hash'] = entry['data_hash']
+        return data
+
+    def delete(self, backup_ids: Iterable[str]) -> int:
+        """
+        刪除備份並清除不再被引用的區塊
+
+        一次改寫 manifest，再掃描一次區塊目錄。
+
+        Args:
+            backup_ids: 要刪除的備份 ID
+
+        Returns:
+            刪除的備份數
+        """
+        targets = set(backup_ids)
+        if not targets:
+            return 0
+
+        with self._mutex:
+            self._file_lock.acquire()
+            try:
+                manifest = self.read_manifest()
+                kept = [entry for entry in manifest['backups'] if entry['id'] not in targets]
+                deleted = len(manifest['backups']) - len(kept)
+                if deleted:
+                    manifest['backups'] = kept
+                    self._write_manifest(manifest)
+                self._sweep({digest for entry in kept for digest in entry['chunks'].values()})
+                return deleted
+            finally:
+                self._file_lock.release()
+
+    def _sweep(self, referenced: Set[str]) -> int:
+        """刪除未被引用的區塊（含中斷遺留的暫存檔），回傳刪除的檔案數"""
+        removed = 0
+        if not self.object_dir.exists():
+            return removed
+
+        for path in self.object_dir.glob('*/*'):
+            digest = path.name.split('.', 1)[0]
+            if digest in referenced and not path.name.endswith('.tmp'):
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except OSError as e:
+                logger.warning(f"⚠️ 無法刪除備份區塊 {path.name}: {e}")
+        logger.debug(f"✅ 已清除 {removed} 個未引用的備份區塊")
+        return removed
+
+    # ========================================================================
+    # 比較與選擇性讀取
+    # ========================================================================
+
+    def get_records(self, backup_id: str, kind: str, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        只讀取包含指定記錄的區塊並取出記錄
+
+        Args:
+            backup_id: 備份 ID
+            kind: 'videos' 或 'actresses'
+            keys: 記錄 ID
+
+        Returns:
+            {記錄 ID: 記錄}（備份中不存在的 ID 不包含在內）
+
+        Raises:
+            BackupError: 若備份不存在
+            CorruptedDataError: 若區塊遺失或損壞
+        """
+        chunk_refs = self._entry(backup_id)['chunks']
+        wanted: Dict[str, List[str]] = {}
+        for key in keys:
+            wanted.setdefault(f"{kind}-{self._bucket(key)}", []).append(key)
+
+        records: Dict[str, Dict[str, Any]] = {}
+        for name, bucket_keys in wanted.items():
+            if name not in chunk_refs:
+                continue
+            chunk = self._get_object(chunk_refs[name])
+            records.update({key: chunk[key] for key in bucket_keys if key in chunk})
+        return records
+
+    def diff(self, old: DiffSource, new: DiffSource) -> Iterator[RecordChange]:
+        """
+        逐分桶比較兩份備份或備份與資料庫字典
+
+        依 DIFF_KINDS 的順序輸出差異；兩邊皆為備份且區塊雜湊相同的
+        分桶不讀取。關聯以 (video_id, actress_id) 比對。
+
+        Args:
+            old: 比較基準（備份 ID 或資料庫字典）
+            new: 比較目標（備份 ID 或資料庫字典）
+
+        Yields:
+            RecordChange
+
+        Raises:
+            BackupError: 若備份不存在
+            CorruptedDataError: 若區塊遺失或損壞（例如比較期間被清理）
+        """
+        sides = [self._entry(source)['chunks'] if isinstance(source, str) else _DataBuckets(self, source)
+                 for source in (old, new)]
+
+        for kind in DIFF_KINDS:
+            refs = [self._bucket_refs(side, kind) for side in sides]
+            for name in sorted(set(refs[0]) | set(refs[1])):
+                old_digest, new_digest = refs[0].get(name), refs[1].get(name)
+                if old_digest is not None and old_digest == new_digest:
+                    continue
+                old_chunk = self._read_bucket(sides[0], kind, name)
+                new_chunk = self._read_bucket(sides[1], kind, name)
+                if kind == 'links':
+                    old_chunk = {(link.get('video_id'), link.get('actress_id')): link for link in old_chunk}
+                    new_chunk = {(link.get('video_id'), link.get('actress_id')): link for link in new_chunk}
+                yield from self._diff_records(kind, old_chunk, new_chunk)
+
+    @staticmethod
+    def _bucket_refs(side: Any, kind: str) -> Dict[str, Optional[str]]:
+        """取得一側的分桶 {名稱: 雜湊}（資料庫字典的雜湊為 None）"""
+        if isinstance(side, _DataBuckets):
+            return {name: None for name in side.names(kind)}
+        return {name: digest for name, digest in side.items() if name.startswith(f"{kind}-")}
+
+    def _read_bucket(self, side: Any, kind: str, name: str) -> Any:
+        if isinstance(side, _DataBuckets):
+            return side.read(kind, name)
+        if name not in side:
+            return [] if kind == 'links' else {}
+        return self._get_object(side[name])
+
+    @staticmethod
+    def _diff_records(
+        kind: str,
+        old_records: Mapping[Any, Dict[str, Any]],
+        new_records: Mapping[Any, Dict[str, Any]]
+    ) -> Iterator[RecordChange]:
+        for key, record in old_records.items():
+            current = new_records.get(key)
+            if current is None:
+                yield RecordChange(kind, key, 'removed', old=record)
+            elif current != record:
+                yield RecordChange(kind, key, 'changed', old=record, new=current)
+        for key, record in new_records.items():
+            if key not in old_records:
+                yield RecordChange(kind, key, 'added', new=record)
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫變更通知 (ChangeFeed)
+
+多個程序（GUI、命令列批次作業、另一個搜尋器）可同時開啟同一個資料庫
+目錄，但各自保有記憶體資料。每次提交時，寫入者在資料旁的 changes.log
+附加一筆記錄：遞增的世代編號 (generation) 與此次變更的影片/女優 ID。
+其他程序只需讀取自己上次位置之後的記錄，即可只重新讀取變更的記錄，
+並通知程序內的訂閱者。
+
+寫入者在寫出資料「之前」附加記錄（持有獨佔檔案鎖定）：程序中斷時
+記錄可能多出一筆未實際變更的 ID（重新讀取不影響結果），但不會有
+未記錄的變更。讀取者發現資料檔案已變更卻沒有新記錄時（舊版程式或
+其他工具寫入），改為完整重新載入。
+"""
+
+import os
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional
+
+from src.models import json_codec
+from src.models.json_types import ISO_DATETIME_FORMAT, CHANGE_FEED_MAX_ENTRIES
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """變更通知
+
+    Attributes:
+        generation: 變更後的世代編號
+        videos: 新增、更新或刪除的影片 ID
+        actresses: 新增、更新或刪除的女優 ID
+        source: 'local'（本管理器提交）或 'remote'（其他程序或管理器提交）
+        reset: 無法得知個別變更（資料已整體替換或重新載入），應視為全部變更
+    """
+    generation: int
+    videos: FrozenSet[str]
+    actresses: FrozenSet[str]
+    source: str
+    reset: bool = False
+
+    @classmethod
+    def from_entry(cls, entry: Dict[str, Any], source: str) -> "ChangeEvent":
+        """由變更記錄建立通知"""
+        return cls(
+            generation=int(entry['gen']),
+            videos=frozenset(entry.get('video_ids', ())),
+            actresses=frozenset(entry.get('actress_ids', ())),
+            source=source,
+            reset=bool(entry.get('reset', False)),
+        )
+
+
+class ChangeFeed:
+    """附加式變更記錄類別
+
+    檔案格式為 JSON Lines：
+    - 第一行為標頭 {"feed": ..., "version": ..., "base": N}，N 為第一筆記錄之前的世代
+    - 之後每行為一次提交 {"gen": n, "ts": "...", "video_ids": [...], "actress_ids": [...]}
+      資料被整體替換（例如還原備份）時另有 "reset": true
+
+    每個 ChangeFeed 物件記錄自己讀到的位置；附加與讀取都需由呼叫端
+    持有檔案鎖定（附加為獨佔，讀取可為共享）。記錄超過 max_entries 筆時
+    以原子替換方式輪替，只保留最近一半；落後超過保留範圍的讀取者會
+    得知需完整重新載入。
+
+    Attributes:
+        path: 變更記錄檔路徑
+        max_entries: 觸發輪替的記錄筆數
+        generation: 已讀取或寫入的最新世代編號
+    """
+
+    FEED_FORMAT = "json_db_changes"
+    FEED_VERSION = 1
+
+    def __init__(self, path: Path, max_entries: int = CHANGE_FEED_MAX_ENTRIES):
+        """
+        初始化 ChangeFeed
+
+        Args:
+            path: 變更記錄檔路徑
+            max_entries: 觸發輪替的記錄筆數
+        """
+        self.path = Path(path)
+        self.max_entries = max(2, max_entries)
+        self.generation = 0
+        # 目前讀取的檔案 (inode) 與最後一筆完整記錄之後的位移
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._entry_count = 0
+
+    @staticmethod
+    def _encode(obj: Dict[str, Any]) -> bytes:
+        """將記錄編碼為單行緊湊 JSON"""
+        return json_codec.dumps(obj) + b"\n"
+
+    def has_new(self) -> bool:
+        """
+        檔案是否可能有尚未讀取的記錄（只取得檔案狀態，不讀取內容）
+
+        Returns:
+            檔案已被替換、刪除或大小超過目前位置時 True
+        """
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return self._inode is not None
+        return stat.st_ino != self._inode or stat.st_size > self._offset
+
+    def read_new(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        讀取目前位置之後的完整記錄並前進
+
+        尾端未以換行結尾的記錄（寫入中或程序中斷）留待下次讀取。
+
+        Returns:
+            新的變更記錄清單；讀取者已落後於輪替保留範圍、檔案被刪除
+            或記錄損壞時返回 None（呼叫端需完整重新載入）
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                inode = os.fstat(f.fileno()).st_ino
+                if inode == self._inode:
+                    f.seek(self._offset)
+                    base = None
+                else:
+                    base = self._read_header(f.readline())
+                position = f.tell()
+                content = f.read()
+        except FileNotFoundError:
+            missing = self._inode is not None
+            self._inode, self._offset, self._entry_count = None, 0, 0
+            return None if missing else []
+
+        if inode != self._inode:
+            # 首次讀取或檔案已輪替：從頭讀取，略過已讀過的世代
+            self._inode, self._entry_count = inode, 0
+            if base is None or base > self.generation:
+                self._offset = position + len(content)
+                self._entry_count = content.count(b"\n")
+                self.generation = self._last_generation(content, base)
+                return None
+
+        entries: List[Dict[str, Any]] = []
+        lines = content.split(b"\n")
+        lines.pop()  # 最後一段為空字串或尚未寫完的記錄
+        for line in lines:
+            try:
+                entry = json_codec.loads(line)
+                generation = int(entry['gen'])
+            except (ValueError, KeyError, TypeError, UnicodeDecodeError) as e:
+                logger.warning(f"⚠️ 變更記錄損壞 (位移 {position}): {e}")
+                self._offset = position + len(content)
+                return None
+            position += len(line) + 1
+            self._entry_count += 1
+            if generation > self.generation:
+                entries.append(entry)
+                self.generation = generation
+
+        self._offset = position
+        return entries
+
+    def _read_header(self, line: bytes) -> Optional[int]:
+        """解析標頭並返回基準世代（無效時 None）"""
+        try:
+            header = json_codec.loads(line)
+            if header.get('feed') != self.FEED_FORMAT:
+                return None
+            return int(header.get('base', 0))
+        except (ValueError, TypeError, AttributeError, UnicodeDecodeError):
+            return None
+
+    def _last_generation(self, content: bytes, base: Optional[int]) -> int:
+        """檔案中最後一筆完整記錄的世代（無記錄時為基準世代）"""
+        generation = base or 0
+        for line in content.split(b"\n")[:-1]:
+            try:
+                generation = max(generation, int(json_codec.loads(line)['gen']))
+            except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+                continue
+        return max(generation, self.generation)
+
+    def append(self, videos: Iterable[str] = (), actresses: Iterable[str] = (), reset: bool = False) -> Dict[str, Any]:
+        """
+        附加一筆變更記錄（呼叫端需持有獨佔檔案鎖定）
+
+        附加前先讀到檔案結尾；呼叫端若需要通知其他程序的變更，
+        應在此之前呼叫 read_new()。
+
+        Args:
+            videos: 變更的影片 ID
+            actresses: 變更的女優 ID
+            reset: 資料是否被整體替換
+
+        Returns:
+            寫入的變更記錄
+        """
+        if self.read_new() is None or self._inode is None:
+            self._rewrite([])
+        elif self._entry_count >= self.max_entries:
+            self._rotate()
+
+        entry: Dict[str, Any] = {
+            'gen': self.generation + 1,
+            'ts': datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT),
+            'video_ids': sorted(set(videos)),
+            'actress_ids': sorted(set(actresses)),
+        }
+        if reset:
+            entry['reset'] = True
+        payload = self._encode(entry)
+
+        with open(self.path, 'r+b') as f:
+            # 截斷尾端殘缺的記錄
+            f.seek(self._offset)
+            f.truncate()
+            f.write(payload)
+            f.flush()
+
+        self._offset += len(payload)
+        self._entry_count += 1
+        self.generation = entry['gen']
+        return entry
+
+    def _rotate(self) -> None:
+        """只保留最近一半的記錄"""
+        with open(self.path, 'rb') as f:
+            f.readline()
+            lines = f.read(self._offset - f.tell()).split(b"\n")[:-1]
+        self._rewrite(lines[-(self.max_entries // 2):])
+        logger.debug(f"✅ 變更記錄已輪替: 保留 {self._entry_count} 筆")
+
+    def _rewrite(self, lines: List[bytes]) -> None:
+        """以原子替換方式寫入新檔案（標頭與保留的記錄）"""
+        base = self.generation
+        if lines:
+            base = int(json_codec.loads(lines[0])['gen']) - 1
+        header = self._encode({'feed': self.FEED_FORMAT, 'version': self.FEED_VERSION, 'base': base})
+        body = b"".join(line + b"\n" for line in lines)
+
+        temp_file = self.path.parent / f"{self.path.name}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(header + body)
+            f.flush()
+            inode = os.fstat(f.fileno()).st_ino
+        temp_file.replace(self.path)
+
+        self._inode = inode
+        self._offset = len(header) + len(body)
+        self._entry_count = len(lines)
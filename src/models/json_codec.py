@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 序列化後端 (json_codec)
+
+此模組提供可替換的 JSON 編碼/解碼後端，依序優先使用：
+- orjson: 最快，直接輸出 UTF-8 位元組
+- msgspec: 次快
+- json: 標準函式庫（一定可用）
+
+所有後端輸出相同的 JSON 語意（UTF-8、不跳脫非 ASCII 字元），
+indent=True 時使用 2 格縮排，與原本 json.dump(indent=2) 的格式相同。
+快速後端無法處理的物件（例如超出 64 位元的整數）會自動改用標準函式庫。
+非 dict 的 Mapping（例如精簡記錄）一律編碼為 JSON 物件。
+解碼大型內容時暫停循環垃圾回收：解碼結果不含循環參照，
+而解碼途中大量配置的容器會反覆觸發無效的回收掃描。
+"""
+
+import gc
+import os
+import json
+import logging
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Union
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 指定後端的環境變數（例如 JSON_CODEC_BACKEND=json）
+BACKEND_ENV_VAR = "JSON_CODEC_BACKEND"
+
+# 超過此大小（位元組）的內容解碼時暫停垃圾回收
+GC_PAUSE_THRESHOLD = 1024 * 1024
+
+
+class _Backend:
+    """序列化後端"""
+
+    def __init__(self, name: str, dumps: Callable[[Any, bool], bytes], loads: Callable[[Any], Any]):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+
+def _encode_default(obj: Any) -> Any:
+    """各後端無法直接編碼的物件：Mapping 轉為 dict"""
+    if isinstance(obj, Mapping):
+        return dict(obj.items())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _std_dumps(obj: Any, indent: bool) -> bytes:
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=_encode_default).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_encode_default).encode('utf-8')
+
+
+def _std_loads(data: Union[bytes, str]) -> Any:
+    return json.loads(data)
+
+
+def _build_backends() -> Dict[str, _Backend]:
+    """建立所有可用的後端"""
+    backends = {}
+
+    try:
+        import orjson
+
+        def orjson_dumps(obj: Any, indent: bool) -> bytes:
+            option = orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_encode_default, option=option)
+
+        backends['orjson'] = _Backend('orjson', orjson_dumps, orjson.loads)
+    except ImportError:
+        logger.debug("orjson 未安裝，略過")
+
+    try:
+        import msgspec
+
+        encoder = msgspec.json.Encoder(enc_hook=_encode_default)
+        decoder = msgspec.json.Decoder()
+
+        def msgspec_dumps(obj: Any, indent: bool) -> bytes:
+            encoded = encoder.encode(obj)
+            return msgspec.json.format(encoded, indent=2) if indent else encoded
+
+        def msgspec_loads(data: Union[bytes, str]) -> Any:
+            try:
+                return decoder.decode(data)
+            except msgspec.DecodeError as e:
+                document = data.decode('utf-8', 'replace') if isinstance(data, bytes) else data
+                raise json.JSONDecodeError(str(e), document, 0)
+
+        backends['msgspec'] = _Backend('msgspec', msgspec_dumps, msgspec_loads)
+    except ImportError:
+        logger.debug("msgspec 未安裝，略過")
+
+    backends['json'] = _Backend('json', _std_dumps, _std_loads)
+    return backends
+
+
+def _select_default_backend() -> _Backend:
+    """依環境變數或優先順序選擇預設後端"""
+    requested = os.environ.get(BACKEND_ENV_VAR)
+    if requested:
+        if requested in _BACKENDS:
+            return _BACKENDS[requested]
+        logger.warning(f"⚠️ 指定的 JSON 後端不可用: {requested}")
+    return next(_BACKENDS[name] for name in _PREFERENCE if name in _BACKENDS)
+
+
+_PREFERENCE = ('orjson', 'msgspec', 'json')
+_BACKENDS = _build_backends()
+_active = _select_default_backend()
+
+
+# ============================================================================
+# 後端選擇
+# ============================================================================
+
+
+def available_backends() -> List[str]:
+    """取得可用的後端名稱（依優先順序）"""
+    return [name for name in _PREFERENCE if name in _BACKENDS]
+
+
+def get_backend() -> str:
+    """取得目前使用的後端名稱"""
+    return _active.name
+
+
+def set_backend(name: str) -> None:
+    """
+    切換後端
+
+    Args:
+        name: 後端名稱 ('orjson', 'msgspec', 'json')
+
+    Raises:
+        ValueError: 若後端不可用
+    """
+    global _active
+    if name not in _BACKENDS:
+        raise ValueError(f"JSON 後端不可用: {name}")
+    _active = _BACKENDS[name]
+    logger.debug(f"✅ JSON 後端已切換: {name}")
+
+
+def is_native() -> bool:
+    """目前後端是否為原生加速實作（非標準函式庫）"""
+    return _active.name != 'json'
+
+
+# ============================================================================
+# 編碼與解碼
+# ============================================================================
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    將物件編碼為 UTF-8 JSON 位元組
+
+    Args:
+        obj: 要編碼的物件
+        indent: 是否使用 2 格縮排
+
+    Returns:
+        JSON 位元組
+    """
+    if _active.name != 'json':
+        try:
+            return _active.dumps(obj, indent)
+        except (TypeError, ValueError, OverflowError):
+            # 快速後端不支援的型別，改用標準函式庫
+            pass
+    return _std_dumps(obj, indent)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    解碼 JSON
+
+    Args:
+        data: JSON 位元組或字串
+
+    Returns:
+        解碼後的物件
+
+    Raises:
+        json.JSONDecodeError: 若格式錯誤（所有後端皆相同）
+    """
+    if len(data) < GC_PAUSE_THRESHOLD or not gc.isenabled():
+        return _active.loads(data)
+
+    gc.disable()
+    try:
+        return _active.loads(data)
+    finally:
+        gc.enable()
+
+
+def load_file(path: Union[str, Path]) -> Any:
+    """
+    讀取 JSON 檔案
+
+    Args:
+        path: 檔案路徑
+
+    Returns:
+        解碼後的物件
+    """
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dump_file(obj: Any, path: Union[str, Path], indent: bool = True) -> None:
+    """
+    寫入 JSON 檔案
+
+    Args:
+        obj: 要編碼的物件
+        path: 檔案路徑
+        indent: 是否使用 2 格縮排 (預設: True)
+    """
+    encoded = dumps(obj, indent)
+    with open(path, 'wb') as f:
+        f.write(encoded)
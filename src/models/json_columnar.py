@@ -0,0 +1,478 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫欄式統計 (ColumnarStatistics)
+
+完整統計計算（女優、片商、女優×片商交叉統計）改以欄式資料進行：
+影片與關聯各掃描一次，轉為整數欄位：
+- 影片：片商鍵 (studio, studio_code)、片商名稱、片商代碼的內部編號
+- 關聯：女優編號、影片位置、角色類型編號、時間戳序數
+
+字串一律以內部編號 (interning) 表示；時間戳依字串排序後的名次
+作為序數，因此以整數比較的最小/最大值與原本的字串比較一致。
+
+安裝 NumPy 時，分組計數、去重集合與最小/最大日期以向量化運算完成；
+未安裝時以相同欄位的純 Python 迴圈計算，結果完全相同。
+"""
+
+import gc
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Hashable, Iterator
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 為選用套件
+    np = None
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 是否可使用向量化計算
+NUMPY_AVAILABLE = np is not None
+
+# 關聯數超過此值時，產生結果期間暫停循環垃圾回收
+# （結果不含循環參照，大量配置的字典與清單會反覆觸發無效的回收掃描）
+GC_PAUSE_THRESHOLD = 100_000
+
+
+@contextmanager
+def _gc_paused(size: int) -> Iterator[None]:
+    if size < GC_PAUSE_THRESHOLD or not gc.isenabled():
+        yield
+        return
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
+
+
+def _distinct(values):
+    """排序後的不重複值（排序後比較相鄰元素，較 np.unique 的雜湊實作快）"""
+    values = np.sort(values)
+    if len(values):
+        values = values[np.concatenate(([True], values[1:] != values[:-1]))]
+    return values
+
+
+class _Interner:
+    """將值對應到依首次出現順序編號的整數"""
+
+    def __init__(self):
+        self.codes: Dict[Hashable, int] = {}
+        self.values: List[Any] = []
+
+    def code(self, value: Hashable) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ColumnarStatistics:
+    """欄式統計類別
+
+    結果格式與 JSONDBManager._compute_statistics() 相同。
+    建立後不追蹤資料變更；資料改變時需重新建立。
+    """
+
+    def __init__(self, data: Dict[str, Any], use_numpy: Optional[bool] = None):
+        """
+        初始化 ColumnarStatistics（掃描資料建立欄位）
+
+        Args:
+            data: 資料庫字典
+            use_numpy: 是否使用 NumPy，None 表示可用時使用
+        """
+        self.use_numpy = NUMPY_AVAILABLE if use_numpy is None else (use_numpy and NUMPY_AVAILABLE)
+        self._actresses = data.get('actresses', {})
+        self._total_videos = len(data.get('videos', {}))
+
+        # 女優依資料順序先行編號，統計輸出即依此順序
+        self._actress_ids = _Interner()
+        for actress_id in self._actresses:
+            self._actress_ids.code(actress_id)
+
+        links = data.get('links', [])
+        with _gc_paused(len(links)):
+            self._build_video_columns(data.get('videos', {}))
+            self._build_link_columns(links)
+
+            if self.use_numpy:
+                self._to_arrays()
+
+        logger.debug(
+            f"✅ 欄式統計欄位已建立: {self._total_videos} 部影片, "
+            f"{len(self.link_actress)} 筆關聯 ({'NumPy' if self.use_numpy else 'Python'})"
+        )
+
+    # ========================================================================
+    # 建立欄位
+    # ========================================================================
+
+    def _build_video_columns(self, videos: Dict[str, Any]) -> None:
+        """建立影片欄位（無片商者編號為 -1）"""
+        self._studio_keys = _Interner()
+        self._studio_names = _Interner()
+        self._studio_codes = _Interner()
+        self._video_positions: Dict[str, int] = {}
+
+        self.video_studio_key: List[int] = []
+        self.video_studio: List[int] = []
+        self.video_studio_code: List[int] = []
+        self.video_known_studio: List[bool] = []
+        self.video_codes: List[str] = []
+
+        for video_id, video in videos.items():
+            studio = video.get('studio')
+            studio_code = video.get('studio_code', '')
+            self._video_positions[video_id] = len(self.video_codes)
+            self.video_studio_key.append(self._studio_keys.code((studio, studio_code)) if studio else -1)
+            self.video_studio.append(self._studio_names.code(studio) if studio else -1)
+            self.video_studio_code.append(self._studio_codes.code(studio_code) if studio_code else -1)
+            self.video_known_studio.append(bool(studio) and studio != 'UNKNOWN')
+            self.video_codes.append(video.get('id', ''))
+
+    def _build_link_columns(self, links: List[Dict[str, Any]]) -> None:
+        """建立關聯欄位（略過缺少女優或影片 ID 的關聯；影片不存在時位置為 -1）"""
+        self._roles = _Interner()
+        self._timestamps = _Interner()
+
+        self.link_actress: List[int] = []
+        self.link_video: List[int] = []
+        self.link_role: List[int] = []
+        self.link_timestamp: List[int] = []
+
+        video_positions = self._video_positions
+        for link in links:
+            actress_id = link.get('actress_id')
+            video_id = link.get('video_id')
+            if not actress_id or not video_id:
+                continue
+            self.link_actress.append(self._actress_ids.code(actress_id))
+            self.link_video.append(video_positions.get(video_id, -1))
+            self.link_role.append(self._roles.code(link.get('role_type', 'primary')))
+            self.link_timestamp.append(self._timestamps.code(link.get('timestamp', '')))
+
+        # 時間戳序數：有值的時間戳依字串排序的名次，空值為 -1
+        ranked = sorted(value for value in self._timestamps.values if value)
+        self._ranked_timestamps = ranked
+        rank_of = {value: rank for rank, value in enumerate(ranked)}
+        self.timestamp_ordinal: List[int] = [
+            rank_of[value] if value else -1 for value in self._timestamps.values
+        ]
+
+    def _to_arrays(self) -> None:
+        """將欄位轉為 NumPy 陣列"""
+        for name in ('video_studio_key', 'video_studio', 'video_studio_code',
+                     'link_actress', 'link_video', 'link_role', 'link_timestamp',
+                     'timestamp_ordinal'):
+            setattr(self, name, np.asarray(getattr(self, name), dtype=np.int64))
+        self.video_known_studio = np.asarray(self.video_known_studio, dtype=bool)
+        self.video_codes = np.asarray(self.video_codes, dtype=object)
+
+    # ========================================================================
+    # 女優統計
+    # ========================================================================
+
+    def actress_statistics(self) -> List[Dict[str, Any]]:
+        """
+        女優統計（出演部數、片商與片商代碼）
+
+        Returns:
+            依出演部數降序排序的女優統計清單
+        """
+        actress_count = len(self._actresses)
+        with _gc_paused(len(self.link_actress)):
+            if self.use_numpy:
+                counts, studios, codes = self._actress_groups_numpy()
+                order = np.argsort(-np.asarray(counts[:actress_count]), kind='stable').tolist()
+            else:
+                counts, studios, codes = self._actress_groups_python()
+                order = sorted(range(actress_count), key=lambda position: -counts[position])
+
+            names = [actress.get('name', '') for actress in self._actresses.values()]
+            return [
+                {
+                    'actress_name': names[position],
+                    'video_count': counts[position],
+                    'studios': studios[position],
+                    'studio_codes': codes[position],
+                }
+                for position in order
+            ]
+
+    def _actress_groups_python(self):
+        actress_count = len(self._actresses)
+        counts = [0] * len(self._actress_ids)
+        studios = [set() for _ in range(actress_count)]
+        codes = [set() for _ in range(actress_count)]
+        for actress, video in zip(self.link_actress, self.link_video):
+            counts[actress] += 1
+            if video < 0 or actress >= actress_count:
+                continue
+            studio = self.video_studio[video]
+            if studio >= 0:
+                studios[actress].add(self._studio_names.values[studio])
+            code = self.video_studio_code[video]
+            if code >= 0:
+                codes[actress].add(self._studio_codes.values[code])
+        return counts, [sorted(values) for values in studios], [sorted(values) for values in codes]
+
+    def _actress_groups_numpy(self):
+        actress_count = len(self._actresses)
+        counts = np.bincount(self.link_actress, minlength=len(self._actress_ids)).tolist()
+        present = self.link_video >= 0
+        actresses = self.link_actress[present]
+        videos = self.link_video[present]
+        return (
+            counts,
+            self._sorted_distinct(actresses, self.video_studio[videos], self._studio_names, actress_count),
+            self._sorted_distinct(actresses, self.video_studio_code[videos], self._studio_codes, actress_count),
+        )
+
+    @staticmethod
+    def _sorted_distinct(groups, values, interner: _Interner, group_count: int) -> List[List[Any]]:
+        """
+        各群組的不重複值（依值排序，忽略 -1 與超出 group_count 的群組）
+
+        值先轉為排序名次再與群組合併成單一整數鍵，排序去重後
+        同一群組的值即依名次連續排列，直接依群組邊界切分。
+        """
+        ranked = sorted(interner.values)
+        rank_of = {value: rank for rank, value in enumerate(ranked)}
+        ranks = np.asarray([rank_of[value] for value in interner.values], dtype=np.int64)
+        width = max(len(ranked), 1)
+
+        valid = (values >= 0) & (groups < group_count)
+        pairs = _distinct(groups[valid] * width + ranks[values[valid]])
+        sorted_values = np.asarray(ranked, dtype=object)[pairs % width].tolist() if len(pairs) else []
+        bounds = np.searchsorted(pairs // width, np.arange(group_count + 1)).tolist()
+        return [sorted_values[bounds[group]:bounds[group + 1]] for group in range(group_count)]
+
+    # ========================================================================
+    # 片商統計
+    # ========================================================================
+
+    def studio_statistics(self) -> List[Dict[str, Any]]:
+        """
+        片商統計（依 (studio, studio_code) 分組的影片數與不重複女優數）
+
+        Returns:
+            依影片數降序排序的片商統計清單
+        """
+        key_count = len(self._studio_keys)
+        if self.use_numpy:
+            keys = self.video_studio_key
+            video_counts = np.bincount(keys[keys >= 0], minlength=key_count)
+            present = self.link_video >= 0
+            link_keys = keys[self.link_video[present]]
+            actresses = self.link_actress[present]
+            valid = link_keys >= 0
+            actress_count = max(len(self._actress_ids), 1)
+            pairs = _distinct(link_keys[valid] * actress_count + actresses[valid])
+            actress_counts = np.bincount(pairs // actress_count, minlength=key_count)
+        else:
+            video_counts = Counter(key for key in self.video_studio_key if key >= 0)
+            pairs = {
+                (self.video_studio_key[video], actress)
+                for actress, video in zip(self.link_actress, self.link_video)
+                if video >= 0 and self.video_studio_key[video] >= 0
+            }
+            actress_counts = Counter(key for key, _ in pairs)
+
+        statistics = [
+            {
+                'studio': studio,
+                'studio_code': studio_code,
+                'video_count': int(video_counts[key]),
+                'actress_count': int(actress_counts[key]),
+            }
+            for key, (studio, studio_code) in enumerate(self._studio_keys.values)
+        ]
+        statistics.sort(key=lambda x: x['video_count'], reverse=True)
+        return statistics
+
+    def total_studios(self) -> int:
+        """不重複的片商數（不含 UNKNOWN）"""
+        if self.use_numpy:
+            return int(_distinct(self.video_studio[self.video_known_studio]).size)
+        return len({studio for studio, known in zip(self.video_studio, self.video_known_studio) if known})
+
+    # ========================================================================
+    # 女優×片商交叉統計
+    # ========================================================================
+
+    def enhanced_statistics(self, actress_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        女優×片商×角色類型交叉統計
+
+        Args:
+            actress_name: 篩選特定女優名稱（可選）
+
+        Returns:
+            交叉統計清單；指定女優時依影片數降序，否則依女優名稱與影片數排序
+        """
+        names = [actress.get('name', '') for actress in self._actresses.values()]
+        names += [''] * (len(self._actress_ids) - len(names))
+
+        with _gc_paused(len(self.link_actress)):
+            if self.use_numpy:
+                columns = self._cross_groups_numpy(names, actress_name)
+            else:
+                columns = self._cross_groups_python(names, actress_name)
+
+            return [
+                {
+                    'actress_name': name,
+                    'studio': studio,
+                    'studio_code': studio_code,
+                    'association_type': role,
+                    'video_count': len(video_codes),
+                    'video_codes': video_codes,
+                    'first_appearance': first,
+                    'latest_appearance': latest,
+                }
+                for name, studio, studio_code, role, video_codes, first, latest in zip(*columns)
+            ]
+
+    def _cross_groups_python(self, names: List[str], actress_name: Optional[str]):
+        """以迴圈分組；回傳已排序的輸出欄位"""
+        groups: Dict[tuple, List[Any]] = {}
+        for actress, video, role, timestamp in zip(
+            self.link_actress, self.link_video, self.link_role, self.link_timestamp
+        ):
+            if actress_name and names[actress] != actress_name:
+                continue
+            if video < 0 or not self.video_known_studio[video]:
+                continue
+            key = (actress, self.video_studio_key[video], role)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [[], timestamp, -1, -1]
+            group[0].append(self.video_codes[video])
+            ordinal = self.timestamp_ordinal[timestamp]
+            if ordinal >= 0:
+                group[2] = ordinal if group[2] < 0 else min(group[2], ordinal)
+                group[3] = max(group[3], ordinal)
+
+        rows = []
+        for (actress, key, role), (video_codes, first, earliest, latest) in groups.items():
+            studio, studio_code = self._studio_keys.values[key]
+            if earliest < 0:
+                # 群組內沒有任何時間戳時沿用第一筆關聯的原始值
+                first_appearance = latest_appearance = self._timestamps.values[first]
+            else:
+                first_appearance = self._ranked_timestamps[earliest]
+                latest_appearance = self._ranked_timestamps[latest]
+            rows.append((names[actress], studio, studio_code, self._roles.values[role],
+                         video_codes, first_appearance, latest_appearance))
+
+        if actress_name:
+            rows.sort(key=lambda row: -len(row[4]))
+        else:
+            rows.sort(key=lambda row: (row[0], -len(row[4])))
+        return list(zip(*rows)) or [()] * 7
+
+    def _cross_groups_numpy(self, names: List[str], actress_name: Optional[str]):
+        """以 NumPy 分組；回傳已排序的輸出欄位"""
+        present = self.link_video >= 0
+        present[present] = self.video_known_studio[self.link_video[present]]
+        if actress_name:
+            matching = np.array([name == actress_name for name in names], dtype=bool)
+            present &= matching[self.link_actress]
+
+        actresses = self.link_actress[present]
+        videos = self.link_video[present]
+        roles = self.link_role[present]
+        timestamps = self.link_timestamp[present]
+        if not len(actresses):
+            return [()] * 7
+
+        keys = self.video_studio_key[videos]
+        composite = (actresses * len(self._studio_keys) + keys) * len(self._roles) + roles
+        _, first_index, inverse = np.unique(composite, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        group_count = len(first_index)
+        sizes = np.bincount(inverse, minlength=group_count)
+
+        # 最小/最大時間戳序數（無時間戳的關聯不參與）
+        ordinals = self.timestamp_ordinal[timestamps]
+        sentinel = len(self._ranked_timestamps)
+        earliest = np.full(group_count, sentinel, dtype=np.int64)
+        np.minimum.at(earliest, inverse, np.where(ordinals < 0, sentinel, ordinals))
+        latest = np.full(group_count, -1, dtype=np.int64)
+        np.maximum.at(latest, inverse, ordinals)
+
+        # 以各群組的第一筆關聯取得鍵，先依首次出現順序排列群組
+        groups = np.argsort(first_index, kind='stable')
+        rows = first_index[groups]
+        group_actresses = actresses[rows]
+        group_keys = keys[rows]
+        counts = sizes[groups]
+        earliest = earliest[groups]
+        latest = latest[groups]
+
+        # 輸出排序：依女優名稱名次與影片數（同分保持首次出現順序）
+        if actress_name:
+            order = np.argsort(-counts, kind='stable')
+        else:
+            ranked_names = sorted(set(names))
+            name_rank = {name: rank for rank, name in enumerate(ranked_names)}
+            name_ranks = np.asarray([name_rank[name] for name in names], dtype=np.int64)
+            order = np.lexsort((np.arange(group_count), -counts, name_ranks[group_actresses]))
+
+        # 依群組切分影片代碼（穩定排序保持關聯順序）
+        link_order = np.argsort(inverse, kind='stable')
+        codes = self.video_codes[videos[link_order]].tolist()
+        ends = np.cumsum(sizes).tolist()
+        starts = [0] + ends[:-1]
+        video_codes = [codes[starts[group]:ends[group]] for group in groups[order].tolist()]
+
+        # 序數轉回時間戳；群組內沒有任何時間戳時沿用第一筆關聯的原始值
+        raw_first = np.asarray(self._timestamps.values, dtype=object)[timestamps[rows]]
+        ranked = np.asarray(self._ranked_timestamps or [''], dtype=object)
+        has_timestamp = earliest < sentinel
+        first_appearance = np.where(has_timestamp, ranked[np.where(has_timestamp, earliest, 0)], raw_first)
+        latest_appearance = np.where(has_timestamp, ranked[np.where(has_timestamp, latest, 0)], raw_first)
+
+        studios = np.asarray([key[0] for key in self._studio_keys.values], dtype=object)
+        studio_codes = np.asarray([key[1] for key in self._studio_keys.values], dtype=object)
+        return (
+            np.asarray(names, dtype=object)[group_actresses[order]].tolist(),
+            studios[group_keys[order]].tolist(),
+            studio_codes[group_keys[order]].tolist(),
+            np.asarray(self._roles.values, dtype=object)[roles[rows][order]].tolist(),
+            video_codes,
+            first_appearance[order].tolist(),
+            latest_appearance[order].tolist(),
+        )
+
+    # ========================================================================
+    # 結果輸出
+    # ========================================================================
+
+    def materialize(self, computed_at: str) -> Dict[str, Any]:
+        """
+        輸出統計字典
+
+        Args:
+            computed_at: 計算時間 (ISO 8601)
+
+        Returns:
+            與 _compute_statistics() 相同格式的統計字典
+        """
+        return {
+            'actress_statistics': self.actress_statistics(),
+            'studio_statistics': self.studio_statistics(),
+            'enhanced_actress_studio_statistics': self.enhanced_statistics(),
+            'total_videos': self._total_videos,
+            'total_actresses': len(self._actresses),
+            'total_studios': self.total_studios(),
+            'computed_at': computed_at,
+        }
@@ -3,19 +3,22 @@
 JSON 資料庫管理器 (JSONDBManager)
 
 此模組提供 JSON 檔案型資料庫的核心管理功能，包括：
-- 檔案鎖定機制（讀寫並行控制）
+- 鎖定機制（程序內讀寫鎖 + 跨程序共享/獨佔檔案鎖）
 - 資料的載入和保存
 - 基本 CRUD 操作
 - 資料驗證和完整性檢查
 """
 
+import re
 import json
 import logging
 import hashlib
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterable, Iterator, Set, Callable, Tuple
 from datetime import datetime, timezone
-from filelock import FileLock
 
 from src.models.json_types import (
     JSONDatabaseDict,
@@ -34,39 +37,110 @@ from src.models.json_types import (
     READ_LOCK_TIMEOUT,
     WRITE_LOCK_TIMEOUT,
     ISO_DATETIME_FORMAT,
+    JOURNAL_FILE_NAME,
+    STORAGE_MODES,
+    JOURNAL_COMPACT_THRESHOLD,
+    JOURNAL_COMPACT_MAX_BYTES,
+    SHARD_DIR_NAME,
+    DEFAULT_SHARD_COUNT,
+    CHANGE_FEED_FILE_NAME,
     get_empty_json_database,
     get_empty_video,
     get_empty_actress,
 )
+from src.models import json_codec
+from src.models.json_journal import WriteAheadLog
+from src.models.json_changes import ChangeFeed, ChangeEvent
+from src.models.json_statistics import IncrementalStatistics
+from src.models.json_columnar import ColumnarStatistics
+from src.models.json_indexes import SecondaryIndexes
+from src.models.json_locks import RWLock, SharedFileLock
+from src.models.json_shards import ShardedStore, migrate_single_file_database
+from src.models.json_snapshot import DatabaseSnapshot
+from src.models.json_backup import BackupStore, DiffSource, RecordChange
+from src.models.json_lazy import LazySnapshotReader, UNAVAILABLE
+from src.models.json_records import CompactVideo, CompactActress, compact_containers
+from src.models.video_query import VideoQuery
+from src.models.storage_engine import StorageEngine, StudioBreakdownRow, breakdown_actress_videos
 
 # 設定日誌
 logger = logging.getLogger(__name__)
 
+# data.json 結尾的雜湊欄位（雜湊涵蓋此欄位之前的所有位元組）
+_DATA_HASH_TRAILER = re.compile(rb',\s*"data_hash"\s*:\s*"([0-9a-f]{64})"\s*\}\s*$')
 
-class JSONDBManager:
+# 備份名稱 backup_<日期>_<時間>[_<同一秒內的序號>]
+_BACKUP_NAME = re.compile(r'^(backup_[\d-]+_[\d-]+)(?:_(\d+))?$')
+
+# 串流寫入時的緩衝大小（字元）
+_WRITE_BUFFER_SIZE = 64 * 1024
+
+# 變更操作會修改的容器（決定發佈快照時需複製哪些容器）
+_OPERATION_CONTAINERS = {
+    'put_video': ('videos',),
+    'put_actress': ('actresses',),
+    'delete_video': ('videos', 'links'),
+    'delete_actress': ('actresses', 'links'),
+}
+
+# 其他程序變更的記錄超過目前記錄數的此比例時，完整重新載入比逐筆讀取快
+_POINT_REFRESH_MAX_RATIO = 0.25
+
+# 逐筆同步其他程序的變更時一併更新的頂層欄位
+_REFRESHED_SECTIONS = ('statistics', 'metadata', 'updated_at', 'data_hash')
+
+
+class JSONDBManager(StorageEngine):
     """JSON 資料庫管理器類別
     
     提供 JSON 檔案型資料庫的管理功能，支援並行讀寫操作。
+    實作 StorageEngine 介面。
+    
+    讀取記憶體資料只取得程序內共享鎖定，不存取磁碟；寫入取得程序內
+    獨佔鎖定與獨佔檔案鎖定；從磁碟重新載入時取得共享檔案鎖定，
+    多個程序可同時載入。
     
     Attributes:
         data_file: JSON 資料庫檔案路徑
         backup_dir: 備份目錄路徑
-        read_lock: 讀操作鎖定物件
-        write_lock: 寫操作鎖定物件
+        backups: 增量備份儲存 (BackupStore)
+        rw_lock: 程序內讀寫鎖定
+        file_lock: 跨程序檔案鎖定 (db.lock)
         data: 記憶體中的資料快取
+        storage_mode: 儲存模式 ("snapshot" 或 "journal")
+        journal: 日誌模式下的預寫日誌物件 (其他模式為 None)
+        shards: 分片模式下的分片儲存物件 (其他模式為 None)
+        changes: 跨程序變更通知記錄 (changes.log)
     """
     
-    # 常數定義
-    BACKUP_PATTERN = "backup_*.json"
-    DEFAULT_BACKUP_DAYS = 30
-    DEFAULT_BACKUP_MAX_COUNT = 50
-    
-    def __init__(self, data_dir: str = "data/json_db"):
+    def __init__(
+        self,
+        data_dir: str = "data/json_db",
+        storage_mode: str = STORAGE_MODES["SNAPSHOT"],
+        journal_compact_threshold: int = JOURNAL_COMPACT_THRESHOLD,
+        trust_verified_snapshots: bool = True,
+        compact_json: bool = False,
+        shard_count: int = DEFAULT_SHARD_COUNT,
+        lazy_load: bool = False,
+        compact_records: bool = False
+    ):
         """
         初始化 JSONDBManager
         
         Args:
             data_dir: JSON 資料庫目錄路徑 (預設: "data/json_db")
+            storage_mode: 儲存模式 (預設: "snapshot")
+                         - "snapshot": 每次變更重寫整個 data.json
+                         - "journal": 變更附加至 data.wal，定期壓縮為快照
+                         - "sharded": 分片配置 (shards/)，只重寫變更的分片
+            journal_compact_threshold: 日誌模式下觸發壓縮的提交記錄數
+            trust_verified_snapshots: 載入時若 data_hash 與內容相符則略過完整性驗證
+            compact_json: 以緊湊格式 (無縮排) 寫入 data.json
+            shard_count: 分片模式下新建資料庫的影片分桶數
+            lazy_load: 延遲載入（僅快照模式）：初始化時只對映檔案，
+                       完整解析與驗證於背景執行，期間點查詢透過位移索引讀取
+            compact_records: 以精簡記錄 (CompactVideo / CompactActress) 存放
+                             影片與女優，記錄為唯讀 Mapping
             
         Raises:
             JSONDatabaseError: 若初始化失敗
@@ -80,20 +154,85 @@ class JSONDBManager:
             # 建立必需的目錄
             self.data_dir.mkdir(parents=True, exist_ok=True)
             self.backup_dir.mkdir(parents=True, exist_ok=True)
+            self.backups = BackupStore(self.backup_dir)
             
             # 初始化鎖定機制
-            lock_file = self.data_dir / "db.lock"
-            self.read_lock = FileLock(str(lock_file), timeout=READ_LOCK_TIMEOUT)
-            self.write_lock = FileLock(str(lock_file), timeout=WRITE_LOCK_TIMEOUT)
-            
-            # 初始化記憶體快取
-            self.data: JSONDatabaseDict = get_empty_json_database()
+            self.rw_lock = RWLock()
+            self.file_lock = SharedFileLock(self.data_dir / "db.lock", timeout=WRITE_LOCK_TIMEOUT)
+            self._held_locks = threading.local()
+            # 讀鎖定下延遲重建衍生狀態時，避免多個讀取者同時重建
+            self._derived_lock = threading.RLock()
+            
+            # 初始化儲存模式
+            if storage_mode not in STORAGE_MODES.values():
+                raise ValidationError(f"不支援的儲存模式: {storage_mode}")
+            self.storage_mode = storage_mode
+            self.journal_compact_threshold = journal_compact_threshold
+            self.trust_verified_snapshots = trust_verified_snapshots
+            self.compact_json = compact_json
+            self.compact_records = compact_records
+            self.journal: Optional[WriteAheadLog] = None
+            self._journal_generation = 0
+            self._journal_offset = 0
+            self._statistics_dirty = False
+            self._transaction: Optional[List[Dict[str, Any]]] = None
+            
+            # 背景統計重新計算（要求/完成序號，序號落後表示統計過期）
+            self._statistics_refresh = threading.Condition()
+            self._statistics_requested = 0
+            self._statistics_completed = 0
+            self._statistics_refresh_thread: Optional[threading.Thread] = None
+            self._statistics_refresh_error: Optional[Exception] = None
+            
+            # 最後一次載入/保存時的檔案簽章 (inode, 大小, 修改時間)
+            self._file_signature: Optional[tuple] = None
+            
+            # 增量統計與次要索引（於首次使用時建立）
+            self._statistics_engine: Optional[IncrementalStatistics] = None
+            self._indexes: Optional[SecondaryIndexes] = None
+            self._derived_fingerprint: Optional[tuple] = None
+            # 完整統計使用的欄式資料 (指紋, 欄位)，資料變更後首次使用時重建
+            self._columns: Optional[Tuple[tuple, ColumnarStatistics]] = None
+            
+            # 變更通知：本程序尚未寫入記錄的變更 ID、待發送的通知與訂閱者
+            self.changes = ChangeFeed(self.data_dir / CHANGE_FEED_FILE_NAME)
+            self._changed_videos: Set[str] = set()
+            self._changed_actresses: Set[str] = set()
+            self._change_events: List[ChangeEvent] = []
+            self._change_subscribers: List[Callable[[ChangeEvent], None]] = []
+            self._change_events_lock = threading.Lock()
+            self._change_dispatch_lock = threading.Lock()
+            self._change_watcher: Optional[threading.Thread] = None
+            self._change_watcher_stop = threading.Event()
+            
+            # 已發佈的唯讀快照、自上次發佈後變更的容器與快照是否落後於已提交的資料
+            self._snapshot: Optional[DatabaseSnapshot] = None
+            self._dirty_containers: Set[str] = set()
+            self._snapshot_stale = True
+            self._snapshot_lock = threading.Lock()
+            if self._is_journal_mode():
+                self.journal = WriteAheadLog(self.data_dir / JOURNAL_FILE_NAME)
+            
+            # 分片模式：data_file 指向 manifest，並追蹤需重寫的分片
+            self.shards: Optional[ShardedStore] = None
+            self._dirty_shards: Set[str] = set()
+            if self._is_sharded_mode():
+                self.shards = ShardedStore(self.data_dir / SHARD_DIR_NAME, shard_count, compact_json)
+                self.data_file = self.shards.manifest_path
+            
+            # 初始化記憶體快取（延遲載入時由背景執行緒填入）
+            self._lazy: Optional[LazySnapshotReader] = None
+            self._lazy_thread: Optional[threading.Thread] = None
+            self.data = get_empty_json_database()
             
             # 確保資料檔案存在
             self._ensure_data_file_exists()
             
             # 載入資料到記憶體
-            self._load_all_data()
+            if lazy_load and self._can_lazy_load():
+                self._start_lazy_load()
+            else:
+                self._load_all_data()
             
             logger.info(f"✅ JSONDBManager 初始化成功: {self.data_file}")
             
@@ -105,9 +244,26 @@ class JSONDBManager:
         """
         確保 JSON 資料檔案存在
         
-        如果檔案不存在，建立初始的空資料庫。
+        如果檔案不存在，建立初始的空資料庫。分片模式下若已有
+        單一檔案 data.json，則自動遷移為分片配置。
+        
+        取得寫鎖定後重新檢查：在磁碟讀取鎖定內呼叫時，升級為獨佔
+        鎖定的期間其他程序可能已建立檔案。
         """
-        if not self.data_file.exists():
+        if self.data_file.exists():
+            return
+        
+        legacy_file = self.data_dir / "data.json"
+        if self._is_sharded_mode() and legacy_file.exists():
+            # 遷移以另一個管理器讀取 data.json，自行取得鎖定
+            logger.info(f"將單一檔案資料庫遷移為分片配置: {legacy_file}")
+            migrate_single_file_database(str(self.data_dir), self.shards.shard_count, self.compact_json)
+            return
+        
+        with self._locked(self._acquire_write_lock):
+            if self.data_file.exists():
+                return
+            
             logger.info(f"建立新的 JSON 資料庫檔案: {self.data_file}")
             initial_data = get_empty_json_database()
             self._save_all_data(initial_data)
@@ -122,7 +278,9 @@ class JSONDBManager:
             CorruptedDataError: 若資料損壞或無法解析
         """
         try:
-            with self.read_lock:
+            with self._locked(self._acquire_refresh_lock):
+                # 先讀到變更記錄結尾再載入：之間的變更會在下次同步時重新讀取
+                self.changes.read_new()
                 self._load_data_internal()
         
         except LockError as e:
@@ -134,37 +292,56 @@ class JSONDBManager:
             logger.error(f"❌ 資料載入失敗: {e}")
             raise CorruptedDataError(f"載入失敗: {e}")
     
-    def _load_data_internal(self) -> None:
+    def _read_file_signature(self) -> Optional[tuple]:
+        """
+        取得資料檔案簽章
+        
+        每次原子寫入都會替換檔案，因此 inode 會改變；
+        配合大小與修改時間即可判斷檔案是否被其他程序更新。
+        
+        Returns:
+            (inode, 大小, 修改時間 ns)，若檔案不存在則返回 None
+        """
+        try:
+            stat = self.data_file.stat()
+            return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+    
+    def _load_data_internal(self, force: bool = False) -> None:
         """
         內部載入方法（不獲取鎖）
         
-        用於在已獲取鎖的情況下重新載入資料。
+        用於在已獲取鎖的情況下重新載入資料。若檔案簽章與上次
+        載入/保存時相同，表示檔案未被其他程序修改，直接沿用 self.data。
+        
+        Args:
+            force: 是否忽略簽章強制重新載入（用於還原記憶體狀態）
         
         Raises:
             CorruptedDataError: 若資料損壞或無法解析
         """
         try:
             if not self.data_file.exists():
+                # 建立後依簽章判斷：由此程序建立時沿用記憶體資料，其他程序搶先建立時載入
                 self._ensure_data_file_exists()
-                return
-            
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                file_content = f.read()
-            
-            # 試圖解析 JSON
-            try:
-                loaded_data = json.loads(file_content)
-            except json.JSONDecodeError as e:
-                logger.error(f"❌ JSON 解析失敗: {e}")
-                raise CorruptedDataError(f"JSON 格式錯誤: {e}")
             
-            # 驗證資料結構
-            self._validate_json_format(loaded_data)
+            signature = self._read_file_signature()
+            if not force and signature is not None and signature == self._file_signature:
+                logger.debug("✅ 資料檔案未變更，沿用記憶體資料")
+                return
             
-            # 驗證完整性
-            self._validate_referential_integrity(loaded_data)
+            if self._is_sharded_mode():
+                loaded_data = self._load_shards()
+            else:
+                with open(self.data_file, 'rb') as f:
+                    file_content = f.read()
+                loaded_data = self._parse_snapshot(file_content)
             
             self.data = loaded_data
+            self._file_signature = signature
+            self._dirty_shards = set()
+            self._invalidate_derived_state()
             logger.debug(f"✅ 資料載入成功: {len(loaded_data.get('videos', {}))} 部影片")
             
         except CorruptedDataError:
@@ -173,7 +350,614 @@ class JSONDBManager:
             logger.error(f"❌ 內部資料載入失敗: {e}")
             raise CorruptedDataError(f"內部載入失敗: {e}")
     
-    def _save_all_data(self, data: JSONDatabaseDict) -> None:
+    def _parse_snapshot(self, file_content: bytes) -> JSONDatabaseDict:
+        """
+        解析並驗證 data.json 內容（日誌模式會重放日誌）
+        
+        Args:
+            file_content: data.json 的原始內容
+            
+        Returns:
+            資料庫字典
+            
+        Raises:
+            CorruptedDataError: 若 JSON 格式錯誤
+            ValidationError / DataIntegrityError: 若驗證失敗
+        """
+        # 試圖解析 JSON
+        try:
+            loaded_data = json_codec.loads(file_content)
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ JSON 解析失敗: {e}")
+            raise CorruptedDataError(f"JSON 格式錯誤: {e}")
+        
+        # 驗證資料結構
+        self._validate_json_format(loaded_data)
+        
+        # 日誌模式：重放快照之後的提交記錄
+        replayed = self._replay_journal(loaded_data) if self._is_journal_mode() else 0
+        
+        # 驗證完整性（由本類別寫出且未被修改的快照可略過）
+        if replayed or not self._is_trusted_snapshot(file_content):
+            self._validate_referential_integrity(loaded_data)
+        self._prepare_records(loaded_data)
+        return loaded_data
+    
+    def _prepare_records(self, data: JSONDatabaseDict) -> None:
+        """精簡記錄模式下將載入的影片與女優轉為精簡記錄"""
+        if self.compact_records:
+            compact_containers(data)
+    
+    def _reload_for_write(self) -> List[ChangeEvent]:
+        """
+        寫入前同步磁碟上的最新資料（需已獲取獨佔鎖定）
+        
+        快照模式依變更記錄只重新讀取其他程序變更的記錄，無法逐筆
+        同步時重新載入 data.json；日誌模式僅重放其他程序在上次同步
+        之後附加的日誌記錄，除非日誌已被壓縮。同步到的變更會排入
+        通知，於釋放鎖定後送給訂閱者。
+        
+        Returns:
+            其他程序的變更通知
+        
+        Raises:
+            CorruptedDataError: 若資料損壞或無法解析
+        """
+        if self._transaction is not None:
+            # 交易進行中，記憶體狀態已是最新且包含未提交的變更
+            return []
+        
+        entries = self.changes.read_new()
+        
+        if not self._is_journal_mode():
+            synced = self._file_signature == self._read_file_signature()
+            if not synced and entries and not any(entry.get('reset') for entry in entries):
+                synced = self._apply_remote_changes(entries)
+            if not synced:
+                self._load_data_internal()
+                if not entries:
+                    # 沒有變更記錄（舊版程式或其他工具寫入），無法得知個別變更
+                    entries = None
+        elif self.journal.read_generation() != self._journal_generation:
+            # 其他程序已壓縮日誌，重新載入快照
+            self._load_data_internal()
+        else:
+            journal_entries, self._journal_offset = self.journal.read_entries(self._journal_offset)
+            for entry in journal_entries:
+                for operation in entry.get('ops', []):
+                    self._apply_to_memory(operation)
+            if journal_entries:
+                self._statistics_dirty = True
+                logger.debug(f"✅ 已同步 {len(journal_entries)} 筆日誌記錄")
+        
+        if entries is None:
+            events = [ChangeEvent(self.changes.generation, frozenset(), frozenset(), 'remote', reset=True)]
+        else:
+            events = [ChangeEvent.from_entry(entry, 'remote') for entry in entries]
+        self._queue_change_events(events)
+        return events
+    
+    # ========================================================================
+    # 延遲載入
+    # ========================================================================
+    
+    @property
+    def data(self) -> JSONDatabaseDict:
+        """記憶體中的資料（延遲載入時等待背景載入完成）"""
+        self._await_lazy_load()
+        return self._data
+    
+    @data.setter
+    def data(self, value: JSONDatabaseDict) -> None:
+        self._data = value
+    
+    def _can_lazy_load(self) -> bool:
+        """延遲載入只支援快照模式的非空 data.json"""
+        if self.storage_mode != STORAGE_MODES["SNAPSHOT"]:
+            logger.warning(f"⚠️ {self.storage_mode} 模式不支援延遲載入，改為立即載入")
+            return False
+        return self.data_file.exists() and self.data_file.stat().st_size > 0
+    
+    def _start_lazy_load(self) -> None:
+        """對映 data.json 並啟動背景載入（不解析內容）"""
+        self.changes.read_new()
+        self._lazy = LazySnapshotReader(self.data_file)
+        self._lazy_thread = threading.Thread(
+            target=self._lazy_load_worker, args=(self._lazy,),
+            name="JSONDBManager-lazy-load", daemon=True
+        )
+        self._lazy_thread.start()
+    
+    def _lazy_load_worker(self, lazy: LazySnapshotReader) -> None:
+        """
+        背景載入：建立位移索引，再於磁碟讀取鎖定下完整解析並驗證資料
+        
+        其他執行緒取得鎖定前會等待載入結束（見 _await_lazy_load），
+        因此載入的資料不會與寫入交錯；釋放鎖定時照常發佈快照。
+        """
+        try:
+            lazy.build_index()
+        except Exception as e:
+            logger.warning(f"⚠️ 位移索引建立失敗，點查詢將等待完整載入: {e}")
+        
+        try:
+            with self._locked(self._acquire_refresh_lock):
+                try:
+                    self._data = self._parse_snapshot(lazy.read_all())
+                    self._file_signature = lazy.signature
+                    self._invalidate_derived_state()
+                    self._lazy = None
+                except Exception as e:
+                    lazy.error = e
+                    lazy.loaded.set()
+                    raise
+                finally:
+                    lazy.close()
+            logger.info(f"✅ 背景載入完成: {len(self._data.get('videos', {}))} 部影片")
+        except Exception as e:
+            lazy.error = lazy.error or e
+            logger.error(f"❌ 背景載入失敗: {e}")
+        finally:
+            lazy.loaded.set()
+    
+    def _await_lazy_load(self) -> None:
+        """
+        背景載入進行中時等待其結束（載入執行緒本身除外）
+        
+        Raises:
+            CorruptedDataError: 若背景載入失敗
+        """
+        lazy = self._lazy
+        if lazy is None:
+            return
+        if threading.current_thread() is not self._lazy_thread:
+            lazy.loaded.wait()
+        if lazy.error is not None:
+            raise CorruptedDataError(f"背景載入失敗: {lazy.error}")
+    
+    def _lazy_read(self, container: str, key: Optional[str] = None) -> Any:
+        """
+        背景載入完成前透過位移索引讀取單筆記錄或頂層欄位
+        
+        Args:
+            container: 'videos' / 'actresses'，或 key 為 None 時的頂層欄位名稱
+            key: 記錄 ID
+            
+        Returns:
+            記錄/欄位值或 None；未在延遲載入中或無法使用索引時回傳 UNAVAILABLE
+        """
+        lazy = self._lazy
+        if lazy is None or lazy.loaded.is_set():
+            return UNAVAILABLE
+        if key is None:
+            return lazy.read_section(container)
+        return lazy.lookup(container, key)
+    
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待背景載入完成（非延遲載入模式立即返回 True）
+        
+        Args:
+            timeout: 等待超時 (秒)，None 表示無限等待
+            
+        Returns:
+            已完成則 True（失敗時存取 data 會拋出 CorruptedDataError）
+        """
+        lazy = self._lazy
+        return lazy is None or lazy.loaded.wait(timeout)
+    
+    # ========================================================================
+    # 日誌模式 (WAL)
+    # ========================================================================
+    
+    def _is_journal_mode(self) -> bool:
+        """是否為日誌儲存模式"""
+        return self.storage_mode == STORAGE_MODES["JOURNAL"]
+    
+    def _replay_journal(self, data: JSONDatabaseDict) -> int:
+        """
+        將日誌記錄重放到剛載入的快照上（崩潰復原）
+        
+        日誌世代與快照不符時表示快照已包含日誌內容
+        （壓縮途中中斷），此時捨棄舊日誌。重放後的完整性
+        由呼叫端驗證。
+        
+        Args:
+            data: 剛從 data.json 載入的資料
+            
+        Returns:
+            重放的日誌記錄數
+            
+        Raises:
+            CorruptedDataError: 若日誌記錄損壞
+        """
+        entries = []
+        snapshot_generation = data.get('metadata', {}).get('journal_generation', 0)
+        journal_generation = self.journal.read_generation()
+        
+        if journal_generation != snapshot_generation:
+            if journal_generation is not None:
+                logger.warning(
+                    f"⚠️ 日誌世代 {journal_generation} 與快照世代 {snapshot_generation} 不符，捨棄舊日誌"
+                )
+            self._journal_offset = self.journal.reset(snapshot_generation)
+        else:
+            entries, self._journal_offset = self.journal.read_entries()
+            for entry in entries:
+                for operation in entry.get('ops', []):
+                    self._apply_operation(data, operation)
+            if entries:
+                self._statistics_dirty = True
+                logger.info(f"✅ 已重放 {len(entries)} 筆日誌記錄")
+        
+        self._journal_generation = snapshot_generation
+        return len(entries)
+    
+    # ========================================================================
+    # 分片模式
+    # ========================================================================
+    
+    def _is_sharded_mode(self) -> bool:
+        """是否為分片儲存模式"""
+        return self.storage_mode == STORAGE_MODES["SHARDED"]
+    
+    def _load_shards(self) -> JSONDatabaseDict:
+        """
+        讀取並驗證所有分片（不獲取鎖）
+        
+        所有分片雜湊與 manifest 相符時可略過完整性驗證。
+        
+        Raises:
+            CorruptedDataError: 若分片損壞
+            DataIntegrityError: 若完整性檢查失敗
+        """
+        loaded_data, verified = self.shards.load()
+        self._validate_json_format(loaded_data)
+        if not (verified and self.trust_verified_snapshots):
+            self._validate_referential_integrity(loaded_data)
+        self._statistics_dirty = self.shards.statistics_stale
+        self._prepare_records(loaded_data)
+        return loaded_data
+    
+    def _track_dirty_shards(self, operation: Dict[str, Any]) -> None:
+        """
+        記錄變更操作影響的分片（需在套用操作前呼叫）
+        
+        Args:
+            operation: 變更操作
+        """
+        op = operation.get('op')
+        if op in ('put_video', 'delete_video'):
+            video_id = operation['record']['id'] if op == 'put_video' else operation['id']
+            self._dirty_shards.add(self.shards.shard_for_video(video_id))
+            return
+        
+        self._dirty_shards.add(ShardedStore.ACTRESS_SHARD)
+        if op == 'delete_actress':
+            # 被移除的關聯存放在各自影片的分片
+            links = self.data.get('links', [])
+            for position in self._indexes.actress_links.get(operation['id'], ()):
+                self._dirty_shards.add(self.shards.shard_for_video(links[position].get('video_id')))
+    
+    def _journal_needs_compaction(self) -> bool:
+        """日誌是否已達壓縮門檻"""
+        return (
+            self.journal.record_count >= self.journal_compact_threshold or
+            self.journal.size() >= JOURNAL_COMPACT_MAX_BYTES
+        )
+    
+    def _compact_journal_internal(self) -> None:
+        """
+        內部日誌壓縮方法（不獲取鎖）
+        
+        重新計算統計並寫出完整快照，_save_all_data 會同時清空日誌。
+        """
+        self._cache_statistics()
+        self._save_all_data(self.data, validate=False)
+        logger.info(f"✅ 日誌已壓縮為快照: 世代 {self._journal_generation}")
+    
+    def compact_journal(self) -> bool:
+        """
+        壓縮日誌
+        
+        將目前資料寫成新的 data.json 快照並清空 WAL。
+        快照模式下不做任何事。
+        
+        Returns:
+            有執行壓縮則 True
+            
+        Raises:
+            LockError: 若無法獲得寫鎖定
+            CorruptedDataError: 若壓縮失敗
+        """
+        if not self._is_journal_mode():
+            return False
+        
+        try:
+            self._acquire_write_lock()
+            
+            try:
+                self._reload_for_write()
+                self._compact_journal_internal()
+                return True
+                
+            finally:
+                self._release_locks()
+                
+        except LockError as e:
+            logger.error(f"❌ 日誌壓縮失敗: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"❌ 日誌壓縮失敗: {e}")
+            raise CorruptedDataError(f"日誌壓縮失敗: {e}")
+    
+    # ========================================================================
+    # 變更操作
+    # ========================================================================
+    
+    @staticmethod
+    def _apply_operation(data: JSONDatabaseDict, operation: Dict[str, Any]) -> None:
+        """
+        將單一變更操作套用到資料字典
+        
+        支援的操作:
+        - put_video: 新增或取代影片記錄 ('record')
+        - put_actress: 新增或取代女優記錄 ('record')
+        - delete_video: 刪除影片及其關聯 ('id')
+        - delete_actress: 刪除女優及其關聯 ('id')
+        
+        Args:
+            data: 資料字典
+            operation: 變更操作
+            
+        Raises:
+            CorruptedDataError: 若操作類型未知
+        """
+        op = operation.get('op')
+        
+        if op == 'put_video':
+            record = operation['record']
+            data['videos'][record['id']] = record
+        elif op == 'put_actress':
+            record = operation['record']
+            data['actresses'][record['id']] = record
+        elif op == 'delete_video':
+            video_id = operation['id']
+            data['videos'].pop(video_id, None)
+            links = data.get('links', [])
+            data['links'] = [link for link in links if link.get('video_id') != video_id]
+        elif op == 'delete_actress':
+            actress_id = operation['id']
+            data['actresses'].pop(actress_id, None)
+            links = data.get('links', [])
+            data['links'] = [link for link in links if link.get('actress_id') != actress_id]
+        else:
+            raise CorruptedDataError(f"未知的變更操作: {op}")
+    
+    def _apply_to_memory(self, operation: Dict[str, Any]) -> None:
+        """
+        將單一變更操作套用到 self.data，並同步增量統計與次要索引
+        
+        刪除操作透過索引只移除相關的關聯，不掃描整個關聯清單。
+        
+        Args:
+            operation: 變更操作
+            
+        Raises:
+            CorruptedDataError: 若操作類型未知
+        """
+        statistics_engine = self._get_statistics_engine()
+        indexes = self._indexes
+        op = operation.get('op')
+        
+        if self.shards is not None:
+            self._track_dirty_shards(operation)
+        self._dirty_containers.update(_OPERATION_CONTAINERS.get(op, ()))
+        
+        if op == 'put_video':
+            record = operation['record']
+            if self.compact_records:
+                record = CompactVideo.from_mapping(record)
+            videos = self.data['videos']
+            previous = videos.get(record['id'])
+            if previous is not None:
+                indexes.remove_video(record['id'], previous)
+            videos[record['id']] = record
+            indexes.add_video(record['id'], record)
+            statistics_engine.put_video(record)
+        elif op == 'put_actress':
+            record = operation['record']
+            if self.compact_records:
+                record = CompactActress.from_mapping(record)
+            actresses = self.data['actresses']
+            previous = actresses.get(record['id'])
+            if previous is not None:
+                indexes.remove_actress(record['id'], previous)
+            actresses[record['id']] = record
+            indexes.add_actress(record['id'], record)
+            # put_actress 只影響名稱與總數，統計於輸出時直接讀取
+        elif op == 'delete_video':
+            video_id = operation['id']
+            indexes.remove_links(self.data['links'], indexes.video_links.get(video_id, ()))
+            previous = self.data['videos'].pop(video_id, None)
+            if previous is not None:
+                indexes.remove_video(video_id, previous)
+            statistics_engine.delete_video(video_id)
+        elif op == 'delete_actress':
+            actress_id = operation['id']
+            indexes.remove_links(self.data['links'], indexes.actress_links.get(actress_id, ()))
+            previous = self.data['actresses'].pop(actress_id, None)
+            if previous is not None:
+                indexes.remove_actress(actress_id, previous)
+            statistics_engine.delete_actress(actress_id)
+        else:
+            raise CorruptedDataError(f"未知的變更操作: {op}")
+        
+        self._derived_fingerprint = self._data_fingerprint()
+        self._columns = None
+    
+    def _commit_operations(self, operations: List[Dict[str, Any]]) -> None:
+        """
+        提交變更操作（需已獲取寫鎖定並已同步最新資料）
+        
+        交易進行中時僅套用到記憶體並暫存，待交易結束時一併提交。
+        
+        Args:
+            operations: 變更操作清單
+            
+        Raises:
+            DataIntegrityError: 若完整性檢查失敗（記憶體狀態會還原）
+        """
+        try:
+            for operation in operations:
+                self._apply_to_memory(operation)
+            
+            if self._transaction is not None:
+                self._transaction.extend(operations)
+                return
+            
+            # 驗證完整性（只檢查此次變更觸及的記錄）
+            self._validate_operations_integrity(operations)
+        except Exception:
+            if self._transaction is None:
+                # 還原記憶體狀態至磁碟上的最新版本
+                self._load_data_internal(force=True)
+            raise
+        
+        self._persist_operations(operations)
+    
+    def _persist_operations(self, operations: List[Dict[str, Any]]) -> None:
+        """
+        將已套用到記憶體的變更寫入磁碟（需已獲取寫鎖定）
+        
+        快照模式會更新統計並重寫 data.json；日誌模式只附加
+        一筆 WAL 記錄，達到門檻時才壓縮為快照；分片模式只重寫
+        變更的分片。寫入前先在變更記錄中附加此次變更的 ID。
+        
+        Args:
+            operations: 變更操作清單
+        """
+        for operation in operations:
+            op = operation.get('op')
+            key = operation['record']['id'] if op in ('put_video', 'put_actress') else operation.get('id')
+            if op in ('put_video', 'delete_video'):
+                self._changed_videos.add(key)
+            else:
+                self._changed_actresses.add(key)
+        
+        if self._is_journal_mode():
+            self._append_change()
+            self._journal_offset = self.journal.append(operations)
+            self._statistics_dirty = True
+            
+            if self._journal_needs_compaction():
+                self._compact_journal_internal()
+        elif self._is_sharded_mode():
+            # 統計於讀取時從累加器輸出，不必每次重寫統計分片
+            self._statistics_dirty = True
+            self._save_all_data(self.data, validate=False, dirty_shards=self._dirty_shards)
+        else:
+            # 更新統計快取（快取失效策略）
+            self._cache_statistics()
+            
+            # 保存（變更已通過增量驗證）
+            self._save_all_data(self.data, validate=False)
+    
+    # ========================================================================
+    # 交易與批次寫入
+    # ========================================================================
+    
+    @contextmanager
+    def transaction(self) -> Iterator["JSONDBManager"]:
+        """
+        批次寫入交易
+        
+        在交易內呼叫的 CRUD 方法只修改記憶體資料，
+        交易結束時只獲取一次寫鎖定、驗證一次並保存一次。
+        任何例外都會還原全部變更（全有或全無）。巢狀交易會併入外層交易。
+        
+        用法:
+            with db.transaction():
+                db.add_or_update_actress(...)
+                db.add_or_update_video(...)
+        
+        Yields:
+            JSONDBManager 本身
+            
+        Raises:
+            LockError: 若無法獲得寫鎖定
+            DataIntegrityError: 若完整性檢查失敗
+        """
+        self._acquire_write_lock()
+        
+        try:
+            if self._transaction is not None:
+                yield self
+                return
+            
+            # 重新載入最新資料
+            self._reload_for_write()
+            
+            # 交易期間其他執行緒讀取已提交的快照，不需等待交易結束
+            if self._snapshot_stale:
+                self._publish_snapshot()
+            
+            pending: List[Dict[str, Any]] = []
+            self._transaction = pending
+            
+            try:
+                yield self
+                
+                self._transaction = None
+                if pending:
+                    # 驗證完整性（只檢查交易觸及的記錄）
+                    self._validate_operations_integrity(pending)
+                    self._persist_operations(pending)
+                    logger.info(f"✅ 交易已提交: {len(pending)} 筆操作")
+                    
+            except BaseException:
+                self._transaction = None
+                if pending:
+                    # 還原記憶體狀態至磁碟上的最新版本
+                    self._load_data_internal(force=True)
+                    logger.warning(f"⚠️ 交易已還原: {len(pending)} 筆操作")
+                raise
+                
+        finally:
+            self._release_locks()
+    
+    def bulk_upsert_videos(self, videos: Iterable[VideoDict]) -> int:
+        """
+        批次新增或更新影片
+        
+        在單一交易中寫入所有影片，全部成功或全部不生效。
+        
+        Args:
+            videos: 影片資訊 (VideoDict) 的可迭代物件
+            
+        Returns:
+            寫入的影片數
+            
+        Raises:
+            ValidationError: 若任一影片資訊無效
+            LockError: 若無法獲得寫鎖定
+            DataIntegrityError: 若完整性檢查失敗
+        """
+        count = 0
+        with self.transaction():
+            for video_info in videos:
+                self.add_or_update_video(video_info)
+                count += 1
+        
+        logger.info(f"✅ 批次寫入 {count} 部影片")
+        return count
+    
+    def _save_all_data(
+        self,
+        data: JSONDatabaseDict,
+        validate: bool = True,
+        dirty_shards: Optional[Set[str]] = None
+    ) -> None:
         """
         原子寫入資料到磁碟
         
@@ -181,6 +965,9 @@ class JSONDBManager:
         
         Args:
             data: 要儲存的資料字典
+            validate: 是否執行完整的參照完整性驗證
+                     (變更已通過增量驗證時為 False)
+            dirty_shards: 分片模式下已知變更的分片 (None 表示比對所有分片)
             
         Raises:
             LockError: 若無法獲得寫鎖定
@@ -189,27 +976,49 @@ class JSONDBManager:
         try:
             # 驗證資料
             self._validate_json_format(data)
-            self._validate_referential_integrity(data)
+            if validate:
+                self._validate_referential_integrity(data)
             
-            # 計算資料雜湊
-            data_copy = data.copy()
-            data_copy['data_hash'] = ''  # 暫時清空以計算雜湊
-            data_str = json.dumps(data_copy, ensure_ascii=False, sort_keys=True)
-            data_hash = hashlib.sha256(data_str.encode('utf-8')).hexdigest()
-            data['data_hash'] = data_hash
+            # 日誌模式：新快照使用新的世代編號
+            if self._is_journal_mode():
+                generation = max(
+                    self._journal_generation,
+                    data.get('metadata', {}).get('journal_generation', 0)
+                ) + 1
+                data.setdefault('metadata', {})['journal_generation'] = generation
             
             # 更新時間戳
             data['updated_at'] = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
             
-            with self.write_lock:
-                # 原子寫入
-                temp_file = self.data_file.parent / f"{self.data_file.name}.tmp"
+            with self._locked(self._acquire_write_lock):
+                # 先記錄變更再寫出資料，中斷時其他程序最多多讀幾筆未變更的記錄
+                self._append_change(reset=data is not self.data)
+                
+                if self._is_sharded_mode():
+                    # 寫出變更的分片後原子替換 manifest
+                    data['data_hash'] = self.shards.save(
+                        data, dirty_shards,
+                        statistics_stale=self._statistics_dirty and data is self.data
+                    )
+                    if data is self.data:
+                        self._dirty_shards = set()
+                else:
+                    # 原子寫入（寫入時同時計算資料雜湊）
+                    temp_file = self.data_file.parent / f"{self.data_file.name}.tmp"
+                    data['data_hash'] = self._write_snapshot(temp_file, data)
+                    
+                    # 替換原檔案
+                    temp_file.replace(self.data_file)
                 
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+                # 記錄簽章，下次寫入前若檔案未被其他程序修改即可略過重新載入
+                self._file_signature = (
+                    self._read_file_signature() if data is self.data else None
+                )
                 
-                # 替換原檔案
-                temp_file.replace(self.data_file)
+                # 快照已包含所有日誌內容，清空日誌
+                if self._is_journal_mode():
+                    self._journal_offset = self.journal.reset(generation)
+                    self._journal_generation = generation
                 
                 logger.info(f"✅ 資料儲存成功: {self.data_file}")
                 
@@ -220,36 +1029,61 @@ class JSONDBManager:
             logger.error(f"❌ 資料儲存失敗: {e}")
             raise DataIntegrityError(f"儲存失敗: {e}")
     
-    def _validate_json_format(self, data: Any) -> None:
+    def _write_snapshot(self, path: Path, data: JSONDatabaseDict) -> str:
         """
-        驗證 JSON 格式和必需欄位
+        將資料寫入檔案並同時計算資料雜湊（只序列化一次）
+        
+        data_hash 欄位寫在最後，雜湊涵蓋其之前的所有位元組。
+        緊湊格式或有原生 JSON 後端時一次編碼後寫入；否則以標準
+        函式庫串流編碼，邊編碼邊寫入。
         
         Args:
-            data: 要驗證的資料
+            path: 目標檔案路徑
+            data: 要儲存的資料字典
             
-        Raises:
-            ValidationError: 若格式不正確
+        Returns:
+            資料雜湊 (SHA256 十六進位字串)
         """
-        if not isinstance(data, dict):
-            raise ValidationError("根層必須是字典")
-        
-        required_keys = {'schema_version', 'videos', 'actresses', 'links', 'statistics'}
-        missing_keys = required_keys - set(data.keys())
+        body = {key: value for key, value in data.items() if key != 'data_hash'}
+        digest = hashlib.sha256()
         
-        if missing_keys:
-            raise ValidationError(f"遺失必需鍵: {missing_keys}")
-        
-        # 驗證 schema 版本
-        if data.get('schema_version') != SCHEMA_VERSION:
-            raise ValidationError(
-                f"Schema 版本不符: 預期 {SCHEMA_VERSION}, 實際 {data.get('schema_version')}"
-            )
-        
-        logger.debug("✅ JSON 格式驗證通過")
+        with open(path, 'wb') as f:
+            def write(encoded: bytes) -> None:
+                digest.update(encoded)
+                f.write(encoded)
+            
+            if self.compact_json or json_codec.is_native():
+                encoded = json_codec.dumps(body, indent=not self.compact_json)
+                closing = 1 if self.compact_json else 2  # 保留結尾的 '}' 或 '\n}'
+                write(memoryview(encoded)[:-closing])
+            else:
+                closing = '\n}'
+                pending: List[str] = []
+                pending_size = 0
+                for chunk in json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(body):
+                    pending.append(chunk)
+                    pending_size += len(chunk)
+                    if pending_size >= _WRITE_BUFFER_SIZE:
+                        text = ''.join(pending)
+                        write(text[:-len(closing)].encode('utf-8'))
+                        pending = [text[-len(closing):]]
+                        pending_size = len(closing)
+                
+                text = ''.join(pending)
+                write(text[:-len(closing)].encode('utf-8'))
+            
+            data_hash = digest.hexdigest()
+            if self.compact_json:
+                f.write(f',"data_hash":"{data_hash}"}}'.encode('utf-8'))
+            else:
+                f.write(f',\n  "data_hash": "{data_hash}"\n}}'.encode('utf-8'))
+            return data_hash
     
     def _validate_referential_integrity(self, data: Dict[str, Any]) -> None:
         """
-        驗證參照完整性（外鍵約束）
+        驗證參照完整性（外鍵約束）- 完整模式
+        
+        掃描所有關聯與影片的女優清單，用於載入、還原與手動驗證。
         
         Args:
             data: 要驗證的資料
@@ -260,32 +1094,84 @@ class JSONDBManager:
         videos = data.get('videos', {})
         actresses = data.get('actresses', {})
         links = data.get('links', [])
+        errors: List[str] = []
         
         # 檢查連結中的 video_id 和 actress_id 是否存在
         for link in links:
-            video_id = link.get('video_id')
-            actress_id = link.get('actress_id')
-            
-            if video_id and video_id not in videos:
-                raise DataIntegrityError(
-                    f"連結中的 video_id '{video_id}' 不存在"
-                )
-            
-            if actress_id and actress_id not in actresses:
-                raise DataIntegrityError(
-                    f"連結中的 actress_id '{actress_id}' 不存在"
-                )
+            errors.extend(self._link_integrity_errors(link, videos, actresses))
         
         # 檢查影片中的 actresses 清單是否有效
         for video_id, video in videos.items():
-            actresses_list = video.get('actresses', [])
-            for actress_id in actresses_list:
-                if actress_id not in actresses:
-                    raise DataIntegrityError(
-                        f"影片 '{video_id}' 中的女優 ID '{actress_id}' 不存在"
-                    )
+            errors.extend(self._video_integrity_errors(video_id, video, actresses))
         
-        logger.debug("✅ 參照完整性驗證通過")
+        self._raise_integrity_errors(errors)
+    
+    def _validate_operations_integrity(self, operations: List[Dict[str, Any]]) -> None:
+        """
+        驗證參照完整性 - 增量模式
+        
+        變更前的資料已通過驗證，因此只需檢查變更觸及的記錄
+        （透過次要索引找出引用它們的關聯與影片）。錯誤回報與
+        完整模式相同。操作需已套用到 self.data。
+        
+        Args:
+            operations: 已套用的變更操作
+            
+        Raises:
+            DataIntegrityError: 若完整性檢查失敗
+        """
+        videos = self.data.get('videos', {})
+        actresses = self.data.get('actresses', {})
+        links = self.data.get('links', [])
+        indexes = self._get_indexes()
+        
+        touched_videos = {op['record']['id'] if 'record' in op else op['id']
+                          for op in operations if op.get('op') in ('put_video', 'delete_video')}
+        touched_actresses = {op['record']['id'] if 'record' in op else op['id']
+                             for op in operations if op.get('op') in ('put_actress', 'delete_actress')}
+        
+        # 受影響的關聯：引用被觸及影片/女優的關聯
+        positions = set()
+        for video_id in touched_videos:
+            positions.update(indexes.video_links.get(video_id, ()))
+        for actress_id in touched_actresses:
+            positions.update(indexes.actress_links.get(actress_id, ()))
+        
+        # 受影響的影片：被觸及的影片與引用被觸及女優的影片
+        affected_videos = {video_id for video_id in touched_videos if video_id in videos}
+        for actress_id in touched_actresses:
+            affected_videos.update(indexes.actress_videos.get(actress_id, ()))
+        
+        errors: List[str] = []
+        for position in positions:
+            errors.extend(self._link_integrity_errors(links[position], videos, actresses))
+        for video_id in affected_videos:
+            errors.extend(self._video_integrity_errors(video_id, videos[video_id], actresses))
+        
+        self._raise_integrity_errors(errors)
+    
+    def _is_trusted_snapshot(self, raw: bytes) -> bool:
+        """
+        判斷快照是否可略過完整性驗證
+        
+        快照只在通過驗證後由 _save_all_data 寫出，若結尾的 data_hash
+        與其之前的位元組相符，表示寫出後未被修改。只需對原始位元組
+        計算雜湊，不必重新序列化。
+        
+        Args:
+            raw: data.json 的原始內容
+        """
+        if not self.trust_verified_snapshots:
+            return False
+        
+        tail = raw[-256:]
+        match = _DATA_HASH_TRAILER.search(tail)
+        if not match:
+            return False
+        
+        prefix_length = len(raw) - len(tail) + match.start()
+        digest = hashlib.sha256(memoryview(raw)[:prefix_length]).hexdigest()
+        return digest == match.group(1).decode('ascii')
     
     def _validate_structure(self, data: Dict[str, Any]) -> None:
         """
@@ -303,7 +1189,7 @@ class JSONDBManager:
             raise ValidationError("'videos' 必須是字典")
         
         for video_id, video in videos.items():
-            if not isinstance(video, dict):
+            if not isinstance(video, Mapping):
                 raise ValidationError(f"影片 '{video_id}' 必須是字典")
             
             # 必需欄位
@@ -324,7 +1210,7 @@ class JSONDBManager:
             raise ValidationError("'actresses' 必須是字典")
         
         for actress_id, actress in actresses.items():
-            if not isinstance(actress, dict):
+            if not isinstance(actress, Mapping):
                 raise ValidationError(f"女優 '{actress_id}' 必須是字典")
             
             required_actress_fields = {'id', 'name'}
@@ -441,35 +1327,33 @@ class JSONDBManager:
         pass
     
     # ========================================================================
-    # 備份和恢復 (將在 T006 實現)
+    # 備份和恢復 (T006)
     # ========================================================================
     
     def create_backup(self) -> str:
         """
-        建立備份
+        建立增量備份
         
-        建立當前資料的時間戳備份檔案。
+        資料切分為內容定址的區塊，只寫出與既有備份不同的區塊
+        並壓縮保存（見 BackupStore）。日誌模式下備份包含尚未
+        壓縮進 data.json 的變更。
         
         Returns:
-            建立的備份檔案路徑
+            備份路徑（備份目錄下的備份 ID，可傳給 restore_from_backup）
             
         Raises:
             BackupError: 若備份失敗
         """
         try:
-            from datetime import datetime, timezone
-            
-            timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d_%H-%M-%S')
-            backup_filename = f"backup_{timestamp}.json"
-            backup_path = self.backup_dir / backup_filename
-            
-            # 複製資料
-            with open(self.data_file, 'r', encoding='utf-8') as src:
-                content = src.read()
-            
-            with open(backup_path, 'w', encoding='utf-8') as dst:
-                dst.write(content)
+            # 同步磁碟上的最新版本，備份期間不允許寫入
+            with self._locked(self._acquire_refresh_lock):
+                self._load_data_internal()
+                if self._statistics_dirty:
+                    self._cache_statistics()
+                legacy_names = [Path(path).stem for path in self._legacy_backup_files()]
+                backup_id = self.backups.create(self.data, taken=legacy_names)
             
+            backup_path = self.backup_dir / backup_id
             logger.info(f"✅ 備份建立成功: {backup_path}")
             return str(backup_path)
             
@@ -477,132 +1361,482 @@ class JSONDBManager:
             logger.error(f"❌ 備份失敗: {e}")
             raise BackupError(f"備份失敗: {e}")
     
-    def restore_from_backup(self, backup_path: str) -> bool:
+    def restore_from_backup(self, backup_path: str) -> bool:
+        """
+        還原備份
+        
+        從增量備份（備份 ID）或舊格式的完整備份檔案恢復資料。
+        
+        Args:
+            backup_path: create_backup / get_backup_list 回傳的備份路徑
+            
+        Returns:
+            成功則 True
+            
+        Raises:
+            BackupError: 若還原失敗
+        """
+        try:
+            backup_file = Path(backup_path)
+            
+            # 載入備份資料
+            if backup_file.is_file():
+                backup_data = json_codec.load_file(backup_file)
+            elif self.backups.has(backup_file.name):
+                backup_data = self.backups.load(backup_file.name)
+            else:
+                raise BackupError(f"備份檔案不存在: {backup_path}")
+            
+            self.import_data(backup_data)
+            
+            logger.info(f"✅ 備份還原成功: {backup_path}")
+            return True
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ 備份檔案損壞: {e}")
+            raise BackupError(f"備份檔案損壞: {e}")
+        except Exception as e:
+            logger.error(f"❌ 還原失敗: {e}")
+            raise BackupError(f"還原失敗: {e}")
+    
+    def _diff_source(self, backup_path: Optional[str]) -> DiffSource:
+        """
+        取得比較來源
+        
+        None 表示目前資料（已發佈的快照）；增量備份以 ID 逐分桶讀取；
+        舊格式完整備份檔以位移索引逐筆解析影片與女優（關聯整段解析），
+        緊湊格式的舊備份無法建立索引，只能整份載入。
+        
+        Raises:
+            BackupError: 若備份不存在
+        """
+        if backup_path is None:
+            snapshot = self.snapshot()
+            return {'videos': snapshot.videos, 'actresses': snapshot.actresses, 'links': snapshot.links}
+        
+        backup_file = Path(backup_path)
+        if backup_file.is_file():
+            reader = LazySnapshotReader(backup_file)
+            if not reader.build_index():
+                reader.close()
+                logger.warning(f"⚠️ 舊備份不是縮排格式，整份載入比較: {backup_file.name}")
+                return json_codec.load_file(backup_file)
+            # 對映由記錄容器持有，比較結束後隨之釋放
+            return {
+                'videos': reader.records('videos'),
+                'actresses': reader.records('actresses'),
+                'links': reader.read_section('links') or [],
+            }
+        if self.backups.has(backup_file.name):
+            return backup_file.name
+        raise BackupError(f"備份檔案不存在: {backup_path}")
+    
+    def diff_backups(self, old_backup: str, new_backup: Optional[str] = None) -> Iterator[RecordChange]:
+        """
+        比較兩份備份，或備份與目前資料
+        
+        增量備份逐分桶串流比較，內容相同的分桶不讀取，
+        記憶體用量與單一分桶大小成正比。舊格式的完整備份檔逐筆解析
+        影片與女優，但關聯需整段載入；緊湊格式 (compact_json) 的舊備份
+        無法建立位移索引，會整份載入記憶體。
+        
+        用法:
+            for change in db.diff_backups(old_path):
+                print(change.kind, change.key, change.change)
+        
+        Args:
+            old_backup: 比較基準的備份路徑
+            new_backup: 比較目標的備份路徑（None 表示目前資料）
+            
+        Yields:
+            RecordChange（依影片、女優、關聯的順序）
+            
+        Raises:
+            BackupError: 若備份不存在
+        """
+        old_source = self._diff_source(old_backup)
+        new_source = self._diff_source(new_backup)
+        return self.backups.diff(old_source, new_source)
+    
+    def restore_records(
+        self,
+        backup_path: str,
+        video_ids: Iterable[str] = (),
+        actress_ids: Iterable[str] = ()
+    ) -> Dict[str, int]:
+        """
+        選擇性還原影片與女優記錄
+        
+        只讀取包含指定記錄的分桶，於單一交易中將記錄還原為備份時的
+        內容；備份中不存在的記錄會被刪除。關聯不在還原範圍內。
+        
+        Args:
+            backup_path: 備份路徑
+            video_ids: 要還原的影片 ID
+            actress_ids: 要還原的女優 ID
+            
+        Returns:
+            {'restored': 寫回的記錄數, 'deleted': 刪除的記錄數}
+            
+        Raises:
+            BackupError: 若備份不存在或還原失敗
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        actress_ids = list(dict.fromkeys(actress_ids))
+        
+        try:
+            source = self._diff_source(backup_path)
+            if isinstance(source, str):
+                videos = self.backups.get_records(source, 'videos', video_ids)
+                actresses = self.backups.get_records(source, 'actresses', actress_ids)
+            else:
+                videos = {key: source['videos'][key] for key in video_ids if key in source.get('videos', {})}
+                actresses = {key: source['actresses'][key] for key in actress_ids
+                             if key in source.get('actresses', {})}
+            
+            result = {'restored': len(videos) + len(actresses), 'deleted': 0}
+            with self.transaction():
+                operations = [{'op': 'put_actress', 'record': record} for record in actresses.values()]
+                operations.extend({'op': 'put_video', 'record': record} for record in videos.values())
+                for video_id in video_ids:
+                    if video_id not in videos and video_id in self.data['videos']:
+                        operations.append({'op': 'delete_video', 'id': video_id})
+                for actress_id in actress_ids:
+                    if actress_id not in actresses and actress_id in self.data['actresses']:
+                        operations.append({'op': 'delete_actress', 'id': actress_id})
+                result['deleted'] = len(operations) - result['restored']
+                self._commit_operations(operations)
+            
+            logger.info(f"✅ 選擇性還原完成: 寫回 {result['restored']} 筆, 刪除 {result['deleted']} 筆")
+            return result
+            
+        except BackupError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ 選擇性還原失敗: {e}")
+            raise BackupError(f"選擇性還原失敗: {e}")
+    
+    def _legacy_backup_files(self) -> List[Path]:
+        """舊格式的完整備份檔案 (backup_*.json)"""
+        return list(self.backup_dir.glob(self.BACKUP_PATTERN))
+    
+    def get_backup_list(self) -> List[str]:
+        """
+        列出可用備份（增量備份與舊格式備份檔案）
+        
+        Returns:
+            備份路徑清單 (按時間排序)
+        """
+        try:
+            paths = [str(self.backup_dir / backup_id) for backup_id in self.backups.list_ids()]
+            paths.extend(str(path) for path in self._legacy_backup_files())
+            return sorted(paths, key=self._backup_sort_key)
+        except Exception as e:
+            logger.error(f"❌ 無法列出備份: {e}")
+            return []
+    
+    @staticmethod
+    def _backup_sort_key(path: str) -> Tuple[str, int]:
+        """備份排序鍵：(時間戳, 同一秒內的序號)"""
+        stem = Path(path).stem
+        match = _BACKUP_NAME.match(stem)
+        if not match:
+            return stem, 0
+        return match.group(1), int(match.group(2) or 0)
+    
+    def _delete_backups(self, backup_paths: List[str]) -> int:
+        """
+        刪除備份
+        
+        舊格式備份直接刪除檔案；增量備份一次從 manifest 移除，
+        並清除不再被任何備份引用的區塊。
+        
+        Args:
+            backup_paths: get_backup_list() 回傳的備份路徑
+            
+        Returns:
+            刪除的備份數
+        """
+        legacy = [Path(path) for path in backup_paths if Path(path).is_file()]
+        for path in legacy:
+            path.unlink()
+        incremental = [Path(path).name for path in backup_paths if not Path(path).is_file()]
+        return len(legacy) + self.backups.delete(incremental)
+    
+    # ========================================================================
+    # 唯讀快照
+    # ========================================================================
+    
+    def _synced_statistics(self) -> Optional[Dict[str, Any]]:
+        """與記憶體資料同步的統計快取，落後於資料時 None"""
+        if self._statistics_dirty:
+            return None
+        cached = self.data.get('statistics')
+        return cached if self._has_statistics(cached) else None
+    
+    def _mark_snapshot_stale(self) -> None:
+        """
+        提交後標記快照落後於資料（需已獲取獨佔鎖定）
+        
+        只比較容器的 id/長度與變更紀錄，不複製資料；快照於下次
+        呼叫 snapshot() 時才建立，連續寫入不必每次複製整個容器。
+        """
+        snapshot = self._snapshot
+        if snapshot is None or not snapshot.matches(self.data, self._dirty_containers, self._synced_statistics()):
+            self._snapshot_stale = True
+    
+    def _publish_snapshot(self) -> None:
+        """
+        發佈反映目前資料的快照（需已獲取讀或寫鎖定）
+        
+        只複製自上次發佈後變更的容器；統計快取與資料同步時
+        一併附上，否則由快照於讀取時計算。
+        """
+        with self._snapshot_lock:
+            if not self._snapshot_stale:
+                return
+            statistics = self._synced_statistics()
+            if self._snapshot is None:
+                self._snapshot = DatabaseSnapshot.from_data(self.data, statistics=statistics)
+            else:
+                self._snapshot = self._snapshot.derive(self.data, self._dirty_containers, statistics)
+            self._dirty_containers = set()
+            self._snapshot_stale = False
+    
+    def snapshot(self) -> DatabaseSnapshot:
+        """
+        取得反映最近一次提交的唯讀快照
+        
+        快照在取得後不會再改變，可在其他執行緒寫入的同時安全迭代。
+        自上次取得後有新的提交時，在讀鎖定下複製變更的容器建立新快照；
+        沒有新的提交時不獲取鎖定。交易中尚未提交的變更不會出現在快照中
+        （持有寫鎖定的執行緒取得的是最近一次發佈的快照）。
+        
+        Returns:
+            DatabaseSnapshot
+            
+        Raises:
+            CorruptedDataError: 若延遲載入失敗
+            LockError: 若無法獲得讀鎖定
+        """
+        self._await_lazy_load()
+        if self._snapshot_stale and (self._snapshot is None or not self.rw_lock.is_write_owner()):
+            with self._locked(self._acquire_read_lock):
+                self._publish_snapshot()
+        return self._snapshot
+    
+    def _serves_from_snapshot(self) -> bool:
+        """
+        讀取是否可直接使用快照
+        
+        快照需反映最近一次提交；持有寫鎖定的執行緒需讀取未發佈的變更。
+        """
+        return (self._snapshot is not None and not self._snapshot_stale
+                and not self.rw_lock.is_write_owner())
+    
+    # ========================================================================
+    # 變更通知
+    # ========================================================================
+    
+    def subscribe(self, callback: Callable[[ChangeEvent], None]) -> Callable[[], None]:
+        """
+        訂閱資料變更通知
+        
+        本管理器提交的變更 (source='local') 與同步到的其他程序變更
+        (source='remote') 都會以 ChangeEvent 通知。通知在釋放鎖定後由
+        釋放鎖定的執行緒依序送出，回呼中可讀寫資料庫；回呼拋出的例外
+        只記錄警告。其他程序的變更在寫入前、poll_changes() 或變更
+        監看執行緒 (start_change_watcher) 同步時送出。
+        
+        Args:
+            callback: 接收 ChangeEvent 的回呼函式
+            
+        Returns:
+            取消訂閱的函式
+        """
+        with self._change_events_lock:
+            self._change_subscribers.append(callback)
+        
+        def unsubscribe() -> None:
+            with self._change_events_lock:
+                if callback in self._change_subscribers:
+                    self._change_subscribers.remove(callback)
+        
+        return unsubscribe
+    
+    def poll_changes(self) -> List[ChangeEvent]:
         """
-        還原備份
+        同步其他程序的變更
         
-        從備份檔案恢復資料。
+        變更記錄與資料檔案都未改變時只取得檔案狀態，不獲取鎖定。
+        否則在磁碟讀取鎖定下只重新讀取變更的記錄（見 _reload_for_write），
+        並通知訂閱者。
         
-        Args:
-            backup_path: 備份檔案路徑
-            
         Returns:
-            成功則 True
+            同步到的變更通知（沒有變更時為空清單）
             
         Raises:
-            BackupError: 若還原失敗
+            LockError: 若無法獲取鎖定
+            CorruptedDataError: 若資料損壞或無法解析
         """
-        try:
-            backup_file = Path(backup_path)
-            
-            if not backup_file.exists():
-                raise BackupError(f"備份檔案不存在: {backup_path}")
-            
-            # 載入備份資料
-            with open(backup_file, 'r', encoding='utf-8') as f:
-                backup_data = json.load(f)
-            
-            # 驗證備份資料
-            self._validate_json_format(backup_data)
-            self._validate_referential_integrity(backup_data)
-            
-            # 寫入
-            self._save_all_data(backup_data)
-            self.data = backup_data
-            
-            logger.info(f"✅ 備份還原成功: {backup_path}")
-            return True
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ 備份檔案損壞: {e}")
-            raise BackupError(f"備份檔案損壞: {e}")
-        except Exception as e:
-            logger.error(f"❌ 還原失敗: {e}")
-            raise BackupError(f"還原失敗: {e}")
+        if not self.changes.has_new() and self._read_file_signature() == self._file_signature:
+            return []
+        
+        with self._locked(self._acquire_refresh_lock):
+            return self._reload_for_write()
     
-    def get_backup_list(self) -> List[str]:
+    def start_change_watcher(self, interval: float = 1.0) -> None:
         """
-        列出可用備份
+        啟動背景執行緒，定期同步其他程序的變更並通知訂閱者
         
-        Returns:
-            備份檔案路徑清單 (按時間排序)
+        每次檢查只取得檔案狀態；已啟動時不做任何事。
+        
+        Args:
+            interval: 檢查間隔 (秒)
         """
-        try:
-            backup_files = sorted(self.backup_dir.glob(self.BACKUP_PATTERN))
-            return [str(f) for f in backup_files]
-        except Exception as e:
-            logger.error(f"❌ 無法列出備份: {e}")
-            return []
+        if self._change_watcher is not None and self._change_watcher.is_alive():
+            return
+        
+        self._change_watcher_stop.clear()
+        self._change_watcher = threading.Thread(
+            target=self._change_watcher_worker, args=(interval,),
+            name="JSONDBManager-change-watcher", daemon=True
+        )
+        self._change_watcher.start()
+    
+    def stop_change_watcher(self, timeout: Optional[float] = None) -> None:
+        """
+        停止變更監看執行緒
+        
+        Args:
+            timeout: 等待執行緒結束的超時 (秒)，None 表示無限等待
+        """
+        watcher = self._change_watcher
+        if watcher is None:
+            return
+        self._change_watcher_stop.set()
+        watcher.join(timeout)
+        self._change_watcher = None
+    
+    def _change_watcher_worker(self, interval: float) -> None:
+        """變更監看執行緒：同步失敗時記錄警告並於下次檢查重試"""
+        while not self._change_watcher_stop.wait(interval):
+            try:
+                self.poll_changes()
+            except Exception as e:
+                logger.warning(f"⚠️ 同步其他程序的變更失敗: {e}")
+    
+    def _append_change(self, reset: bool = False) -> None:
+        """
+        在變更記錄中附加累積的變更 ID 並排入本地通知（需已獲取寫鎖定）
+        
+        Args:
+            reset: 資料是否被整體替換
+        """
+        videos, self._changed_videos = self._changed_videos, set()
+        actresses, self._changed_actresses = self._changed_actresses, set()
+        entry = self.changes.append(videos, actresses, reset=reset)
+        self._queue_change_events([ChangeEvent.from_entry(entry, 'local')])
     
-    def cleanup_old_backups(self, days: int = None, max_count: int = None) -> int:
+    def _apply_remote_changes(self, entries: List[Dict[str, Any]]) -> bool:
         """
-        清理舊備份
+        只重新讀取其他程序變更的記錄（需已獲取獨佔鎖定）
         
-        按日期和數量限制清理備份。
+        透過 data.json 的位移索引逐筆解析變更的記錄，轉為變更操作套用到
+        記憶體，增量統計與次要索引隨之更新。寫入者已驗證過資料，
+        此處不再驗證完整性。
         
         Args:
-            days: 保留天數 (預設: 30)
-            max_count: 最大備份數 (預設: 50)
+            entries: 上次同步之後的變更記錄
             
         Returns:
-            刪除的備份數
+            成功則 True；分片模式、緊湊格式或變更過多時 False（由呼叫端完整重新載入）
         """
-        if days is None:
-            days = self.DEFAULT_BACKUP_DAYS
-        if max_count is None:
-            max_count = self.DEFAULT_BACKUP_MAX_COUNT
-            
-        try:
-            from datetime import timedelta
-            
-            deleted_count = 0
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-            
-            # 按時間刪除
-            backup_files = list(self.backup_dir.glob(self.BACKUP_PATTERN))
-            for backup_file in backup_files:
-                if self._is_backup_expired(backup_file, cutoff_date):
-                    backup_file.unlink()
-                    deleted_count += 1
-                    logger.info(f"刪除舊備份: {backup_file}")
-            
-            # 按數量刪除
-            backup_files = sorted(self.backup_dir.glob(self.BACKUP_PATTERN))
-            while len(backup_files) > max_count:
-                oldest = backup_files[0]
-                oldest.unlink()
-                deleted_count += 1
-                logger.info(f"刪除超限備份: {oldest}")
-                backup_files = sorted(self.backup_dir.glob(self.BACKUP_PATTERN))
-            
-            logger.info(f"✅ 備份清理完成，刪除 {deleted_count} 個備份")
-            return deleted_count
-            
-        except Exception as e:
-            logger.error(f"❌ 備份清理失敗: {e}")
-            return 0
-    
-    @staticmethod
-    def _is_backup_expired(backup_file: Path, cutoff_date: datetime) -> bool:
-        """檢查備份是否過期"""
+        videos = {key for entry in entries for key in entry.get('video_ids', ())}
+        actresses = {key for entry in entries for key in entry.get('actress_ids', ())}
+        total = len(self.data['videos']) + len(self.data['actresses'])
+        if self._is_sharded_mode() or len(videos) + len(actresses) > total * _POINT_REFRESH_MAX_RATIO + 1:
+            return False
+        
         try:
-            date_str = backup_file.stem.replace("backup_", "")
-            date_part = date_str.split("_")[0]  # YYYY-MM-DD
-            file_date = datetime.strptime(date_part, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-            return file_date < cutoff_date
-        except Exception as e:
-            logger.warning(f"無法解析備份檔案日期: {backup_file}, {e}")
+            reader = LazySnapshotReader(self.data_file)
+        except (OSError, ValueError):
             return False
+        
+        try:
+            if not reader.build_index():
+                return False
+            
+            # 記憶體套用不驗證完整性，操作順序不影響結果
+            operations: List[Dict[str, Any]] = []
+            for container, kind, keys in (('actresses', 'actress', actresses), ('videos', 'video', videos)):
+                for key in sorted(keys):
+                    record = reader.lookup(container, key)
+                    if record is UNAVAILABLE:
+                        return False
+                    if record is None:
+                        operations.append({'op': f'delete_{kind}', 'id': key})
+                    else:
+                        operations.append({'op': f'put_{kind}', 'record': record})
+            
+            sections = {name: reader.read_section(name) for name in _REFRESHED_SECTIONS}
+            if any(value is UNAVAILABLE for value in sections.values()):
+                return False
+            signature = reader.signature
+        finally:
+            reader.close()
+        
+        for operation in operations:
+            self._apply_to_memory(operation)
+        for name, value in sections.items():
+            if value is not None:
+                self.data[name] = value
+        self._statistics_dirty = not self._has_statistics(self.data.get('statistics'))
+        self._file_signature = signature
+        
+        logger.debug(f"✅ 已同步其他程序的變更: {len(videos)} 部影片, {len(actresses)} 位女優")
+        return True
+    
+    def _queue_change_events(self, events: List[ChangeEvent]) -> None:
+        """排入待送出的變更通知（釋放鎖定後送出）"""
+        if events:
+            with self._change_events_lock:
+                self._change_events.extend(events)
+    
+    def _dispatch_change_events(self) -> None:
+        """
+        依序送出待送出的變更通知
+        
+        同一時間只有一個執行緒送出通知；其他執行緒排入的通知由
+        正在送出的執行緒一併送出，因此回呼中的寫入不會造成遞迴或亂序。
+        """
+        while self._change_dispatch_lock.acquire(blocking=False):
+            try:
+                with self._change_events_lock:
+                    events, self._change_events = self._change_events, []
+                    subscribers = list(self._change_subscribers)
+                for event in events:
+                    for callback in subscribers:
+                        try:
+                            callback(event)
+                        except Exception as e:
+                            logger.warning(f"⚠️ 變更通知回呼發生錯誤: {e}")
+            finally:
+                self._change_dispatch_lock.release()
+            
+            if not self._change_events:
+                return
     
     # ========================================================================
-    # 並行鎖定 (已在 __init__ 實現)
+    # 並行鎖定
     # ========================================================================
     
     def _acquire_read_lock(self, timeout: int = READ_LOCK_TIMEOUT) -> None:
         """
         獲取讀鎖定
         
-        允許多個讀操作並行執行。
+        只取得程序內共享鎖定：讀取的是記憶體資料，不需要檔案鎖定，
+        多個執行緒可並行讀取。持有寫鎖定的執行緒以重入方式取得。
         
         Args:
             timeout: 等待超時 (秒)
@@ -610,8 +1844,11 @@ class JSONDBManager:
         Raises:
             LockError: 若無法獲取鎖定
         """
+        self._await_lazy_load()
         try:
-            self.read_lock.acquire(timeout=timeout)
+            if not self.rw_lock.acquire_read(timeout=timeout):
+                raise LockError(f"等待逾時 ({timeout} 秒)")
+            self._lock_stack().append((self.rw_lock.release_read, False))
             logger.debug("✅ 讀鎖定已獲取")
         except Exception as e:
             logger.error(f"❌ 無法獲得讀鎖定: {e}")
@@ -621,7 +1858,7 @@ class JSONDBManager:
         """
         獲取寫鎖定
         
-        獨佔鎖定，確保寫操作不被干擾。
+        程序內獨佔鎖定加上獨佔檔案鎖定，確保寫操作不被干擾。
         
         Args:
             timeout: 等待超時 (秒)
@@ -629,33 +1866,91 @@ class JSONDBManager:
         Raises:
             LockError: 若無法獲取鎖定
         """
+        self._await_lazy_load()
         try:
-            self.write_lock.acquire(timeout=timeout)
+            self._acquire_exclusive(shared_file=False, timeout=timeout)
             logger.debug("✅ 寫鎖定已獲取")
         except Exception as e:
             logger.error(f"❌ 無法獲得寫鎖定: {e}")
             raise LockError(f"無法獲得寫鎖定: {e}")
     
-    def _release_locks(self) -> None:
+    def _acquire_refresh_lock(self, timeout: int = READ_LOCK_TIMEOUT) -> None:
         """
-        釋放所有鎖定
+        獲取磁碟讀取鎖定
+        
+        從磁碟重新載入會替換記憶體資料，因此取得程序內獨佔鎖定；
+        檔案鎖定為共享模式，其他程序仍可同時讀取。
         
-        在操作完成後釋放已獲取的鎖定。
-        安全處理已釋放的鎖定物件。
+        Args:
+            timeout: 等待超時 (秒)
+            
+        Raises:
+            LockError: 若無法獲取鎖定
         """
+        self._await_lazy_load()
         try:
-            if self.read_lock.is_locked:
-                self.read_lock.release()
-                logger.debug("✅ 讀鎖定已釋放")
+            self._acquire_exclusive(shared_file=True, timeout=timeout)
+            logger.debug("✅ 磁碟讀取鎖定已獲取")
         except Exception as e:
-            logger.warning(f"⚠️ 釋放讀鎖定時發生錯誤: {e}")
+            logger.error(f"❌ 無法獲得讀鎖定: {e}")
+            raise LockError(f"無法獲得讀鎖定: {e}")
+    
+    def _acquire_exclusive(self, shared_file: bool, timeout: int) -> None:
+        if not self.rw_lock.acquire_write(timeout=timeout):
+            raise LockError(f"等待逾時 ({timeout} 秒)")
+        try:
+            self.file_lock.acquire(shared=shared_file, timeout=timeout)
+        except Exception:
+            self.rw_lock.release_write()
+            raise
+        self._lock_stack().append((self.rw_lock.release_write, True))
+    
+    def _lock_stack(self) -> List[Tuple[Callable[[], None], bool]]:
+        """目前執行緒已取得的鎖定（釋放函式, 是否持有檔案鎖定）"""
+        stack = getattr(self._held_locks, 'stack', None)
+        if stack is None:
+            stack = self._held_locks.stack = []
+        return stack
+    
+    def _release_locks(self) -> None:
+        """
+        釋放鎖定
+        
+        釋放目前執行緒最近一次取得的鎖定（與 _acquire_* 成對呼叫）。
+        釋放最外層的獨佔鎖定時標記快照需重新發佈。未持有鎖定時不做任何事。
+        """
+        stack = self._lock_stack()
+        if not stack:
+            return
+        
+        release, holds_file_lock = stack.pop()
+        if holds_file_lock and not any(exclusive for _, exclusive in stack):
+            # 最外層的獨佔鎖定：釋放前標記快照是否落後，其他寫入者無法同時修改資料
+            self._mark_snapshot_stale()
+        
+        if holds_file_lock:
+            try:
+                self.file_lock.release()
+            except Exception as e:
+                logger.warning(f"⚠️ 釋放檔案鎖定時發生錯誤: {e}")
         
         try:
-            if self.write_lock.is_locked:
-                self.write_lock.release()
-                logger.debug("✅ 寫鎖定已釋放")
+            release()
+            logger.debug("✅ 鎖定已釋放")
         except Exception as e:
-            logger.warning(f"⚠️ 釋放寫鎖定時發生錯誤: {e}")
+            logger.warning(f"⚠️ 釋放鎖定時發生錯誤: {e}")
+        
+        if not stack and self._change_events:
+            self._dispatch_change_events()
+    
+    @contextmanager
+    def _locked(self, acquire: Callable[[], None]) -> Iterator[None]:
+        """以 acquire 取得鎖定，離開區塊時釋放"""
+        acquire()
+        try:
+            yield
+        finally:
+            self._release_locks()
     
     def __enter__(self):
         """上下文管理器進入"""
@@ -689,7 +1984,7 @@ class JSONDBManager:
         """
         try:
             # 驗證輸入
-            if not isinstance(video_info, dict):
+            if not isinstance(video_info, Mapping):
                 raise ValidationError("影片資訊必須是字典")
             
             if 'id' not in video_info:
@@ -702,24 +1997,15 @@ class JSONDBManager:
             
             try:
                 # 重新載入最新資料
-                self._load_data_internal()
+                self._reload_for_write()
                 
                 # 準備影片資料
                 video_dict = get_empty_video()
                 video_dict.update(video_info)
                 video_dict['updated_at'] = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
                 
-                # 新增或更新
-                self.data['videos'][video_id] = video_dict
-                
-                # 驗證完整性
-                self._validate_referential_integrity(self.data)
-
-                # 更新統計快取（快取失效策略）
-                self._cache_statistics()
-
-                # 保存
-                self._save_all_data(self.data)
+                # 新增或更新並提交
+                self._commit_operations([{'op': 'put_video', 'record': video_dict}])
 
                 logger.info(f"✅ 影片已新增/更新: {video_id}")
                 return video_id
@@ -738,6 +2024,10 @@ class JSONDBManager:
         """
         查詢影片資訊
         
+        由最近發佈的快照直接回傳，不獲取鎖定；持有寫鎖定時
+        （交易中）讀取記憶體資料，包含尚未提交的變更。延遲載入
+        完成前透過位移索引只解析該筆記錄。
+        
         Args:
             video_id: 影片 ID
             
@@ -747,6 +2037,13 @@ class JSONDBManager:
         Raises:
             LockError: 若無法獲得讀鎖定
         """
+        if self._serves_from_snapshot():
+            return self._snapshot.get_video(video_id)
+        
+        video = self._lazy_read('videos', video_id)
+        if video is not UNAVAILABLE:
+            return video
+        
         try:
             # 獲取讀鎖定
             self._acquire_read_lock()
@@ -776,27 +2073,27 @@ class JSONDBManager:
         """
         取得所有影片清單（支援過濾）
         
+        無過濾條件時由最近發佈的快照回傳，不獲取鎖定。
+        
         Args:
             filter_dict: 過濾條件 (例如: {'studio': 'ABC'})
                         支援的鍵: 'studio', 'release_date_after', 'release_date_before'
             
         Returns:
-            影片清單
+            影片清單（僅以日期過濾時依發行日期排序）
             
         Raises:
             LockError: 若無法獲得讀鎖定
         """
+        if not filter_dict and self._serves_from_snapshot():
+            return self._snapshot.get_all_videos()
+        
         try:
             # 獲取讀鎖定
             self._acquire_read_lock()
             
             try:
-                videos = self.data.get('videos', {})
-                video_list = list(videos.values())
-                
-                # 應用過濾
-                if filter_dict:
-                    video_list = self._apply_video_filters(video_list, filter_dict)
+                video_list = self._query_videos_internal(filter_dict)
                 
                 logger.debug(f"✅ 取得 {len(video_list)} 個影片")
                 return video_list
@@ -811,6 +2108,45 @@ class JSONDBManager:
             logger.error(f"❌ 取得影片清單失敗: {e}")
             raise
     
+    def query_videos(self, query: VideoQuery) -> Iterator[VideoDict]:
+        """
+        執行影片查詢
+        
+        在讀鎖定下以次要索引選出候選影片（ID、片商、搜尋狀態、女優、
+        發行日期與最後搜尋時間），釋放鎖定後才逐筆比對其餘條件。
+        記錄本身不會被就地修改，因此迭代期間的寫入不影響結果。
+        
+        Args:
+            query: VideoQuery
+            
+        Returns:
+            符合條件的影片迭代器
+            
+        Raises:
+            LockError: 若無法獲得讀鎖定
+        """
+        try:
+            self._acquire_read_lock()
+            
+            try:
+                videos = self.data.get('videos', {})
+                driver, video_ids = self._get_indexes().plan(query.predicates, videos)
+                if video_ids is None:
+                    candidates = list(videos.values())
+                else:
+                    candidates = [videos[video_id] for video_id in video_ids]
+                
+                logger.debug(f"✅ 查詢候選影片 {len(candidates)} 個 (索引條件: {driver!r})")
+                
+            finally:
+                self._release_locks()
+                
+        except LockError as e:
+            logger.error(f"❌ 無法獲取讀鎖定: {e}")
+            raise
+        
+        return query.execute(candidates, satisfied=(driver,) if driver is not None else ())
+    
     def delete_video(self, video_id: str) -> bool:
         """
         刪除影片
@@ -833,7 +2169,7 @@ class JSONDBManager:
             
             try:
                 # 重新載入最新資料
-                self._load_data_internal()
+                self._reload_for_write()
                 
                 videos = self.data.get('videos', {})
                 
@@ -842,21 +2178,8 @@ class JSONDBManager:
                     logger.warning(f"⚠️ 影片不存在: {video_id}")
                     return False
                 
-                # 刪除影片
-                del videos[video_id]
-                
-                # 刪除相關的影片-女優關聯
-                links = self.data.get('links', [])
-                self.data['links'] = [link for link in links if link.get('video_id') != video_id]
-
-                # 驗證完整性
-                self._validate_referential_integrity(self.data)
-
-                # 更新統計快取（快取失效策略）
-                self._cache_statistics()
-
-                # 保存
-                self._save_all_data(self.data)
+                # 刪除影片及相關的影片-女優關聯並提交
+                self._commit_operations([{'op': 'delete_video', 'id': video_id}])
 
                 logger.info(f"✅ 影片已刪除: {video_id}")
                 return True
@@ -864,86 +2187,190 @@ class JSONDBManager:
             finally:
                 self._release_locks()
                 
-        except (DataIntegrityError, LockError) as e:
-            logger.error(f"❌ 刪除影片失敗: {e}")
+        except (DataIntegrityError, LockError) as e:
+            logger.error(f"❌ 刪除影片失敗: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"❌ 未預期的錯誤: {e}")
+            raise CorruptedDataError(f"刪除影片失敗: {e}")
+    
+    def add_or_update_actress(self, actress_info: ActressDict) -> str:
+        """
+        新增或更新女優
+        
+        若女優 ID 已存在則更新，否則建立新記錄。
+        
+        Args:
+            actress_info: 女優資訊 (ActressDict)
+            
+        Returns:
+            女優 ID (新建或已更新)
+            
+        Raises:
+            ValidationError: 若女優資訊無效
+            LockError: 若無法獲得寫鎖定
+            CorruptedDataError: 若寫入失敗
+        """
+        try:
+            # 驗證輸入
+            if not isinstance(actress_info, Mapping):
+                raise ValidationError("女優資訊必須是字典")
+            
+            if 'id' not in actress_info:
+                raise ValidationError("女優 ID 必須存在")
+            
+            actress_id = actress_info.get('id')
+            
+            # 獲取寫鎖定
+            self._acquire_write_lock()
+            
+            try:
+                # 重新載入最新資料
+                self._reload_for_write()
+                
+                # 準備女優資料
+                actress_dict = get_empty_actress()
+                actress_dict.update(actress_info)
+                actress_dict['updated_at'] = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
+                
+                # 新增或更新並提交
+                self._commit_operations([{'op': 'put_actress', 'record': actress_dict}])
+
+                logger.info(f"✅ 女優已新增/更新: {actress_id}")
+                return actress_id
+                
+            finally:
+                self._release_locks()
+                
+        except (ValidationError, DataIntegrityError, LockError) as e:
+            logger.error(f"❌ 新增/更新女優失敗: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"❌ 未預期的錯誤: {e}")
+            raise CorruptedDataError(f"新增/更新女優失敗: {e}")
+    
+    def get_actress_info(self, actress_id: str) -> Optional[ActressDict]:
+        """
+        查詢女優資訊
+        
+        與 get_video_info 相同，由最近發佈的快照回傳。
+        
+        Args:
+            actress_id: 女優 ID
+            
+        Returns:
+            女優資訊，若不存在則返回 None
+            
+        Raises:
+            LockError: 若無法獲得讀鎖定
+        """
+        if self._serves_from_snapshot():
+            return self._snapshot.get_actress(actress_id)
+        
+        actress = self._lazy_read('actresses', actress_id)
+        if actress is not UNAVAILABLE:
+            return actress
+        
+        try:
+            # 獲取讀鎖定
+            self._acquire_read_lock()
+            
+            try:
+                actresses = self.data.get('actresses', {})
+                actress = actresses.get(actress_id)
+                
+                if actress:
+                    logger.debug(f"✅ 查詢女優成功: {actress_id}")
+                    return actress
+                else:
+                    logger.debug(f"⚠️ 女優不存在: {actress_id}")
+                    return None
+                    
+            finally:
+                self._release_locks()
+                
+        except LockError as e:
+            logger.error(f"❌ 無法獲取讀鎖定: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"❌ 查詢女優失敗: {e}")
+            raise
+    
+    def find_actress_by_name(self, name: str) -> Optional[ActressDict]:
+        """
+        依名稱查詢女優（透過名稱索引）
+        
+        Args:
+            name: 女優名稱
+            
+        Returns:
+            第一位名稱相符的女優資訊，若不存在則返回 None
+            
+        Raises:
+            LockError: 若無法獲得讀鎖定
+        """
+        try:
+            # 獲取讀鎖定
+            self._acquire_read_lock()
+            
+            try:
+                actress_ids = self._get_indexes().actress_ids_by_name(name)
+                if not actress_ids:
+                    logger.debug(f"⚠️ 女優不存在: {name}")
+                    return None
+                return self.data['actresses'][actress_ids[0]]
+                    
+            finally:
+                self._release_locks()
+                
+        except LockError as e:
+            logger.error(f"❌ 無法獲取讀鎖定: {e}")
             raise
         except Exception as e:
-            logger.error(f"❌ 未預期的錯誤: {e}")
-            raise CorruptedDataError(f"刪除影片失敗: {e}")
+            logger.error(f"❌ 查詢女優失敗: {e}")
+            raise
     
-    def add_or_update_actress(self, actress_info: ActressDict) -> str:
+    def get_video_links(self, video_id: str) -> List[VideoActressLinkDict]:
         """
-        新增或更新女優
-        
-        若女優 ID 已存在則更新，否則建立新記錄。
+        取得影片的所有影片-女優關聯（透過關聯索引）
         
         Args:
-            actress_info: 女優資訊 (ActressDict)
+            video_id: 影片 ID
             
         Returns:
-            女優 ID (新建或已更新)
+            關聯清單
             
         Raises:
-            ValidationError: 若女優資訊無效
-            LockError: 若無法獲得寫鎖定
-            CorruptedDataError: 若寫入失敗
+            LockError: 若無法獲得讀鎖定
         """
         try:
-            # 驗證輸入
-            if not isinstance(actress_info, dict):
-                raise ValidationError("女優資訊必須是字典")
-            
-            if 'id' not in actress_info:
-                raise ValidationError("女優 ID 必須存在")
-            
-            actress_id = actress_info.get('id')
-            
-            # 獲取寫鎖定
-            self._acquire_write_lock()
+            # 獲取讀鎖定
+            self._acquire_read_lock()
             
             try:
-                # 重新載入最新資料
-                self._load_data_internal()
-                
-                # 準備女優資料
-                actress_dict = get_empty_actress()
-                actress_dict.update(actress_info)
-                actress_dict['updated_at'] = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
-                
-                # 新增或更新
-                self.data['actresses'][actress_id] = actress_dict
-
-                # 驗證完整性
-                self._validate_referential_integrity(self.data)
-
-                # 更新統計快取（快取失效策略）
-                self._cache_statistics()
-
-                # 保存
-                self._save_all_data(self.data)
-
-                logger.info(f"✅ 女優已新增/更新: {actress_id}")
-                return actress_id
-                
+                positions = self._get_indexes().video_links.get(video_id, ())
+                links = self.data.get('links', [])
+                return [links[position] for position in sorted(positions)]
+                    
             finally:
                 self._release_locks()
                 
-        except (ValidationError, DataIntegrityError, LockError) as e:
-            logger.error(f"❌ 新增/更新女優失敗: {e}")
+        except LockError as e:
+            logger.error(f"❌ 無法獲取讀鎖定: {e}")
             raise
         except Exception as e:
-            logger.error(f"❌ 未預期的錯誤: {e}")
-            raise CorruptedDataError(f"新增/更新女優失敗: {e}")
+            logger.error(f"❌ 查詢關聯失敗: {e}")
+            raise
     
-    def get_actress_info(self, actress_id: str) -> Optional[ActressDict]:
+    def get_actress_links(self, actress_id: str) -> List[VideoActressLinkDict]:
         """
-        查詢女優資訊
+        取得女優的所有影片-女優關聯（透過關聯索引）
         
         Args:
             actress_id: 女優 ID
             
         Returns:
-            女優資訊，若不存在則返回 None
+            關聯清單
             
         Raises:
             LockError: 若無法獲得讀鎖定
@@ -953,15 +2380,9 @@ class JSONDBManager:
             self._acquire_read_lock()
             
             try:
-                actresses = self.data.get('actresses', {})
-                actress = actresses.get(actress_id)
-                
-                if actress:
-                    logger.debug(f"✅ 查詢女優成功: {actress_id}")
-                    return actress
-                else:
-                    logger.debug(f"⚠️ 女優不存在: {actress_id}")
-                    return None
+                positions = self._get_indexes().actress_links.get(actress_id, ())
+                links = self.data.get('links', [])
+                return [links[position] for position in sorted(positions)]
                     
             finally:
                 self._release_locks()
@@ -970,9 +2391,67 @@ class JSONDBManager:
             logger.error(f"❌ 無法獲取讀鎖定: {e}")
             raise
         except Exception as e:
-            logger.error(f"❌ 查詢女優失敗: {e}")
+            logger.error(f"❌ 查詢關聯失敗: {e}")
+            raise
+    
+    def export_data(self) -> JSONDatabaseDict:
+        """
+        取得完整資料庫字典（同步磁碟上的最新版本）
+        
+        回傳的字典即為記憶體快取，呼叫端不應修改。
+        
+        Returns:
+            資料庫字典
+            
+        Raises:
+            LockError: 若無法獲得讀鎖定
+        """
+        try:
+            # 可能替換記憶體資料，取得程序內獨佔鎖定（檔案鎖定為共享）
+            self._acquire_refresh_lock()
+            
+            try:
+                self._load_data_internal()
+                if self._statistics_dirty:
+                    self._cache_statistics()
+                return self.data
+                
+            finally:
+                self._release_locks()
+                
+        except LockError as e:
+            logger.error(f"❌ 無法獲取讀鎖定: {e}")
             raise
     
+    def import_data(self, data: JSONDatabaseDict) -> None:
+        """
+        以資料庫字典取代全部內容
+        
+        完整驗證後在寫鎖定下保存並替換記憶體資料：日誌模式重設日誌、
+        分片模式重寫變更的分片，變更記錄以重設通知其他程序，衍生資料
+        與快照於下次使用時重建。
+        
+        Args:
+            data: JSON 資料庫格式的字典（匯入後由資料庫持有，呼叫端不應再修改）
+            
+        Raises:
+            ValidationError: 若格式不正確
+            DataIntegrityError: 若完整性檢查失敗（不會修改資料庫）
+            LockError: 若無法獲得寫鎖定
+        """
+        self._validate_json_format(data)
+        self._validate_referential_integrity(data)
+        
+        # 替換記憶體資料後才釋放鎖定，讓快照一併更新
+        with self._locked(self._acquire_write_lock):
+            self._save_all_data(data)
+            self._prepare_records(data)
+            self.data = data
+            self._file_signature = self._read_file_signature()
+            self._invalidate_derived_state()
+        
+        logger.info(f"✅ 已匯入資料: {len(data.get('videos', {}))} 部影片")
+    
     def delete_actress(self, actress_id: str) -> bool:
         """
         刪除女優
@@ -995,7 +2474,7 @@ class JSONDBManager:
             
             try:
                 # 重新載入最新資料
-                self._load_data_internal()
+                self._reload_for_write()
                 
                 actresses = self.data.get('actresses', {})
                 
@@ -1004,21 +2483,8 @@ class JSONDBManager:
                     logger.warning(f"⚠️ 女優不存在: {actress_id}")
                     return False
                 
-                # 刪除女優
-                del actresses[actress_id]
-                
-                # 刪除相關的影片-女優關聯
-                links = self.data.get('links', [])
-                self.data['links'] = [link for link in links if link.get('actress_id') != actress_id]
-
-                # 驗證完整性
-                self._validate_referential_integrity(self.data)
-
-                # 更新統計快取（快取失效策略）
-                self._cache_statistics()
-
-                # 保存
-                self._save_all_data(self.data)
+                # 刪除女優及相關的影片-女優關聯並提交
+                self._commit_operations([{'op': 'delete_actress', 'id': actress_id}])
 
                 logger.info(f"✅ 女優已刪除: {actress_id}")
                 return True
@@ -1041,11 +2507,76 @@ class JSONDBManager:
     # 統計查詢快取機制 (T025)
     # ========================================================================
 
+    def _data_fingerprint(self) -> tuple:
+        """
+        取得資料結構指紋
+        
+        用於偵測 self.data 是否在 CRUD 之外被替換或直接修改，
+        此時增量統計與次要索引需要重建。
+        """
+        videos = self.data.get('videos', {})
+        actresses = self.data.get('actresses', {})
+        links = self.data.get('links', [])
+        return (
+            id(self.data), id(videos), len(videos),
+            id(actresses), len(actresses), id(links), len(links),
+        )
+    
+    def _invalidate_derived_state(self) -> None:
+        """捨棄增量統計與次要索引（下次使用時重建）"""
+        self._statistics_engine = None
+        self._indexes = None
+        self._derived_fingerprint = None
+        self._columns = None
+    
+    def _rebuild_derived_state(self) -> None:
+        """從目前資料完整重建增量統計與次要索引"""
+        self._statistics_engine = IncrementalStatistics(self.data)
+        self._indexes = SecondaryIndexes(self.data)
+        self._derived_fingerprint = self._data_fingerprint()
+    
+    def _ensure_derived_state(self) -> None:
+        """
+        確保增量統計與次要索引與目前資料同步
+        
+        首次使用或資料被直接替換時完整重建一次。讀鎖定下可能有
+        多個執行緒同時呼叫，重建以 _derived_lock 互斥。
+        """
+        if self._statistics_engine is None or self._derived_fingerprint != self._data_fingerprint():
+            with self._derived_lock:
+                if self._statistics_engine is None or self._derived_fingerprint != self._data_fingerprint():
+                    self._rebuild_derived_state()
+    
+    def _get_statistics_engine(self) -> IncrementalStatistics:
+        """取得與目前資料同步的增量統計累加器"""
+        self._ensure_derived_state()
+        return self._statistics_engine
+    
+    def _get_indexes(self) -> SecondaryIndexes:
+        """取得與目前資料同步的次要索引"""
+        self._ensure_derived_state()
+        return self._indexes
+    
+    def _get_columns(self) -> ColumnarStatistics:
+        """
+        取得與目前資料同步的欄式統計
+        
+        CRUD 操作後或資料被直接替換時，於下次使用時重新建立欄位。
+        """
+        fingerprint = self._data_fingerprint()
+        cached = self._columns
+        if cached is None or cached[0] != fingerprint:
+            with self._derived_lock:
+                cached = self._columns
+                if cached is None or cached[0] != fingerprint:
+                    cached = self._columns = (fingerprint, ColumnarStatistics(self.data))
+        return cached[1]
+    
     def _compute_statistics(self) -> Dict[str, Any]:
         """
         計算統計資訊 (T025)
 
-        計算所有統計指標並返回統計字典。
+        計算所有統計指標並返回統計字典（以欄式統計一次完成）。
 
         Returns:
             統計字典，包含:
@@ -1058,35 +2589,12 @@ class JSONDBManager:
             - computed_at: 計算時間
         """
         try:
-            # 計算各種統計
-            actress_stats = self._compute_actress_statistics_internal()
-            studio_stats = self._compute_studio_statistics_internal()
-            enhanced_stats = self._compute_enhanced_actress_studio_statistics_internal()
-
-            # 基本統計
-            total_videos = len(self.data.get('videos', {}))
-            total_actresses = len(self.data.get('actresses', {}))
-
-            # 計算片商數 (去重)
-            studios = set()
-            for video in self.data.get('videos', {}).values():
-                studio = video.get('studio')
-                if studio and studio != 'UNKNOWN':
-                    studios.add(studio)
-            total_studios = len(studios)
-
             computed_at = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
-
-            statistics = {
-                'actress_statistics': actress_stats,
-                'studio_statistics': studio_stats,
-                'enhanced_actress_studio_statistics': enhanced_stats,
-                'total_videos': total_videos,
-                'total_actresses': total_actresses,
-                'total_studios': total_studios,
-                'computed_at': computed_at
-            }
-
+            statistics = self._get_columns().materialize(computed_at)
+            
+            total_videos = statistics['total_videos']
+            total_actresses = statistics['total_actresses']
+            total_studios = statistics['total_studios']
             logger.info(f"✅ 統計計算完成: {total_videos} 部影片, {total_actresses} 位女優, {total_studios} 間片商")
             return statistics
 
@@ -1094,22 +2602,31 @@ class JSONDBManager:
             logger.error(f"❌ 統計計算失敗: {e}")
             raise
 
-    def _cache_statistics(self) -> None:
+    def _cache_statistics(self, full_recompute: bool = False) -> None:
         """
         更新統計快取 (T025)
 
-        計算統計並更新到 self.data['statistics']。
-        在新增/修改影片時自動呼叫此方法。
+        將統計更新到 self.data['statistics']。在新增/修改影片時自動呼叫此方法，
+        預設從增量統計累加器輸出；full_recompute 時才重新掃描全部資料。
+
+        Args:
+            full_recompute: 是否完整重新計算 (預設: False)
 
         Raises:
             LockError: 若無法獲得寫鎖定
         """
         try:
-            # 計算統計
-            statistics = self._compute_statistics()
+            if full_recompute:
+                # 完整計算並重建累加器
+                statistics = self._compute_statistics()
+                self._rebuild_derived_state()
+            else:
+                computed_at = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
+                statistics = self._get_statistics_engine().materialize(self.data, computed_at)
 
             # 更新快取
             self.data['statistics'] = statistics
+            self._statistics_dirty = False
 
             logger.info("✅ 統計快取已更新")
 
@@ -1117,74 +2634,204 @@ class JSONDBManager:
             logger.error(f"❌ 統計快取更新失敗: {e}")
             raise
 
-    def get_cached_statistics(self, force_refresh: bool = False) -> Dict[str, Any]:
+    def get_cached_statistics(self, force_refresh: bool = False, wait: bool = False) -> Dict[str, Any]:
         """
         獲取快取的統計資訊 (T025)
 
-        從快取中取得統計資訊，若快取不存在或需要重新整理則重新計算。
+        立即回傳最近一次計算的統計（stale-while-revalidate）。快取不存在
+        時由增量統計累加器輸出完整統計；force_refresh 時排程背景完整
+        重新計算，完成後才發佈新的統計；
+        重新計算期間的多次要求合併為一次。回傳的字典附加 stale 旗標，
+        表示是否仍有尚未完成的重新計算。
 
         Args:
             force_refresh: 是否強制重新計算統計 (預設: False)
+            wait: 是否等待重新計算完成後回傳最新結果 (預設: False)
 
         Returns:
-            統計字典，包含所有統計資訊
+            統計字典，包含所有統計資訊、computed_at 與 stale
 
         Raises:
             LockError: 若無法獲得鎖定
+            JSONDatabaseError: 若 wait 且背景重新計算失敗
         """
-        try:
-            # 獲取讀鎖定
-            self._acquire_read_lock()
+        if wait and self.rw_lock.is_write_owner():
+            # 持有寫鎖定（例如交易中）時背景執行緒無法取得鎖定，直接重新計算
+            if force_refresh or not self._has_statistics(self.data.get('statistics')):
+                self._cache_statistics(full_recompute=True)
+            return dict(self.data['statistics'], stale=False)
 
-            try:
-                statistics = self.data.get('statistics', {})
+        if force_refresh:
+            self._request_statistics_refresh()
+        elif not wait:
+            # 延遲載入完成前直接讀取檔案中的統計快取
+            statistics = self._lazy_read('statistics')
+            if statistics is not UNAVAILABLE and self._has_statistics(statistics):
+                return dict(statistics, stale=self.is_statistics_refreshing())
 
-                # 檢查快取是否存在且有效
-                has_valid_cache = (
-                    statistics and
-                    'computed_at' in statistics and
-                    'total_videos' in statistics
-                )
+        if wait:
+            self.wait_for_statistics_refresh()
 
-                if not has_valid_cache or force_refresh:
-                    # 釋放讀鎖，獲取寫鎖以更新快取
-                    self._release_locks()
-                    self._acquire_write_lock()
+        statistics = self._current_statistics()
 
-                    try:
-                        # 重新載入最新資料
-                        self._load_data_internal()
+        logger.info("✅ 取得統計快取成功")
+        return dict(statistics, stale=self.is_statistics_refreshing())
 
-                        # 重新計算統計
-                        self._cache_statistics()
+    def _current_statistics(self) -> Dict[str, Any]:
+        """
+        取得目前發佈的統計（不完整重新計算）
 
-                        # 保存到磁碟
-                        self._save_all_data(self.data)
+        快照附有統計時不獲取鎖定；快取不存在，或日誌/分片模式下快取
+        落後於記憶體資料時從增量累加器輸出。
 
-                        statistics = self.data.get('statistics', {})
+        Raises:
+            LockError: 若無法獲得讀鎖定
+        """
+        snapshot = self._snapshot
+        if self._serves_from_snapshot() and snapshot.cached_statistics is not None:
+            return snapshot.cached_statistics
 
-                    finally:
-                        # 寫鎖會在 finally 外層釋放
-                        pass
+        try:
+            self._acquire_read_lock()
 
-                logger.info("✅ 取得統計快取成功")
+            try:
+                statistics = self.data.get('statistics', {})
+                if self._statistics_dirty or not self._has_statistics(statistics):
+                    # 累加器與記憶體資料同步，輸出即為最新統計
+                    # （讀鎖定可由多個執行緒共享，更新快取需另行互斥）
+                    # 尚無統計快取時同樣由累加器輸出，首次呼叫即回傳完整統計
+                    with self._derived_lock:
+                        if self._statistics_dirty or not self._has_statistics(self.data.get('statistics')):
+                            self._cache_statistics()
+                    statistics = self.data.get('statistics', {})
                 return statistics
 
             finally:
                 self._release_locks()
 
         except LockError as e:
-            logger.error(f"❌ 無法獲取鎖定: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"❌ 取得統計快取失敗: {e}")
+            logger.error(f"❌ 無法獲取讀鎖定: {e}")
             raise
 
+    @staticmethod
+    def _has_statistics(statistics: Optional[Dict[str, Any]]) -> bool:
+        """統計快取是否存在且完整"""
+        return bool(statistics) and 'computed_at' in statistics and 'total_videos' in statistics
+
+    # ========================================================================
+    # 背景統計重新計算
+    # ========================================================================
+
+    def _request_statistics_refresh(self) -> int:
+        """
+        要求背景重新計算統計（已有工作執行緒時併入下一輪）
+
+        Returns:
+            此次要求的序號（供 wait_for_statistics_refresh 等待）
+        """
+        with self._statistics_refresh:
+            self._statistics_requested += 1
+            if self._statistics_refresh_thread is None:
+                self._statistics_refresh_thread = threading.Thread(
+                    target=self._statistics_refresh_worker,
+                    name="JSONDBManager-statistics-refresh", daemon=True
+                )
+                self._statistics_refresh_thread.start()
+            return self._statistics_requested
+
+    def _statistics_refresh_worker(self) -> None:
+        """處理重新計算要求，直到沒有新的要求為止"""
+        while True:
+            with self._statistics_refresh:
+                if self._statistics_completed >= self._statistics_requested:
+                    self._statistics_refresh_thread = None
+                    self._statistics_refresh.notify_all()
+                    return
+                target = self._statistics_requested
+
+            error: Optional[Exception] = None
+            try:
+                self._refresh_statistics()
+            except Exception as e:
+                logger.error(f"❌ 背景統計重新計算失敗: {e}")
+                error = e
+
+            with self._statistics_refresh:
+                self._statistics_completed = target
+                self._statistics_refresh_error = error
+                self._statistics_refresh.notify_all()
+
+    def _refresh_statistics(self) -> None:
+        """
+        完整重新計算統計並保存
+
+        在最新快照上計算（不持有鎖定），再於寫鎖定下發佈。計算期間
+        資料已變更時改由增量累加器輸出目前資料的統計，不發佈過期結果。
+        """
+        with self._locked(self._acquire_write_lock):
+            self._reload_for_write()
+
+        snapshot = self.snapshot()
+        statistics = snapshot.compute_statistics()
+
+        with self._locked(self._acquire_write_lock):
+            self._reload_for_write()
+            if self._snapshot is snapshot and snapshot.matches(self.data, self._dirty_containers):
+                self.data['statistics'] = statistics
+                self._statistics_dirty = False
+            else:
+                self._cache_statistics()
+            self._persist_statistics()
+
+        logger.info(f"✅ 統計已於背景重新計算: {statistics['total_videos']} 部影片")
+
+    def _persist_statistics(self) -> None:
+        """
+        保存重新計算的統計（需已獲取寫鎖定）
+
+        依儲存模式走一般的寫入路徑：快照模式重寫 data.json（同每次變更），
+        分片模式只寫出統計分片。日誌模式不寫入：統計可由重放日誌後的
+        累加器輸出，於下次壓縮時隨快照保存，不為此重寫快照並清空日誌。
+        """
+        if self._is_journal_mode():
+            return
+        if self._is_sharded_mode():
+            dirty_shards = self._dirty_shards | {ShardedStore.STATISTICS_SHARD}
+            self._save_all_data(self.data, validate=False, dirty_shards=dirty_shards)
+        else:
+            self._save_all_data(self.data, validate=False)
+
+    def is_statistics_refreshing(self) -> bool:
+        """是否有尚未完成的統計重新計算"""
+        with self._statistics_refresh:
+            return self._statistics_completed < self._statistics_requested
+
+    def wait_for_statistics_refresh(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待目前已要求的統計重新計算完成
+
+        Args:
+            timeout: 等待超時 (秒)，None 表示無限等待
+
+        Returns:
+            已完成則 True，逾時則 False
+
+        Raises:
+            JSONDatabaseError: 若重新計算失敗（原始例外）
+        """
+        with self._statistics_refresh:
+            target = self._statistics_requested
+            if not self._statistics_refresh.wait_for(lambda: self._statistics_completed >= target, timeout):
+                return False
+            if self._statistics_refresh_error is not None:
+                raise self._statistics_refresh_error
+            return True
+
     def refresh_statistics_cache(self) -> bool:
         """
         手動重新整理統計快取 (T025)
 
-        強制重新計算所有統計並更新快取。
+        強制重新計算所有統計並等待結果發佈。
 
         Returns:
             成功則返回 True
@@ -1193,7 +2840,7 @@ class JSONDBManager:
             LockError: 若無法獲得寫鎖定
         """
         try:
-            self.get_cached_statistics(force_refresh=True)
+            self.get_cached_statistics(force_refresh=True, wait=True)
             logger.info("✅ 統計快取手動重新整理成功")
             return True
 
@@ -1248,53 +2895,7 @@ class JSONDBManager:
         Returns:
             女優統計清單
         """
-        actresses = self.data.get('actresses', {})
-        videos = self.data.get('videos', {})
-        links = self.data.get('links', [])
-
-        # 建立 actress_id → video_ids 映射
-        actress_video_map: Dict[str, List[str]] = {}
-        for link in links:
-            actress_id = link.get('actress_id')
-            video_id = link.get('video_id')
-            if actress_id and video_id:
-                if actress_id not in actress_video_map:
-                    actress_video_map[actress_id] = []
-                actress_video_map[actress_id].append(video_id)
-
-        # 統計每位女優的資訊
-        statistics = []
-        for actress_id, actress in actresses.items():
-            actress_name = actress.get('name', '')
-
-            # 取得該女優的所有影片
-            video_ids = actress_video_map.get(actress_id, [])
-            video_count = len(video_ids)
-
-            # 收集片商資訊
-            studios = set()
-            studio_codes = set()
-
-            for video_id in video_ids:
-                video = videos.get(video_id)
-                if video:
-                    studio = video.get('studio')
-                    studio_code = video.get('studio_code')
-                    if studio:
-                        studios.add(studio)
-                    if studio_code:
-                        studio_codes.add(studio_code)
-
-            statistics.append({
-                'actress_name': actress_name,
-                'video_count': video_count,
-                'studios': sorted(list(studios)),
-                'studio_codes': sorted(list(studio_codes))
-            })
-
-        # 按出演部數降序排序
-        statistics.sort(key=lambda x: x['video_count'], reverse=True)
-
+        statistics = self._get_columns().actress_statistics()
         logger.debug(f"✅ 女優統計計算完成: {len(statistics)} 位女優")
         return statistics
     
@@ -1341,62 +2942,7 @@ class JSONDBManager:
         Returns:
             片商統計清單
         """
-        videos = self.data.get('videos', {})
-        links = self.data.get('links', [])
-
-        # 建立片商統計映射 {(studio, studio_code): {...}}
-        studio_stats: Dict[tuple, Dict[str, Any]] = {}
-
-        # 建立 video_id → actress_ids 映射
-        video_actress_map: Dict[str, set] = {}
-        for link in links:
-            video_id = link.get('video_id')
-            actress_id = link.get('actress_id')
-            if video_id and actress_id:
-                if video_id not in video_actress_map:
-                    video_actress_map[video_id] = set()
-                video_actress_map[video_id].add(actress_id)
-
-        # 遍歷所有影片
-        for video_id, video in videos.items():
-            studio = video.get('studio')
-            studio_code = video.get('studio_code', '')
-
-            # 過濾掉無片商的影片
-            if not studio:
-                continue
-
-            # 使用 (studio, studio_code) 作為鍵
-            key = (studio, studio_code)
-
-            if key not in studio_stats:
-                studio_stats[key] = {
-                    'studio': studio,
-                    'studio_code': studio_code,
-                    'video_count': 0,
-                    'actress_ids': set()
-                }
-
-            # 增加影片計數
-            studio_stats[key]['video_count'] += 1
-
-            # 收集女優 ID
-            if video_id in video_actress_map:
-                studio_stats[key]['actress_ids'].update(video_actress_map[video_id])
-
-        # 轉換為結果格式
-        statistics = []
-        for key, stats in studio_stats.items():
-            statistics.append({
-                'studio': stats['studio'],
-                'studio_code': stats['studio_code'],
-                'video_count': stats['video_count'],
-                'actress_count': len(stats['actress_ids'])
-            })
-
-        # 按影片數降序排序
-        statistics.sort(key=lambda x: x['video_count'], reverse=True)
-
+        statistics = self._get_columns().studio_statistics()
         logger.debug(f"✅ 片商統計計算完成: {len(statistics)} 間片商")
         return statistics
     
@@ -1459,92 +3005,75 @@ class JSONDBManager:
         Returns:
             增強交叉統計清單
         """
-        actresses = self.data.get('actresses', {})
-        videos = self.data.get('videos', {})
-        links = self.data.get('links', [])
-
-        # 建立 actress_id → actress_name 映射
-        actress_id_to_name = {
-            actress_id: actress.get('name', '')
-            for actress_id, actress in actresses.items()
-        }
-
-        # 建立統計映射 {(actress_id, studio, studio_code, role_type): {...}}
-        stats_map: Dict[tuple, Dict[str, Any]] = {}
-
-        # 遍歷所有關聯
-        for link in links:
-            actress_id = link.get('actress_id')
-            video_id = link.get('video_id')
-            role_type = link.get('role_type', 'primary')  # 預設為 primary
-            timestamp = link.get('timestamp', '')
-
-            if not actress_id or not video_id:
-                continue
-
-            # 取得女優名稱
-            name = actress_id_to_name.get(actress_id, '')
-
-            # 如果指定了 actress_name，則過濾
-            if actress_name and name != actress_name:
-                continue
-
-            # 取得影片資訊
-            video = videos.get(video_id)
-            if not video:
-                continue
-
-            studio = video.get('studio', '')
-            studio_code = video.get('studio_code', '')
-            video_code = video.get('id', '')
-
-            # 過濾掉無片商或 UNKNOWN 的影片
-            if not studio or studio == 'UNKNOWN':
-                continue
-
-            # 使用 (actress_id, studio, studio_code, role_type) 作為鍵
-            key = (actress_id, studio, studio_code, role_type)
-
-            if key not in stats_map:
-                stats_map[key] = {
-                    'actress_name': name,
-                    'studio': studio,
-                    'studio_code': studio_code,
-                    'association_type': role_type,
-                    'video_count': 0,
-                    'video_codes': [],
-                    'first_appearance': timestamp,
-                    'latest_appearance': timestamp
-                }
-
-            # 更新統計
-            stats = stats_map[key]
-            stats['video_count'] += 1
-            stats['video_codes'].append(video_code)
-
-            # 更新日期範圍
-            if timestamp:
-                if not stats['first_appearance'] or timestamp < stats['first_appearance']:
-                    stats['first_appearance'] = timestamp
-                if not stats['latest_appearance'] or timestamp > stats['latest_appearance']:
-                    stats['latest_appearance'] = timestamp
-
-        # 轉換為結果格式
-        statistics = list(stats_map.values())
-
-        # 排序：如果指定女優則按影片數降序，否則按女優名稱+影片數
-        if actress_name:
-            statistics.sort(key=lambda x: x['video_count'], reverse=True)
-        else:
-            statistics.sort(key=lambda x: (x['actress_name'], -x['video_count']))
-
+        statistics = self._get_columns().enhanced_statistics(actress_name)
         logger.debug(f"✅ 增強女優片商統計計算完成: {len(statistics)} 筆記錄")
         return statistics
     
+    def _actress_studio_breakdown(self, actress_name: str) -> List[StudioBreakdownRow]:
+        """
+        依片商與關聯類型分組女優的影片（透過名稱與女優→影片索引）
+        
+        找不到同名女優時，將名稱視為女優 ID。
+        
+        Args:
+            actress_name: 女優名稱
+            
+        Returns:
+            (片商, 片商代碼, 關聯類型, 影片代碼清單) 清單
+        """
+        try:
+            self._acquire_read_lock()
+            
+            try:
+                indexes = self._get_indexes()
+                videos = self.data.get('videos', {})
+                actress_ids = indexes.actress_ids_by_name(actress_name) or [actress_name]
+                return breakdown_actress_videos(videos, actress_ids, indexes.actress_videos)
+                
+            finally:
+                self._release_locks()
+                
+        except LockError as e:
+            logger.error(f"❌ 無法獲取讀鎖定: {e}")
+            raise
+    
     # ========================================================================
     # 輔助方法
     # ========================================================================
     
+    def _query_videos_internal(self, filter_dict: Optional[Dict[str, Any]] = None) -> List[VideoDict]:
+        """
+        內部影片查詢方法（不獲取鎖）
+        
+        片商與發行日期條件透過次要索引取得候選影片，
+        只對候選影片套用其餘條件。
+        
+        Args:
+            filter_dict: 過濾條件
+            
+        Returns:
+            影片清單
+        """
+        videos = self.data.get('videos', {})
+        if not filter_dict:
+            return list(videos.values())
+        
+        indexes = self._get_indexes()
+        
+        if 'studio' in filter_dict:
+            candidates = [videos[v] for v in indexes.video_ids_by_studio(filter_dict['studio'])]
+            remaining = {k: v for k, v in filter_dict.items() if k != 'studio'}
+            return self._apply_video_filters(candidates, remaining)
+        
+        if 'release_date_after' in filter_dict or 'release_date_before' in filter_dict:
+            video_ids = indexes.video_ids_by_release_date(
+                filter_dict.get('release_date_after'),
+                filter_dict.get('release_date_before')
+            )
+            return [videos[v] for v in video_ids]
+        
+        return self._apply_video_filters(list(videos.values()), filter_dict)
+    
     @staticmethod
     def _apply_video_filters(videos: List[VideoDict], filter_dict: Dict[str, Any]) -> List[VideoDict]:
         """
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫次要索引 (SecondaryIndexes)
+
+此模組維護與 self.data 同步的記憶體索引，包括：
+- 影片 → 關聯位置、女優 → 關聯位置
+- 片商 → 影片 ID
+- 女優名稱 → 女優 ID
+- 搜尋狀態 → 影片 ID
+- 依發行日期、最後搜尋時間排序的影片索引
+
+並依索引為 VideoQuery 的條件選擇候選影片 (plan)。
+
+關聯以其在 data['links'] 中的位置索引，刪除時保持其餘關聯的順序
+（與 WAL 重播的結果相同），只重新索引被移除位置之後的關聯。
+"""
+
+import bisect
+import heapq
+import logging
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from src.models.video_query import Predicate, Eq, In, Prefix, Range, HasActress, AnyOf, normalize_search_date
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+class _SortedIndex:
+    """依欄位值排序的影片 ID（兩個平行清單，以 bisect 查詢）
+
+    項目依 (值, 影片 ID) 排序，順序與新增/刪除的歷程無關。新增的項目先暫存，於下次讀取時排序後一次合併，大量新增（例如
+    bulk_upsert_videos）只需 O(n log n)，不必逐筆 list.insert。
+    """
+
+    # 暫存項目不超過此數時逐筆插入，避免為少量新增重建整個清單
+    MERGE_THRESHOLD = 8
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()):
+        entries = sorted(entries)
+        self._values: List[str] = [value for value, _ in entries]
+        self._video_ids: List[str] = [video_id for _, video_id in entries]
+        self._pending: List[Tuple[str, str]] = []
+
+    @property
+    def values(self) -> List[str]:
+        self._flush()
+        return self._values
+
+    @property
+    def video_ids(self) -> List[str]:
+        self._flush()
+        return self._video_ids
+
+    def add(self, value: str, video_id: str) -> None:
+        self._pending.append((value, video_id))
+
+    def remove(self, value: str, video_id: str) -> None:
+        self._flush()
+        position = self._position(value, video_id)
+        if position < len(self._values) and self._values[position] == value \
+                and self._video_ids[position] == video_id:
+            del self._values[position]
+            del self._video_ids[position]
+
+    def _position(self, value: str, video_id: str) -> int:
+        """(值, 影片 ID) 的排序位置（相同值的項目依影片 ID 排序）"""
+        low = bisect.bisect_left(self._values, value)
+        high = bisect.bisect_right(self._values, value, low)
+        return bisect.bisect_left(self._video_ids, video_id, low, high)
+
+    def _flush(self) -> None:
+        """合併暫存的新增項目"""
+        if not self._pending:
+            return
+        pending = sorted(self._pending)
+        self._pending = []
+        if len(pending) <= self.MERGE_THRESHOLD:
+            for value, video_id in pending:
+                position = self._position(value, video_id)
+                self._values.insert(position, value)
+                self._video_ids.insert(position, video_id)
+            return
+        # 建立新清單而非就地修改：既有的 _Slice 仍參照合併前的清單
+        merged = list(heapq.merge(zip(self._values, self._video_ids), pending))
+        self._values = [value for value, _ in merged]
+        self._video_ids = [video_id for _, video_id in merged]
+
+    def bounds(
+        self,
+        low: Optional[str] = None,
+        high: Optional[str] = None,
+        include_low: bool = True,
+        include_high: bool = True
+    ) -> Tuple[int, int]:
+        """取得值在範圍內的位置區間 [start, end)"""
+        if low is None:
+            start = 0
+        else:
+            start = (bisect.bisect_left if include_low else bisect.bisect_right)(self.values, low)
+        if high is None:
+            end = len(self.values)
+        else:
+            end = (bisect.bisect_right if include_high else bisect.bisect_left)(self.values, high)
+        return start, max(start, end)
+
+
+class _Slice:
+    """排序索引的位置區間（不複製 ID 清單）"""
+
+    def __init__(self, video_ids: List[str], start: int, end: int):
+        self._video_ids = video_ids
+        self._range = range(start, end)
+
+    def __len__(self) -> int:
+        return len(self._range)
+
+    def __iter__(self) -> Iterator[str]:
+        video_ids = self._video_ids
+        return (video_ids[position] for position in self._range)
+
+
+class SecondaryIndexes:
+    """次要索引類別
+
+    Attributes:
+        video_links: 影片 ID → data['links'] 位置集合
+        actress_links: 女優 ID → data['links'] 位置集合
+        studio_videos: 片商名稱 → 影片 ID (保持插入順序，含空值)
+        actress_names: 女優名稱 → 女優 ID (保持插入順序)
+        actress_videos: 女優 ID → actresses 欄位中引用該女優的影片 ID
+        status_videos: 搜尋狀態 → 影片 ID (保持插入順序，含空值)
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        """
+        初始化 SecondaryIndexes
+
+        Args:
+            data: 資料庫字典，若提供則立即建立索引
+        """
+        self._reset()
+        if data is not None:
+            self.rebuild(data)
+
+    def _reset(self) -> None:
+        """清空所有索引"""
+        self.video_links: Dict[str, Set[int]] = {}
+        self.actress_links: Dict[str, Set[int]] = {}
+        self.studio_videos: Dict[Optional[str], Dict[str, None]] = {}
+        self.actress_names: Dict[str, Dict[str, None]] = {}
+        self.actress_videos: Dict[str, Dict[str, None]] = {}
+        self.status_videos: Dict[Optional[str], Dict[str, None]] = {}
+        # 缺少發行日期的影片以空字串加入；未搜尋過的影片不加入搜尋時間索引
+        self._release_dates = _SortedIndex()
+        self._search_dates = _SortedIndex()
+
+    def rebuild(self, data: Dict[str, Any]) -> None:
+        """
+        從資料完整重建索引
+
+        Args:
+            data: 資料庫字典
+        """
+        self._reset()
+
+        release_dates = []
+        search_dates = []
+        for video_id, video in data.get('videos', {}).items():
+            self._register_video_keys(video_id, video)
+            release_dates.append((self._release_date(video), video_id))
+            search_date = self._search_date(video)
+            if search_date:
+                search_dates.append((search_date, video_id))
+        self._release_dates = _SortedIndex(release_dates)
+        self._search_dates = _SortedIndex(search_dates)
+
+        for actress_id, actress in data.get('actresses', {}).items():
+            self.add_actress(actress_id, actress)
+
+        for position, link in enumerate(data.get('links', [])):
+            self._register_link(link, position)
+
+        logger.debug(f"✅ 次要索引已重建: {len(data.get('videos', {}))} 部影片")
+
+    # ========================================================================
+    # 影片與女優
+    # ========================================================================
+
+    def add_video(self, video_id: str, video: Dict[str, Any]) -> None:
+        """將影片加入索引"""
+        self._register_video_keys(video_id, video)
+        self._release_dates.add(self._release_date(video), video_id)
+        search_date = self._search_date(video)
+        if search_date:
+            self._search_dates.add(search_date, video_id)
+
+    def remove_video(self, video_id: str, video: Dict[str, Any]) -> None:
+        """將影片自索引移除"""
+        self._unregister_key(self.studio_videos, video.get('studio'), video_id)
+        self._unregister_key(self.status_videos, video.get('search_status'), video_id)
+        for actress_id in video.get('actresses', ()):
+            self._unregister_key(self.actress_videos, actress_id, video_id)
+
+        self._release_dates.remove(self._release_date(video), video_id)
+        search_date = self._search_date(video)
+        if search_date:
+            self._search_dates.remove(search_date, video_id)
+
+    def _register_video_keys(self, video_id: str, video: Dict[str, Any]) -> None:
+        self.studio_videos.setdefault(video.get('studio'), {})[video_id] = None
+        self.status_videos.setdefault(video.get('search_status'), {})[video_id] = None
+        for actress_id in video.get('actresses', ()):
+            self.actress_videos.setdefault(actress_id, {})[video_id] = None
+
+    @staticmethod
+    def _unregister_key(index: Dict[Any, Dict[str, None]], key: Any, video_id: str) -> None:
+        video_ids = index.get(key)
+        if video_ids is not None:
+            video_ids.pop(video_id, None)
+            if not video_ids:
+                del index[key]
+
+    def add_actress(self, actress_id: str, actress: Dict[str, Any]) -> None:
+        """將女優加入名稱索引"""
+        name = actress.get('name')
+        if name:
+            self.actress_names.setdefault(name, {})[actress_id] = None
+
+    def remove_actress(self, actress_id: str, actress: Dict[str, Any]) -> None:
+        """將女優自名稱索引移除"""
+        name = actress.get('name')
+        if name and name in self.actress_names:
+            self.actress_names[name].pop(actress_id, None)
+            if not self.actress_names[name]:
+                del self.actress_names[name]
+
+    # ========================================================================
+    # 關聯
+    # ========================================================================
+
+    def remove_links(self, links: List[Dict[str, Any]], positions: Iterable[int]) -> None:
+        """
+        就地移除指定位置的關聯
+
+        其餘關聯保持原本的順序，只有第一個被移除位置之後的關聯
+        需要重新索引。
+
+        Args:
+            links: data['links'] 清單（會被就地修改）
+            positions: 要移除的位置
+        """
+        removed = set(positions)
+        if not removed:
+            return
+        first = min(removed)
+        tail = links[first:]
+        for offset, link in enumerate(tail):
+            self._unregister_link(link, first + offset)
+        kept = [link for offset, link in enumerate(tail) if first + offset not in removed]
+        links[first:] = kept
+        for offset, link in enumerate(kept):
+            self._register_link(link, first + offset)
+
+    def _register_link(self, link: Dict[str, Any], position: int) -> None:
+        video_id = link.get('video_id')
+        actress_id = link.get('actress_id')
+        if video_id:
+            self.video_links.setdefault(video_id, set()).add(position)
+        if actress_id:
+            self.actress_links.setdefault(actress_id, set()).add(position)
+
+    def _unregister_link(self, link: Dict[str, Any], position: int) -> None:
+        for index, key in ((self.video_links, link.get('video_id')),
+                           (self.actress_links, link.get('actress_id'))):
+            positions = index.get(key)
+            if positions is not None:
+                positions.discard(position)
+                if not positions:
+                    del index[key]
+
+    # ========================================================================
+    # 查詢
+    # ========================================================================
+
+    def video_ids_by_studio(self, studio: Optional[str]) -> List[str]:
+        """取得片商的影片 ID（依插入順序）"""
+        return list(self.studio_videos.get(studio, ()))
+
+    def video_ids_by_release_date(
+        self,
+        after: Optional[str] = None,
+        before: Optional[str] = None
+    ) -> List[str]:
+        """
+        取得發行日期在範圍內的影片 ID（依日期排序）
+
+        比較方式與字串比較相同，缺少日期的影片視為空字串。
+
+        Args:
+            after: 發行日期下限（含）
+            before: 發行日期上限（含）
+        """
+        start, end = self._release_dates.bounds(after, before)
+        return self._release_dates.video_ids[start:end]
+
+    def actress_ids_by_name(self, name: str) -> List[str]:
+        """取得名稱相符的女優 ID"""
+        return list(self.actress_names.get(name, ()))
+
+    # ========================================================================
+    # 查詢規劃
+    # ========================================================================
+
+    def plan(
+        self,
+        predicates: Sequence[Predicate],
+        videos: Dict[str, Any]
+    ) -> Tuple[Optional[Predicate], Optional[Iterable[str]]]:
+        """
+        為 AND 條件選擇候選影片數最少的索引
+
+        Args:
+            predicates: VideoQuery 的條件
+            videos: data['videos']（ID 條件直接以字典查詢）
+
+        Returns:
+            (使用的條件, 候選影片 ID)；沒有可用索引時為 (None, None)。
+            候選影片恰好是符合該條件的影片，不需再比對該條件。
+        """
+        best: Tuple[Optional[Predicate], Optional[List[Any]]] = (None, None)
+        best_size = None
+        for predicate in predicates:
+            sources = self._sources(predicate, videos)
+            if sources is None:
+                continue
+            size = sum(len(source) for source in sources)
+            if best_size is None or size < best_size:
+                best, best_size = (predicate, sources), size
+
+        predicate, sources = best
+        if sources is None:
+            return None, None
+        if len(sources) == 1:
+            return predicate, sources[0]
+        # 多個來源可能重疊（例如 AnyOf），合併並去除重複
+        return predicate, dict.fromkeys(video_id for source in sources for video_id in source)
+
+    def _sources(self, predicate: Predicate, videos: Dict[str, Any]) -> Optional[List[Any]]:
+        """取得條件對應的索引來源（各來源為影片 ID 的集合）；無索引時 None"""
+        if isinstance(predicate, (Eq, In)):
+            values = (predicate.value,) if isinstance(predicate, Eq) else predicate.values
+            if predicate.field == 'id':
+                return [[video_id for video_id in values if video_id in videos]]
+            keyed = {'studio': self.studio_videos, 'search_status': self.status_videos}.get(predicate.field)
+            if keyed is None:
+                return None
+            return [keyed[value] for value in values if value in keyed]
+
+        if isinstance(predicate, HasActress):
+            return [self.actress_videos.get(predicate.actress_id, {})]
+
+        if isinstance(predicate, (Range, Prefix)):
+            index = {'release_date': self._release_dates, 'last_search_date': self._search_dates}.get(predicate.field)
+            if index is None:
+                return None
+            if isinstance(predicate, Prefix):
+                # 搜尋日期索引存放 UTC 值，前綴比對原始字串
+                if not predicate.prefix or index is self._search_dates:
+                    return None
+                start, end = index.bounds(predicate.prefix, predicate.upper_bound(), include_high=False)
+            else:
+                start, end = index.bounds(predicate.low, predicate.high, predicate.include_low, predicate.include_high)
+                # 空白值（缺少發行日期）不符合範圍條件
+                start = max(start, bisect.bisect_right(index.values, '', 0, end))
+            return [_Slice(index.video_ids, start, end)]
+
+        if isinstance(predicate, AnyOf):
+            sources: List[Any] = []
+            for branch in predicate.predicates:
+                branch_sources = self._sources(branch, videos)
+                if branch_sources is None:
+                    return None
+                sources.extend(branch_sources)
+            return sources
+
+        return None
+
+    @staticmethod
+    def _release_date(video: Dict[str, Any]) -> str:
+        return video.get('release_date') or ''
+
+    @staticmethod
+    def _search_date(video: Dict[str, Any]) -> Optional[str]:
+        # 與 Range 相同轉為 UTC，混合 '...Z' 與本地時間的記錄也能依序比較
+        return normalize_search_date(video.get('last_search_date'))
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫預寫日誌 (Write-Ahead Log)
+
+此模組提供 JSONDBManager 日誌模式所使用的附加式 WAL 檔案，包括：
+- 以單行緊湊 JSON 記錄每次提交的變更操作
+- 以世代編號 (generation) 對應 data.json 快照
+- 讀取時容忍程序中斷造成的殘缺尾端記錄
+"""
+
+import os
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timezone
+
+from src.models import json_codec
+from src.models.json_types import (
+    CorruptedDataError,
+    ISO_DATETIME_FORMAT,
+)
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+
+class WriteAheadLog:
+    """附加式預寫日誌類別
+
+    檔案格式為 JSON Lines：
+    - 第一行為標頭 {"journal": ..., "version": ..., "generation": N}
+    - 之後每行為一次提交 {"seq": n, "ts": "...", "ops": [...]}
+
+    Attributes:
+        path: 日誌檔案路徑
+        record_count: 目前日誌中的提交記錄數
+    """
+
+    JOURNAL_FORMAT = "json_db_wal"
+    JOURNAL_VERSION = 1
+
+    def __init__(self, path: Path):
+        """
+        初始化 WriteAheadLog
+
+        Args:
+            path: 日誌檔案路徑
+        """
+        self.path = Path(path)
+        self.record_count = 0
+        self._next_seq = 1
+
+    @staticmethod
+    def _encode(obj: Dict[str, Any]) -> bytes:
+        """將記錄編碼為單行緊湊 JSON"""
+        return json_codec.dumps(obj) + b"\n"
+
+    def exists(self) -> bool:
+        """日誌檔案是否存在"""
+        return self.path.exists()
+
+    def size(self) -> int:
+        """日誌檔案大小 (bytes)"""
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def read_generation(self) -> Optional[int]:
+        """
+        讀取日誌標頭中的世代編號
+
+        Returns:
+            世代編號，若檔案不存在或標頭無效則返回 None
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                header_line = f.readline()
+            header = json_codec.loads(header_line)
+            if header.get('journal') != self.JOURNAL_FORMAT:
+                return None
+            return int(header.get('generation', 0))
+        except (FileNotFoundError, ValueError, UnicodeDecodeError):
+            return None
+
+    def reset(self, generation: int) -> int:
+        """
+        重設日誌（僅保留標頭）
+
+        以原子替換方式寫入新的標頭，用於快照壓縮之後。
+
+        Args:
+            generation: 對應快照的世代編號
+
+        Returns:
+            標頭之後的位移量（下一筆記錄的起點）
+        """
+        header = self._encode({
+            'journal': self.JOURNAL_FORMAT,
+            'version': self.JOURNAL_VERSION,
+            'generation': generation,
+        })
+        temp_file = self.path.parent / f"{self.path.name}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+        temp_file.replace(self.path)
+
+        self.record_count = 0
+        self._next_seq = 1
+        logger.debug(f"✅ 日誌已重設: 世代 {generation}")
+        return len(header)
+
+    def append(self, operations: List[Dict[str, Any]]) -> int:
+        """
+        附加一筆提交記錄
+
+        整批操作寫成同一行，確保重放時整批生效或整批忽略。
+
+        Args:
+            operations: 變更操作清單
+
+        Returns:
+            寫入後的檔案位移量
+        """
+        record = {
+            'seq': self._next_seq,
+            'ts': datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT),
+            'ops': operations,
+        }
+        payload = self._encode(record)
+
+        with open(self.path, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+
+        self._next_seq += 1
+        self.record_count += 1
+        return offset
+
+    def read_entries(self, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        從指定位移讀取提交記錄
+
+        最後一行若不完整（程序中斷造成）會被忽略並截斷；
+        中間行損壞則視為資料損壞。
+
+        Args:
+            offset: 起始位移 (0 表示從標頭之後開始)
+
+        Returns:
+            (提交記錄清單, 最後一筆完整記錄之後的位移)
+
+        Raises:
+            CorruptedDataError: 若日誌中間記錄損壞
+        """
+        entries: List[Dict[str, Any]] = []
+
+        with open(self.path, 'rb') as f:
+            if offset <= 0:
+                f.readline()  # 略過標頭
+            else:
+                f.seek(offset)
+            position = f.tell()
+            lines = f.read().split(b"\n")
+
+        # split 後最後一段若非空則為未以換行結尾的殘缺記錄
+        torn_tail = lines.pop() != b""
+        for index, line in enumerate(lines):
+            try:
+                entry = json_codec.loads(line)
+            except (ValueError, UnicodeDecodeError) as e:
+                if index == len(lines) - 1 and not torn_tail:
+                    torn_tail = True
+                    break
+                raise CorruptedDataError(f"日誌記錄損壞 (位移 {position}): {e}")
+            entries.append(entry)
+            position += len(line) + 1
+
+        if torn_tail:
+            logger.warning(f"⚠️ 日誌尾端記錄不完整，已截斷於位移 {position}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(position)
+
+        for entry in entries:
+            self._next_seq = max(self._next_seq, int(entry.get('seq', 0)) + 1)
+        if offset <= 0:
+            self.record_count = len(entries)
+        else:
+            self.record_count += len(entries)
+
+        return entries, position
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫延遲載入 (LazySnapshotReader)
+
+延遲載入模式下，JSONDBManager 初始化時只以 mmap 開啟 data.json，
+完整解析與驗證改在背景執行緒進行。背景載入完成前：
+- 以輕量的位移索引定位影片/女優記錄，點查詢時才解析單筆記錄
+- 頂層欄位（例如統計快取）同樣可單獨解析
+
+同一個位移索引也用於比較舊格式的完整備份檔（見 MappedRecords），
+記錄於讀取時逐筆解析，不必整份載入。
+
+位移索引依 _write_snapshot 寫出的 2 格縮排配置掃描：頂層欄位位於
+以 2 個空白開頭的行，影片/女優記錄位於以 4 個空白開頭的行。JSON 字串
+內的換行一律跳脫，因此不會誤判。緊湊格式 (compact_json) 無法建立索引，
+此時點查詢等待完整載入。
+"""
+
+import re
+import json
+import mmap
+import os
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Iterator, Mapping, Optional, Tuple
+
+from src.models import json_codec
+from src.models.json_types import CorruptedDataError
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 縮排配置中的頂層欄位與記錄鍵
+_TOP_LEVEL_KEY = re.compile(rb'\n  "((?:[^"\\]|\\.)*)": ')
+_RECORD_KEY = re.compile(rb'\n    "((?:[^"\\]|\\.)*)": ')
+
+# 建立位移索引的記錄容器
+INDEXED_CONTAINERS = ('videos', 'actresses')
+
+# 位移索引無法使用時 lookup 的回傳值
+UNAVAILABLE = object()
+
+
+class LazySnapshotReader:
+    """data.json 的記憶體對映讀取器與背景載入狀態
+
+    Attributes:
+        path: data.json 路徑
+        signature: 開啟時的檔案簽章 (inode, 大小, 修改時間 ns)
+        index_ready: 位移索引建立完成（或確定無法建立）時設定
+        loaded: 背景完整載入結束（成功或失敗）時設定
+        error: 背景載入失敗時的例外
+    """
+
+    def __init__(self, path: Path):
+        """
+        開啟並對映檔案（不解析內容）
+
+        Args:
+            path: data.json 路徑
+
+        Raises:
+            OSError: 若檔案無法開啟或為空檔案
+        """
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            # mmap 保有自己的檔案描述元；檔案被原子替換後仍對映原本的內容
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.index_ready = threading.Event()
+        self.loaded = threading.Event()
+        self.error: Optional[BaseException] = None
+        self._sections: Dict[str, Tuple[int, int]] = {}
+        self._offsets: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self._cache: Dict[Tuple[str, str], Any] = {}
+        # 保護對映區域的讀取與關閉
+        self._map_lock = threading.Lock()
+
+    # ========================================================================
+    # 位移索引
+    # ========================================================================
+
+    def build_index(self) -> bool:
+        """
+        掃描頂層欄位與記錄的位移（不解析 JSON）
+
+        Returns:
+            成功建立則 True；檔案不是縮排配置時 False
+        """
+        try:
+            data = self._map
+            if data[:2] != b'{\n':
+                logger.debug(f"⚠️ 非縮排配置，無法建立位移索引: {self.path}")
+                return False
+
+            closing = data.rfind(b'\n}')
+            matches = list(_TOP_LEVEL_KEY.finditer(data, 0, closing))
+            for i, match in enumerate(matches):
+                # 值延伸到下一個頂層欄位前的逗號，最後一個延伸到結尾的 '}'
+                end = matches[i + 1].start() - 1 if i + 1 < len(matches) else closing
+                self._sections[self._decode_key(match.group(1))] = (match.end(), end)
+
+            for name in INDEXED_CONTAINERS:
+                self._offsets[name] = self._index_records(name)
+
+            logger.debug(
+                f"✅ 位移索引已建立: {len(self._offsets['videos'])} 部影片, "
+                f"{len(self._offsets['actresses'])} 位女優"
+            )
+            return True
+        finally:
+            self.index_ready.set()
+
+    def _index_records(self, name: str) -> Dict[str, Tuple[int, int]]:
+        """建立容器內各記錄的 (起點, 終點) 位移"""
+        offsets: Dict[str, Tuple[int, int]] = {}
+        if name not in self._sections:
+            return offsets
+
+        start, end = self._sections[name]
+        section_close = self._map.rfind(b'\n  }', start, end)
+        if section_close < 0:
+            return offsets  # 空容器 "{}"
+
+        matches = list(_RECORD_KEY.finditer(self._map, start, section_close))
+        for i, match in enumerate(matches):
+            record_end = matches[i + 1].start() - 1 if i + 1 < len(matches) else section_close
+            offsets[self._decode_key(match.group(1))] = (match.end(), record_end)
+        return offsets
+
+    @staticmethod
+    def _decode_key(raw: bytes) -> str:
+        if b'\\' not in raw:
+            return raw.decode('utf-8')
+        return json.loads(b'"' + raw + b'"')
+
+    # ========================================================================
+    # 讀取
+    # ========================================================================
+
+    def lookup(self, container: str, key: str) -> Any:
+        """
+        解析單筆記錄（等待位移索引建立）
+
+        Args:
+            container: 'videos' 或 'actresses'
+            key: 記錄 ID
+
+        Returns:
+            記錄字典；不存在時 None；無位移索引時 UNAVAILABLE
+        """
+        self.index_ready.wait()
+        offsets = self._offsets.get(container)
+        if offsets is None:
+            return UNAVAILABLE
+
+        return self._read((container, key), offsets.get(key))
+
+    def read_section(self, name: str) -> Any:
+        """
+        解析單一頂層欄位（等待位移索引建立）
+
+        Returns:
+            欄位值；不存在時 None；無位移索引時 UNAVAILABLE
+        """
+        self.index_ready.wait()
+        if not self._offsets:
+            return UNAVAILABLE
+
+        return self._read(('', name), self._sections.get(name))
+
+    def _read(self, cache_key: Tuple[str, str], span: Optional[Tuple[int, int]]) -> Any:
+        if cache_key not in self._cache:
+            with self._map_lock:
+                if self._map.closed:
+                    return UNAVAILABLE
+                raw = self._map[span[0]:span[1]] if span else None
+            try:
+                self._cache[cache_key] = json_codec.loads(raw) if raw is not None else None
+            except ValueError as e:
+                # 記錄損壞：交由完整載入回報錯誤
+                logger.debug(f"⚠️ 無法解析 {cache_key}: {e}")
+                return UNAVAILABLE
+        return self._cache[cache_key]
+
+    def records(self, container: str) -> Optional["MappedRecords"]:
+        """
+        容器內記錄的唯讀對映（逐筆解析、不快取，等待位移索引建立）
+
+        Returns:
+            MappedRecords；無位移索引時 None
+        """
+        self.index_ready.wait()
+        if container not in self._offsets:
+            return None
+        return MappedRecords(self, self._offsets[container])
+
+    def parse_span(self, span: Tuple[int, int]) -> Any:
+        """
+        解析指定範圍（不快取）
+
+        Raises:
+            CorruptedDataError: 若已解除對映或內容無法解析
+        """
+        with self._map_lock:
+            if self._map.closed:
+                raise CorruptedDataError(f"檔案已關閉: {self.path}")
+            raw = self._map[span[0]:span[1]]
+        try:
+            return json_codec.loads(raw)
+        except ValueError as e:
+            raise CorruptedDataError(f"記錄損壞 ({self.path}): {e}")
+
+    def read_all(self) -> bytes:
+        """讀取完整檔案內容"""
+        with self._map_lock:
+            return self._map[:]
+
+    def close(self) -> None:
+        """解除對映（之後的點查詢回傳 UNAVAILABLE）"""
+        with self._map_lock:
+            if not self._map.closed:
+                self._map.close()
+
+
+class MappedRecords(Mapping):
+    """以位移索引逐筆解析的唯讀記錄容器
+
+    只保存記錄的位移，每次取值時解析該筆記錄；迭代整個容器時
+    記憶體用量與單筆記錄大小成正比。
+    """
+
+    def __init__(self, reader: LazySnapshotReader, offsets: Dict[str, Tuple[int, int]]):
+        self._reader = reader
+        self._offsets = offsets
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        return self._reader.parse_span(self._offsets[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
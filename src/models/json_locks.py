@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫鎖定 (RWLock / SharedFileLock)
+
+此模組提供 JSONDBManager 使用的兩層鎖定：
+- RWLock: 程序內讀寫鎖，多個執行緒可同時讀取記憶體資料
+- SharedFileLock: 跨程序檔案鎖，支援共享 (讀) 與獨佔 (寫) 模式
+
+POSIX 系統以 flock 實作共享鎖定；沒有 fcntl 的平台 (Windows)
+退回 filelock 的獨佔鎖定，行為正確但跨程序讀取不能並行。
+"""
+
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from filelock import FileLock, Timeout
+
+from src.models.json_types import LockError
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 等待檔案鎖定時的輪詢間隔（秒）
+_POLL_INTERVAL = 0.05
+
+
+class RWLock:
+    """程序內讀寫鎖（寫入優先，可重入）
+
+    - 多個執行緒可同時持有讀鎖定，寫鎖定為獨佔
+    - 有寫入者等待時，新的讀取者會等待，避免寫入者飢餓
+    - 已持有鎖定的執行緒可重入；持有寫鎖定時取得讀鎖定視為寫鎖定重入
+    - 不支援由讀鎖定升級為寫鎖定（會造成兩個讀取者互相等待）
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: Dict[int, int] = {}
+        self._writer: Optional[int] = None
+        self._write_count = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self, timeout: Optional[float] = None) -> bool:
+        """
+        獲取讀鎖定
+
+        Args:
+            timeout: 等待超時 (秒)，None 表示無限等待
+
+        Returns:
+            成功則 True，逾時則 False
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_count += 1
+                return True
+            if me in self._readers:
+                self._readers[me] += 1
+                return True
+
+            if not self._cond.wait_for(
+                lambda: self._writer is None and not self._waiting_writers, timeout
+            ):
+                return False
+            self._readers[me] = 1
+            return True
+
+    def release_read(self) -> None:
+        """釋放讀鎖定"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._release_write_locked()
+                return
+
+            count = self._readers.get(me)
+            if count is None:
+                raise RuntimeError("目前執行緒未持有讀鎖定")
+            if count > 1:
+                self._readers[me] = count - 1
+            else:
+                del self._readers[me]
+                if not self._readers:
+                    self._cond.notify_all()
+
+    def acquire_write(self, timeout: Optional[float] = None) -> bool:
+        """
+        獲取寫鎖定
+
+        Args:
+            timeout: 等待超時 (秒)，None 表示無限等待
+
+        Returns:
+            成功則 True，逾時則 False
+
+        Raises:
+            RuntimeError: 若目前執行緒只持有讀鎖定
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_count += 1
+                return True
+            if me in self._readers:
+                raise RuntimeError("不可由讀鎖定升級為寫鎖定")
+
+            self._waiting_writers += 1
+            try:
+                acquired = self._cond.wait_for(
+                    lambda: self._writer is None and not self._readers, timeout
+                )
+            finally:
+                self._waiting_writers -= 1
+
+            if not acquired:
+                # 讓因等待中的寫入者而暫停的讀取者繼續
+                self._cond.notify_all()
+                return False
+
+            self._writer = me
+            self._write_count = 1
+            return True
+
+    def release_write(self) -> None:
+        """釋放寫鎖定"""
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("目前執行緒未持有寫鎖定")
+            self._release_write_locked()
+
+    def _release_write_locked(self) -> None:
+        self._write_count -= 1
+        if self._write_count == 0:
+            self._writer = None
+            self._cond.notify_all()
+
+    @property
+    def write_locked(self) -> bool:
+        """是否有執行緒持有寫鎖定"""
+        return self._writer is not None
+
+    def is_write_owner(self) -> bool:
+        """目前執行緒是否持有寫鎖定"""
+        return self._writer == threading.get_ident()
+
+    @property
+    def reader_count(self) -> int:
+        """持有讀鎖定的執行緒數"""
+        return len(self._readers)
+
+
+class SharedFileLock:
+    """跨程序檔案鎖（共享/獨佔，可重入）
+
+    同一個物件在程序內以巢狀方式使用：外層取得的模式決定檔案鎖的狀態。
+    flock 的共享/獨佔轉換不是原子操作（核心先釋放原本的鎖定再等待新的
+    模式），因此內層要求獨佔時先明確釋放共享鎖定再取得獨佔鎖定，期間
+    其他程序可能已寫入，呼叫端需在取得獨佔鎖定後重新驗證讀到的資料；
+    內層釋放後維持獨佔直到最外層釋放，不再降級。
+    呼叫端需以程序內鎖定保證同一時間只有一個執行緒操作此物件
+    （JSONDBManager 只在持有 RWLock 寫鎖定時使用）。
+
+    Attributes:
+        path: 鎖定檔案路徑
+    """
+
+    SHARED = 'shared'
+    EXCLUSIVE = 'exclusive'
+
+    def __init__(self, path: Union[str, Path], timeout: float = 60):
+        self.path = Path(path)
+        self.timeout = timeout
+        self._mutex = threading.RLock()
+        self._modes: List[str] = []
+        self._held: Optional[str] = None
+        self._fd: Optional[int] = None
+        self._fallback = FileLock(str(self.path)) if fcntl is None else None
+
+    @property
+    def is_locked(self) -> bool:
+        """是否持有檔案鎖定"""
+        return bool(self._modes)
+
+    @property
+    def mode(self) -> Optional[str]:
+        """檔案實際持有的鎖定模式（未持有時為 None）"""
+        return self._held
+
+    def acquire(self, shared: bool = False, timeout: Optional[float] = None) -> None:
+        """
+        獲取檔案鎖定
+
+        Args:
+            shared: True 為共享鎖定（讀），False 為獨佔鎖定（寫）
+            timeout: 等待超時 (秒)，預設使用建構時的設定
+
+        Raises:
+            LockError: 若等待逾時
+        """
+        mode = self.SHARED if shared else self.EXCLUSIVE
+        timeout = self.timeout if timeout is None else timeout
+
+        with self._mutex:
+            if self._held is None:
+                self._lock_file(mode, timeout)
+            elif self._held == self.SHARED and mode == self.EXCLUSIVE:
+                self._upgrade(timeout)
+            self._modes.append(mode)
+
+    def release(self) -> None:
+        """釋放最近一次取得的檔案鎖定（最外層釋放時才解除檔案鎖定）"""
+        with self._mutex:
+            if not self._modes:
+                return
+
+            self._modes.pop()
+            if not self._modes:
+                self._unlock_file()
+
+    def _upgrade(self, timeout: float) -> None:
+        """
+        共享 → 獨佔
+
+        先釋放共享鎖定再輪詢獨佔鎖定：兩個程序同時升級時不會各自持有
+        共享鎖定而互相等待。逾時時恢復共享鎖定後拋出 LockError。
+        """
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._held = None
+        try:
+            self._lock_file(self.EXCLUSIVE, timeout)
+        except LockError:
+            self._lock_file(self.SHARED, self.timeout)
+            raise
+
+    def _lock_file(self, mode: str, timeout: float) -> None:
+        if self._fallback is not None:
+            # filelock 只有獨佔鎖定
+            if not self._fallback.is_locked:
+                try:
+                    self._fallback.acquire(timeout=timeout)
+                except Timeout:
+                    raise LockError(f"等待檔案鎖定逾時: {self.path}")
+            self._held = self.EXCLUSIVE
+            return
+
+        if self._fd is None:
+            self._fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+
+        operation = fcntl.LOCK_SH if mode == self.SHARED else fcntl.LOCK_EX
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(self._fd, operation | fcntl.LOCK_NB)
+                self._held = mode
+                logger.debug(f"✅ 檔案鎖定已獲取 ({mode}): {self.path}")
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    if not self._modes:
+                        self._close_fd()
+                    raise LockError(f"等待檔案鎖定逾時: {self.path}")
+                time.sleep(_POLL_INTERVAL)
+
+    def _unlock_file(self) -> None:
+        self._held = None
+        if self._fallback is not None:
+            if self._fallback.is_locked:
+                self._fallback.release()
+            return
+
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._close_fd()
+            logger.debug(f"✅ 檔案鎖定已釋放: {self.path}")
+
+    def _close_fd(self) -> None:
+        os.close(self._fd)
+        self._fd = None
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+精簡記錄表示 (CompactVideo / CompactActress)
+
+大型資料庫中，每筆影片/女優記錄都是一個由 get_empty_video() 建立的
+dict：重複的字串鍵與各自配置的雜湊表使常駐記憶體主要花在 dict 本身。
+精簡模式 (JSONDBManager(compact_records=True)) 改以 tuple 存放欄位值：
+- 已知欄位依類別層級的欄位表定位，實例只保存值（缺少的欄位以標記佔位）
+- 其他欄位存放於額外字典（通常為 None）
+- 片商、搜尋狀態與女優 ID 等高度重複的字串以 sys.intern 共用
+
+記錄實作 Mapping 介面，可如 VideoDict 一般以 record['id']、get()、
+items()、dict(record) 讀取，與 dict 比較相等。記錄為唯讀：資料庫一律
+以新記錄取代舊記錄，不就地修改（與快照的寫入時複製約定相同）。
+json_codec 會將任何 Mapping 編碼為 JSON 物件。
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, FrozenSet, Iterator, Optional, Tuple
+
+from src.models.json_types import get_empty_video, get_empty_actress
+
+# 缺少欄位的佔位標記
+_MISSING = object()
+
+
+class CompactRecord(Mapping):
+    """以 tuple 存放欄位值的唯讀記錄（子類別定義欄位表）"""
+
+    __slots__ = ('_values', '_extra')
+
+    # 子類別設定：欄位順序、欄位 → 位置、需共用的字串欄位
+    FIELDS: Tuple[str, ...] = ()
+    _POSITIONS: Dict[str, int] = {}
+    INTERNED: FrozenSet[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._POSITIONS = {field: position for position, field in enumerate(cls.FIELDS)}
+
+    def __init__(self, record: Mapping):
+        """
+        從記錄字典建立（共用重複的字串）
+
+        Args:
+            record: 記錄字典或其他 Mapping
+        """
+        values = [_MISSING] * len(self.FIELDS)
+        extra: Optional[Dict[str, Any]] = None
+        positions = self._POSITIONS
+        for key, value in record.items():
+            if key in self.INTERNED:
+                value = _intern(value)
+            position = positions.get(key)
+            if position is None:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+            else:
+                values[position] = value
+        self._values = tuple(values)
+        self._extra = extra
+
+    @classmethod
+    def from_mapping(cls, record: Mapping) -> "CompactRecord":
+        """轉換為精簡記錄（已是同類別時直接回傳）"""
+        return record if type(record) is cls else cls(record)
+
+    # ========================================================================
+    # Mapping 介面
+    # ========================================================================
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._POSITIONS.get(key)
+        if position is not None:
+            value = self._values[position]
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        position = self._POSITIONS.get(key)
+        if position is not None:
+            value = self._values[position]
+            return default if value is _MISSING else value
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __contains__(self, key: Any) -> bool:
+        position = self._POSITIONS.get(key)
+        if position is not None:
+            return self._values[position] is not _MISSING
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field, value in zip(self.FIELDS, self._values):
+            if value is not _MISSING:
+                yield field
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        present = len(self._values) - self._values.count(_MISSING)
+        return present + (len(self._extra) if self._extra is not None else 0)
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is type(self):
+            return self._values == other._values and (self._extra or {}) == (other._extra or {})
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def copy(self) -> Dict[str, Any]:
+        """取得可修改的 dict 複本（與 dict.copy() 相同為淺複製）"""
+        return dict(self.items())
+
+    def __reduce__(self) -> tuple:
+        return (type(self), (dict(self.items()),))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+
+def _intern(value: Any) -> Any:
+    """共用字串值（清單中的字串逐一共用）"""
+    if type(value) is str:
+        return sys.intern(value)
+    if type(value) is list:
+        return [sys.intern(item) if type(item) is str else item for item in value]
+    return value
+
+
+class CompactVideo(CompactRecord):
+    """精簡影片記錄（欄位同 get_empty_video()，另含分類器寫入的常用欄位）"""
+
+    __slots__ = ()
+    FIELDS = tuple(get_empty_video()) + ('studio_code', 'original_filename', 'file_path', 'search_method')
+    INTERNED = frozenset({'id', 'studio', 'studio_code', 'search_status', 'search_method', 'actresses'})
+
+
+class CompactActress(CompactRecord):
+    """精簡女優記錄（欄位同 get_empty_actress()）"""
+
+    __slots__ = ()
+    FIELDS = tuple(get_empty_actress())
+    INTERNED = frozenset({'id', 'name'})
+
+
+def compact_containers(data: Dict[str, Any]) -> None:
+    """
+    將資料庫字典中的影片與女優記錄就地替換為精簡記錄
+
+    容器鍵同樣共用，與記錄中的 id 為同一字串物件。
+
+    Args:
+        data: 資料庫字典
+    """
+    for container, record_class in (('videos', CompactVideo), ('actresses', CompactActress)):
+        records = data.get(container)
+        if records:
+            data[container] = {sys.intern(key): record_class.from_mapping(record) for key, record in records.items()}
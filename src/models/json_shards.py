@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫分片儲存 (ShardedStore)
+
+此模組提供 JSONDBManager 分片模式所使用的磁碟配置，包括：
+- 影片依 ID 雜湊分桶，關聯與其影片存放在同一分片
+- 女優與統計快取各自獨立分片
+- 小型 manifest 記錄各分片檔名與雜湊
+- 影片附帶序號，載入時還原原本的插入順序
+
+分片檔名包含寫入時的世代編號，保存時先寫出變更的分片，
+最後以原子替換 manifest 作為提交點，中途中斷不會破壞既有資料。
+
+亦提供將單一檔案 data.json 轉換為分片配置的遷移工具：
+    python -m src.models.json_shards data/json_db --shards 16
+"""
+
+import os
+import zlib
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from src.models import json_codec
+from src.models.json_types import (
+    CorruptedDataError,
+    SHARD_DIR_NAME,
+    SHARD_MANIFEST_NAME,
+    DEFAULT_SHARD_COUNT,
+)
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 非分片的頂層欄位（其餘欄位直接存放在 manifest）
+_SHARDED_KEYS = ('videos', 'actresses', 'links', 'statistics', 'data_hash')
+
+
+class ShardedStore:
+    """分片儲存類別
+
+    manifest 格式:
+        {
+            "format": "json_db_shards", "version": 1,
+            "shard_count": 16, "generation": N,
+            "root": {schema_version, metadata, created_at, updated_at, ...},
+            "statistics_stale": false,
+            "shards": {"videos-00": {"file": "...", "sha256": "...", "size": n}, ...}
+        }
+
+    Attributes:
+        shard_dir: 分片目錄
+        manifest_path: manifest 檔案路徑
+        shard_count: 影片分桶數
+        statistics_stale: 最後載入/保存的統計快取是否落後於資料
+    """
+
+    MANIFEST_FORMAT = "json_db_shards"
+    MANIFEST_VERSION = 1
+    ACTRESS_SHARD = "actresses"
+    STATISTICS_SHARD = "statistics"
+
+    def __init__(self, shard_dir: Path, shard_count: int = DEFAULT_SHARD_COUNT, compact_json: bool = False):
+        """
+        初始化 ShardedStore
+
+        Args:
+            shard_dir: 分片目錄
+            shard_count: 新建資料庫的影片分桶數（既有資料庫以 manifest 為準）
+            compact_json: 是否以緊湊格式寫入分片
+        """
+        self.shard_dir = Path(shard_dir)
+        self.manifest_path = self.shard_dir / SHARD_MANIFEST_NAME
+        self.shard_count = shard_count
+        self.compact_json = compact_json
+        self.statistics_stale = False
+        # 最後載入/寫入的 manifest（呼叫端負責在檔案被外部修改時重新載入）
+        self._manifest: Optional[Dict[str, Any]] = None
+        # 影片序號 {video_id: n}，依序號排序即為插入順序
+        self._sequence: Dict[str, int] = {}
+
+    # ========================================================================
+    # 分片配置
+    # ========================================================================
+
+    def shard_for_video(self, video_id: Optional[str]) -> str:
+        """取得影片（及其關聯）所屬的分片名稱"""
+        bucket = zlib.crc32((video_id or '').encode('utf-8')) % self.shard_count
+        return f"videos-{bucket:02x}"
+
+    def shard_names(self) -> List[str]:
+        """取得所有分片名稱"""
+        names = [f"videos-{bucket:02x}" for bucket in range(self.shard_count)]
+        return names + [self.ACTRESS_SHARD, self.STATISTICS_SHARD]
+
+    def exists(self) -> bool:
+        """manifest 是否存在"""
+        return self.manifest_path.exists()
+
+    def _assign_sequences(self, videos: Dict[str, Any]) -> Tuple[Dict[str, int], bool]:
+        """
+        依目前的影片順序指定序號
+
+        既有影片沿用原序號、新影片接在前一部之後；只有順序與
+        原序號矛盾時（例如還原備份）才需要重新編號。
+
+        Args:
+            videos: 影片字典
+
+        Returns:
+            (序號字典, 是否有既有影片被重新編號)
+        """
+        sequence: Dict[str, int] = {}
+        renumbered = False
+        last = -1
+        for video_id in videos:
+            number = self._sequence.get(video_id)
+            if number is None or number <= last:
+                renumbered = renumbered or number is not None
+                number = last + 1
+            sequence[video_id] = number
+            last = number
+        return sequence, renumbered
+
+    def _partition(
+        self,
+        data: Dict[str, Any],
+        names: Set[str],
+        sequence: Dict[str, int]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        將資料切分為指定的分片內容
+
+        Args:
+            data: 資料庫字典
+            names: 需要的分片名稱
+            sequence: 影片序號
+        """
+        shards: Dict[str, Dict[str, Any]] = {}
+        video_shards = {name for name in names if name.startswith('videos-')}
+
+        for name in video_shards:
+            shards[name] = {'videos': {}, 'sequence': {}, 'links': []}
+        if video_shards:
+            for video_id, video in data.get('videos', {}).items():
+                name = self.shard_for_video(video_id)
+                if name in video_shards:
+                    shards[name]['videos'][video_id] = video
+                    shards[name]['sequence'][video_id] = sequence[video_id]
+            for link in data.get('links', []):
+                name = self.shard_for_video(link.get('video_id'))
+                if name in video_shards:
+                    shards[name]['links'].append(link)
+
+        if self.ACTRESS_SHARD in names:
+            shards[self.ACTRESS_SHARD] = {'actresses': data.get('actresses', {})}
+        if self.STATISTICS_SHARD in names:
+            shards[self.STATISTICS_SHARD] = {'statistics': data.get('statistics', {})}
+
+        return shards
+
+    # ========================================================================
+    # 讀取
+    # ========================================================================
+
+    def read_manifest(self) -> Dict[str, Any]:
+        """
+        讀取 manifest
+
+        Raises:
+            CorruptedDataError: 若 manifest 無效
+        """
+        try:
+            manifest = json_codec.load_file(self.manifest_path)
+        except (OSError, ValueError) as e:
+            raise CorruptedDataError(f"分片 manifest 讀取失敗: {e}")
+
+        if manifest.get('format') != self.MANIFEST_FORMAT:
+            raise CorruptedDataError(f"不支援的分片 manifest 格式: {manifest.get('format')}")
+        return manifest
+
+    def load(self) -> Tuple[Dict[str, Any], bool]:
+        """
+        讀取所有分片並組合為資料庫字典
+
+        Returns:
+            (資料庫字典, 所有分片雜湊是否與 manifest 相符)
+
+        Raises:
+            CorruptedDataError: 若 manifest 或分片損壞
+        """
+        manifest = self.read_manifest()
+        data: Dict[str, Any] = dict(manifest.get('root', {}))
+        data.update({'videos': {}, 'actresses': {}, 'links': [], 'statistics': {}})
+        verified = True
+        sequence: Dict[str, int] = {}
+
+        for name, entry in manifest.get('shards', {}).items():
+            try:
+                with open(self.shard_dir / entry['file'], 'rb') as f:
+                    raw = f.read()
+                shard = json_codec.loads(raw)
+            except (OSError, ValueError) as e:
+                raise CorruptedDataError(f"分片讀取失敗 {name}: {e}")
+
+            if hashlib.sha256(raw).hexdigest() != entry.get('sha256'):
+                logger.warning(f"⚠️ 分片雜湊不符: {name}")
+                verified = False
+
+            data['videos'].update(shard.get('videos', {}))
+            sequence.update(shard.get('sequence', {}))
+            data['links'].extend(shard.get('links', []))
+            data['actresses'].update(shard.get('actresses', {}))
+            if 'statistics' in shard:
+                data['statistics'] = shard['statistics']
+
+        # 還原插入順序（缺少序號的影片排在最後）
+        videos = data['videos']
+        ordered = sorted(videos, key=lambda video_id: sequence.get(video_id, float('inf')))
+        data['videos'] = {video_id: videos[video_id] for video_id in ordered}
+
+        data['data_hash'] = manifest.get('data_hash', '')
+        self._manifest = manifest
+        self._sequence = {video_id: sequence[video_id] for video_id in ordered if video_id in sequence}
+        self.shard_count = manifest.get('shard_count', self.shard_count)
+        self.statistics_stale = manifest.get('statistics_stale', False)
+        logger.debug(f"✅ 已載入 {len(manifest.get('shards', {}))} 個分片")
+        return data, verified
+
+    # ========================================================================
+    # 寫入
+    # ========================================================================
+
+    def save(
+        self,
+        data: Dict[str, Any],
+        dirty_shards: Optional[Set[str]] = None,
+        statistics_stale: bool = False
+    ) -> str:
+        """
+        保存資料（只重寫變更的分片）
+
+        Args:
+            data: 資料庫字典
+            dirty_shards: 已知變更的分片名稱；None 表示未知，
+                         此時編碼所有分片並只寫出雜湊不同者
+            statistics_stale: 統計快取是否落後於資料
+
+        Returns:
+            資料雜湊（由各分片雜湊組合）
+        """
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        sequence, renumbered = self._assign_sequences(data.get('videos', {}))
+        if renumbered:
+            # 序號變動的影片可能位於任何分片
+            dirty_shards = None
+
+        # 增量保存沿用已同步的 manifest；完整保存則以磁碟上的為準
+        previous = self._manifest if dirty_shards is not None else None
+        if previous is None and self.exists():
+            previous = self.read_manifest()
+        previous_shards = previous.get('shards', {}) if previous else {}
+        if previous and previous.get('shard_count') != self.shard_count:
+            # 分桶數變更時所有影片分片都需重寫
+            previous_shards = {}
+
+        generation = (previous.get('generation', 0) if previous else 0) + 1
+        names = set(self.shard_names())
+        if dirty_shards is not None:
+            names &= set(dirty_shards) | (names - set(previous_shards))
+
+        shards = dict(previous_shards)
+        written = 0
+        for name, content in self._partition(data, names, sequence).items():
+            encoded = json_codec.dumps(content, indent=not self.compact_json)
+            digest = hashlib.sha256(encoded).hexdigest()
+            if previous_shards.get(name, {}).get('sha256') == digest:
+                continue
+
+            file_name = f"{name}.{generation:06d}.json"
+            with open(self.shard_dir / file_name, 'wb') as f:
+                f.write(encoded)
+            shards[name] = {'file': file_name, 'sha256': digest, 'size': len(encoded)}
+            written += 1
+
+        data_hash = hashlib.sha256(
+            "\n".join(f"{name}:{shards[name]['sha256']}" for name in sorted(shards)).encode('utf-8')
+        ).hexdigest()
+
+        manifest = {
+            'format': self.MANIFEST_FORMAT,
+            'version': self.MANIFEST_VERSION,
+            'shard_count': self.shard_count,
+            'generation': generation,
+            'data_hash': data_hash,
+            'statistics_stale': statistics_stale,
+            'root': {key: value for key, value in data.items() if key not in _SHARDED_KEYS},
+            'shards': shards,
+        }
+
+        # 原子替換 manifest（提交點）
+        temp_file = self.shard_dir / f"{SHARD_MANIFEST_NAME}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(json_codec.dumps(manifest, indent=True))
+            f.flush()
+            os.fsync(f.fileno())
+        temp_file.replace(self.manifest_path)
+
+        self._manifest = manifest
+        self._sequence = sequence
+        self.statistics_stale = statistics_stale
+        self._remove_unreferenced(shards)
+        logger.debug(f"✅ 分片已保存: 重寫 {written}/{len(shards)} 個分片 (世代 {generation})")
+        return data_hash
+
+    def _remove_unreferenced(self, shards: Dict[str, Dict[str, Any]]) -> None:
+        """刪除 manifest 未引用的分片檔案（舊世代或中斷遺留）"""
+        referenced = {entry['file'] for entry in shards.values()}
+        for path in self.shard_dir.glob('*.json'):
+            if path.name != SHARD_MANIFEST_NAME and path.name not in referenced:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning(f"⚠️ 無法刪除舊分片 {path.name}: {e}")
+
+
+# ============================================================================
+# 遷移工具
+# ============================================================================
+
+
+def migrate_single_file_database(
+    data_dir: str,
+    shard_count: int = DEFAULT_SHARD_COUNT,
+    compact_json: bool = False
+) -> Path:
+    """
+    將單一檔案 data.json（含日誌模式的 data.wal）轉換為分片配置
+
+    來源檔案保留不刪除。
+
+    Args:
+        data_dir: 資料庫目錄
+        shard_count: 影片分桶數
+        compact_json: 是否以緊湊格式寫入分片
+
+    Returns:
+        manifest 檔案路徑
+
+    Raises:
+        CorruptedDataError: 若來源資料損壞
+    """
+    from src.models.json_database import JSONDBManager
+    from src.models.json_types import JOURNAL_FILE_NAME, STORAGE_MODES
+
+    data_dir = Path(data_dir)
+    storage_mode = STORAGE_MODES["JOURNAL"] if (data_dir / JOURNAL_FILE_NAME).exists() \
+        else STORAGE_MODES["SNAPSHOT"]
+
+    # 以既有模式開啟，確保來源通過驗證且已重放日誌
+    source = JSONDBManager(data_dir=str(data_dir), storage_mode=storage_mode)
+    store = ShardedStore(data_dir / SHARD_DIR_NAME, shard_count, compact_json)
+    store.save(source.data, statistics_stale=source._statistics_dirty)
+
+    logger.info(
+        f"✅ 已遷移至分片配置: {len(source.data.get('videos', {}))} 部影片 → "
+        f"{shard_count} 個影片分片 ({store.manifest_path})"
+    )
+    return store.manifest_path
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="將單一檔案 JSON 資料庫轉換為分片配置")
+    parser.add_argument('data_dir', nargs='?', default="data/json_db", help="資料庫目錄")
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARD_COUNT, help="影片分桶數")
+    parser.add_argument('--compact', action='store_true', help="以緊湊格式寫入分片")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    migrate_single_file_database(args.data_dir, args.shards, args.compact)
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫唯讀快照 (DatabaseSnapshot)
+
+JSONDBManager 提交後標記快照落後，於下次取得快照時才發佈新的不可變
+快照；連續寫入不必每次複製容器。已發佈的快照不需取得任何鎖定即可
+反覆迭代，寫入者同時提交也不會影響已取得的快照。
+
+快照以容器為單位寫入時複製 (copy-on-write)：
+- videos / actresses / links 各自是一份淺複製，未變更的容器在版本間共用
+- 記錄 (影片/女優字典) 不複製；資料庫只以新記錄取代舊記錄，
+  不會就地修改，因此記錄可在版本間安全共用，呼叫端也不應修改
+- 次要索引、統計等衍生資料於首次使用時建立，並快取在快照上
+"""
+
+import logging
+import threading
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Iterable, Mapping, Set, Tuple
+
+from src.models.json_types import (
+    JSONDatabaseDict,
+    VideoDict,
+    ActressDict,
+    VideoActressLinkDict,
+    ISO_DATETIME_FORMAT,
+)
+from src.models.json_indexes import SecondaryIndexes
+from src.models.json_columnar import ColumnarStatistics
+from src.models.storage_engine import breakdown_actress_videos, recommend_primary_studio
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 快照涵蓋的容器
+SNAPSHOT_CONTAINERS = ('videos', 'actresses', 'links')
+
+
+class DatabaseSnapshot:
+    """資料庫唯讀快照類別
+
+    Attributes:
+        version: 快照版本（每次發佈遞增）
+        videos: 影片 ID → 影片記錄（唯讀映射）
+        actresses: 女優 ID → 女優記錄（唯讀映射）
+        links: 影片-女優關聯（tuple）
+    """
+
+    def __init__(
+        self,
+        version: int,
+        videos: Dict[str, VideoDict],
+        actresses: Dict[str, ActressDict],
+        links: Tuple[VideoActressLinkDict, ...],
+        statistics: Optional[Dict[str, Any]],
+        sources: Dict[str, tuple]
+    ):
+        """
+        初始化 DatabaseSnapshot（請使用 from_data() / derive() 建立）
+
+        Args:
+            version: 快照版本
+            videos: 快照專用的影片字典（建立後不再修改）
+            actresses: 快照專用的女優字典（建立後不再修改）
+            links: 關聯 tuple
+            statistics: 與資料同步的統計快取，None 表示於讀取時計算
+            sources: 各容器來源的 (id, 長度)，用於偵測容器被替換
+        """
+        self.version = version
+        self._videos = videos
+        self._actresses = actresses
+        self.videos: Mapping[str, VideoDict] = MappingProxyType(videos)
+        self.actresses: Mapping[str, ActressDict] = MappingProxyType(actresses)
+        self.links = links
+        self._statistics = statistics
+        self._sources = sources
+
+        # 延遲建立的衍生資料
+        self._lazy_lock = threading.Lock()
+        self._indexes: Optional[SecondaryIndexes] = None
+
+    # ========================================================================
+    # 建立與衍生
+    # ========================================================================
+
+    @staticmethod
+    def _source_key(container: Any) -> tuple:
+        return (id(container), len(container))
+
+    def _replaced_containers(self, data: JSONDatabaseDict) -> Dict[str, tuple]:
+        """data 中已被替換 (id/長度不同) 的容器 {名稱: 來源}"""
+        replaced = {}
+        for name in SNAPSHOT_CONTAINERS:
+            key = self._source_key(data.get(name, [] if name == 'links' else {}))
+            if key != self._sources.get(name):
+                replaced[name] = key
+        return replaced
+
+    def matches(
+        self,
+        data: JSONDatabaseDict,
+        changed: Iterable[str] = (),
+        statistics: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        快照是否仍反映 data（只比較容器的 id/長度，不逐筆比較）
+
+        Args:
+            data: 資料庫字典
+            changed: 已知變更的容器名稱
+            statistics: 與資料同步的統計快取（可選，不同於快照的統計時視為不符）
+
+        Returns:
+            沒有變更的容器、統計相同且沒有容器被替換時 True
+        """
+        if any(True for _ in changed):
+            return False
+        if statistics is not None and statistics is not self._statistics:
+            return False
+        return not self._replaced_containers(data)
+
+    @classmethod
+    def from_data(
+        cls,
+        data: JSONDatabaseDict,
+        version: int = 0,
+        statistics: Optional[Dict[str, Any]] = None
+    ) -> "DatabaseSnapshot":
+        """
+        從資料庫字典建立完整快照
+
+        Args:
+            data: 資料庫字典
+            version: 快照版本
+            statistics: 與資料同步的統計快取（可選）
+
+        Returns:
+            新快照
+        """
+        videos = data.get('videos', {})
+        actresses = data.get('actresses', {})
+        links = data.get('links', [])
+        return cls(
+            version,
+            dict(videos),
+            dict(actresses),
+            tuple(links),
+            statistics,
+            {name: cls._source_key(container)
+             for name, container in zip(SNAPSHOT_CONTAINERS, (videos, actresses, links))},
+        )
+
+    def derive(
+        self,
+        data: JSONDatabaseDict,
+        changed: Iterable[str] = (),
+        statistics: Optional[Dict[str, Any]] = None
+    ) -> "DatabaseSnapshot":
+        """
+        建立反映目前資料的下一個快照
+
+        只複製 changed 中列出、或已被替換 (id/長度不同) 的容器，
+        其餘容器與目前快照共用。沒有任何變更時回傳自身。
+
+        Args:
+            data: 資料庫字典
+            changed: 已知變更的容器名稱 ('videos' / 'actresses' / 'links')
+            statistics: 與資料同步的統計快取（可選）
+
+        Returns:
+            新快照，或無變更時的自身
+        """
+        changed: Set[str] = set(changed)
+        replaced = self._replaced_containers(data)
+        changed.update(replaced)
+        sources = dict(self._sources, **replaced)
+
+        if not changed and (statistics is None or statistics is self._statistics):
+            return self
+
+        return DatabaseSnapshot(
+            self.version + 1,
+            dict(data.get('videos', {})) if 'videos' in changed else self._videos,
+            dict(data.get('actresses', {})) if 'actresses' in changed else self._actresses,
+            tuple(data.get('links', [])) if 'links' in changed else self.links,
+            statistics,
+            sources,
+        )
+
+    def _view(self) -> Dict[str, Any]:
+        """以資料庫字典格式檢視快照（供索引與統計使用）"""
+        return {'videos': self._videos, 'actresses': self._actresses, 'links': self.links}
+
+    def _get_indexes(self) -> SecondaryIndexes:
+        """取得快照的次要索引（首次使用時建立）"""
+        if self._indexes is None:
+            with self._lazy_lock:
+                if self._indexes is None:
+                    self._indexes = SecondaryIndexes(self._view())
+        return self._indexes
+
+    # ========================================================================
+    # 查詢
+    # ========================================================================
+
+    def get_video(self, video_id: str) -> Optional[VideoDict]:
+        """查詢影片，不存在時返回 None"""
+        return self._videos.get(video_id)
+
+    def get_actress(self, actress_id: str) -> Optional[ActressDict]:
+        """查詢女優，不存在時返回 None"""
+        return self._actresses.get(actress_id)
+
+    def find_actress_by_name(self, name: str) -> Optional[ActressDict]:
+        """依名稱查詢第一位相符的女優，不存在時返回 None"""
+        actress_ids = self._get_indexes().actress_ids_by_name(name)
+        return self._actresses[actress_ids[0]] if actress_ids else None
+
+    def get_all_videos(self, filter_dict: Optional[Dict[str, Any]] = None) -> List[VideoDict]:
+        """
+        取得影片清單（過濾條件與 JSONDBManager.get_all_videos 相同）
+
+        Args:
+            filter_dict: 過濾條件，支援 'studio', 'release_date_after', 'release_date_before'
+
+        Returns:
+            影片清單（僅以日期過濾時依發行日期排序）
+        """
+        if not filter_dict:
+            return list(self._videos.values())
+
+        indexes = self._get_indexes()
+        if 'studio' in filter_dict:
+            candidates = indexes.video_ids_by_studio(filter_dict['studio'])
+        else:
+            candidates = indexes.video_ids_by_release_date(
+                filter_dict.get('release_date_after'),
+                filter_dict.get('release_date_before')
+            )
+
+        after = filter_dict.get('release_date_after')
+        before = filter_dict.get('release_date_before')
+        result = []
+        for video_id in candidates:
+            video = self._videos[video_id]
+            release_date = video.get('release_date') or ''
+            if after is not None and release_date < after:
+                continue
+            if before is not None and release_date > before:
+                continue
+            result.append(video)
+        return result
+
+    def get_video_links(self, video_id: str) -> List[VideoActressLinkDict]:
+        """取得影片的影片-女優關聯"""
+        positions = self._get_indexes().video_links.get(video_id, ())
+        return [self.links[position] for position in sorted(positions)]
+
+    def get_actress_links(self, actress_id: str) -> List[VideoActressLinkDict]:
+        """取得女優的影片-女優關聯"""
+        positions = self._get_indexes().actress_links.get(actress_id, ())
+        return [self.links[position] for position in sorted(positions)]
+
+    # ========================================================================
+    # 統計與分析
+    # ========================================================================
+
+    @property
+    def statistics(self) -> Dict[str, Any]:
+        """
+        與快照同步的統計字典（格式同 get_cached_statistics()）
+
+        發佈時統計快取已落後於資料（例如日誌模式）則於首次讀取時計算。
+        """
+        if self._statistics is None:
+            with self._lazy_lock:
+                if self._statistics is None:
+                    self._statistics = self.compute_statistics()
+        return self._statistics
+
+    @property
+    def cached_statistics(self) -> Optional[Dict[str, Any]]:
+        """發佈時附上（或已計算過）的統計；尚未計算時 None，不觸發計算"""
+        return self._statistics
+
+    def compute_statistics(self) -> Dict[str, Any]:
+        """
+        從快照資料完整計算統計（不使用已附上的統計）
+
+        快照不會改變，可在不持有資料庫鎖定的情況下於背景執行緒計算。
+
+        Returns:
+            統計字典（computed_at 為目前時間）
+        """
+        computed_at = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
+        return ColumnarStatistics(self._view()).materialize(computed_at)
+
+    def analyze_actress_primary_studio(
+        self,
+        actress_name: str,
+        major_studios: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        分析女優的主要片商（結果與 StorageEngine.analyze_actress_primary_studio 相同）
+
+        Args:
+            actress_name: 女優名稱
+            major_studios: 大片商集合（支援例外邏輯）
+
+        Returns:
+            分析結果字典
+        """
+        indexes = self._get_indexes()
+        actress_ids = indexes.actress_ids_by_name(actress_name) or [actress_name]
+        rows = breakdown_actress_videos(self._videos, actress_ids, indexes.actress_videos)
+        return recommend_primary_studio(actress_name, rows, major_studios)
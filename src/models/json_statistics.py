@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫增量統計 (IncrementalStatistics)
+
+此模組維護 data['statistics'] 所需的彙總計數，包括：
+- 女優出演部數與片商分佈
+- 片商影片數與女優數
+- 女優×片商×角色類型交叉統計與首次/最新出現日期
+
+所有集合都以計數 (multiset) 保存，因此影片更新或刪除時
+只需扣除該影片原有的貢獻，不必重新掃描全部影片與關聯。
+"""
+
+import logging
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# (actress_id, role_type, timestamp)
+LinkTuple = Tuple[str, str, str]
+
+
+def _decrement(counter: Dict[Any, int], key: Any) -> None:
+    """計數減一，歸零時移除鍵"""
+    remaining = counter.get(key, 0) - 1
+    if remaining > 0:
+        counter[key] = remaining
+    else:
+        counter.pop(key, None)
+
+
+class IncrementalStatistics:
+    """增量統計累加器類別
+
+    以影片為單位累加/扣除統計貢獻。結果格式與
+    JSONDBManager._compute_statistics() 相同。
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        """
+        初始化 IncrementalStatistics
+
+        Args:
+            data: 資料庫字典，若提供則立即完整建立統計
+        """
+        self._reset()
+        if data is not None:
+            self.rebuild(data)
+
+    def _reset(self) -> None:
+        """清空所有計數"""
+        # 影片目前被計入的屬性 {video_id: (studio, studio_code, video_code)}
+        self._videos: Dict[str, Tuple[Any, Any, str]] = {}
+        # 影片的關聯 {video_id: [(actress_id, role_type, timestamp)]}
+        self._video_links: Dict[str, List[LinkTuple]] = {}
+        # 女優的影片 {actress_id: Counter(video_id)}
+        self._actress_videos: Dict[str, Counter] = {}
+
+        # 女優統計
+        self._actress_video_count: Counter = Counter()
+        self._actress_studios: Dict[str, Counter] = {}
+        self._actress_studio_codes: Dict[str, Counter] = {}
+
+        # 片商統計 {(studio, studio_code): ...}
+        self._studio_videos: Dict[Tuple[Any, Any], int] = {}
+        self._studio_actresses: Dict[Tuple[Any, Any], Counter] = {}
+        self._studio_names: Counter = Counter()
+
+        # 交叉統計 {(actress_id, studio, studio_code, role_type): {...}}
+        self._cross: Dict[Tuple[str, Any, Any, str], Dict[str, Any]] = {}
+
+    # ========================================================================
+    # 建立與增量更新
+    # ========================================================================
+
+    def rebuild(self, data: Dict[str, Any]) -> None:
+        """
+        從資料完整重建統計
+
+        Args:
+            data: 資料庫字典
+        """
+        self._reset()
+
+        for video_id, video in data.get('videos', {}).items():
+            self._videos[video_id] = self._video_key(video)
+            self._video_links[video_id] = []
+
+        for link in data.get('links', []):
+            video_id = link.get('video_id')
+            actress_id = link.get('actress_id')
+            if not actress_id or video_id not in self._videos:
+                continue
+            self._video_links[video_id].append(self._link_tuple(link))
+            self._actress_videos.setdefault(actress_id, Counter())[video_id] += 1
+
+        for video_id in self._videos:
+            self._include_video(video_id)
+
+        logger.debug(f"✅ 增量統計已重建: {len(self._videos)} 部影片")
+
+    def put_video(self, video: Dict[str, Any]) -> None:
+        """
+        新增或更新影片（扣除舊貢獻後加入新貢獻）
+
+        Args:
+            video: 影片記錄
+        """
+        video_id = video.get('id')
+        if video_id in self._videos:
+            self._exclude_video(video_id)
+        else:
+            self._video_links.setdefault(video_id, [])
+        self._videos[video_id] = self._video_key(video)
+        self._include_video(video_id)
+
+    def delete_video(self, video_id: str) -> None:
+        """
+        刪除影片及其關聯的貢獻
+
+        Args:
+            video_id: 影片 ID
+        """
+        if video_id not in self._videos:
+            return
+        self._exclude_video(video_id)
+        for actress_id, _, _ in self._video_links.pop(video_id, []):
+            self._actress_videos.get(actress_id, Counter()).pop(video_id, None)
+            if not self._actress_videos.get(actress_id):
+                self._actress_videos.pop(actress_id, None)
+        del self._videos[video_id]
+
+    def delete_actress(self, actress_id: str) -> None:
+        """
+        刪除女優的所有關聯貢獻
+
+        只重算該女優出演的影片。
+
+        Args:
+            actress_id: 女優 ID
+        """
+        video_ids = list(self._actress_videos.pop(actress_id, Counter()))
+        for video_id in video_ids:
+            self._exclude_video(video_id)
+            self._video_links[video_id] = [
+                link for link in self._video_links[video_id] if link[0] != actress_id
+            ]
+            self._include_video(video_id)
+
+    # ========================================================================
+    # 結果輸出
+    # ========================================================================
+
+    def materialize(self, data: Dict[str, Any], computed_at: str) -> Dict[str, Any]:
+        """
+        輸出統計字典
+
+        Args:
+            data: 資料庫字典（提供女優名稱與總數）
+            computed_at: 計算時間 (ISO 8601)
+
+        Returns:
+            與 _compute_statistics() 相同格式的統計字典
+        """
+        actresses = data.get('actresses', {})
+
+        actress_stats = [
+            {
+                'actress_name': actress.get('name', ''),
+                'video_count': self._actress_video_count.get(actress_id, 0),
+                'studios': sorted(self._actress_studios.get(actress_id, ())),
+                'studio_codes': sorted(self._actress_studio_codes.get(actress_id, ())),
+            }
+            for actress_id, actress in actresses.items()
+        ]
+        actress_stats.sort(key=lambda x: x['video_count'], reverse=True)
+
+        studio_stats = [
+            {
+                'studio': studio,
+                'studio_code': studio_code,
+                'video_count': video_count,
+                'actress_count': len(self._studio_actresses.get((studio, studio_code), ())),
+            }
+            for (studio, studio_code), video_count in self._studio_videos.items()
+        ]
+        studio_stats.sort(key=lambda x: x['video_count'], reverse=True)
+
+        enhanced_stats = []
+        for (actress_id, studio, studio_code, role_type), group in self._cross.items():
+            timestamps = group['timestamps']
+            actress = actresses.get(actress_id)
+            enhanced_stats.append({
+                'actress_name': actress.get('name', '') if actress else '',
+                'studio': studio,
+                'studio_code': studio_code,
+                'association_type': role_type,
+                'video_count': len(group['video_codes']),
+                'video_codes': list(group['video_codes']),
+                'first_appearance': min(timestamps) if timestamps else '',
+                'latest_appearance': max(timestamps) if timestamps else '',
+            })
+        enhanced_stats.sort(key=lambda x: (x['actress_name'], -x['video_count']))
+
+        return {
+            'actress_statistics': actress_stats,
+            'studio_statistics': studio_stats,
+            'enhanced_actress_studio_statistics': enhanced_stats,
+            'total_videos': len(data.get('videos', {})),
+            'total_actresses': len(actresses),
+            'total_studios': len(self._studio_names),
+            'computed_at': computed_at,
+        }
+
+    # ========================================================================
+    # 輔助方法
+    # ========================================================================
+
+    @staticmethod
+    def _video_key(video: Dict[str, Any]) -> Tuple[Any, Any, str]:
+        """取得影片影響統計的欄位"""
+        return video.get('studio'), video.get('studio_code', ''), video.get('id', '')
+
+    @staticmethod
+    def _link_tuple(link: Dict[str, Any]) -> LinkTuple:
+        """取得關聯影響統計的欄位"""
+        return link.get('actress_id'), link.get('role_type', 'primary'), link.get('timestamp', '')
+
+    def _include_video(self, video_id: str) -> None:
+        """加入影片及其關聯的統計貢獻"""
+        studio, studio_code, video_code = self._videos[video_id]
+        links = self._video_links.get(video_id, [])
+
+        if studio:
+            key = (studio, studio_code)
+            self._studio_videos[key] = self._studio_videos.get(key, 0) + 1
+            studio_actresses = self._studio_actresses.setdefault(key, Counter())
+            for actress_id in {link[0] for link in links}:
+                studio_actresses[actress_id] += 1
+            if studio != 'UNKNOWN':
+                self._studio_names[studio] += 1
+
+        for actress_id, role_type, timestamp in links:
+            self._actress_video_count[actress_id] += 1
+            if studio:
+                self._actress_studios.setdefault(actress_id, Counter())[studio] += 1
+            if studio_code:
+                self._actress_studio_codes.setdefault(actress_id, Counter())[studio_code] += 1
+
+            if studio and studio != 'UNKNOWN':
+                group = self._cross.setdefault(
+                    (actress_id, studio, studio_code, role_type),
+                    {'video_codes': [], 'timestamps': Counter()}
+                )
+                group['video_codes'].append(video_code)
+                if timestamp:
+                    group['timestamps'][timestamp] += 1
+
+    def _exclude_video(self, video_id: str) -> None:
+        """扣除影片及其關聯的統計貢獻（_include_video 的逆運算）"""
+        studio, studio_code, video_code = self._videos[video_id]
+        links = self._video_links.get(video_id, [])
+
+        if studio:
+            key = (studio, studio_code)
+            _decrement(self._studio_videos, key)
+            studio_actresses = self._studio_actresses.get(key, Counter())
+            for actress_id in {link[0] for link in links}:
+                _decrement(studio_actresses, actress_id)
+            if not studio_actresses:
+                self._studio_actresses.pop(key, None)
+            if studio != 'UNKNOWN':
+                _decrement(self._studio_names, studio)
+
+        for actress_id, role_type, timestamp in links:
+            _decrement(self._actress_video_count, actress_id)
+            if studio:
+                studios = self._actress_studios.get(actress_id, Counter())
+                _decrement(studios, studio)
+                if not studios:
+                    self._actress_studios.pop(actress_id, None)
+            if studio_code:
+                codes = self._actress_studio_codes.get(actress_id, Counter())
+                _decrement(codes, studio_code)
+                if not codes:
+                    self._actress_studio_codes.pop(actress_id, None)
+
+            if studio and studio != 'UNKNOWN':
+                cross_key = (actress_id, studio, studio_code, role_type)
+                group = self._cross.get(cross_key)
+                if group is None:
+                    continue
+                group['video_codes'].remove(video_code)
+                if timestamp:
+                    _decrement(group['timestamps'], timestamp)
+                if not group['video_codes']:
+                    del self._cross[cross_key]
@@ -122,6 +122,36 @@ DATA_DIR = "data/json_db"
 JSON_DB_FILE = "data/json_db/data.json"
 BACKUP_DIR = "data/json_db/backup"
 BACKUP_MANIFEST_FILE = "data/json_db/backup/BACKUP_MANIFEST.json"
+BACKUP_MANIFEST_NAME = "BACKUP_MANIFEST.json"
+BACKUP_OBJECT_DIR_NAME = "objects"
+JOURNAL_FILE_NAME = "data.wal"
+SHARD_DIR_NAME = "shards"
+SHARD_MANIFEST_NAME = "manifest.json"
+CHANGE_FEED_FILE_NAME = "changes.log"
+
+# 儲存模式
+STORAGE_MODES = {
+    "SNAPSHOT": "snapshot",    # 每次變更重寫整個 data.json
+    "JOURNAL": "journal",      # 變更附加至 WAL，定期壓縮為快照
+    "SHARDED": "sharded",      # 分片配置，只重寫變更的分片
+}
+
+# 儲存引擎
+STORAGE_ENGINES = {
+    "JSON": "json",            # JSON 檔案 (JSONDBManager，可搭配上述儲存模式)
+    "SQLITE": "sqlite",        # SQLite WAL 模式 (SQLiteStorageEngine)
+}
+SQLITE_DB_FILE_NAME = "data.sqlite"
+
+# 分片模式的影片分桶數
+DEFAULT_SHARD_COUNT = 16
+
+# 日誌壓縮門檻
+JOURNAL_COMPACT_THRESHOLD = 500              # 提交記錄數
+JOURNAL_COMPACT_MAX_BYTES = 8 * 1024 * 1024  # 日誌檔案大小
+
+# 變更通知：變更記錄檔超過此筆數時輪替（保留最近一半）
+CHANGE_FEED_MAX_ENTRIES = 1000
 
 # 檔案鎖定
 READ_LOCK_TIMEOUT = 30       # 秒
@@ -130,6 +160,7 @@ WRITE_LOCK_TIMEOUT = 60      # 秒
 # 備份設定
 MAX_BACKUP_AGE_DAYS = 30     # 天
 MAX_BACKUP_COUNT = 50        # 個
+BACKUP_CHUNK_COUNT = 64      # 增量備份的影片/女優分桶數
 
 # 驗證相關
 MAX_STRING_LENGTH = 2000     # 字串最大長度
@@ -0,0 +1,1369 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite 儲存引擎 (SQLiteStorageEngine)
+
+此模組以 SQLite (WAL 模式) 實作與 JSONDBManager 相同的 StorageEngine 介面，包括：
+- 影片、女優與關聯各自成表，完整記錄以 JSON 存放，查詢欄位另建索引
+- 交易與批次寫入對應單一 SQLite 交易，完整性只檢查變更觸及的記錄
+- 統計以 GROUP BY 查詢計算，結果快取於 meta 表並在資料變更時失效
+
+WAL 模式下讀取不會阻擋其他程序寫入，寫入也只需附加到 WAL，
+不必像 JSON 快照模式一樣重寫整個檔案。
+
+亦提供 JSON ↔ SQLite 的批次遷移工具：
+    python -m src.models.sqlite_database to-sqlite data/json_db
+    python -m src.models.sqlite_database to-json data/json_db/data.sqlite data/json_db
+"""
+
+import sqlite3
+import logging
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterable, Iterator, Set, Tuple
+
+from src.models import json_codec
+from src.models.json_types import (
+    JSONDatabaseDict,
+    VideoDict,
+    ActressDict,
+    VideoActressLinkDict,
+    ValidationError,
+    LockError,
+    DataIntegrityError,
+    CorruptedDataError,
+    JSONDatabaseError,
+    BackupError,
+    DATA_DIR,
+    ISO_DATETIME_FORMAT,
+    JOURNAL_FILE_NAME,
+    SHARD_DIR_NAME,
+    SHARD_MANIFEST_NAME,
+    STORAGE_MODES,
+    SQLITE_DB_FILE_NAME,
+    WRITE_LOCK_TIMEOUT,
+    get_empty_json_database,
+    get_empty_video,
+    get_empty_actress,
+)
+from src.models.storage_engine import StorageEngine, StudioBreakdownRow
+from src.models.video_query import VideoQuery, Predicate, Eq, In, Prefix, Range, HasActress, AnyOf
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 單一 IN (...) 查詢的參數數量上限（低於舊版 SQLite 的 999）
+_MAX_QUERY_PARAMS = 500
+
+# 可在 SQL 中比對的影片欄位（其餘條件讀出記錄後比對）
+_VIDEO_COLUMNS = ('id', 'studio', 'studio_code', 'release_date')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS videos (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    studio TEXT,
+    studio_code TEXT,
+    release_date TEXT NOT NULL DEFAULT '',
+    record BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS actresses (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    record BLOB NOT NULL
+);
+-- 影片 actresses 清單的展開（position 0 為主要女優）
+CREATE TABLE IF NOT EXISTS video_actresses (
+    video_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    actress_id TEXT NOT NULL,
+    PRIMARY KEY (video_id, position)
+);
+CREATE TABLE IF NOT EXISTS links (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT,
+    actress_id TEXT,
+    role_type TEXT,
+    timestamp TEXT,
+    record BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_videos_studio ON videos(studio, studio_code);
+CREATE INDEX IF NOT EXISTS idx_videos_release_date ON videos(release_date);
+CREATE INDEX IF NOT EXISTS idx_actresses_name ON actresses(name);
+CREATE INDEX IF NOT EXISTS idx_video_actresses_actress ON video_actresses(actress_id);
+CREATE INDEX IF NOT EXISTS idx_links_video ON links(video_id);
+CREATE INDEX IF NOT EXISTS idx_links_actress ON links(actress_id);
+"""
+
+# 不存放在 root 的頂層欄位
+_TABLE_KEYS = ('videos', 'actresses', 'links', 'statistics', 'data_hash')
+
+
+def _chunks(values: List[Any], size: int = _MAX_QUERY_PARAMS) -> Iterator[List[Any]]:
+    """將清單切分為固定大小的區段"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class SQLiteStorageEngine(StorageEngine):
+    """SQLite 儲存引擎類別
+
+    所有連線操作以執行緒鎖序列化；跨程序的並行由 SQLite 的檔案鎖處理。
+
+    Attributes:
+        db_path: SQLite 檔案路徑
+        backup_dir: 備份目錄路徑
+    """
+
+    ROOT_KEY = 'root'
+    STATISTICS_KEY = 'statistics'
+
+    def __init__(
+        self,
+        db_path: str = f"{DATA_DIR}/{SQLITE_DB_FILE_NAME}",
+        lock_timeout: int = WRITE_LOCK_TIMEOUT
+    ):
+        """
+        初始化 SQLiteStorageEngine
+
+        Args:
+            db_path: SQLite 檔案路徑 (預設: "data/json_db/data.sqlite")
+            lock_timeout: 等待其他程序釋放寫鎖定的秒數
+
+        Raises:
+            JSONDatabaseError: 若初始化失敗
+        """
+        try:
+            self.db_path = Path(db_path)
+            self.backup_dir = self.db_path.parent / "backup"
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+
+            self._lock = threading.RLock()
+            self._transaction: Optional[List[Dict[str, Any]]] = None
+
+            # isolation_level=None：交易邊界由 transaction() 明確控制
+            self._conn = sqlite3.connect(
+                str(self.db_path), timeout=lock_timeout,
+                isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._create_schema()
+
+            logger.info(f"✅ SQLite 儲存引擎初始化成功: {self.db_path}")
+
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"❌ SQLite 儲存引擎初始化失敗: {e}")
+            raise JSONDatabaseError(f"SQLite 儲存引擎初始化失敗: {e}")
+
+    def _create_schema(self) -> None:
+        """建立資料表與索引，新資料庫寫入初始 root 欄位"""
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+            if self._get_meta(self.ROOT_KEY) is None:
+                empty = get_empty_json_database()
+                self._set_meta(self.ROOT_KEY, self._root_fields(empty))
+
+    def close(self) -> None:
+        """關閉資料庫連線"""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        """上下文管理器進入"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """上下文管理器退出（關閉連線）"""
+        self.close()
+        return False
+
+    # ========================================================================
+    # 連線與交易
+    # ========================================================================
+
+    @contextmanager
+    def _guard(self, action: str) -> Iterator[None]:
+        """
+        取得連線鎖，並將 SQLite 錯誤轉換為資料庫例外
+
+        Args:
+            action: 操作名稱（用於錯誤訊息）
+
+        Raises:
+            LockError: 若資料庫被其他程序鎖定逾時
+            CorruptedDataError: 若發生其他 SQLite 錯誤
+        """
+        try:
+            with self._lock:
+                yield
+        except JSONDatabaseError as e:
+            logger.error(f"❌ {action}失敗: {e}")
+            raise
+        except sqlite3.OperationalError as e:
+            logger.error(f"❌ {action}失敗: {e}")
+            if 'locked' in str(e) or 'busy' in str(e):
+                raise LockError(f"無法獲得資料庫鎖定: {e}")
+            raise CorruptedDataError(f"{action}失敗: {e}")
+        except sqlite3.Error as e:
+            logger.error(f"❌ {action}失敗: {e}")
+            raise CorruptedDataError(f"{action}失敗: {e}")
+
+    @contextmanager
+    def transaction(self) -> Iterator["SQLiteStorageEngine"]:
+        """
+        批次寫入交易
+
+        對應單一 SQLite 交易 (BEGIN IMMEDIATE)，結束時驗證一次完整性並提交。
+        任何例外都會還原全部變更（全有或全無）。巢狀交易會併入外層交易。
+
+        用法:
+            with db.transaction():
+                db.add_or_update_actress(...)
+                db.add_or_update_video(...)
+
+        Yields:
+            SQLiteStorageEngine 本身
+
+        Raises:
+            LockError: 若無法獲得寫鎖定
+            DataIntegrityError: 若完整性檢查失敗
+        """
+        with self._guard("交易"):
+            if self._transaction is not None:
+                yield self
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            pending: List[Dict[str, Any]] = []
+            self._transaction = pending
+
+            try:
+                yield self
+
+                self._transaction = None
+                if pending:
+                    # 驗證完整性（只檢查交易觸及的記錄）
+                    self._validate_operations_integrity(pending)
+                    self._mark_modified()
+                self._conn.execute("COMMIT")
+                if pending:
+                    logger.info(f"✅ 交易已提交: {len(pending)} 筆操作")
+
+            except BaseException:
+                self._transaction = None
+                self._conn.execute("ROLLBACK")
+                if pending:
+                    logger.warning(f"⚠️ 交易已還原: {len(pending)} 筆操作")
+                raise
+
+    @contextmanager
+    def _read_snapshot(self) -> Iterator[None]:
+        """
+        在一致的讀取快照中執行多個查詢
+
+        交易進行中時直接沿用該交易（可讀到未提交的變更）。
+        """
+        if self._transaction is not None or self._conn.in_transaction:
+            yield
+            return
+
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            self._conn.execute("COMMIT")
+
+    def _commit_operations(self, operations: List[Dict[str, Any]]) -> None:
+        """
+        提交變更操作
+
+        交易進行中時併入該交易，否則以單一交易提交。
+
+        Args:
+            operations: 變更操作清單（格式與 JSONDBManager 相同）
+
+        Raises:
+            DataIntegrityError: 若完整性檢查失敗（變更會還原）
+        """
+        with self.transaction():
+            for operation in operations:
+                self._apply_operation(operation)
+            self._transaction.extend(operations)
+
+    def _apply_operation(self, operation: Dict[str, Any]) -> None:
+        """
+        將單一變更操作寫入資料表
+
+        Args:
+            operation: 變更操作
+
+        Raises:
+            CorruptedDataError: 若操作類型未知
+        """
+        op = operation.get('op')
+        conn = self._conn
+
+        if op == 'put_video':
+            record = operation['record']
+            # ON CONFLICT 更新保留原本的 seq，維持插入順序
+            conn.execute(
+                "INSERT INTO videos (id, studio, studio_code, release_date, record) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "studio = excluded.studio, studio_code = excluded.studio_code, "
+                "release_date = excluded.release_date, record = excluded.record",
+                self._video_row(record)
+            )
+            conn.execute("DELETE FROM video_actresses WHERE video_id = ?", (record['id'],))
+            conn.executemany(
+                "INSERT OR REPLACE INTO video_actresses (video_id, position, actress_id) VALUES (?, ?, ?)",
+                self._video_actress_rows(record)
+            )
+        elif op == 'put_actress':
+            record = operation['record']
+            conn.execute(
+                "INSERT INTO actresses (id, name, record) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name = excluded.name, record = excluded.record",
+                self._actress_row(record)
+            )
+        elif op == 'delete_video':
+            video_id = operation['id']
+            conn.execute("DELETE FROM videos WHERE id = ?", (video_id,))
+            conn.execute("DELETE FROM video_actresses WHERE video_id = ?", (video_id,))
+            conn.execute("DELETE FROM links WHERE video_id = ?", (video_id,))
+        elif op == 'delete_actress':
+            actress_id = operation['id']
+            conn.execute("DELETE FROM actresses WHERE id = ?", (actress_id,))
+            conn.execute("DELETE FROM links WHERE actress_id = ?", (actress_id,))
+        else:
+            raise CorruptedDataError(f"未知的變更操作: {op}")
+
+    def _mark_modified(self) -> None:
+        """更新 root 的 updated_at 並使統計快取失效（需在交易中呼叫）"""
+        root = self._get_meta(self.ROOT_KEY) or {}
+        root['updated_at'] = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
+        self._set_meta(self.ROOT_KEY, root)
+        self._conn.execute("DELETE FROM meta WHERE key = ?", (self.STATISTICS_KEY,))
+
+    # ========================================================================
+    # 資料列轉換
+    # ========================================================================
+
+    @staticmethod
+    def _video_row(record: VideoDict) -> tuple:
+        return (
+            record['id'], record.get('studio'), record.get('studio_code', ''),
+            record.get('release_date') or '', json_codec.dumps(record),
+        )
+
+    @staticmethod
+    def _video_actress_rows(record: VideoDict) -> List[tuple]:
+        return [
+            (record['id'], position, actress_id)
+            for position, actress_id in enumerate(record.get('actresses', []))
+        ]
+
+    @staticmethod
+    def _actress_row(record: ActressDict) -> tuple:
+        return record['id'], record.get('name', ''), json_codec.dumps(record)
+
+    @staticmethod
+    def _link_row(link: VideoActressLinkDict) -> tuple:
+        return (
+            link.get('video_id'), link.get('actress_id'), link.get('role_type', 'primary'),
+            link.get('timestamp', ''), json_codec.dumps(link),
+        )
+
+    @staticmethod
+    def _root_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in data.items() if key not in _TABLE_KEYS}
+
+    def _get_meta(self, key: str) -> Optional[Any]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json_codec.loads(row[0]) if row else None
+
+    def _set_meta(self, key: str, value: Any) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json_codec.dumps(value))
+        )
+
+    def _fetch_records(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        return [json_codec.loads(row[0]) for row in self._conn.execute(sql, params)]
+
+    def _select_in(self, sql: str, values: Iterable[Any]) -> List[tuple]:
+        """
+        執行含 IN ({}) 佔位的查詢（參數過多時分段）
+
+        Args:
+            sql: 含一個 {} 佔位的 SQL
+            values: IN 清單的值
+        """
+        rows: List[tuple] = []
+        for chunk in _chunks(list(values)):
+            placeholders = ", ".join("?" * len(chunk))
+            rows.extend(self._conn.execute(sql.format(placeholders), chunk).fetchall())
+        return rows
+
+    def _existing_ids(self, table: str, ids: Iterable[str]) -> Set[str]:
+        """取得資料表中存在的 ID"""
+        return {row[0] for row in self._select_in(f"SELECT id FROM {table} WHERE id IN ({{}})", ids)}
+
+    # ========================================================================
+    # 完整性驗證
+    # ========================================================================
+
+    def _validate_operations_integrity(self, operations: List[Dict[str, Any]]) -> None:
+        """
+        驗證參照完整性 - 增量模式
+
+        只檢查變更觸及的記錄，錯誤回報與 JSONDBManager 相同。
+
+        Args:
+            operations: 已寫入的變更操作
+
+        Raises:
+            DataIntegrityError: 若完整性檢查失敗
+        """
+        touched_videos = {op['record']['id'] if 'record' in op else op['id']
+                          for op in operations if op.get('op') in ('put_video', 'delete_video')}
+        touched_actresses = {op['record']['id'] if 'record' in op else op['id']
+                             for op in operations if op.get('op') in ('put_actress', 'delete_actress')}
+
+        # 受影響的關聯：引用被觸及影片/女優的關聯
+        links: Dict[int, Dict[str, Any]] = {}
+        for column, ids in (('video_id', touched_videos), ('actress_id', touched_actresses)):
+            rows = self._select_in(f"SELECT seq, video_id, actress_id FROM links WHERE {column} IN ({{}})", ids)
+            for seq, video_id, actress_id in rows:
+                links[seq] = {'video_id': video_id, 'actress_id': actress_id}
+
+        # 受影響的影片：被觸及的影片與引用被觸及女優的影片
+        affected_videos = self._existing_ids('videos', touched_videos)
+        affected_videos.update(row[0] for row in self._select_in(
+            "SELECT DISTINCT video_id FROM video_actresses WHERE actress_id IN ({})", touched_actresses
+        ))
+        video_actresses: Dict[str, Dict[str, List[str]]] = {}
+        for video_id, actress_id in self._select_in(
+            "SELECT video_id, actress_id FROM video_actresses WHERE video_id IN ({}) ORDER BY video_id, position",
+            affected_videos
+        ):
+            video_actresses.setdefault(video_id, {'actresses': []})['actresses'].append(actress_id)
+
+        existing_videos = self._existing_ids('videos', {link['video_id'] for link in links.values()})
+        existing_actresses = self._existing_ids('actresses', (
+            {link['actress_id'] for link in links.values()} |
+            {actress_id for video in video_actresses.values() for actress_id in video['actresses']}
+        ))
+
+        errors: List[str] = []
+        for link in links.values():
+            errors.extend(self._link_integrity_errors(link, existing_videos, existing_actresses))
+        for video_id, video in video_actresses.items():
+            errors.extend(self._video_integrity_errors(video_id, video, existing_actresses))
+
+        self._raise_integrity_errors(errors)
+
+    def _validate_referential_integrity(self) -> None:
+        """
+        驗證參照完整性 - 完整模式（以 SQL 找出懸空的引用）
+
+        Raises:
+            DataIntegrityError: 若完整性檢查失敗
+        """
+        errors: List[str] = []
+
+        dangling_links = self._conn.execute(
+            "SELECT l.video_id, l.actress_id, v.id IS NOT NULL, a.id IS NOT NULL FROM links l "
+            "LEFT JOIN videos v ON v.id = l.video_id LEFT JOIN actresses a ON a.id = l.actress_id "
+            "WHERE (l.video_id IS NOT NULL AND l.video_id != '' AND v.id IS NULL) "
+            "OR (l.actress_id IS NOT NULL AND l.actress_id != '' AND a.id IS NULL)"
+        ).fetchall()
+        for video_id, actress_id, video_exists, actress_exists in dangling_links:
+            errors.extend(self._link_integrity_errors(
+                {'video_id': video_id, 'actress_id': actress_id},
+                {video_id} if video_exists else set(),
+                {actress_id} if actress_exists else set()
+            ))
+
+        dangling_actresses = self._conn.execute(
+            "SELECT va.video_id, va.actress_id FROM video_actresses va "
+            "LEFT JOIN actresses a ON a.id = va.actress_id WHERE a.id IS NULL"
+        ).fetchall()
+        for video_id, actress_id in dangling_actresses:
+            errors.extend(self._video_integrity_errors(video_id, {'actresses': [actress_id]}, set()))
+
+        self._raise_integrity_errors(errors)
+
+    def validate_data(self) -> Dict[str, Any]:
+        """
+        執行全面的資料驗證
+
+        Returns:
+            驗證結果字典，包含:
+            - 'valid' (bool): 是否有效
+            - 'errors' (List[str]): 錯誤訊息清單
+        """
+        result = {
+            'valid': True,
+            'errors': [],
+        }
+
+        with self._guard("資料驗證"), self._read_snapshot():
+            status = self._conn.execute("PRAGMA quick_check").fetchone()[0]
+            if status != 'ok':
+                result['valid'] = False
+                result['errors'].append(f"SQLite 檔案檢查失敗: {status}")
+
+            try:
+                self._validate_referential_integrity()
+            except DataIntegrityError as e:
+                result['valid'] = False
+                result['errors'].append(f"完整性驗證失敗: {e}")
+
+            # 女優的 video_count 是否與關聯數一致
+            rows = self._conn.execute(
+                "SELECT a.record, COUNT(l.seq) FROM actresses a LEFT JOIN links l "
+                "ON l.actress_id = a.id GROUP BY a.seq"
+            ).fetchall()
+            for record, link_count in rows:
+                actress = json_codec.loads(record)
+                if actress.get('video_count', 0) != link_count:
+                    logger.warning(
+                        f"女優 '{actress.get('id')}' 的 video_count 不一致: "
+                        f"預期 {link_count}, 實際 {actress.get('video_count', 0)}"
+                    )
+                    result['valid'] = False
+                    result['errors'].append("一致性驗證失敗")
+                    break
+
+        return result
+
+    # ========================================================================
+    # 匯入與匯出
+    # ========================================================================
+
+    def export_data(self) -> JSONDatabaseDict:
+        """
+        匯出完整資料庫字典（JSON 資料庫格式）
+
+        Returns:
+            資料庫字典
+        """
+        with self._guard("匯出資料"), self._read_snapshot():
+            data: Dict[str, Any] = dict(self._get_meta(self.ROOT_KEY) or {})
+            data['videos'] = {
+                record['id']: record
+                for record in self._fetch_records("SELECT record FROM videos ORDER BY seq")
+            }
+            data['actresses'] = {
+                record['id']: record
+                for record in self._fetch_records("SELECT record FROM actresses ORDER BY seq")
+            }
+            data['links'] = self._fetch_records("SELECT record FROM links ORDER BY seq")
+            data['statistics'] = self._get_meta(self.STATISTICS_KEY) or self._compute_statistics()
+            data['data_hash'] = ''
+
+            logger.debug(f"✅ 已匯出 {len(data['videos'])} 部影片")
+            return data
+
+    def import_data(self, data: JSONDatabaseDict) -> None:
+        """
+        以資料庫字典取代全部內容（單一交易，完整驗證後才提交）
+
+        Args:
+            data: JSON 資料庫格式的字典
+
+        Raises:
+            ValidationError: 若格式不正確
+            DataIntegrityError: 若完整性檢查失敗（不會修改資料庫）
+        """
+        self._validate_json_format(data)
+
+        with self._guard("匯入資料"), self.transaction():
+            conn = self._conn
+            for table in ('videos', 'actresses', 'video_actresses', 'links', 'meta'):
+                conn.execute(f"DELETE FROM {table}")
+
+            videos = list(data.get('videos', {}).values())
+            conn.executemany(
+                "INSERT INTO videos (id, studio, studio_code, release_date, record) VALUES (?, ?, ?, ?, ?)",
+                (self._video_row(video) for video in videos)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO video_actresses (video_id, position, actress_id) VALUES (?, ?, ?)",
+                (row for video in videos for row in self._video_actress_rows(video))
+            )
+            conn.executemany(
+                "INSERT INTO actresses (id, name, record) VALUES (?, ?, ?)",
+                (self._actress_row(actress) for actress in data.get('actresses', {}).values())
+            )
+            conn.executemany(
+                "INSERT INTO links (video_id, actress_id, role_type, timestamp, record) VALUES (?, ?, ?, ?, ?)",
+                (self._link_row(link) for link in data.get('links', []))
+            )
+
+            # 匯入的統計可能與資料不同步，一律於下次查詢時重新計算
+            self._set_meta(self.ROOT_KEY, self._root_fields(data))
+
+            self._validate_referential_integrity()
+
+        logger.info(f"✅ 已匯入 {len(videos)} 部影片、{len(data.get('actresses', {}))} 位女優")
+
+    def compact_journal(self) -> bool:
+        """
+        將 WAL 內容寫回主資料庫檔案並截斷 WAL
+
+        Returns:
+            有執行則 True
+        """
+        with self._guard("WAL 檢查點"):
+            if self._conn.in_transaction:
+                return False
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            logger.info(f"✅ WAL 已寫回資料庫: {self.db_path}")
+            return True
+
+    # ========================================================================
+    # 交易與 CRUD
+    # ========================================================================
+
+    def bulk_upsert_videos(self, videos: Iterable[VideoDict]) -> int:
+        """
+        批次新增或更新影片
+
+        在單一交易中寫入所有影片，全部成功或全部不生效。
+
+        Args:
+            videos: 影片資訊 (VideoDict) 的可迭代物件
+
+        Returns:
+            寫入的影片數
+
+        Raises:
+            ValidationError: 若任一影片資訊無效
+            LockError: 若無法獲得寫鎖定
+            DataIntegrityError: 若完整性檢查失敗
+        """
+        count = 0
+        with self.transaction():
+            for video_info in videos:
+                self.add_or_update_video(video_info)
+                count += 1
+
+        logger.info(f"✅ 批次寫入 {count} 部影片")
+        return count
+
+    def add_or_update_video(self, video_info: VideoDict) -> str:
+        """
+        新增或更新影片
+
+        Args:
+            video_info: 影片資訊 (VideoDict)
+
+        Returns:
+            影片 ID (新建或已更新)
+
+        Raises:
+            ValidationError: 若影片資訊無效
+            LockError: 若無法獲得寫鎖定
+            DataIntegrityError: 若完整性檢查失敗
+        """
+        with self._guard("新增/更新影片"):
+            if not isinstance(video_info, Mapping):
+                raise ValidationError("影片資訊必須是字典")
+
+            if 'id' not in video_info:
+                raise ValidationError("影片 ID 必須存在")
+
+            video_dict = get_empty_video()
+            video_dict.update(video_info)
+            video_dict['updated_at'] = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
+
+            self._commit_operations([{'op': 'put_video', 'record': video_dict}])
+
+            logger.info(f"✅ 影片已新增/更新: {video_dict['id']}")
+            return video_dict['id']
+
+    def get_video_info(self, video_id: str) -> Optional[VideoDict]:
+        """
+        查詢影片資訊
+
+        Args:
+            video_id: 影片 ID
+
+        Returns:
+            影片資訊，若不存在則返回 None
+        """
+        with self._guard("查詢影片"):
+            records = self._fetch_records("SELECT record FROM videos WHERE id = ?", (video_id,))
+            if not records:
+                logger.debug(f"⚠️ 影片不存在: {video_id}")
+                return None
+            return records[0]
+
+    def get_all_videos(self, filter_dict: Optional[Dict[str, Any]] = None) -> List[VideoDict]:
+        """
+        取得所有影片清單（支援過濾，條件以索引查詢）
+
+        Args:
+            filter_dict: 過濾條件 (例如: {'studio': 'ABC'})
+                        支援的鍵: 'studio', 'release_date_after', 'release_date_before'
+
+        Returns:
+            影片清單（依插入順序；僅以日期過濾時依發行日期排序）
+        """
+        filter_dict = filter_dict or {}
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        if 'studio' in filter_dict:
+            clauses.append("studio IS ?")
+            params.append(filter_dict['studio'])
+        if 'release_date_after' in filter_dict:
+            clauses.append("release_date >= ?")
+            params.append(filter_dict['release_date_after'])
+        if 'release_date_before' in filter_dict:
+            clauses.append("release_date <= ?")
+            params.append(filter_dict['release_date_before'])
+
+        order = "seq"
+        if 'studio' not in filter_dict and len(clauses) > 0:
+            order = "release_date, seq"
+
+        sql = "SELECT record FROM videos"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order}"
+
+        with self._guard("取得影片清單"):
+            video_list = self._fetch_records(sql, tuple(params))
+            logger.debug(f"✅ 取得 {len(video_list)} 個影片")
+            return video_list
+
+    def query_videos(self, query: VideoQuery) -> Iterator[VideoDict]:
+        """
+        執行影片查詢
+
+        ID、片商、發行日期與女優條件轉為 SQL 以索引查詢，
+        其餘條件（例如搜尋狀態）於解碼記錄後逐筆比對。
+
+        Args:
+            query: VideoQuery
+
+        Returns:
+            符合條件的影片迭代器（未指定排序時依插入順序）
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        pushed: List[Predicate] = []
+        for predicate in query.predicates:
+            translated = self._query_clause(predicate)
+            if translated is not None:
+                clauses.append(translated[0])
+                params.extend(translated[1])
+                pushed.append(predicate)
+
+        sql = "SELECT record FROM videos"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY seq"
+
+        with self._guard("查詢影片"):
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+            logger.debug(f"✅ 查詢候選影片 {len(rows)} 個 (SQL 條件 {len(pushed)} 個)")
+
+        # 記錄於迭代時才解碼
+        return query.execute((json_codec.loads(row[0]) for row in rows), satisfied=pushed)
+
+    def _query_clause(self, predicate: Predicate) -> Optional[Tuple[str, List[Any]]]:
+        """將條件轉為 SQL (子句, 參數)；無法轉換時 None"""
+        if isinstance(predicate, HasActress):
+            return "id IN (SELECT video_id FROM video_actresses WHERE actress_id = ?)", [predicate.actress_id]
+
+        if isinstance(predicate, AnyOf):
+            translated = [self._query_clause(branch) for branch in predicate.predicates]
+            if any(branch is None for branch in translated):
+                return None
+            return (
+                "(" + " OR ".join(clause for clause, _ in translated) + ")",
+                [param for _, branch_params in translated for param in branch_params],
+            )
+
+        column = predicate.field
+        if column not in _VIDEO_COLUMNS:
+            return None
+
+        if isinstance(predicate, Eq):
+            # 空發行日期以 '' 存放，缺少欄位無法與空字串區分
+            if column == 'release_date' and predicate.value in (None, ''):
+                return None
+            return f"{column} IS ?", [predicate.value]
+        if isinstance(predicate, In):
+            if column == 'release_date' and ({None, ''} & set(predicate.values)):
+                return None
+            if None in predicate.values:
+                return None
+            # 以 json_each 傳入整個清單，不受參數數量限制
+            values = json_codec.dumps(list(predicate.values)).decode('utf-8')
+            return f"{column} IN (SELECT value FROM json_each(?))", [values]
+        if isinstance(predicate, Prefix):
+            if not predicate.prefix:
+                return None
+            return f"{column} >= ? AND {column} < ?", [predicate.prefix, predicate.upper_bound()]
+        if isinstance(predicate, Range):
+            clause = [f"{column} != ''"]
+            params: List[Any] = []
+            if predicate.low is not None:
+                clause.append(f"{column} {'>=' if predicate.include_low else '>'} ?")
+                params.append(predicate.low)
+            if predicate.high is not None:
+                clause.append(f"{column} {'<=' if predicate.include_high else '<'} ?")
+                params.append(predicate.high)
+            return "(" + " AND ".join(clause) + ")", params
+        return None
+
+    def delete_video(self, video_id: str) -> bool:
+        """
+        刪除影片
+
+        同時刪除相關的影片-女優關聯記錄。
+
+        Args:
+            video_id: 影片 ID
+
+        Returns:
+            成功則返回 True，若影片不存在則返回 False
+
+        Raises:
+            LockError: 若無法獲得寫鎖定
+        """
+        with self._guard("刪除影片"), self.transaction():
+            if not self._existing_ids('videos', [video_id]):
+                logger.warning(f"⚠️ 影片不存在: {video_id}")
+                return False
+
+            self._commit_operations([{'op': 'delete_video', 'id': video_id}])
+
+        logger.info(f"✅ 影片已刪除: {video_id}")
+        return True
+
+    def add_or_update_actress(self, actress_info: ActressDict) -> str:
+        """
+        新增或更新女優
+
+        Args:
+            actress_info: 女優資訊 (ActressDict)
+
+        Returns:
+            女優 ID (新建或已更新)
+
+        Raises:
+            ValidationError: 若女優資訊無效
+            LockError: 若無法獲得寫鎖定
+        """
+        with self._guard("新增/更新女優"):
+            if not isinstance(actress_info, Mapping):
+                raise ValidationError("女優資訊必須是字典")
+
+            if 'id' not in actress_info:
+                raise ValidationError("女優 ID 必須存在")
+
+            actress_dict = get_empty_actress()
+            actress_dict.update(actress_info)
+            actress_dict['updated_at'] = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
+
+            self._commit_operations([{'op': 'put_actress', 'record': actress_dict}])
+
+            logger.info(f"✅ 女優已新增/更新: {actress_dict['id']}")
+            return actress_dict['id']
+
+    def get_actress_info(self, actress_id: str) -> Optional[ActressDict]:
+        """
+        查詢女優資訊
+
+        Args:
+            actress_id: 女優 ID
+
+        Returns:
+            女優資訊，若不存在則返回 None
+        """
+        with self._guard("查詢女優"):
+            records = self._fetch_records("SELECT record FROM actresses WHERE id = ?", (actress_id,))
+            if not records:
+                logger.debug(f"⚠️ 女優不存在: {actress_id}")
+                return None
+            return records[0]
+
+    def find_actress_by_name(self, name: str) -> Optional[ActressDict]:
+        """
+        依名稱查詢女優
+
+        Args:
+            name: 女優名稱
+
+        Returns:
+            第一位名稱相符的女優資訊，若不存在則返回 None
+        """
+        with self._guard("查詢女優"):
+            records = self._fetch_records(
+                "SELECT record FROM actresses WHERE name = ? ORDER BY seq LIMIT 1", (name,)
+            )
+            return records[0] if records else None
+
+    def get_video_links(self, video_id: str) -> List[VideoActressLinkDict]:
+        """
+        取得影片的所有影片-女優關聯
+
+        Args:
+            video_id: 影片 ID
+
+        Returns:
+            關聯清單
+        """
+        with self._guard("查詢關聯"):
+            return self._fetch_records("SELECT record FROM links WHERE video_id = ? ORDER BY seq", (video_id,))
+
+    def get_actress_links(self, actress_id: str) -> List[VideoActressLinkDict]:
+        """
+        取得女優的所有影片-女優關聯
+
+        Args:
+            actress_id: 女優 ID
+
+        Returns:
+            關聯清單
+        """
+        with self._guard("查詢關聯"):
+            return self._fetch_records("SELECT record FROM links WHERE actress_id = ? ORDER BY seq", (actress_id,))
+
+    def delete_actress(self, actress_id: str) -> bool:
+        """
+        刪除女優
+
+        同時刪除相關的影片-女優關聯記錄。
+
+        Args:
+            actress_id: 女優 ID
+
+        Returns:
+            成功則返回 True，若女優不存在則返回 False
+
+        Raises:
+            LockError: 若無法獲得寫鎖定
+            DataIntegrityError: 若仍有影片引用該女優
+        """
+        with self._guard("刪除女優"), self.transaction():
+            if not self._existing_ids('actresses', [actress_id]):
+                logger.warning(f"⚠️ 女優不存在: {actress_id}")
+                return False
+
+            self._commit_operations([{'op': 'delete_actress', 'id': actress_id}])
+
+        logger.info(f"✅ 女優已刪除: {actress_id}")
+        return True
+
+    # ========================================================================
+    # 統計查詢
+    # ========================================================================
+
+    def _compute_statistics(self) -> Dict[str, Any]:
+        """
+        計算統計資訊（格式與 JSONDBManager._compute_statistics() 相同）
+
+        Returns:
+            統計字典
+        """
+        with self._read_snapshot():
+            total_videos = self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+            total_actresses = self._conn.execute("SELECT COUNT(*) FROM actresses").fetchone()[0]
+            total_studios = self._conn.execute(
+                "SELECT COUNT(DISTINCT studio) FROM videos "
+                "WHERE studio IS NOT NULL AND studio NOT IN ('', 'UNKNOWN')"
+            ).fetchone()[0]
+
+            statistics = {
+                'actress_statistics': self._compute_actress_statistics_internal(),
+                'studio_statistics': self._compute_studio_statistics_internal(),
+                'enhanced_actress_studio_statistics': self._compute_enhanced_actress_studio_statistics_internal(),
+                'total_videos': total_videos,
+                'total_actresses': total_actresses,
+                'total_studios': total_studios,
+                'computed_at': datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT),
+            }
+
+        logger.info(f"✅ 統計計算完成: {total_videos} 部影片, {total_actresses} 位女優, {total_studios} 間片商")
+        return statistics
+
+    def get_cached_statistics(self, force_refresh: bool = False, wait: bool = False) -> Dict[str, Any]:
+        """
+        獲取快取的統計資訊
+
+        快取存放於 meta 表，任何資料變更都會使其失效。重新計算以
+        索引查詢完成，直接在呼叫端執行，因此結果的 stale 一律為 False。
+
+        Args:
+            force_refresh: 是否強制重新計算統計 (預設: False)
+            wait: 與 JSONDBManager 相容，重新計算一律同步完成
+
+        Returns:
+            統計字典（含 computed_at 與 stale）
+        """
+        with self._guard("取得統計快取"):
+            statistics = None if force_refresh else self._get_meta(self.STATISTICS_KEY)
+            if statistics is None:
+                statistics = self._compute_statistics()
+                with self.transaction():
+                    self._set_meta(self.STATISTICS_KEY, statistics)
+
+            logger.info("✅ 取得統計快取成功")
+            return dict(statistics, stale=False)
+
+    def refresh_statistics_cache(self) -> bool:
+        """
+        手動重新整理統計快取
+
+        Returns:
+            成功則返回 True
+        """
+        self.get_cached_statistics(force_refresh=True)
+        logger.info("✅ 統計快取手動重新整理成功")
+        return True
+
+    def get_actress_statistics(self) -> List[Dict[str, Any]]:
+        """
+        取得女優統計資訊，包含片商分佈
+
+        Returns:
+            女優統計清單（actress_name, video_count, studios, studio_codes）
+        """
+        with self._guard("女優統計查詢"), self._read_snapshot():
+            return self._compute_actress_statistics_internal()
+
+    def _compute_actress_statistics_internal(self) -> List[Dict[str, Any]]:
+        """內部女優統計計算方法（依出演部數降序，同數依插入順序）"""
+        studios: Dict[str, List[str]] = {}
+        for actress_id, studio in self._conn.execute(
+            "SELECT DISTINCT l.actress_id, v.studio FROM links l JOIN videos v ON v.id = l.video_id "
+            "WHERE v.studio IS NOT NULL AND v.studio != '' ORDER BY v.studio"
+        ):
+            studios.setdefault(actress_id, []).append(studio)
+
+        studio_codes: Dict[str, List[str]] = {}
+        for actress_id, studio_code in self._conn.execute(
+            "SELECT DISTINCT l.actress_id, v.studio_code FROM links l JOIN videos v ON v.id = l.video_id "
+            "WHERE v.studio_code IS NOT NULL AND v.studio_code != '' ORDER BY v.studio_code"
+        ):
+            studio_codes.setdefault(actress_id, []).append(studio_code)
+
+        statistics = [
+            {
+                'actress_name': name,
+                'video_count': video_count,
+                'studios': studios.get(actress_id, []),
+                'studio_codes': studio_codes.get(actress_id, []),
+            }
+            for actress_id, name, video_count in self._conn.execute(
+                "SELECT a.id, a.name, COUNT(l.seq) AS video_count FROM actresses a "
+                "LEFT JOIN links l ON l.actress_id = a.id AND l.video_id IS NOT NULL AND l.video_id != '' "
+                "GROUP BY a.seq ORDER BY video_count DESC, a.seq"
+            )
+        ]
+
+        logger.debug(f"✅ 女優統計計算完成: {len(statistics)} 位女優")
+        return statistics
+
+    def get_studio_statistics(self) -> List[Dict[str, Any]]:
+        """
+        取得片商統計資訊
+
+        Returns:
+            片商統計清單（studio, studio_code, video_count, actress_count）
+        """
+        with self._guard("片商統計查詢"), self._read_snapshot():
+            return self._compute_studio_statistics_internal()
+
+    def _compute_studio_statistics_internal(self) -> List[Dict[str, Any]]:
+        """內部片商統計計算方法（依影片數降序，同數依首次出現順序）"""
+        statistics = [
+            {
+                'studio': studio,
+                'studio_code': studio_code,
+                'video_count': video_count,
+                'actress_count': actress_count,
+            }
+            for studio, studio_code, video_count, actress_count in self._conn.execute(
+                "SELECT v.studio, v.studio_code, COUNT(DISTINCT v.seq) AS video_count, "
+                "COUNT(DISTINCT l.actress_id) FROM videos v "
+                "LEFT JOIN links l ON l.video_id = v.id AND l.actress_id IS NOT NULL AND l.actress_id != '' "
+                "WHERE v.studio IS NOT NULL AND v.studio != '' "
+                "GROUP BY v.studio, v.studio_code ORDER BY video_count DESC, MIN(v.seq)"
+            )
+        ]
+
+        logger.debug(f"✅ 片商統計計算完成: {len(statistics)} 間片商")
+        return statistics
+
+    def get_enhanced_actress_studio_statistics(
+        self,
+        actress_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        取得增強版女優片商統計資訊（包含關聯類型分析）
+
+        Args:
+            actress_name: 篩選特定女優名稱（可選）
+
+        Returns:
+            交叉統計清單，格式與 JSONDBManager 相同
+        """
+        with self._guard("增強女優片商統計查詢"), self._read_snapshot():
+            return self._compute_enhanced_actress_studio_statistics_internal(actress_name)
+
+    def _compute_enhanced_actress_studio_statistics_internal(
+        self,
+        actress_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """內部增強女優片商統計計算方法"""
+        sql = (
+            "SELECT l.actress_id, COALESCE(a.name, ''), v.studio, v.studio_code, "
+            "l.role_type, l.timestamp, v.id FROM links l "
+            "JOIN videos v ON v.id = l.video_id LEFT JOIN actresses a ON a.id = l.actress_id "
+            "WHERE l.actress_id IS NOT NULL AND l.actress_id != '' "
+            "AND v.studio IS NOT NULL AND v.studio NOT IN ('', 'UNKNOWN')"
+        )
+        params: tuple = ()
+        if actress_name:
+            sql += " AND COALESCE(a.name, '') = ?"
+            params = (actress_name,)
+        sql += " ORDER BY l.seq"
+
+        stats_map: Dict[tuple, Dict[str, Any]] = {}
+        for actress_id, name, studio, studio_code, role_type, timestamp, video_code in self._conn.execute(sql, params):
+            key = (actress_id, studio, studio_code, role_type)
+            stats = stats_map.get(key)
+            if stats is None:
+                stats = stats_map[key] = {
+                    'actress_name': name,
+                    'studio': studio,
+                    'studio_code': studio_code,
+                    'association_type': role_type,
+                    'video_count': 0,
+                    'video_codes': [],
+                    'first_appearance': timestamp,
+                    'latest_appearance': timestamp
+                }
+
+            stats['video_count'] += 1
+            stats['video_codes'].append(video_code)
+            if timestamp:
+                if not stats['first_appearance'] or timestamp < stats['first_appearance']:
+                    stats['first_appearance'] = timestamp
+                if not stats['latest_appearance'] or timestamp > stats['latest_appearance']:
+                    stats['latest_appearance'] = timestamp
+
+        statistics = list(stats_map.values())
+        if actress_name:
+            statistics.sort(key=lambda x: x['video_count'], reverse=True)
+        else:
+            statistics.sort(key=lambda x: (x['actress_name'], -x['video_count']))
+
+        logger.debug(f"✅ 增強女優片商統計計算完成: {len(statistics)} 筆記錄")
+        return statistics
+
+    def _actress_studio_breakdown(self, actress_name: str) -> List[StudioBreakdownRow]:
+        """
+        依片商與關聯類型分組女優的影片（單一 GROUP BY 查詢）
+
+        找不到同名女優時，將名稱視為女優 ID。
+
+        Args:
+            actress_name: 女優名稱
+
+        Returns:
+            (片商, 片商代碼, 關聯類型, 影片代碼清單) 清單
+        """
+        with self._guard("女優片商分析"), self._read_snapshot():
+            actress_ids = [row[0] for row in self._conn.execute(
+                "SELECT id FROM actresses WHERE name = ? ORDER BY seq", (actress_name,)
+            )] or [actress_name]
+
+            # 以 \x1f (unit separator) 串接影片代碼，避免與代碼內容衝突
+            rows = self._select_in(
+                "SELECT v.studio, v.studio_code, "
+                "CASE WHEN va.position = 0 THEN 'primary' ELSE 'collaboration' END AS association_type, "
+                "GROUP_CONCAT(v.id, char(31)) FROM video_actresses va JOIN videos v ON v.id = va.video_id "
+                "WHERE va.actress_id IN ({}) AND v.studio IS NOT NULL AND v.studio NOT IN ('', 'UNKNOWN') "
+                "GROUP BY v.studio, v.studio_code, association_type",
+                actress_ids
+            )
+            return [
+                (studio, studio_code, association_type, codes.split('\x1f'))
+                for studio, studio_code, association_type, codes in rows
+            ]
+
+    # ========================================================================
+    # 備份和恢復
+    # ========================================================================
+
+    def create_backup(self) -> str:
+        """
+        建立備份
+
+        匯出為 JSON 資料庫格式，可由任一儲存引擎還原。
+
+        Returns:
+            建立的備份檔案路徑
+
+        Raises:
+            BackupError: 若備份失敗
+        """
+        try:
+            timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d_%H-%M-%S')
+            backup_path = self.backup_dir / f"backup_{timestamp}.json"
+
+            json_codec.dump_file(self.export_data(), backup_path)
+
+            logger.info(f"✅ 備份建立成功: {backup_path}")
+            return str(backup_path)
+
+        except Exception as e:
+            logger.error(f"❌ 備份失敗: {e}")
+            raise BackupError(f"備份失敗: {e}")
+
+    def restore_from_backup(self, backup_path: str) -> bool:
+        """
+        還原備份
+
+        Args:
+            backup_path: 備份檔案路徑 (JSON 資料庫格式)
+
+        Returns:
+            成功則 True
+
+        Raises:
+            BackupError: 若還原失敗
+        """
+        try:
+            backup_file = Path(backup_path)
+            if not backup_file.exists():
+                raise BackupError(f"備份檔案不存在: {backup_path}")
+
+            self.import_data(json_codec.load_file(backup_file))
+
+            logger.info(f"✅ 備份還原成功: {backup_path}")
+            return True
+
+        except BackupError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ 還原失敗: {e}")
+            raise BackupError(f"還原失敗: {e}")
+
+
+# ============================================================================
+# 遷移工具
+# ============================================================================
+
+
+def _detect_json_storage_mode(data_dir: Path) -> str:
+    """依目錄內容判斷 JSON 資料庫的儲存模式"""
+    if (data_dir / SHARD_DIR_NAME / SHARD_MANIFEST_NAME).exists():
+        return STORAGE_MODES["SHARDED"]
+    if (data_dir / JOURNAL_FILE_NAME).exists():
+        return STORAGE_MODES["JOURNAL"]
+    return STORAGE_MODES["SNAPSHOT"]
+
+
+def migrate_json_to_sqlite(data_dir: str = DATA_DIR, sqlite_path: Optional[str] = None) -> Path:
+    """
+    將 JSON 資料庫（任一儲存模式）批次匯入 SQLite
+
+    來源檔案保留不刪除；目標資料庫的既有內容會被取代。
+
+    Args:
+        data_dir: JSON 資料庫目錄
+        sqlite_path: SQLite 檔案路徑 (預設為資料目錄下的 data.sqlite)
+
+    Returns:
+        SQLite 檔案路徑
+
+    Raises:
+        JSONDatabaseError: 若來源資料損壞或匯入失敗
+    """
+    from src.models.json_database import JSONDBManager
+
+    data_dir = Path(data_dir)
+    sqlite_path = Path(sqlite_path) if sqlite_path else data_dir / SQLITE_DB_FILE_NAME
+
+    source = JSONDBManager(data_dir=str(data_dir), storage_mode=_detect_json_storage_mode(data_dir))
+    with SQLiteStorageEngine(str(sqlite_path)) as target:
+        target.import_data(source.export_data())
+
+    logger.info(f"✅ 已遷移至 SQLite: {len(source.data.get('videos', {}))} 部影片 → {sqlite_path}")
+    return sqlite_path
+
+
+def migrate_sqlite_to_json(
+    sqlite_path: str,
+    data_dir: str = DATA_DIR,
+    storage_mode: str = STORAGE_MODES["SNAPSHOT"]
+) -> Path:
+    """
+    將 SQLite 資料庫批次匯出為 JSON 資料庫
+
+    目標目錄的既有資料會被取代（舊檔案可由備份還原）。
+
+    Args:
+        sqlite_path: SQLite 檔案路徑
+        data_dir: JSON 資料庫目錄
+        storage_mode: 目標 JSON 資料庫的儲存模式
+
+    Returns:
+        JSON 資料庫的主檔案路徑 (data.json 或分片 manifest)
+
+    Raises:
+        JSONDatabaseError: 若匯出或驗證失敗
+    """
+    from src.models.json_database import JSONDBManager
+
+    with SQLiteStorageEngine(sqlite_path) as source:
+        data = source.export_data()
+
+    target = JSONDBManager(data_dir=str(data_dir), storage_mode=storage_mode)
+    target.import_data(data)
+
+    logger.info(f"✅ 已遷移至 JSON 資料庫: {len(data['videos'])} 部影片 → {target.data_file}")
+    return target.data_file
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="JSON 與 SQLite 資料庫之間的批次遷移")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    to_sqlite = subparsers.add_parser('to-sqlite', help="JSON 資料庫 → SQLite")
+    to_sqlite.add_argument('data_dir', nargs='?', default=DATA_DIR, help="JSON 資料庫目錄")
+    to_sqlite.add_argument('--sqlite', dest='sqlite_path', default=None, help="SQLite 檔案路徑")
+
+    to_json = subparsers.add_parser('to-json', help="SQLite → JSON 資料庫")
+    to_json.add_argument('sqlite_path', help="SQLite 檔案路徑")
+    to_json.add_argument('data_dir', nargs='?', default=DATA_DIR, help="JSON 資料庫目錄")
+    to_json.add_argument('--mode', default=STORAGE_MODES["SNAPSHOT"],
+                         choices=list(STORAGE_MODES.values()), help="JSON 儲存模式")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'to-sqlite':
+        migrate_json_to_sqlite(args.data_dir, args.sqlite_path)
+    else:
+        migrate_sqlite_to_json(args.sqlite_path, args.data_dir, args.mode)
@@ -0,0 +1,627 @@
+# -*- coding: utf-8 -*-
+"""
+資料庫儲存引擎介面 (StorageEngine)
+
+此模組定義 JSONDBManager 與 SQLiteStorageEngine 共同實作的介面，包括：
+- 影片與女優 CRUD、交易與批次寫入
+- 影片查詢 (query_videos)
+- 統計查詢與統計快取
+- 女優主要片商分析（評分邏輯由所有引擎共用）
+- 唯讀快照 (snapshot)
+- 備份列表與清理、完整性錯誤回報格式
+
+並提供依 config.ini [database] 區段建立引擎的 create_storage_engine()。
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Iterable, Iterator, Mapping, Set, Tuple
+
+from src.models.json_types import (
+    JSONDatabaseDict,
+    VideoDict,
+    ActressDict,
+    VideoActressLinkDict,
+    ValidationError,
+    DataIntegrityError,
+    SCHEMA_VERSION,
+    DATA_DIR,
+    STORAGE_ENGINES,
+    STORAGE_MODES,
+    SQLITE_DB_FILE_NAME,
+    DEFAULT_SHARD_COUNT,
+)
+
+if TYPE_CHECKING:
+    from src.models.json_snapshot import DatabaseSnapshot
+    from src.models.video_query import VideoQuery
+
+# 設定日誌
+logger = logging.getLogger(__name__)
+
+# 女優片商分析的分組 (片商, 片商代碼, 關聯類型, 影片代碼清單)
+StudioBreakdownRow = Tuple[Any, Any, str, List[str]]
+
+
+class StorageEngine(ABC):
+    """儲存引擎抽象類別
+
+    子類別需提供 backup_dir 屬性，並實作所有抽象方法。
+    讀取方法回傳與 JSON 資料庫相同結構的字典 (VideoDict、ActressDict...)。
+    """
+
+    # 常數定義
+    BACKUP_PATTERN = "backup_*.json"
+    DEFAULT_BACKUP_DAYS = 30
+    DEFAULT_BACKUP_MAX_COUNT = 50
+
+    # ========================================================================
+    # 交易與 CRUD
+    # ========================================================================
+
+    @abstractmethod
+    @contextmanager
+    def transaction(self) -> Iterator["StorageEngine"]:
+        """抽象方法：批次寫入交易（全有或全無，巢狀交易併入外層）"""
+        pass
+
+    @abstractmethod
+    def bulk_upsert_videos(self, videos: Iterable[VideoDict]) -> int:
+        """抽象方法：在單一交易中新增或更新多部影片"""
+        pass
+
+    @abstractmethod
+    def add_or_update_video(self, video_info: VideoDict) -> str:
+        """抽象方法：新增或更新影片"""
+        pass
+
+    @abstractmethod
+    def get_video_info(self, video_id: str) -> Optional[VideoDict]:
+        """抽象方法：查詢影片"""
+        pass
+
+    @abstractmethod
+    def get_all_videos(self, filter_dict: Optional[Dict[str, Any]] = None) -> List[VideoDict]:
+        """抽象方法：取得影片清單（支援 studio / release_date_after / release_date_before 過濾）"""
+        pass
+
+    def query_videos(self, query: "VideoQuery") -> Iterator[VideoDict]:
+        """
+        執行影片查詢
+
+        預設對 get_all_videos() 的結果逐筆比對；引擎可覆寫以使用索引。
+
+        Args:
+            query: VideoQuery
+
+        Returns:
+            符合條件的影片迭代器
+        """
+        return query.execute(self.get_all_videos())
+
+    @abstractmethod
+    def delete_video(self, video_id: str) -> bool:
+        """抽象方法：刪除影片及其關聯"""
+        pass
+
+    @abstractmethod
+    def add_or_update_actress(self, actress_info: ActressDict) -> str:
+        """抽象方法：新增或更新女優"""
+        pass
+
+    @abstractmethod
+    def get_actress_info(self, actress_id: str) -> Optional[ActressDict]:
+        """抽象方法：查詢女優"""
+        pass
+
+    @abstractmethod
+    def find_actress_by_name(self, name: str) -> Optional[ActressDict]:
+        """抽象方法：依名稱查詢女優"""
+        pass
+
+    @abstractmethod
+    def get_video_links(self, video_id: str) -> List[VideoActressLinkDict]:
+        """抽象方法：取得影片的影片-女優關聯"""
+        pass
+
+    @abstractmethod
+    def get_actress_links(self, actress_id: str) -> List[VideoActressLinkDict]:
+        """抽象方法：取得女優的影片-女優關聯"""
+        pass
+
+    @abstractmethod
+    def delete_actress(self, actress_id: str) -> bool:
+        """抽象方法：刪除女優及其關聯"""
+        pass
+
+    @abstractmethod
+    def export_data(self) -> JSONDatabaseDict:
+        """抽象方法：取得完整資料庫字典（JSON 資料庫格式，供遷移與備份使用）"""
+        pass
+
+    @abstractmethod
+    def import_data(self, data: JSONDatabaseDict) -> None:
+        """抽象方法：以資料庫字典取代全部內容（完整驗證後才寫入，供遷移與還原使用）"""
+        pass
+
+    def snapshot(self) -> "DatabaseSnapshot":
+        """
+        取得目前資料的唯讀快照
+
+        預設從 export_data() 建立完整快照，成本與資料量成正比（例如
+        SQLite 引擎會讀出整個資料庫）；只需查詢部分影片時使用
+        query_videos()。JSONDBManager 只在提交後首次取得時複製變更的
+        容器，沒有新的提交時直接回傳已發佈的快照而不取得鎖定。
+
+        Returns:
+            DatabaseSnapshot
+        """
+        from src.models.json_snapshot import DatabaseSnapshot
+
+        return DatabaseSnapshot.from_data(self.export_data())
+
+    @abstractmethod
+    def compact_journal(self) -> bool:
+        """抽象方法：將引擎的日誌合併回主檔案，無日誌時回傳 False"""
+        pass
+
+    # ========================================================================
+    # 統計查詢
+    # ========================================================================
+
+    @abstractmethod
+    def get_cached_statistics(self, force_refresh: bool = False, wait: bool = False) -> Dict[str, Any]:
+        """抽象方法：取得統計快取（含 computed_at 與表示重新計算尚未完成的 stale 旗標）"""
+        pass
+
+    @abstractmethod
+    def refresh_statistics_cache(self) -> bool:
+        """抽象方法：強制重新計算統計快取"""
+        pass
+
+    @abstractmethod
+    def get_actress_statistics(self) -> List[Dict[str, Any]]:
+        """抽象方法：女優統計"""
+        pass
+
+    @abstractmethod
+    def get_studio_statistics(self) -> List[Dict[str, Any]]:
+        """抽象方法：片商統計"""
+        pass
+
+    @abstractmethod
+    def get_enhanced_actress_studio_statistics(
+        self,
+        actress_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """抽象方法：女優×片商×關聯類型交叉統計"""
+        pass
+
+    @abstractmethod
+    def _actress_studio_breakdown(self, actress_name: str) -> List[StudioBreakdownRow]:
+        """
+        抽象方法：依片商與關聯類型分組女優的影片
+
+        影片的 actresses 清單中排第一位者為 'primary'，其餘為 'collaboration'；
+        無片商或片商為 UNKNOWN 的影片不計入。
+        """
+        pass
+
+    def analyze_actress_primary_studio(
+        self,
+        actress_name: str,
+        major_studios: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        分析女優的主要片商（基於檔案關聯類型和番號統計）
+
+        主演作品權重較高；有大片商作品且小片商作品少於 10 部時
+        推薦以片商分類，否則歸類為單體企劃。
+
+        Args:
+            actress_name: 女優名稱
+            major_studios: 大片商集合（支援例外邏輯）
+
+        Returns:
+            分析結果字典，包含:
+            - actress_name, primary_studio, confidence, total_videos
+            - studio_distribution: {片商: {studio_code, primary_count, collaboration_count, total_count, codes}}
+            - recommendation: 'studio_classification' 或 'solo_artist'
+        """
+        return recommend_primary_studio(actress_name, self._actress_studio_breakdown(actress_name), major_studios)
+
+    # ========================================================================
+    # 驗證與完整性錯誤
+    # ========================================================================
+
+    @abstractmethod
+    def validate_data(self) -> Dict[str, Any]:
+        """抽象方法：全面驗證資料，回傳 {'valid': bool, 'errors': [...]}"""
+        pass
+
+    def _validate_json_format(self, data: Any) -> None:
+        """
+        驗證 JSON 格式和必需欄位
+
+        Args:
+            data: 要驗證的資料
+
+        Raises:
+            ValidationError: 若格式不正確
+        """
+        if not isinstance(data, dict):
+            raise ValidationError("根層必須是字典")
+
+        required_keys = {'schema_version', 'videos', 'actresses', 'links', 'statistics'}
+        missing_keys = required_keys - set(data.keys())
+
+        if missing_keys:
+            raise ValidationError(f"遺失必需鍵: {missing_keys}")
+
+        # 驗證 schema 版本
+        if data.get('schema_version') != SCHEMA_VERSION:
+            raise ValidationError(
+                f"Schema 版本不符: 預期 {SCHEMA_VERSION}, 實際 {data.get('schema_version')}"
+            )
+
+        logger.debug("✅ JSON 格式驗證通過")
+
+    @staticmethod
+    def _link_integrity_errors(
+        link: Dict[str, Any],
+        videos: Dict[str, Any],
+        actresses: Dict[str, Any]
+    ) -> List[str]:
+        """取得單一關聯的完整性錯誤"""
+        errors = []
+        video_id = link.get('video_id')
+        actress_id = link.get('actress_id')
+
+        if video_id and video_id not in videos:
+            errors.append(f"連結中的 video_id '{video_id}' 不存在")
+
+        if actress_id and actress_id not in actresses:
+            errors.append(f"連結中的 actress_id '{actress_id}' 不存在")
+
+        return errors
+
+    @staticmethod
+    def _video_integrity_errors(
+        video_id: str,
+        video: Dict[str, Any],
+        actresses: Dict[str, Any]
+    ) -> List[str]:
+        """取得單一影片女優清單的完整性錯誤"""
+        return [
+            f"影片 '{video_id}' 中的女優 ID '{actress_id}' 不存在"
+            for actress_id in video.get('actresses', [])
+            if actress_id not in actresses
+        ]
+
+    @staticmethod
+    def _raise_integrity_errors(errors: List[str]) -> None:
+        """
+        依固定順序回報完整性錯誤（完整與增量模式共用）
+
+        Raises:
+            DataIntegrityError: 若有任何錯誤
+        """
+        if not errors:
+            logger.debug("✅ 參照完整性驗證通過")
+            return
+
+        errors = sorted(errors)
+        if len(errors) == 1:
+            raise DataIntegrityError(errors[0])
+        raise DataIntegrityError(f"{errors[0]} (共 {len(errors)} 項完整性錯誤)")
+
+    # ========================================================================
+    # 備份
+    # ========================================================================
+
+    @abstractmethod
+    def create_backup(self) -> str:
+        """抽象方法：建立備份並回傳備份檔案路徑"""
+        pass
+
+    @abstractmethod
+    def restore_from_backup(self, backup_path: str) -> bool:
+        """抽象方法：從備份檔案還原"""
+        pass
+
+    def get_backup_list(self) -> List[str]:
+        """
+        列出可用備份
+
+        Returns:
+            備份檔案路徑清單 (按時間排序)
+        """
+        try:
+            backup_files = sorted(self.backup_dir.glob(self.BACKUP_PATTERN))
+            return [str(f) for f in backup_files]
+        except Exception as e:
+            logger.error(f"❌ 無法列出備份: {e}")
+            return []
+
+    def cleanup_old_backups(self, days: int = None, max_count: int = None) -> int:
+        """
+        清理舊備份
+
+        按日期和數量限制清理備份。只列出並排序備份一次，
+        決定要刪除的備份後一次交給 _delete_backups。
+
+        Args:
+            days: 保留天數 (預設: 30)
+            max_count: 最大備份數 (預設: 50)
+
+        Returns:
+            刪除的備份數
+        """
+        if days is None:
+            days = self.DEFAULT_BACKUP_DAYS
+        if max_count is None:
+            max_count = self.DEFAULT_BACKUP_MAX_COUNT
+
+        try:
+            from datetime import timedelta
+
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+            backups = self.get_backup_list()
+
+            # 按時間刪除，剩餘的備份再按數量刪除最舊的
+            expired = [path for path in backups if self._is_backup_expired(Path(path), cutoff_date)]
+            expired_set = set(expired)
+            remaining = [path for path in backups if path not in expired_set]
+            overflow = remaining[:max(len(remaining) - max_count, 0)]
+
+            for path in expired:
+                logger.info(f"刪除舊備份: {path}")
+            for path in overflow:
+                logger.info(f"刪除超限備份: {path}")
+
+            deleted_count = self._delete_backups(expired + overflow)
+            logger.info(f"✅ 備份清理完成，刪除 {deleted_count} 個備份")
+            return deleted_count
+
+        except Exception as e:
+            logger.error(f"❌ 備份清理失敗: {e}")
+            return 0
+
+    def _delete_backups(self, backup_paths: List[str]) -> int:
+        """
+        刪除備份（預設刪除備份檔案）
+
+        Args:
+            backup_paths: get_backup_list() 回傳的備份路徑
+
+        Returns:
+            刪除的備份數
+        """
+        deleted_count = 0
+        for path in backup_paths:
+            Path(path).unlink()
+            deleted_count += 1
+        return deleted_count
+
+    @staticmethod
+    def _is_backup_expired(backup_file: Path, cutoff_date: datetime) -> bool:
+        """檢查備份是否過期"""
+        try:
+            date_str = backup_file.stem.replace("backup_", "")
+            date_part = date_str.split("_")[0]  # YYYY-MM-DD
+            file_date = datetime.strptime(date_part, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            return file_date < cutoff_date
+        except Exception as e:
+            logger.warning(f"無法解析備份檔案日期: {backup_file}, {e}")
+            return False
+
+
+# ============================================================================
+# 女優主要片商分析
+# ============================================================================
+
+
+def recommend_primary_studio(
+    actress_name: str,
+    rows: Iterable[StudioBreakdownRow],
+    major_studios: Optional[Set[str]] = None
+) -> Dict[str, Any]:
+    """
+    依片商分組計算女優的主要片商與分類建議
+
+    主演作品權重較高；有大片商作品且小片商作品少於 10 部時
+    推薦以片商分類，否則歸類為單體企劃。分組依影片數與名稱排序，
+    結果與分組的來源順序無關。
+
+    Args:
+        actress_name: 女優名稱
+        rows: (片商, 片商代碼, 關聯類型, 影片代碼清單) 分組
+        major_studios: 大片商集合（支援例外邏輯）
+
+    Returns:
+        分析結果字典（格式見 StorageEngine.analyze_actress_primary_studio）
+    """
+    rows = sorted(rows, key=lambda row: (-len(row[3]), str(row[0]), str(row[1] or ''), row[2]))
+    studio_stats: Dict[Any, Dict[str, Any]] = {}
+    total_videos = 0
+
+    for studio, studio_code, association_type, codes in rows:
+        count = len(codes)
+        total_videos += count
+
+        if studio not in studio_stats:
+            studio_stats[studio] = {
+                'studio_code': studio_code,
+                'primary_count': 0,
+                'collaboration_count': 0,
+                'total_count': 0,
+                'codes': []
+            }
+
+        studio_stats[studio]['total_count'] += count
+        studio_stats[studio]['codes'].extend(sorted(codes))
+
+        if association_type == 'primary':
+            studio_stats[studio]['primary_count'] += count
+        elif association_type == 'collaboration':
+            studio_stats[studio]['collaboration_count'] += count
+
+    if not studio_stats:
+        return {
+            'actress_name': actress_name,
+            'primary_studio': 'UNKNOWN',
+            'confidence': 0.0,
+            'total_videos': 0,
+            'studio_distribution': {},
+            'recommendation': 'solo_artist'
+        }
+
+    # 優先考慮主演作品較多的片商（主演權重 3，共演權重 1）
+    best_studio = None
+    best_score = 0
+    for studio, stats in studio_stats.items():
+        weighted_score = stats['primary_count'] * 3.0 + stats['collaboration_count'] * 1.0
+        if weighted_score > best_score:
+            best_score = weighted_score
+            best_studio = studio
+
+    # 計算信心度（主演比例超過 70% 時提升 20%）
+    confidence = 0.0
+    best_stats = studio_stats.get(best_studio)
+    if best_stats:
+        confidence = (best_stats['total_count'] / total_videos) * 100
+        if best_stats['primary_count'] / total_videos > 0.7:
+            confidence = min(confidence * 1.2, 100)
+
+    # 統計大片商與小片商作品數
+    major_studio_work_count = 0
+    minor_studio_work_count = 0
+    best_major_studio = None
+    best_major_count = 0
+    for studio, stats in studio_stats.items():
+        if major_studios and studio in major_studios:
+            major_studio_work_count += stats['total_count']
+            if stats['total_count'] > best_major_count:
+                best_major_count = stats['total_count']
+                best_major_studio = studio
+        else:
+            minor_studio_work_count += stats['total_count']
+
+    recommendation = 'solo_artist'
+    if best_major_studio and best_major_studio == best_studio:
+        if best_stats['total_count'] >= 3 and confidence >= 70:
+            # 標準條件：≥3部作品且信心度≥70%
+            recommendation = 'studio_classification'
+        elif minor_studio_work_count < 10:
+            # 有大片商作品且小片商作品<10部
+            recommendation = 'studio_classification'
+            confidence = max(confidence, 60.0)
+    elif best_major_studio and minor_studio_work_count < 10:
+        # 最佳片商不是大片商，但有大片商作品且小片商作品不多
+        recommendation = 'studio_classification'
+        best_studio = best_major_studio
+        major_confidence = (studio_stats[best_major_studio]['total_count'] / total_videos) * 100
+        confidence = max(major_confidence, 60.0)
+
+    return {
+        'actress_name': actress_name,
+        'primary_studio': best_studio or 'UNKNOWN',
+        'confidence': round(confidence, 1),
+        'total_videos': total_videos,
+        'studio_distribution': studio_stats,
+        'recommendation': recommendation
+    }
+
+
+def breakdown_actress_videos(
+    videos: Mapping[str, VideoDict],
+    actress_ids: Iterable[str],
+    actress_videos: Mapping[str, Iterable[str]]
+) -> List[StudioBreakdownRow]:
+    """
+    依片商與關聯類型分組女優的影片
+
+    影片的 actresses 清單中排第一位者為 'primary'，其餘為 'collaboration'；
+    無片商或片商為 UNKNOWN 的影片不計入。
+
+    Args:
+        videos: 影片 ID → 影片記錄
+        actress_ids: 女優 ID
+        actress_videos: 女優 ID → 引用該女優的影片 ID
+
+    Returns:
+        (片商, 片商代碼, 關聯類型, 影片代碼清單) 清單
+    """
+    groups: Dict[tuple, List[str]] = {}
+    for actress_id in actress_ids:
+        for video_id in actress_videos.get(actress_id, ()):
+            video = videos[video_id]
+            studio = video.get('studio')
+            if not studio or studio == 'UNKNOWN':
+                continue
+
+            position = video.get('actresses', []).index(actress_id)
+            association_type = 'primary' if position == 0 else 'collaboration'
+            key = (studio, video.get('studio_code', ''), association_type)
+            groups.setdefault(key, []).append(video_id)
+
+    return [(studio, studio_code, association_type, codes)
+            for (studio, studio_code, association_type), codes in groups.items()]
+
+
+# ============================================================================
+# 引擎建立
+# ============================================================================
+
+
+def create_storage_engine(config) -> StorageEngine:
+    """
+    依 config.ini 的 [database] 區段建立儲存引擎
+
+    支援的設定:
+    - engine: "json" (預設) 或 "sqlite"
+    - json_data_dir: 資料目錄
+    - storage_mode / compact_json / shard_count / lazy_load / compact_records: JSON 引擎選項
+    - sqlite_path: SQLite 檔案路徑 (預設為資料目錄下的 data.sqlite)
+
+    lazy_load 預設關閉。大型資料庫要縮短啟動時間時在 [database] 設定
+    lazy_load = true：啟動時只對映 data.json 並於背景解析，載入完成前
+    的寫入與完整查詢會等待背景載入；僅 snapshot 模式支援，其他模式
+    記錄警告後改為立即載入。
+
+    Args:
+        config: ConfigManager 或 configparser 物件
+
+    Returns:
+        儲存引擎
+
+    Raises:
+        ValidationError: 若引擎名稱不支援
+    """
+    engine = config.get('database', 'engine', fallback=STORAGE_ENGINES["JSON"])
+    data_dir = config.get('database', 'json_data_dir', fallback=DATA_DIR)
+
+    if engine == STORAGE_ENGINES["SQLITE"]:
+        from src.models.sqlite_database import SQLiteStorageEngine
+
+        sqlite_path = config.get('database', 'sqlite_path', fallback=None) or \
+            str(Path(data_dir) / SQLITE_DB_FILE_NAME)
+        logger.info(f"使用 SQLite 儲存引擎: {sqlite_path}")
+        return SQLiteStorageEngine(sqlite_path)
+
+    if engine != STORAGE_ENGINES["JSON"]:
+        raise ValidationError(f"不支援的儲存引擎: {engine}")
+
+    from src.models.json_database import JSONDBManager
+
+    return JSONDBManager(
+        data_dir=data_dir,
+        storage_mode=config.get('database', 'storage_mode', fallback=STORAGE_MODES["SNAPSHOT"]),
+        compact_json=config.getboolean('database', 'compact_json', fallback=False),
+        shard_count=config.getint('database', 'shard_count', fallback=DEFAULT_SHARD_COUNT),
+        lazy_load=config.getboolean('database', 'lazy_load', fallback=False),
+        compact_records=config.getboolean('database', 'compact_records', fallback=False)
+    )
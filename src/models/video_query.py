@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""
+影片查詢 (VideoQuery)
+
+此模組提供可組合的影片查詢，由所有儲存引擎共用：
+- 條件 (Predicate)：欄位相等、IN、前綴、範圍、女優、任一條件成立
+- 排序、limit/offset 與欄位投影
+- 結果以迭代器逐筆產生
+
+VideoQuery 不可變，每個建構方法回傳新的查詢，因此可重複使用與延伸：
+
+    query = VideoQuery().where('studio', 'S1').with_actress('actress_1').limit(20)
+    for video in db.query_videos(query):
+        ...
+
+各引擎以索引處理可用的條件（JSON 的次要索引、SQLite 的欄位索引），
+其餘條件由 VideoQuery.execute() 逐筆比對。未指定排序時，結果順序
+依引擎使用的索引而定。
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from src.models.json_types import ISO_DATETIME_FORMAT, VideoDict
+
+# 需要重新搜尋的搜尋狀態（搜尋過但無結果、搜尋失敗）
+RESEARCH_STATUSES = ('searched_not_found', 'failed')
+
+# 超過此天數未搜尋的影片需要重新搜尋
+RESEARCH_AFTER_DAYS = 7
+
+# ISO 8601 日期時間（小數秒與時區可省略；'Z' 或 ±HH:MM 時差）
+_ISO_DATETIME = re.compile(
+    r"(\d{4}-\d{2}-\d{2})(?:[T ](\d{2}:\d{2}(?::\d{2})?)(?:\.\d+)?)?\s*(Z|[+-]\d{2}:?\d{2})?",
+    re.IGNORECASE
+)
+
+
+# ============================================================================
+# 條件
+# ============================================================================
+
+class Predicate:
+    """查詢條件基底類別"""
+
+    field: Optional[str] = None
+
+    def matches(self, video: VideoDict) -> bool:
+        """檢查影片是否符合條件"""
+        raise NotImplementedError
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and vars(self) == vars(other)
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.field))
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{key}={value!r}" for key, value in vars(self).items())
+        return f"{type(self).__name__}({args})"
+
+
+class Eq(Predicate):
+    """欄位等於指定值（None 符合缺少該欄位的影片）"""
+
+    def __init__(self, field: str, value: Any):
+        self.field = field
+        self.value = value
+
+    def matches(self, video: VideoDict) -> bool:
+        return video.get(self.field) == self.value
+
+
+class In(Predicate):
+    """欄位值為指定值之一"""
+
+    def __init__(self, field: str, values: Iterable[Any]):
+        self.field = field
+        # 保持順序並去除重複（ID 查詢依此順序回傳）
+        self.values = tuple(dict.fromkeys(values))
+        self._lookup = frozenset(self.values)
+
+    def matches(self, video: VideoDict) -> bool:
+        return video.get(self.field) in self._lookup
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and (self.field, self.values) == (other.field, other.values)
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.field))
+
+    def __repr__(self) -> str:
+        return f"In(field={self.field!r}, values={self.values!r})"
+
+
+class Prefix(Predicate):
+    """字串欄位以指定前綴開頭"""
+
+    def __init__(self, field: str, prefix: str):
+        self.field = field
+        self.prefix = prefix
+
+    def matches(self, video: VideoDict) -> bool:
+        value = video.get(self.field)
+        return isinstance(value, str) and value.startswith(self.prefix)
+
+    def upper_bound(self) -> Optional[str]:
+        """符合前綴的字串上限（不含）；空前綴時 None"""
+        if not self.prefix:
+            return None
+        return self.prefix[:-1] + chr(ord(self.prefix[-1]) + 1)
+
+
+class Range(Predicate):
+    """欄位值在範圍內（字串比較；缺少或空白的值不符合）
+
+    ISO 8601 日期與時間字串可直接以字串比較。last_search_date 的值
+    與範圍先以 normalize_search_date 轉為 UTC 再比較。
+    """
+
+    def __init__(
+        self,
+        field: str,
+        low: Optional[str] = None,
+        high: Optional[str] = None,
+        include_low: bool = True,
+        include_high: bool = True
+    ):
+        self.field = field
+        self.low = _range_bound(field, low)
+        self.high = _range_bound(field, high)
+        self.include_low = include_low
+        self.include_high = include_high
+
+    def matches(self, video: VideoDict) -> bool:
+        value = _range_key(self.field, video.get(self.field))
+        if not isinstance(value, str) or not value:
+            return False
+        if self.low is not None and (value < self.low or (value == self.low and not self.include_low)):
+            return False
+        if self.high is not None and (value > self.high or (value == self.high and not self.include_high)):
+            return False
+        return True
+
+
+class HasActress(Predicate):
+    """影片的 actresses 欄位包含指定女優"""
+
+    field = 'actresses'
+
+    def __init__(self, actress_id: str):
+        self.actress_id = actress_id
+
+    def matches(self, video: VideoDict) -> bool:
+        return self.actress_id in (video.get('actresses') or ())
+
+
+class AnyOf(Predicate):
+    """任一子條件成立"""
+
+    def __init__(self, *predicates: Predicate):
+        if not predicates:
+            raise ValueError("AnyOf 至少需要一個條件")
+        self.predicates = tuple(predicates)
+
+    def matches(self, video: VideoDict) -> bool:
+        return any(predicate.matches(video) for predicate in self.predicates)
+
+
+def normalize_search_date(value: Any) -> Optional[str]:
+    """
+    將 last_search_date 轉為 UTC 的比較用字串 (ISO_DATETIME_FORMAT)
+
+    記錄中的時間可能為 '...Z' (UTC)、帶時差的字串，或 datetime.isoformat()
+    產生的無時區本地時間；無時區者視為本地時間。小數秒捨去。
+
+    Args:
+        value: ISO 8601 字串或 datetime
+
+    Returns:
+        UTC 字串；缺少或無法解析時 None
+    """
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, str):
+        match = _ISO_DATETIME.fullmatch(value.strip())
+        if match is None:
+            return None
+        date, clock, offset = match.groups()
+        clock = clock or "00:00"
+        if len(clock) == 5:
+            clock += ":00"
+        try:
+            moment = datetime.strptime(f"{date}T{clock}", "%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            return None
+        if offset and offset.upper() == 'Z':
+            moment = moment.replace(tzinfo=timezone.utc)
+        elif offset:
+            sign = -1 if offset[0] == '-' else 1
+            hours, minutes = int(offset[1:3]), int(offset[-2:])
+            moment = moment.replace(tzinfo=timezone(sign * timedelta(hours=hours, minutes=minutes)))
+    else:
+        return None
+    # astimezone 將無時區的時間視為本地時間
+    return moment.astimezone(timezone.utc).strftime(ISO_DATETIME_FORMAT)
+
+
+def search_cutoff(value: Union[str, datetime]) -> str:
+    """
+    將 last_search_date 截止時間轉為比較用字串（UTC，見 normalize_search_date）
+
+    Args:
+        value: ISO 8601 字串或 datetime（無時區者為本地時間）
+
+    Raises:
+        ValueError: 若字串無法解析
+    """
+    cutoff = normalize_search_date(value)
+    if cutoff is None:
+        raise ValueError(f"無法解析的時間: {value!r}")
+    return cutoff
+
+
+def _range_bound(field: Optional[str], value: Any) -> Any:
+    """範圍的上下限（last_search_date 轉為 UTC，無法解析時拋出 ValueError）"""
+    if field == 'last_search_date' and value is not None:
+        return search_cutoff(value)
+    return value
+
+
+def _range_key(field: Optional[str], value: Any) -> Any:
+    """記錄中用於範圍比較的值（last_search_date 轉為 UTC，無法解析時 None）"""
+    if field == 'last_search_date':
+        return normalize_search_date(value)
+    return value
+
+
+# ============================================================================
+# 查詢
+# ============================================================================
+
+class VideoQuery:
+    """可組合的影片查詢（不可變）
+
+    Attributes:
+        predicates: 所有條件皆需成立 (AND)
+        ordering: 排序欄位與是否遞減；None 表示不排序
+        start: 略過的筆數
+        count: 最多回傳的筆數；None 表示不限制
+        fields: 投影欄位；None 表示回傳完整記錄
+    """
+
+    def __init__(self):
+        self.predicates: Tuple[Predicate, ...] = ()
+        self.ordering: Optional[Tuple[str, bool]] = None
+        self.start = 0
+        self.count: Optional[int] = None
+        self.fields: Optional[Tuple[str, ...]] = None
+
+    def _with(self, **changes: Any) -> "VideoQuery":
+        query = VideoQuery.__new__(VideoQuery)
+        query.__dict__.update(self.__dict__)
+        query.__dict__.update(changes)
+        return query
+
+    # ========================================================================
+    # 條件
+    # ========================================================================
+
+    def filter(self, *predicates: Predicate) -> "VideoQuery":
+        """加入條件（與既有條件皆需成立）"""
+        return self._with(predicates=self.predicates + tuple(predicates))
+
+    def where(self, field: str, value: Any) -> "VideoQuery":
+        """欄位等於指定值"""
+        return self.filter(Eq(field, value))
+
+    def where_in(self, field: str, values: Iterable[Any]) -> "VideoQuery":
+        """欄位值為指定值之一"""
+        return self.filter(In(field, values))
+
+    def where_prefix(self, field: str, prefix: str) -> "VideoQuery":
+        """字串欄位以指定前綴開頭"""
+        return self.filter(Prefix(field, prefix))
+
+    def where_between(self, field: str, low: Optional[str] = None, high: Optional[str] = None) -> "VideoQuery":
+        """欄位值在 [low, high] 範圍內（任一端可省略）"""
+        return self.filter(Range(field, low, high))
+
+    def released_between(self, after: Optional[str] = None, before: Optional[str] = None) -> "VideoQuery":
+        """發行日期在 [after, before] 範圍內"""
+        return self.where_between('release_date', after, before)
+
+    def with_search_status(self, *statuses: str) -> "VideoQuery":
+        """搜尋狀態為指定值之一"""
+        return self.where_in('search_status', statuses)
+
+    def searched_before(self, cutoff: Union[str, datetime]) -> "VideoQuery":
+        """最後搜尋時間早於截止時間（未搜尋過的影片不符合）"""
+        return self.filter(Range('last_search_date', high=search_cutoff(cutoff), include_high=False))
+
+    def with_actress(self, actress_id: str) -> "VideoQuery":
+        """actresses 欄位包含指定女優"""
+        return self.filter(HasActress(actress_id))
+
+    def any_of(self, *predicates: Predicate) -> "VideoQuery":
+        """任一條件成立"""
+        return self.filter(AnyOf(*predicates))
+
+    # ========================================================================
+    # 排序、分頁與投影
+    # ========================================================================
+
+    def order_by(self, field: str, descending: bool = False) -> "VideoQuery":
+        """依欄位排序（缺少或空白的值排在最後）"""
+        return self._with(ordering=(field, descending))
+
+    def offset(self, start: int) -> "VideoQuery":
+        """略過前 start 筆"""
+        if start < 0:
+            raise ValueError("offset 不可為負數")
+        return self._with(start=start)
+
+    def limit(self, count: int) -> "VideoQuery":
+        """最多回傳 count 筆"""
+        if count < 0:
+            raise ValueError("limit 不可為負數")
+        return self._with(count=count)
+
+    def select(self, *fields: str) -> "VideoQuery":
+        """只回傳指定欄位"""
+        return self._with(fields=tuple(fields))
+
+    # ========================================================================
+    # 執行
+    # ========================================================================
+
+    def execute(
+        self,
+        candidates: Iterable[VideoDict],
+        satisfied: Sequence[Predicate] = ()
+    ) -> Iterator[VideoDict]:
+        """
+        對候選影片套用條件、排序、分頁與投影
+
+        Args:
+            candidates: 候選影片（引擎以索引篩選後的結果）
+            satisfied: 已由索引保證成立、不需再比對的條件
+
+        Returns:
+            符合條件的影片迭代器
+        """
+        residual = [predicate for predicate in self.predicates if predicate not in satisfied]
+        if residual:
+            candidates = (video for video in candidates if all(p.matches(video) for p in residual))
+
+        if self.ordering is not None:
+            candidates = self._sorted(candidates)
+
+        position = 0
+        end = self.start + self.count if self.count is not None else None
+        for video in candidates:
+            if end is not None and position >= end:
+                return
+            if position >= self.start:
+                yield self._project(video)
+            position += 1
+
+    def matches(self, video: VideoDict) -> bool:
+        """檢查影片是否符合所有條件"""
+        return all(predicate.matches(video) for predicate in self.predicates)
+
+    def _sorted(self, videos: Iterable[VideoDict]) -> List[VideoDict]:
+        field, descending = self.ordering
+        present: List[VideoDict] = []
+        missing: List[VideoDict] = []
+        for video in videos:
+            (present if video.get(field) not in (None, '') else missing).append(video)
+        present.sort(key=lambda video: video[field], reverse=descending)
+        return present + missing
+
+    def _project(self, video: VideoDict) -> VideoDict:
+        if self.fields is None:
+            return video
+        return {field: video[field] for field in self.fields if field in video}
+
+    def __repr__(self) -> str:
+        return (
+            f"VideoQuery(predicates={list(self.predicates)!r}, ordering={self.ordering!r}, "
+            f"offset={self.start}, limit={self.count}, fields={self.fields!r})"
+        )
+
+
+def research_query(
+    video_ids: Iterable[str],
+    now: Optional[datetime] = None,
+    days: int = RESEARCH_AFTER_DAYS
+) -> VideoQuery:
+    """
+    建立「哪些影片需要重新搜尋」的查詢
+
+    符合條件：ID 在 video_ids 中，且搜尋狀態為 RESEARCH_STATUSES 之一
+    或最後搜尋時間超過 days 天。
+
+    Args:
+        video_ids: 候選影片 ID（例如資料夾中擷取的番號）
+        now: 目前時間（預設為本地時間）
+        days: 重新搜尋的天數門檻
+
+    Returns:
+        VideoQuery
+    """
+    cutoff = search_cutoff((now or datetime.now()) - timedelta(days=days))
+    return VideoQuery().where_in('id', video_ids).any_of(
+        In('search_status', RESEARCH_STATUSES),
+        Range('last_search_date', high=cutoff, include_high=False),
+    )
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+快取壓縮編碼模組
+提供可替換的快取值壓縮編碼，依序優先使用：
+- zstd: zstandard 套件，壓縮率與速度俱佳，並支援字典壓縮
+- lz4: lz4 套件，壓縮率較低但編解碼最快
+- gzip: 標準函式庫（一定可用，舊版快取條目的格式）
+
+每個條目在索引中記錄編碼名稱與版本（以及使用的字典 ID），讀取時依
+記錄選擇解碼方式，因此更換編碼不影響已快取的條目。
+
+快取的值多為同一網站的 HTML 頁面，彼此共用大量版面；啟用字典壓縮時
+每個網域收集一定數量的樣本後訓練一個 zstd 字典，之後該網域的值以字典
+壓縮，小型頁面也能得到良好的壓縮率。
+"""
+
+import gzip
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 舊版快取條目（未記錄編碼）的編碼
+LEGACY_CODEC = "gzip"
+
+# 自動選擇時的優先順序
+_PREFERENCE = ("zstd", "lz4", "gzip")
+
+
+class Codec:
+    """壓縮編碼
+
+    Attributes:
+        name: 編碼名稱（記錄於條目中）
+        version: 編碼格式版本，格式不相容的變更時遞增
+        supports_dictionary: 是否支援字典壓縮
+    """
+
+    def __init__(self, name: str, version: int,
+                 compress: Callable[[bytes, Any], bytes],
+                 decompress: Callable[[bytes, Any], bytes],
+                 supports_dictionary: bool = False):
+        self.name = name
+        self.version = version
+        self.supports_dictionary = supports_dictionary
+        self._compress = compress
+        self._decompress = decompress
+
+    def compress(self, data: bytes, dictionary: Any = None) -> bytes:
+        """壓縮（dictionary 為 zstd 字典，編碼不支援時忽略）"""
+        return self._compress(data, dictionary)
+
+    def decompress(self, data: bytes, dictionary: Any = None) -> bytes:
+        """解壓縮"""
+        return self._decompress(data, dictionary)
+
+
+def _build_codecs() -> Dict[str, Codec]:
+    """建立所有可用的編碼"""
+    codecs = {
+        'gzip': Codec(
+            'gzip', 1,
+            lambda data, dictionary: gzip.compress(data, compresslevel=6),
+            lambda data, dictionary: gzip.decompress(data),
+        ),
+    }
+
+    try:
+        import zstandard
+
+        # ZstdCompressor 不可跨執行緒共用，每個執行緒各自建立
+        local = threading.local()
+
+        def zstd_compressor(dictionary: Any) -> "zstandard.ZstdCompressor":
+            compressors = local.__dict__.setdefault('compressors', {})
+            key = dictionary.dict_id() if dictionary is not None else 0
+            if key not in compressors:
+                compressors[key] = zstandard.ZstdCompressor(level=3, dict_data=dictionary)
+            return compressors[key]
+
+        def zstd_decompressor(dictionary: Any) -> "zstandard.ZstdDecompressor":
+            decompressors = local.__dict__.setdefault('decompressors', {})
+            key = dictionary.dict_id() if dictionary is not None else 0
+            if key not in decompressors:
+                decompressors[key] = zstandard.ZstdDecompressor(dict_data=dictionary)
+            return decompressors[key]
+
+        codecs['zstd'] = Codec(
+            'zstd', 1,
+            lambda data, dictionary: zstd_compressor(dictionary).compress(data),
+            lambda data, dictionary: zstd_decompressor(dictionary).decompress(data),
+            supports_dictionary=True,
+        )
+    except ImportError:
+        logger.debug("zstandard 未安裝，略過 zstd 編碼")
+
+    try:
+        import lz4.frame
+
+        codecs['lz4'] = Codec(
+            'lz4', 1,
+            lambda data, dictionary: lz4.frame.compress(data),
+            lambda data, dictionary: lz4.frame.decompress(data),
+        )
+    except ImportError:
+        logger.debug("lz4 未安裝，略過 lz4 編碼")
+
+    return codecs
+
+
+_CODECS = _build_codecs()
+
+
+def available_codecs() -> List[str]:
+    """可用的編碼名稱（依優先順序）"""
+    return [name for name in _PREFERENCE if name in _CODECS]
+
+
+def get_codec(name: str) -> Codec:
+    """
+    依名稱取得編碼
+
+    Args:
+        name: 編碼名稱；'auto' 選擇可用的最佳編碼
+
+    Raises:
+        ValueError: 編碼不存在或未安裝對應套件
+    """
+    if name == 'auto':
+        return _CODECS[available_codecs()[0]]
+    try:
+        return _CODECS[name]
+    except KeyError:
+        raise ValueError(f"不支援或未安裝的壓縮編碼: {name} (可用: {', '.join(available_codecs())})")
+
+
+class DictionaryStore:
+    """每個網域一個 zstd 字典
+
+    字典檔案存放於 directory/<網域>.<字典ID>.zdict，字典 ID 由 zstd
+    在訓練時產生並記錄於條目中；字典不會被重新訓練或覆蓋，已使用
+    字典壓縮的條目永遠能以相同字典解壓縮。
+
+    Attributes:
+        directory: 字典檔案目錄
+        dictionary_size: 訓練的字典大小上限（bytes）
+        training_samples: 每個網域收集多少個樣本後訓練
+    """
+
+    def __init__(self, directory: Path, dictionary_size: int, training_samples: int):
+        import zstandard
+
+        self._zstd = zstandard
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dictionary_size = dictionary_size
+        self.training_samples = max(1, training_samples)
+
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, Any] = {}
+        self._by_domain: Dict[str, Any] = {}
+        self._samples: Dict[str, List[bytes]] = {}
+        self._load()
+
+    def _load(self):
+        for path in self.directory.glob("*.zdict"):
+            domain = path.stem.rpartition('.')[0]
+            try:
+                dictionary = self._zstd.ZstdCompressionDict(path.read_bytes())
+                dictionary.precompute_compress(level=3)
+            except Exception as e:
+                logger.warning(f"⚠️ 略過無法讀取的壓縮字典 {path.name}: {e}")
+                continue
+            self._by_id[dictionary.dict_id()] = dictionary
+            self._by_domain[domain] = dictionary
+        if self._by_id:
+            logger.info(f"📚 已載入 {len(self._by_id)} 個壓縮字典")
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, dict_id: int) -> Optional[Any]:
+        """依字典 ID 取得字典"""
+        return self._by_id.get(dict_id)
+
+    def for_domain(self, domain: str, sample: bytes) -> Optional[Any]:
+        """
+        取得網域的字典；尚未訓練時收集樣本，樣本足夠時訓練
+
+        Args:
+            domain: 網域（空字串時不使用字典）
+            sample: 待壓縮的資料（作為訓練樣本）
+        """
+        if not domain:
+            return None
+        with self._lock:
+            dictionary = self._by_domain.get(domain)
+            if dictionary is not None:
+                return dictionary
+            samples = self._samples.setdefault(domain, [])
+            samples.append(sample)
+            if len(samples) < self.training_samples:
+                return None
+            del self._samples[domain]
+            return self._train(domain, samples)
+
+    def _train(self, domain: str, samples: List[bytes]) -> Optional[Any]:
+        try:
+            dictionary = self._zstd.train_dictionary(self.dictionary_size, samples)
+            dictionary.precompute_compress(level=3)
+        except Exception as e:
+            # 樣本過少或過於相似時 zstd 無法訓練，之後重新收集
+            logger.warning(f"⚠️ 訓練 {domain} 壓縮字典失敗: {e}")
+            return None
+
+        path = self.directory / f"{domain}.{dictionary.dict_id()}.zdict"
+        temp_path = path.with_suffix(".tmp")
+        temp_path.write_bytes(dictionary.as_bytes())
+        temp_path.replace(path)
+
+        self._by_id[dictionary.dict_id()] = dictionary
+        self._by_domain[domain] = dictionary
+        logger.info(f"📚 已訓練 {domain} 壓縮字典 ({len(dictionary.as_bytes())} bytes, {len(samples)} 個樣本)")
+        return dictionary
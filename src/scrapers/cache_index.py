@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+快取索引模組
+以嵌入式 SQLite 存放磁碟快取條目的中繼資料
+
+每個條目一列，以快取鍵為主鍵：查詢與寫入只讀寫單一列，與條目數量無關。
+值的位置以 (區段, 位移, 大小) 記錄（見 cache_segments），壓縮編碼以
+(名稱, 版本, 字典 ID) 記錄（見 cache_codecs）。過期時間與
+區段另建索引，清理與壓縮時只讀取相關的條目。快取命中時的訪問統計
+先累積在記憶體，達到筆數或時間門檻時以單一交易批次寫入。
+"""
+
+import sqlite3
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.models import json_codec
+from .cache_codecs import LEGACY_CODEC
+
+logger = logging.getLogger(__name__)
+
+# 訪問統計批次寫入門檻
+ACCESS_FLUSH_ENTRIES = 256      # 累積條目數
+ACCESS_FLUSH_SECONDS = 30.0     # 距上次寫入秒數
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS entries (
+    cache_key TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    ttl_seconds INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    access_count INTEGER NOT NULL DEFAULT 0,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    codec TEXT NOT NULL DEFAULT '{LEGACY_CODEC}',
+    codec_version INTEGER NOT NULL DEFAULT 1,
+    dictionary_id INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_expires_at ON entries(expires_at);
+CREATE INDEX IF NOT EXISTS idx_entries_segment ON entries(segment);
+"""
+
+# entries 表中 CacheIndex 讀寫的欄位（expires_at 由 created_at + ttl_seconds 計算）
+_FIELDS = (
+    'segment', 'offset', 'created_at', 'ttl_seconds', 'last_accessed',
+    'access_count', 'compressed', 'size_bytes', 'codec', 'codec_version', 'dictionary_id',
+)
+
+# 未記錄編碼的條目（舊版索引）以 gzip 壓縮
+_CODEC_DEFAULTS = {'codec': LEGACY_CODEC, 'codec_version': 1, 'dictionary_id': 0}
+
+# 舊版索引（每個條目一個檔案）的欄位
+_LEGACY_FIELDS = ('file_path', 'created_at', 'ttl_seconds', 'last_accessed', 'access_count', 'compressed', 'size_bytes')
+
+
+class CacheIndex:
+    """SQLite 快取索引
+
+    條目以字典表示，欄位同 _FIELDS。所有連線操作以執行緒鎖序列化；
+    跨程序的並行由 SQLite 的檔案鎖處理。
+    """
+
+    def __init__(self, path: Path, legacy_path: Optional[Path] = None, lock_timeout: float = 30.0):
+        """
+        開啟（必要時建立）索引
+
+        Args:
+            path: SQLite 索引檔案路徑
+            legacy_path: 舊版 JSON 索引路徑，存在時讀取其條目後刪除
+            lock_timeout: 等待其他程序釋放寫鎖定的秒數
+        """
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._pending_access: Dict[str, Tuple[int, float]] = {}
+        self._last_flush = time.monotonic()
+        self._legacy_entries: List[Tuple[str, Dict[str, Any]]] = []
+
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=lock_timeout,
+            isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade_schema()
+        self._conn.executescript(_SCHEMA)
+
+        if legacy_path is not None and Path(legacy_path).exists():
+            self._read_legacy_json(Path(legacy_path))
+
+    def _upgrade_schema(self):
+        """
+        升級舊版索引
+
+        - 以 file_path 記錄每個條目的檔案：讀出條目後重建資料表
+        - 未記錄壓縮編碼：新增編碼欄位（既有條目為 gzip）
+        """
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+        if columns and 'file_path' not in columns and 'codec' not in columns:
+            with self._transaction():
+                for field, default in _CODEC_DEFAULTS.items():
+                    column_type = 'TEXT' if isinstance(default, str) else 'INTEGER'
+                    self._conn.execute(
+                        f"ALTER TABLE entries ADD COLUMN {field} {column_type} NOT NULL DEFAULT '{default}'"
+                    )
+            return
+        if 'file_path' not in columns:
+            return
+        with self._transaction():
+            rows = self._conn.execute(f"SELECT cache_key, {', '.join(_LEGACY_FIELDS)} FROM entries").fetchall()
+            self._conn.execute("DROP TABLE entries")
+        self._legacy_entries.extend((row[0], dict(zip(_LEGACY_FIELDS, row[1:]))) for row in rows)
+        logger.info(f"📊 快取索引已升級為區段格式: {len(rows)} 個條目待搬移")
+
+    def _read_legacy_json(self, legacy_path: Path):
+        """讀取舊版 JSON 索引（cache_index.json）的條目"""
+        try:
+            entries = json_codec.load_file(legacy_path).get("entries", {})
+            self._legacy_entries.extend(entries.items())
+            legacy_path.unlink()
+            logger.info(f"📊 已讀取舊版快取索引: {len(entries)} 個條目待搬移")
+        except Exception as e:
+            logger.warning(f"⚠️ 讀取舊版快取索引失敗，略過: {e}")
+
+    def take_legacy_entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """取出開啟時讀到的舊版條目（含 file_path），由呼叫端將值搬入區段"""
+        entries, self._legacy_entries = self._legacy_entries, []
+        return entries
+
+    def close(self):
+        """寫入累積的訪問統計並關閉連線"""
+        with self._lock:
+            self.flush_access()
+            self._conn.close()
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """查詢條目（不含尚未寫入的訪問統計）"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_FIELDS)} FROM entries WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = dict(zip(_FIELDS, row))
+        entry['compressed'] = bool(entry['compressed'])
+        return entry
+
+    def put(self, cache_key: str, entry: Dict[str, Any]):
+        """新增或取代條目"""
+        self.put_many([(cache_key, entry)])
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """以單一交易新增或取代多個條目"""
+        rows = []
+        for cache_key, entry in items:
+            row = [entry.get(field, _CODEC_DEFAULTS.get(field, 0)) for field in _FIELDS]
+            row[_FIELDS.index('compressed')] = int(bool(entry.get('compressed')))
+            rows.append((cache_key, *row, entry['created_at'] + entry['ttl_seconds']))
+
+        with self._lock:
+            # 取代的條目不再套用舊的訪問統計
+            for row in rows:
+                self._pending_access.pop(row[0], None)
+            with self._transaction():
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO entries (cache_key, {', '.join(_FIELDS)}, expires_at) "
+                    f"VALUES ({', '.join('?' * (len(_FIELDS) + 2))})",
+                    rows
+                )
+
+    def delete(self, cache_key: str) -> bool:
+        """刪除條目"""
+        return self.delete_many([cache_key]) > 0
+
+    def delete_many(self, cache_keys: Iterable[str]) -> int:
+        """以單一交易刪除多個條目"""
+        keys = [(cache_key,) for cache_key in cache_keys]
+        with self._lock:
+            for (cache_key,) in keys:
+                self._pending_access.pop(cache_key, None)
+            with self._transaction():
+                before = self._conn.total_changes
+                self._conn.executemany("DELETE FROM entries WHERE cache_key = ?", keys)
+                return self._conn.total_changes - before
+
+    def record_access(self, cache_key: str, accessed_at: float):
+        """記錄一次快取命中（累積後批次寫入）"""
+        with self._lock:
+            count, _ = self._pending_access.get(cache_key, (0, 0.0))
+            self._pending_access[cache_key] = (count + 1, accessed_at)
+            if (len(self._pending_access) >= ACCESS_FLUSH_ENTRIES or
+                    time.monotonic() - self._last_flush >= ACCESS_FLUSH_SECONDS):
+                self.flush_access()
+
+    def flush_access(self) -> int:
+        """將累積的訪問統計以單一交易寫入，返回更新的條目數"""
+        with self._lock:
+            pending, self._pending_access = self._pending_access, {}
+            self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+            with self._transaction():
+                self._conn.executemany(
+                    "UPDATE entries SET access_count = access_count + ?, "
+                    "last_accessed = MAX(last_accessed, ?) WHERE cache_key = ?",
+                    [(count, accessed_at, cache_key) for cache_key, (count, accessed_at) in pending.items()]
+                )
+            return len(pending)
+
+    def delete_expired(self, now: float) -> int:
+        """以過期時間索引刪除已過期的條目，返回刪除數（區段空間由壓縮回收）"""
+        with self._lock:
+            with self._transaction():
+                before = self._conn.total_changes
+                self._conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+                return self._conn.total_changes - before
+
+    def segment_usage(self) -> Dict[int, int]:
+        """各區段仍被條目引用的位元組數"""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT segment, SUM(size_bytes) FROM entries GROUP BY segment"
+            ).fetchall())
+
+    def segment_entries(self, segment: int) -> List[Tuple[str, int, int]]:
+        """引用指定區段的條目 [(快取鍵, 位移, 大小)]，依位移排序"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT cache_key, offset, size_bytes FROM entries WHERE segment = ? ORDER BY offset",
+                (segment,)
+            ).fetchall()
+
+    def relocate(self, moves: Iterable[Tuple[str, int, int, int, int]]) -> int:
+        """
+        更新條目位置
+
+        只更新位置仍為舊位置的條目：搬移期間被重新寫入的條目保留新值。
+
+        Args:
+            moves: [(快取鍵, 舊區段, 舊位移, 新區段, 新位移)]
+
+        Returns:
+            更新的條目數
+        """
+        rows = [(new_segment, new_offset, cache_key, old_segment, old_offset)
+                for cache_key, old_segment, old_offset, new_segment, new_offset in moves]
+        with self._lock:
+            with self._transaction():
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "UPDATE entries SET segment = ?, offset = ? "
+                    "WHERE cache_key = ? AND segment = ? AND offset = ?",
+                    rows
+                )
+                return self._conn.total_changes - before
+
+    def summary(self) -> Tuple[int, int]:
+        """(條目數, 總大小 bytes)"""
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), SUM(size_bytes) FROM entries").fetchone()
+        return count, total or 0
+
+    def clear(self):
+        """刪除所有條目"""
+        with self._lock:
+            self._pending_access.clear()
+            with self._transaction():
+                self._conn.execute("DELETE FROM entries")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """寫入交易（BEGIN IMMEDIATE 避免多程序同時升級鎖定時死結）"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
@@ -5,17 +5,23 @@
 """
 
 import asyncio
-import json
+import functools
 import hashlib
 import time
 import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Optional, Dict, List, Tuple
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from urllib.parse import urlparse
+from dataclasses import dataclass, asdict, replace
 import pickle
-import gzip
+
+from .cache_codecs import DictionaryStore, LEGACY_CODEC, available_codecs, get_codec
+from .cache_index import CacheIndex
+from .cache_segments import SegmentStore
+from .cache_policies import EvictionPolicy, POLICIES, create_policy
 
 logger = logging.getLogger(__name__)
 
@@ -24,14 +30,24 @@ logger = logging.getLogger(__name__)
 class CacheConfig:
     """快取配置類"""
     cache_dir: str = "cache"                    # 快取目錄
-    index_file: str = "cache_index.json"        # JSON索引檔案
+    index_file: str = "cache_index.sqlite"      # SQLite索引檔案
     default_ttl_hours: int = 24                 # 預設TTL(小時)
     max_memory_entries: int = 1000              # 記憶體快取最大條目數
+    max_memory_mb: int = 64                     # 記憶體快取最大總大小(MB)
+    memory_policy: str = "lru"                  # 記憶體淘汰策略 (lru / lfu / tinylfu)
+    compare_memory_policies: bool = False       # 以影子策略比較各策略命中率
     enable_compression: bool = True             # 啟用壓縮
+    compression_codec: str = "auto"             # 壓縮編碼 (auto / zstd / lz4 / gzip)
+    enable_dictionary_compression: bool = False # 每個網域訓練 zstd 字典
+    dictionary_size_kb: int = 112               # 字典大小上限(KB)
+    dictionary_training_samples: int = 100      # 每個網域收集多少個值後訓練字典
     enable_memory_cache: bool = True            # 啟用記憶體快取
     enable_disk_cache: bool = True              # 啟用磁碟快取
     cleanup_interval_hours: int = 6             # 清理間隔(小時)
-    max_file_size_mb: int = 10                  # 單檔最大大小(MB)
+    max_file_size_mb: int = 10                  # 單一條目最大大小(MB)
+    segment_size_mb: int = 64                   # 區段檔大小上限(MB)
+    compaction_min_garbage_ratio: float = 0.5   # 區段失效資料達此比例時壓縮
+    async_io_workers: int = 4                   # 非同步介面的磁碟/序列化執行緒數
 
 
 @dataclass
@@ -55,20 +71,61 @@ class CacheManager:
         self.cache_dir = Path(self.config.cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-        # 記憶體快取
-        self.memory_cache: Dict[str, CacheEntry] = {}
+        # 記憶體快取（依條目數與總大小淘汰）
+        max_memory_bytes = self.config.max_memory_mb * 1024 * 1024
+        self.memory_cache: EvictionPolicy = create_policy(
+            self.config.memory_policy, self.config.max_memory_entries, max_memory_bytes
+        )
         self.memory_lock = threading.RLock()
 
-        # JSON 索引檔案
+        # 影子策略：只記錄鍵與大小，重播相同的存取以比較命中率
+        self.shadow_policies: List[EvictionPolicy] = []
+        if self.config.compare_memory_policies:
+            self.shadow_policies = [
+                create_policy(name, self.config.max_memory_entries, max_memory_bytes)
+                for name in POLICIES if name != self.memory_cache.name
+            ]
+
+        # SQLite 索引（舊版 cache_index.json 於首次開啟時匯入）
         self.index_path = self.cache_dir / self.config.index_file
-        self.index_lock = threading.RLock()
-        self._init_index()
+        legacy_index_path = self.cache_dir / "cache_index.json"
+        if self.index_path.suffix == ".json":
+            legacy_index_path = self.index_path
+            self.index_path = self.index_path.with_suffix(".sqlite")
+        self.index = CacheIndex(self.index_path, legacy_path=legacy_index_path)
+
+        # 值附加於區段檔，以索引記錄的 (區段, 位移, 大小) 讀取
+        self.segments = SegmentStore(
+            self.cache_dir / "segments", self.config.segment_size_mb * 1024 * 1024
+        )
+        self._compaction_lock = threading.Lock()
+        self._migrate_legacy_files()
+
+        # 壓縮編碼；字典也用於解壓縮先前以字典壓縮的條目
+        self.codec = get_codec(self.config.compression_codec)
+        self.dictionaries: Optional[DictionaryStore] = None
+        dictionary_dir = self.cache_dir / "dictionaries"
+        if 'zstd' in available_codecs() and (self.config.enable_dictionary_compression or dictionary_dir.exists()):
+            self.dictionaries = DictionaryStore(
+                dictionary_dir, self.config.dictionary_size_kb * 1024, self.config.dictionary_training_samples
+            )
+        elif self.config.enable_dictionary_compression:
+            logger.warning("⚠️ 字典壓縮需要 zstandard 套件，已停用")
 
-        # 統計資訊
+        # 非同步介面：磁碟讀寫與序列化在專用的有界執行緒池執行，
+        # 同一鍵的並行讀取共用一次查詢
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=max(1, self.config.async_io_workers), thread_name_prefix="cache-io"
+        )
+        self._pending_gets: Dict[str, asyncio.Future] = {}
+
+        # 統計資訊（計數由執行緒池與事件迴圈同時更新，以 _count 加鎖遞增）
+        self._stats_lock = threading.Lock()
         self.stats = {
             'memory_hits': 0,
             'disk_hits': 0,
             'misses': 0,
+            'coalesced_gets': 0,
             'sets': 0,
             'deletes': 0,
             'cleanups': 0,
@@ -80,83 +137,49 @@ class CacheManager:
 
         logger.info(f"💾 快取管理器已初始化 - 目錄: {self.cache_dir}")
     
-    def _init_index(self):
-        """初始化 JSON 索引檔案"""
-        try:
-            if not self.index_path.exists():
-                # 建立空索引
-                initial_index = {
-                    "_metadata": {
-                        "version": "1.0",
-                        "created_at": time.time()
-                    },
-                    "entries": {}
-                }
-                with open(self.index_path, 'w', encoding='utf-8') as f:
-                    json.dump(initial_index, f, indent=2, ensure_ascii=False)
-                logger.debug("📊 快取索引檔案已建立")
-            else:
-                # 驗證現有索引
-                with open(self.index_path, 'r', encoding='utf-8') as f:
-                    index_data = json.load(f)
-                    if "entries" not in index_data:
-                        # 修復損壞的索引
-                        index_data["entries"] = {}
-                        with open(self.index_path, 'w', encoding='utf-8') as f_write:
-                            json.dump(index_data, f_write, indent=2, ensure_ascii=False)
-                        logger.warning("📊 快取索引已修復")
-                    else:
-                        logger.debug("📊 快取索引已載入")
-
-        except Exception as e:
-            logger.error(f"初始化快取索引失敗: {e}")
-            # 建立新索引
-            try:
-                initial_index = {
-                    "_metadata": {"version": "1.0", "created_at": time.time()},
-                    "entries": {}
-                }
-                with open(self.index_path, 'w', encoding='utf-8') as f:
-                    json.dump(initial_index, f, indent=2, ensure_ascii=False)
-            except Exception as fallback_error:
-                logger.error(f"建立備援索引失敗: {fallback_error}")
-    
-    def _load_index(self) -> dict:
-        """載入 JSON 索引"""
-        try:
-            with self.index_lock:
-                with open(self.index_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"載入索引失敗: {e}")
-            return {"_metadata": {"version": "1.0", "created_at": time.time()}, "entries": {}}
-
-    def _save_index(self, index_data: dict) -> bool:
-        """儲存 JSON 索引"""
-        try:
-            with self.index_lock:
-                with open(self.index_path, 'w', encoding='utf-8') as f:
-                    json.dump(index_data, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
-            logger.error(f"儲存索引失敗: {e}")
-            return False
-
     def _generate_cache_key(self, key: str) -> str:
         """生成快取鍵值"""
         return hashlib.sha256(key.encode('utf-8')).hexdigest()
 
-    def _get_file_path(self, cache_key: str) -> Path:
-        """獲取快取檔案路徑"""
-        # 使用兩層目錄結構避免單目錄檔案過多
-        dir1 = cache_key[:2]
-        dir2 = cache_key[2:4]
-        cache_file_dir = self.cache_dir / dir1 / dir2
-        cache_file_dir.mkdir(parents=True, exist_ok=True)
-        return cache_file_dir / f"{cache_key}.cache"
+    def _migrate_legacy_files(self):
+        """將舊版每個條目一個檔案的快取值搬入區段檔"""
+        legacy_entries = self.index.take_legacy_entries()
+        if not legacy_entries:
+            return
+
+        entries = []
+        for cache_key, entry in legacy_entries:
+            file_path = Path(entry.pop('file_path', ''))
+            try:
+                data = file_path.read_bytes()
+                file_path.unlink()
+            except (FileNotFoundError, IsADirectoryError):
+                continue
+            segment, offset = self.segments.append(data)
+            entries.append((cache_key, {**entry, 'segment': segment, 'offset': offset, 'size_bytes': len(data)}))
+        self.index.put_many(entries)
+
+        # 移除已清空的兩層目錄
+        for directory in sorted(self.cache_dir.glob("??/??"), reverse=True) + sorted(self.cache_dir.glob("??")):
+            try:
+                directory.rmdir()
+            except OSError:
+                pass
+        logger.info(f"💾 已將 {len(entries)} 個舊版快取檔案搬入區段")
     
-    def _serialize_value(self, value: Any) -> Tuple[bytes, bool]:
-        """序列化值並選擇性壓縮"""
+    def _serialize_value(self, value: Any, key: str = "") -> Tuple[bytes, Dict[str, Any]]:
+        """
+        序列化值並選擇性壓縮
+
+        Returns:
+            (資料, 編碼資訊 {'compressed', 'codec', 'codec_version', 'dictionary_id'})
+        """
+        codec_info = {
+            'compressed': False,
+            'codec': self.codec.name,
+            'codec_version': self.codec.version,
+            'dictionary_id': 0,
+        }
         try:
             # 序列化
             serialized = pickle.dumps(value)
@@ -168,22 +191,41 @@ class CacheManager:
             )
             
             if should_compress:
-                compressed_data = gzip.compress(serialized)
+                # 同網域的值以該網域的字典壓縮（字典訓練完成前收集樣本）
+                dictionary = None
+                if (self.dictionaries is not None and self.config.enable_dictionary_compression
+                        and self.codec.supports_dictionary):
+                    dictionary = self.dictionaries.for_domain(urlparse(key).netloc, serialized)
+
+                compressed_data = self.codec.compress(serialized, dictionary)
                 # 只有在壓縮有效果時才使用
                 if len(compressed_data) < len(serialized) * 0.9:
-                    return compressed_data, True
+                    codec_info['compressed'] = True
+                    codec_info['dictionary_id'] = dictionary.dict_id() if dictionary is not None else 0
+                    return compressed_data, codec_info
             
-            return serialized, False
+            return serialized, codec_info
             
         except Exception as e:
             logger.error(f"序列化值失敗: {e}")
-            return b'', False
+            return b'', codec_info
     
-    def _deserialize_value(self, data: bytes, compressed: bool) -> Any:
-        """反序列化值"""
+    def _deserialize_value(self, data: bytes, codec_info: Dict[str, Any]) -> Any:
+        """依條目記錄的編碼資訊反序列化值"""
         try:
-            if compressed:
-                data = gzip.decompress(data)
+            if codec_info.get('compressed'):
+                codec = get_codec(codec_info.get('codec') or LEGACY_CODEC)
+                if codec_info.get('codec_version', 1) > codec.version:
+                    raise ValueError(f"{codec.name} 編碼版本 {codec_info['codec_version']} 不支援")
+
+                dictionary = None
+                dictionary_id = codec_info.get('dictionary_id', 0)
+                if dictionary_id:
+                    if self.dictionaries is not None:
+                        dictionary = self.dictionaries.get(dictionary_id)
+                    if dictionary is None:
+                        raise ValueError(f"找不到壓縮字典 {dictionary_id}")
+                data = codec.decompress(data, dictionary)
             return pickle.loads(data)
         except Exception as e:
             logger.error(f"反序列化值失敗: {e}")
@@ -201,10 +243,11 @@ class CacheManager:
         
         try:
             # 序列化和壓縮
-            serialized_data, compressed = self._serialize_value(value)
+            serialized_data, codec_info = self._serialize_value(value, key)
+            compressed = codec_info['compressed']
             size_bytes = len(serialized_data)
             
-            # 檢查檔案大小限制
+            # 檢查條目大小限制
             max_size_bytes = self.config.max_file_size_mb * 1024 * 1024
             if size_bytes > max_size_bytes:
                 logger.warning(f"快取值過大 ({size_bytes/1024/1024:.1f}MB)，跳過快取")
@@ -223,32 +266,25 @@ class CacheManager:
             
             # 設置記憶體快取
             if self.config.enable_memory_cache:
-                with self.memory_lock:
-                    self.memory_cache[cache_key] = entry
-                    self._cleanup_memory_cache()
+                self._memory_put(cache_key, entry)
             
             # 設置磁碟快取
             if self.config.enable_disk_cache:
-                file_path = self._get_file_path(cache_key)
-
-                # 寫入檔案
-                with open(file_path, 'wb') as f:
-                    f.write(serialized_data)
-
-                # 更新 JSON 索引
-                index_data = self._load_index()
-                index_data["entries"][cache_key] = {
-                    "file_path": str(file_path),
+                # 先附加到區段檔，再更新索引（只寫入此條目）指向新位置；
+                # 舊值留在原區段，由壓縮回收
+                segment, offset = self.segments.append(serialized_data)
+                self.index.put(cache_key, {
+                    "segment": segment,
+                    "offset": offset,
                     "created_at": current_time,
                     "ttl_seconds": ttl_seconds,
                     "last_accessed": current_time,
                     "access_count": 0,
-                    "compressed": compressed,
-                    "size_bytes": size_bytes
-                }
-                self._save_index(index_data)
+                    "size_bytes": size_bytes,
+                    **codec_info
+                })
             
-            self.stats['sets'] += 1
+            self._count('sets')
             logger.debug(f"💾 已快取: {key} ({size_bytes} bytes)")
             return True
             
@@ -256,36 +292,49 @@ class CacheManager:
             logger.error(f"設置快取失敗: {e}")
             return False
     
+    def _count(self, name: str):
+        """遞增統計計數"""
+        with self._stats_lock:
+            self.stats[name] += 1
+
     def get(self, key: str) -> Optional[Any]:
         """獲取快取值"""
         cache_key = self._generate_cache_key(key)
-        current_time = time.time()
-        
+
         # 嘗試記憶體快取
         if self.config.enable_memory_cache:
-            with self.memory_lock:
-                if cache_key in self.memory_cache:
-                    entry = self.memory_cache[cache_key]
-                    
-                    # 檢查是否過期
-                    if not self._is_expired(entry.created_at, entry.ttl_seconds):
-                        entry.access_count += 1
-                        entry.last_accessed = current_time
-                        self.stats['memory_hits'] += 1
-                        logger.debug(f"📋 記憶體快取命中: {key}")
-                        return entry.value
-                    else:
-                        # 過期，從記憶體移除
-                        del self.memory_cache[cache_key]
-        
+            entry = self._memory_get(key, cache_key)
+            if entry is not None:
+                return entry.value
+
+        return self._get_from_disk(key, cache_key)
+
+    def _memory_get(self, key: str, cache_key: str) -> Optional[CacheEntry]:
+        """查詢記憶體快取"""
+        with self.memory_lock:
+            current_time = time.time()
+            for shadow in self.shadow_policies:
+                shadow.get(cache_key, current_time)
+
+            # 過期條目由策略移除並視為未命中
+            entry = self.memory_cache.get(cache_key, current_time)
+            if entry is not None:
+                entry.access_count += 1
+                entry.last_accessed = current_time
+                self._count('memory_hits')
+                logger.debug(f"📋 記憶體快取命中: {key}")
+            return entry
+
+    def _get_from_disk(self, key: str, cache_key: str) -> Optional[Any]:
+        """查詢磁碟快取（命中時載入記憶體快取）"""
+        current_time = time.time()
+
         # 嘗試磁碟快取
         if self.config.enable_disk_cache:
             try:
-                index_data = self._load_index()
-                entry_data = index_data.get("entries", {}).get(cache_key)
+                entry_data, data = self._read_disk_entry(cache_key)
 
                 if entry_data:
-                    file_path = entry_data["file_path"]
                     created_at = entry_data["created_at"]
                     ttl_seconds = entry_data["ttl_seconds"]
                     compressed = entry_data["compressed"]
@@ -293,49 +342,41 @@ class CacheManager:
 
                     # 檢查是否過期
                     if not self._is_expired(created_at, ttl_seconds):
-                        file_path_obj = Path(file_path)
-
-                        if file_path_obj.exists():
-                            # 讀取檔案
-                            with open(file_path_obj, 'rb') as f:
-                                data = f.read()
-
+                        if data is None:
+                            # 區段已遺失（例如被手動刪除），移除失效的索引條目
+                            self._delete_cache_entry(cache_key)
+                        else:
                             # 反序列化
-                            value = self._deserialize_value(data, compressed)
+                            value = self._deserialize_value(data, entry_data)
 
                             if value is not None:
-                                # 更新訪問統計
-                                entry_data["access_count"] = access_count + 1
-                                entry_data["last_accessed"] = current_time
-                                index_data["entries"][cache_key] = entry_data
-                                self._save_index(index_data)
+                                # 更新訪問統計（累積後批次寫入索引）
+                                self.index.record_access(cache_key, current_time)
 
                                 # 載入到記憶體快取
                                 if self.config.enable_memory_cache:
-                                    with self.memory_lock:
-                                        entry = CacheEntry(
-                                            key=cache_key,
-                                            value=value,
-                                            created_at=created_at,
-                                            ttl_seconds=ttl_seconds,
-                                            access_count=access_count + 1,
-                                            last_accessed=current_time,
-                                            compressed=compressed,
-                                            size_bytes=len(data)
-                                        )
-                                        self.memory_cache[cache_key] = entry
-
-                                self.stats['disk_hits'] += 1
+                                    self._memory_put(cache_key, CacheEntry(
+                                        key=cache_key,
+                                        value=value,
+                                        created_at=created_at,
+                                        ttl_seconds=ttl_seconds,
+                                        access_count=access_count + 1,
+                                        last_accessed=current_time,
+                                        compressed=compressed,
+                                        size_bytes=len(data)
+                                    ))
+
+                                self._count('disk_hits')
                                 logger.debug(f"💿 磁碟快取命中: {key}")
                                 return value
                     else:
                         # 過期，清理
-                        self._delete_cache_entry(cache_key, file_path)
+                        self._delete_cache_entry(cache_key)
 
             except Exception as e:
                 logger.error(f"讀取磁碟快取失敗: {e}")
         
-        self.stats['misses'] += 1
+        self._count('misses')
         logger.debug(f"❌ 快取未命中: {key}")
         return None
     
@@ -346,19 +387,13 @@ class CacheManager:
         try:
             # 從記憶體移除
             if self.config.enable_memory_cache:
-                with self.memory_lock:
-                    self.memory_cache.pop(cache_key, None)
+                self._memory_pop(cache_key)
 
             # 從磁碟移除
             if self.config.enable_disk_cache:
-                index_data = self._load_index()
-                entry_data = index_data.get("entries", {}).get(cache_key)
+                self._delete_cache_entry(cache_key)
 
-                if entry_data:
-                    file_path = entry_data["file_path"]
-                    self._delete_cache_entry(cache_key, file_path)
-
-            self.stats['deletes'] += 1
+            self._count('deletes')
             logger.debug(f"🗑️ 已刪除快取: {key}")
             return True
 
@@ -366,41 +401,42 @@ class CacheManager:
             logger.error(f"刪除快取失敗: {e}")
             return False
     
-    def _delete_cache_entry(self, cache_key: str, file_path: str):
-        """刪除快取條目（檔案和索引）"""
+    def _read_disk_entry(self, cache_key: str) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+        """查詢索引並讀取值（讀取前條目被壓縮搬移時依新位置重讀一次）"""
+        entry_data = self.index.get(cache_key)
+        for _ in range(2):
+            if entry_data is None:
+                return None, None
+            data = self.segments.read(entry_data["segment"], entry_data["offset"], entry_data["size_bytes"])
+            if data is not None:
+                return entry_data, data
+            current = self.index.get(cache_key)
+            if current == entry_data:
+                break
+            entry_data = current
+        return entry_data, None
+
+    def _delete_cache_entry(self, cache_key: str):
+        """刪除快取條目（只移除索引，區段空間由壓縮回收）"""
         try:
-            # 刪除檔案
-            file_path_obj = Path(file_path)
-            if file_path_obj.exists():
-                file_path_obj.unlink()
-
-            # 從 JSON 索引移除
-            index_data = self._load_index()
-            if cache_key in index_data.get("entries", {}):
-                del index_data["entries"][cache_key]
-                self._save_index(index_data)
+            self.index.delete(cache_key)
 
         except Exception as e:
             logger.error(f"刪除快取條目失敗: {e}")
     
-    def _cleanup_memory_cache(self):
-        """清理記憶體快取（LRU策略）"""
-        if len(self.memory_cache) <= self.config.max_memory_entries:
-            return
-        
-        # 按最後訪問時間排序，移除最舊的條目
-        sorted_entries = sorted(
-            self.memory_cache.items(),
-            key=lambda x: x[1].last_accessed
-        )
-        
-        # 移除超出限制的條目
-        remove_count = len(self.memory_cache) - self.config.max_memory_entries
-        for i in range(remove_count):
-            cache_key, _ = sorted_entries[i]
-            del self.memory_cache[cache_key]
-        
-        logger.debug(f"🧹 記憶體快取清理: 移除 {remove_count} 個條目")
+    def _memory_put(self, cache_key: str, entry: CacheEntry):
+        """放入記憶體快取（超過條目數或總大小時由淘汰策略移除條目）"""
+        with self.memory_lock:
+            self.memory_cache.put(cache_key, entry)
+            for shadow in self.shadow_policies:
+                shadow.put(cache_key, replace(entry, value=None))
+
+    def _memory_pop(self, cache_key: str):
+        """從記憶體快取移除"""
+        with self.memory_lock:
+            self.memory_cache.pop(cache_key)
+            for shadow in self.shadow_policies:
+                shadow.pop(cache_key)
     
     def _cleanup_expired_cache(self):
         """清理過期快取"""
@@ -416,36 +452,75 @@ class CacheManager:
                     ]
                     
                     for key in expired_keys:
-                        del self.memory_cache[key]
+                        self._memory_pop(key)
                     
                     if expired_keys:
                         logger.info(f"🧹 記憶體快取清理: {len(expired_keys)} 個過期條目")
             
             # 清理磁碟快取
             if self.config.enable_disk_cache:
-                index_data = self._load_index()
-                expired_entries = []
-
-                # 查找過期條目
-                for cache_key, entry_data in list(index_data.get("entries", {}).items()):
-                    created_at = entry_data.get("created_at", 0)
-                    ttl_seconds = entry_data.get("ttl_seconds", 0)
-
-                    if self._is_expired(created_at, ttl_seconds):
-                        expired_entries.append((cache_key, entry_data.get("file_path")))
+                # 以過期時間索引刪除過期條目，再壓縮失效資料過多的區段
+                expired_count = self.index.delete_expired(current_time)
+                self.index.flush_access()
 
-                # 刪除過期條目
-                for cache_key, file_path in expired_entries:
-                    self._delete_cache_entry(cache_key, file_path)
+                if expired_count:
+                    logger.info(f"🧹 磁碟快取清理: {expired_count} 個過期條目")
 
-                if expired_entries:
-                    logger.info(f"🧹 磁碟快取清理: {len(expired_entries)} 個過期條目")
+                self.compact_segments()
             
-            self.stats['cleanups'] += 1
+            self._count('cleanups')
             
         except Exception as e:
             logger.error(f"清理過期快取失敗: {e}")
     
+    def compact_segments(self) -> Dict[str, int]:
+        """
+        壓縮區段檔
+
+        失效資料（被覆寫、刪除或過期的值）比例達 compaction_min_garbage_ratio
+        的區段，將仍有效的值複製到目前的區段並更新索引後刪除整個區段檔。
+        目前附加中的區段不壓縮。
+
+        Returns:
+            {'segments': 刪除的區段數, 'moved': 搬移的條目數, 'reclaimed_bytes': 回收的位元組數}
+        """
+        result = {'segments': 0, 'moved': 0, 'reclaimed_bytes': 0}
+        with self._compaction_lock:
+            sizes = self.segments.segment_sizes()
+            usage = self.index.segment_usage()
+            # 此程序與其他程序（編號最大者）附加中的區段
+            active = {self.segments.active_segment, self.segments.latest_segment()}
+
+            for segment, size in sorted(sizes.items()):
+                live_bytes = usage.get(segment, 0)
+                if segment in active or size == 0:
+                    continue
+                if 1 - live_bytes / size < self.config.compaction_min_garbage_ratio:
+                    continue
+
+                moves = []
+                for cache_key, offset, length in self.index.segment_entries(segment):
+                    data = self.segments.read(segment, offset, length)
+                    if data is None:
+                        continue
+                    new_segment, new_offset = self.segments.append(data)
+                    moves.append((cache_key, segment, offset, new_segment, new_offset))
+                result['moved'] += self.index.relocate(moves)
+
+                # 搬移期間仍有條目寫入此區段（其他程序）時保留
+                if self.index.segment_entries(segment):
+                    continue
+                self.segments.remove(segment)
+                result['segments'] += 1
+                result['reclaimed_bytes'] += size - live_bytes
+
+        if result['segments']:
+            logger.info(
+                f"🧹 區段壓縮: 刪除 {result['segments']} 個區段，搬移 {result['moved']} 個條目，"
+                f"回收 {result['reclaimed_bytes'] / 1024 / 1024:.1f}MB"
+            )
+        return result
+
     def _start_cleanup_task(self):
         """啟動背景清理任務"""
         def cleanup_worker():
@@ -467,22 +542,14 @@ class CacheManager:
             if self.config.enable_memory_cache:
                 with self.memory_lock:
                     self.memory_cache.clear()
+                    for shadow in self.shadow_policies:
+                        shadow.clear()
 
             # 清空磁碟快取
             if self.config.enable_disk_cache:
-                # 刪除所有快取檔案
-                for cache_file in self.cache_dir.rglob("*.cache"):
-                    try:
-                        cache_file.unlink()
-                    except:
-                        pass
-
-                # 清空 JSON 索引
-                index_data = {
-                    "_metadata": {"version": "1.0", "created_at": time.time()},
-                    "entries": {}
-                }
-                self._save_index(index_data)
+                # 先清空索引再刪除區段檔，避免讀取到已刪除的位置
+                self.index.clear()
+                self.segments.clear()
 
             logger.info("🧹 已清空所有快取")
 
@@ -494,47 +561,102 @@ class CacheManager:
         try:
             # 計算總大小
             total_size_bytes = 0
+            disk_entries = 0
+            segment_sizes: Dict[int, int] = {}
             if self.config.enable_disk_cache:
-                index_data = self._load_index()
-                for entry_data in index_data.get("entries", {}).values():
-                    total_size_bytes += entry_data.get("size_bytes", 0)
+                disk_entries, total_size_bytes = self.index.summary()
+                segment_sizes = self.segments.segment_sizes()
 
-            # 記憶體快取大小
-            memory_size_bytes = sum(entry.size_bytes for entry in self.memory_cache.values())
+            # 記憶體快取大小與各淘汰策略的命中統計
+            with self.memory_lock:
+                memory_size_bytes = self.memory_cache.total_bytes
+                memory_policies = {
+                    policy.name: policy.stats() for policy in [self.memory_cache, *self.shadow_policies]
+                }
 
-            total_requests = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+            with self._stats_lock:
+                stats = dict(self.stats)
+            total_requests = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
             hit_rate = (
-                (self.stats['memory_hits'] + self.stats['disk_hits']) / total_requests * 100
+                (stats['memory_hits'] + stats['disk_hits']) / total_requests * 100
                 if total_requests > 0 else 0
             )
 
             return {
-                **self.stats,
+                **stats,
                 'total_size_mb': total_size_bytes / (1024 * 1024),
+                'disk_cache_entries': disk_entries,
+                'disk_segments': len(segment_sizes),
+                'disk_segments_size_mb': sum(segment_sizes.values()) / (1024 * 1024),
                 'memory_cache_entries': len(self.memory_cache),
                 'memory_cache_size_mb': memory_size_bytes / (1024 * 1024),
+                'compression_codec': self.codec.name,
+                'compression_dictionaries': len(self.dictionaries) if self.dictionaries is not None else 0,
+                'memory_policy': self.memory_cache.name,
+                'memory_policies': memory_policies,
                 'hit_rate': f"{hit_rate:.1f}%",
-                'memory_hit_rate': f"{(self.stats['memory_hits'] / total_requests * 100):.1f}%" if total_requests > 0 else "0%",
-                'disk_hit_rate': f"{(self.stats['disk_hits'] / total_requests * 100):.1f}%" if total_requests > 0 else "0%",
+                'memory_hit_rate': f"{(stats['memory_hits'] / total_requests * 100):.1f}%" if total_requests > 0 else "0%",
+                'disk_hit_rate': f"{(stats['disk_hits'] / total_requests * 100):.1f}%" if total_requests > 0 else "0%",
                 'config': asdict(self.config)
             }
 
         except Exception as e:
             logger.error(f"獲取快取統計失敗: {e}")
-            return self.stats
+            with self._stats_lock:
+                return dict(self.stats)
     
+    def close(self):
+        """等待進行中的非同步操作，寫入累積的訪問統計並關閉索引與區段檔"""
+        self._io_executor.shutdown(wait=True)
+        self.index.close()
+        self.segments.close()
+
     # 非同步介面
+    # 事件迴圈上只查詢記憶體快取（不等待鎖定）；磁碟讀寫、pickle 與壓縮
+    # 都在 _io_executor 執行，不阻塞其他並行的請求。
     async def set_async(self, key: str, value: Any, ttl_hours: Optional[int] = None) -> bool:
         """非同步設置快取值"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.set, key, value, ttl_hours)
-    
+        # 之後的讀取不再共用寫入前開始的查詢
+        self._pending_gets.pop(self._generate_cache_key(key), None)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, self.set, key, value, ttl_hours)
+
     async def get_async(self, key: str) -> Optional[Any]:
-        """非同步獲取快取值"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.get, key)
-    
+        """非同步獲取快取值（同一鍵的並行查詢只讀取一次磁碟）"""
+        cache_key = self._generate_cache_key(key)
+        loop = asyncio.get_running_loop()
+
+        pending = self._pending_gets.get(cache_key)
+        if pending is not None and pending.get_loop() is loop:
+            self._count('coalesced_gets')
+            return await asyncio.shield(pending)
+
+        # 記憶體鎖定忙碌時不等待，改由執行緒完整查詢
+        lookup = functools.partial(self.get, key)
+        if not self.config.enable_memory_cache:
+            lookup = functools.partial(self._get_from_disk, key, cache_key)
+        elif self.memory_lock.acquire(blocking=False):
+            try:
+                entry = self._memory_get(key, cache_key)
+            finally:
+                self.memory_lock.release()
+            if entry is not None:
+                return entry.value
+            lookup = functools.partial(self._get_from_disk, key, cache_key)
+
+        pending = loop.run_in_executor(self._io_executor, lookup)
+        self._pending_gets[cache_key] = pending
+
+        def _forget(future: asyncio.Future):
+            if self._pending_gets.get(cache_key) is future:
+                del self._pending_gets[cache_key]
+
+        pending.add_done_callback(_forget)
+        # shield：單一等待者被取消時不影響共用同一查詢的其他等待者
+        return await asyncio.shield(pending)
+
     async def delete_async(self, key: str) -> bool:
         """非同步刪除快取值"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.delete, key)
\ No newline at end of file
+        self._pending_gets.pop(self._generate_cache_key(key), None)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, self.delete, key)
\ No newline at end of file
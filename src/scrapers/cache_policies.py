@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+記憶體快取淘汰策略模組
+以條目數與總大小 (size_bytes) 為上限的可替換淘汰策略
+
+- lru: 最近最少使用，OrderedDict 維持存取順序，O(1)
+- lfu: 最不常使用，依存取次數分桶（同次數內依最近使用），O(1)
+- tinylfu: W-TinyLFU，新條目先進入小型 LRU 視窗，離開視窗時以
+  Count-Min 頻率估計與主區 (SLRU) 的淘汰候選比較，較常被存取者留下
+
+每個策略各自統計命中、未命中與淘汰次數。CacheManager 可另外以
+不保存值的影子策略重播相同的存取序列，比較各策略在實際工作負載下
+的命中率。
+"""
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Type
+
+if TYPE_CHECKING:
+    from .cache_manager import CacheEntry
+
+
+class EvictionPolicy:
+    """淘汰策略基底類別
+
+    保存快取條目並在超過條目數或總大小上限時淘汰。子類別實作
+    _on_insert / _on_access / _on_remove 維護順序結構，並由 _victim
+    決定下一個淘汰的鍵。
+    """
+
+    name = ""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.total_bytes = 0
+        self._entries: Dict[str, "CacheEntry"] = {}
+
+        # 統計資訊
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def items(self) -> List[Tuple[str, "CacheEntry"]]:
+        """所有條目（複本，可在迭代時移除）"""
+        return list(self._entries.items())
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional["CacheEntry"]:
+        """查詢條目並記錄命中/未命中（指定 now 時過期條目視為未命中並移除）"""
+        entry = self._entries.get(key)
+        if entry is not None and now is not None and now - entry.created_at > entry.ttl_seconds:
+            self.pop(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            self._on_miss(key)
+            return None
+
+        self.hits += 1
+        self._on_access(key)
+        return entry
+
+    def put(self, key: str, entry: "CacheEntry"):
+        """新增或取代條目，必要時淘汰其他條目"""
+        if entry.size_bytes > self.max_bytes:
+            # 單一條目超過總大小上限，不放入記憶體
+            self.pop(key)
+            self.rejections += 1
+            return
+
+        previous = self._entries.get(key)
+        if previous is not None:
+            self._entries[key] = entry
+            self.total_bytes += entry.size_bytes - previous.size_bytes
+            self._on_access(key)
+        else:
+            self._admit(key, entry)
+        self._shrink_to(self.max_entries, self.max_bytes)
+
+    def pop(self, key: str) -> Optional["CacheEntry"]:
+        """移除條目（不計入淘汰）"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size_bytes
+            self._on_remove(key)
+        return entry
+
+    def clear(self):
+        """移除所有條目"""
+        for key in list(self._entries):
+            self.pop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """策略統計資訊"""
+        requests = self.hits + self.misses
+        return {
+            'policy': self.name,
+            'entries': len(self._entries),
+            'size_bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'rejections': self.rejections,
+            'hit_rate': f"{(self.hits / requests * 100):.1f}%" if requests > 0 else "0%",
+        }
+
+    def _admit(self, key: str, entry: "CacheEntry"):
+        """放入新條目（預設先騰出空間再放入，新條目不會立即被淘汰）"""
+        self._shrink_to(self.max_entries - 1, self.max_bytes - entry.size_bytes)
+        self._entries[key] = entry
+        self.total_bytes += entry.size_bytes
+        self._on_insert(key)
+
+    def _shrink_to(self, max_entries: int, max_bytes: int):
+        """淘汰條目直到不超過指定上限"""
+        while self._entries and (len(self._entries) > max_entries or self.total_bytes > max_bytes):
+            self._evict(self._victim())
+
+    def _evict(self, key: str):
+        self.pop(key)
+        self.evictions += 1
+
+    def _on_insert(self, key: str):
+        raise NotImplementedError
+
+    def _on_access(self, key: str):
+        raise NotImplementedError
+
+    def _on_miss(self, key: str):
+        pass
+
+    def _on_remove(self, key: str):
+        raise NotImplementedError
+
+    def _victim(self) -> str:
+        raise NotImplementedError
+
+
+class LRUPolicy(EvictionPolicy):
+    """最近最少使用 (LRU)"""
+
+    name = "lru"
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        super().__init__(max_entries, max_bytes)
+        self._order: "OrderedDict[str, None]" = OrderedDict()
+
+    def _on_insert(self, key: str):
+        self._order[key] = None
+
+    def _on_access(self, key: str):
+        self._order.move_to_end(key)
+
+    def _on_remove(self, key: str):
+        del self._order[key]
+
+    def _victim(self) -> str:
+        return next(iter(self._order))
+
+
+class LFUPolicy(EvictionPolicy):
+    """最不常使用 (LFU)，同存取次數時淘汰最久未使用者"""
+
+    name = "lfu"
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        super().__init__(max_entries, max_bytes)
+        self._counts: Dict[str, int] = {}
+        self._buckets: Dict[int, "OrderedDict[str, None]"] = {}
+        self._min_count = 0
+
+    def _on_insert(self, key: str):
+        self._counts[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_count = 1
+
+    def _on_access(self, key: str):
+        count = self._counts[key]
+        self._unlink(key, count)
+        if self._min_count == count and count not in self._buckets:
+            self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def _on_remove(self, key: str):
+        self._unlink(key, self._counts.pop(key))
+
+    def _unlink(self, key: str, count: int):
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+    def _victim(self) -> str:
+        if self._min_count not in self._buckets:
+            # 移除條目後最小次數的分桶可能已清空
+            self._min_count = min(self._buckets)
+        return next(iter(self._buckets[self._min_count]))
+
+
+class FrequencySketch:
+    """Count-Min 頻率估計（計數上限 15，累計一定次數後全部減半以反映近期熱度）"""
+
+    DEPTH = 4
+    MAX_COUNT = 15
+
+    def __init__(self, capacity: int):
+        width = 16
+        while width < capacity:
+            width *= 2
+        self._mask = width - 1
+        self._rows = [[0] * width for _ in range(self.DEPTH)]
+        self._additions = 0
+        self._sample_size = 10 * width
+
+    def _indexes(self, key: str) -> Iterator[Tuple[List[int], int]]:
+        for seed, row in enumerate(self._rows):
+            yield row, hash((seed, key)) & self._mask
+
+    def increment(self, key: str):
+        for row, index in self._indexes(key):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._rows = [[count >> 1 for count in row] for row in self._rows]
+            self._additions //= 2
+
+    def frequency(self, key: str) -> int:
+        return min(row[index] for row, index in self._indexes(key))
+
+
+class WTinyLFUPolicy(EvictionPolicy):
+    """W-TinyLFU：1% LRU 視窗 + 頻率准入 + 分段 LRU 主區（試用 20%、保護 80%）"""
+
+    name = "tinylfu"
+
+    WINDOW_RATIO = 0.01
+    PROTECTED_RATIO = 0.8
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        super().__init__(max_entries, max_bytes)
+        self._window_max = max(1, int(self.max_entries * self.WINDOW_RATIO))
+        self._main_max = self.max_entries - self._window_max
+        self._protected_max = int(self._main_max * self.PROTECTED_RATIO)
+
+        self._window: "OrderedDict[str, None]" = OrderedDict()
+        self._probation: "OrderedDict[str, None]" = OrderedDict()
+        self._protected: "OrderedDict[str, None]" = OrderedDict()
+        self._segments: Dict[str, "OrderedDict[str, None]"] = {}
+        self._sketch = FrequencySketch(self.max_entries)
+
+    def _admit(self, key: str, entry: "CacheEntry"):
+        self._entries[key] = entry
+        self.total_bytes += entry.size_bytes
+        self._on_insert(key)
+
+        if len(self._window) <= self._window_max:
+            return
+
+        # 視窗溢出：離開視窗的候選與主區的淘汰候選比較頻率
+        candidate = next(iter(self._window))
+        self._move(candidate, self._probation)
+        if len(self._probation) + len(self._protected) <= self._main_max:
+            return
+        victim = next(iter(self._probation))
+        if victim == candidate:
+            victim = next(iter(self._protected), candidate)
+        if self._sketch.frequency(candidate) > self._sketch.frequency(victim):
+            self._evict(victim)
+        else:
+            self._evict(candidate)
+            self.rejections += 1
+
+    def _on_insert(self, key: str):
+        self._sketch.increment(key)
+        self._window[key] = None
+        self._segments[key] = self._window
+
+    def _on_access(self, key: str):
+        self._sketch.increment(key)
+        segment = self._segments[key]
+        if segment is self._probation:
+            # 試用區再次命中時升級至保護區，保護區溢出時降級最舊者
+            self._move(key, self._protected)
+            if len(self._protected) > self._protected_max:
+                self._move(next(iter(self._protected)), self._probation)
+        else:
+            segment.move_to_end(key)
+
+    def _on_miss(self, key: str):
+        self._sketch.increment(key)
+
+    def _on_remove(self, key: str):
+        del self._segments.pop(key)[key]
+
+    def _move(self, key: str, segment: "OrderedDict[str, None]"):
+        del self._segments[key][key]
+        segment[key] = None
+        self._segments[key] = segment
+
+    def _victim(self) -> str:
+        for segment in (self._probation, self._protected, self._window):
+            if segment:
+                return next(iter(segment))
+        raise KeyError("快取為空")
+
+
+POLICIES: Dict[str, Type[EvictionPolicy]] = {
+    policy.name: policy for policy in (LRUPolicy, LFUPolicy, WTinyLFUPolicy)
+}
+
+
+def create_policy(name: str, max_entries: int, max_bytes: int) -> EvictionPolicy:
+    """依名稱建立淘汰策略（lru / lfu / tinylfu）"""
+    try:
+        return POLICIES[name.lower()](max_entries, max_bytes)
+    except KeyError:
+        raise ValueError(f"不支援的淘汰策略: {name} (可用: {', '.join(POLICIES)})")
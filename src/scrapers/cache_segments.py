@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+快取區段檔模組
+以附加式區段檔 (log-structured segments) 存放磁碟快取的值
+
+值依序附加到目前的區段檔 (segments/00000001.seg)，超過大小上限時
+換到下一個編號；位置以 (區段, 位移, 長度) 記錄在索引中。讀取時以 mmap
+對映區段檔並切出指定範圍，不必為每個條目建立檔案與目錄。
+
+被覆寫、刪除或過期的值不會立即移除，由壓縮 (CacheManager.compact_segments)
+將仍有效的值搬到目前的區段後刪除整個舊區段檔。
+
+區段檔以 O_APPEND 開啟，單次 write 附加的位置由作業系統決定，
+多個程序可同時附加到同一個區段。目前的區段記錄在記憶體中，附加時
+只以 fstat 檢查已開啟的檔案：超過大小上限或已被刪除時才重新掃描
+目錄（其他程序可能已換到更新的區段）。
+"""
+
+import os
+import mmap
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".seg"
+
+
+class SegmentStore:
+    """附加式區段檔儲存
+
+    Attributes:
+        directory: 區段檔目錄
+        max_segment_bytes: 單一區段檔大小上限（超過後換到下一個區段）
+    """
+
+    def __init__(self, directory: Path, max_segment_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max(1, max_segment_bytes)
+
+        self._lock = threading.RLock()
+        self._active: Optional[int] = None
+        self._active_fd: Optional[int] = None
+        self._maps: Dict[int, mmap.mmap] = {}
+
+    def _path(self, segment: int) -> Path:
+        return self.directory / f"{segment:08d}{SEGMENT_SUFFIX}"
+
+    def segment_sizes(self) -> Dict[int, int]:
+        """所有區段檔的 {編號: 大小}"""
+        sizes = {}
+        for path in self.directory.glob(f"*{SEGMENT_SUFFIX}"):
+            try:
+                sizes[int(path.stem)] = path.stat().st_size
+            except (ValueError, FileNotFoundError):
+                continue
+        return sizes
+
+    def latest_segment(self) -> int:
+        """掃描目錄取得編號最大的區段（其他程序可能已換到更新的區段）"""
+        return max(self.segment_sizes(), default=self._active or 1)
+
+    @property
+    def active_segment(self) -> int:
+        """此程序目前附加的區段（尚未附加時掃描目錄）"""
+        with self._lock:
+            return self._active if self._active_fd is not None else self.latest_segment()
+
+    def append(self, data: bytes) -> Tuple[int, int]:
+        """
+        附加一個值
+
+        Returns:
+            (區段編號, 位移)
+        """
+        with self._lock:
+            self._roll_if_needed()
+            written = os.write(self._active_fd, data)
+            if written != len(data):
+                os.write(self._active_fd, data[written:])
+            # O_APPEND 寫入後的檔案位置即為此次寫入的結尾
+            end = os.lseek(self._active_fd, 0, os.SEEK_CUR)
+            return self._active, end - len(data)
+
+    def _roll_if_needed(self):
+        """開啟目前的區段，已被刪除或超過大小上限時換到最新或下一個區段"""
+        if self._active_fd is None:
+            self._open_active(self.latest_segment())
+        stat = os.fstat(self._active_fd)
+        # st_nlink 為 0：區段已被其他程序壓縮或清除（編號不重複使用）
+        if stat.st_nlink == 0 or stat.st_size >= self.max_segment_bytes:
+            self._open_active(max(self.latest_segment(), self._active + 1))
+            logger.debug(f"💿 快取區段已切換: {self._path(self._active).name}")
+
+    def _open_active(self, segment: int):
+        self._close_active()
+        self._active = segment
+        self._active_fd = os.open(self._path(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def _close_active(self):
+        if self._active_fd is not None:
+            os.close(self._active_fd)
+            self._active_fd = None
+
+    def read(self, segment: int, offset: int, length: int) -> Optional[bytes]:
+        """
+        以 mmap 讀取一個值
+
+        Returns:
+            值的位元組；區段已被刪除或範圍超出檔案時 None
+        """
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or offset + length > len(mapped):
+                # 首次讀取，或區段在對映後又附加了新的值
+                mapped = self._map(segment)
+                if mapped is None or offset + length > len(mapped):
+                    return None
+            return mapped[offset:offset + length]
+
+    def _map(self, segment: int) -> Optional[mmap.mmap]:
+        self._unmap(segment)
+        try:
+            with open(self._path(segment), 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return None
+        self._maps[segment] = mapped
+        return mapped
+
+    def _unmap(self, segment: int):
+        mapped = self._maps.pop(segment, None)
+        if mapped is not None:
+            mapped.close()
+
+    def remove(self, segment: int):
+        """刪除區段檔（已對映的內容由其他程序繼續持有直到解除對映）"""
+        with self._lock:
+            self._unmap(segment)
+            if segment == self._active:
+                self._close_active()
+            try:
+                self._path(segment).unlink()
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """刪除所有區段檔（編號不重新開始，避免其他程序讀到舊對映）"""
+        with self._lock:
+            next_segment = max(self.segment_sizes(), default=self._active or 0) + 1
+            for segment in self.segment_sizes():
+                self.remove(segment)
+            self._close_active()
+            self._open_active(next_segment)
+
+    def close(self):
+        """關閉檔案與對映"""
+        with self._lock:
+            for segment in list(self._maps):
+                self._unmap(segment)
+            self._close_active()
@@ -6,7 +6,7 @@ import shutil
 import logging
 import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from collections import defaultdict
 
 import sys
@@ -17,13 +17,16 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from models.config import ConfigManager
-from models.json_database import JSONDBManager
+from models.storage_engine import create_storage_engine
+from src.models.json_types import ISO_DATETIME_FORMAT, ValidationError, DataIntegrityError
 from models.extractor import UnifiedCodeExtractor
 from models.studio import StudioIdentifier
 from utils.scanner import UnifiedFileScanner
 from services.web_searcher import WebSearcher
 from services.studio_classifier import StudioClassificationCore
 from services.interactive_classifier import InteractiveClassifier
+# 與儲存引擎相同的模組路徑，引擎才能以 isinstance 辨識條件並以索引處理
+from src.models.video_query import VideoQuery, research_query
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +36,7 @@ class UnifiedClassifierCore:
     
     def __init__(self, config: ConfigManager):
         self.config = config
-        self.db_manager = JSONDBManager()
+        self.db_manager = create_storage_engine(config)
         self.code_extractor = UnifiedCodeExtractor()
         self.file_scanner = UnifiedFileScanner()
         self.studio_identifier = StudioIdentifier()
@@ -48,6 +51,24 @@ class UnifiedClassifierCore:
         
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
+    def _videos_in_db(self, video_files: List[Path], with_records: bool = False) -> Dict[str, Dict]:
+        """
+        以 ID 查詢資料夾中的番號在資料庫中的影片（不讀取整個資料庫）
+
+        Args:
+            video_files: 影片檔案清單
+            with_records: 是否回傳完整記錄（預設只取 ID）
+
+        Returns:
+            {番號: 影片記錄}
+        """
+        codes = {self.code_extractor.extract_code(file_path.name) for file_path in video_files}
+        codes.discard(None)
+        query = VideoQuery().where_in('id', codes)
+        if not with_records:
+            query = query.select('id')
+        return {video['id']: video for video in self.db_manager.query_videos(query)}
+
     def set_preference_manager(self, preference_manager):
         """設定偏好管理器"""
         self.preference_manager = preference_manager
@@ -132,7 +153,7 @@ class UnifiedClassifierCore:
             if progress_callback: 
                 progress_callback(f"📁 發現 {len(video_files)} 個影片檔案。\n")
             
-            codes_in_db = {v['code'] for v in self.db_manager.get_all_videos()}
+            codes_in_db = set(self._videos_in_db(video_files))
             new_code_file_map = {}
             for file_path in video_files:
                 code = self.code_extractor.extract_code(file_path.name)
@@ -148,34 +169,39 @@ class UnifiedClassifierCore:
                     progress_callback("🎉 所有影片都已在資料庫中！\n")
                 return {'status': 'success', 'message': '所有番號都已存在於資料庫中'}
             
-            search_results = self.web_searcher.batch_search(
+            def build_records(results: Dict) -> List[Tuple[str, Dict]]:
+                records = []
+                for code, result in results.items():
+                    if result and result.get('actresses'):
+                        for file_path in new_code_file_map[code]:
+                            # 優先使用搜尋結果中的片商資訊，只有當搜尋結果沒有片商資訊時才使用本地識別
+                            studio = result.get('studio')
+                            if not studio or studio == 'UNKNOWN':
+                                studio = self.studio_identifier.identify_studio(code)
+                            
+                            info = {
+                                'actresses': result['actresses'], 
+                                'original_filename': file_path.name, 
+                                'file_path': str(file_path), 
+                                'studio': studio, 
+                                'search_method': result.get('source', 'AV-WIKI')
+                            }
+                            records.append((code, info))
+                return records
+            
+            search_results, failed_saves = self._search_and_save(
                 list(new_code_file_map.keys()), 
                 self.web_searcher.search_info, 
+                build_records,
                 stop_event, 
                 progress_callback
             )
-            success_count = 0
-            for code, result in search_results.items():
-                if result and result.get('actresses'):
-                    success_count += 1
-                    for file_path in new_code_file_map[code]:
-                        # 優先使用搜尋結果中的片商資訊，只有當搜尋結果沒有片商資訊時才使用本地識別
-                        studio = result.get('studio')
-                        if not studio or studio == 'UNKNOWN':
-                            studio = self.studio_identifier.identify_studio(code)
-                        
-                        info = {
-                            'actresses': result['actresses'], 
-                            'original_filename': file_path.name, 
-                            'file_path': str(file_path), 
-                            'studio': studio, 
-                            'search_method': result.get('source', 'AV-WIKI')
-                        }
-                        self.db_manager.add_or_update_video(code, info)
+            success_count = sum(1 for result in search_results.values() if result and result.get('actresses'))
             return {
                 'status': 'success',                'total_files': len(video_files), 
                 'new_codes': len(new_code_file_map), 
-                'success': success_count
+                'success': success_count,
+                'failed_saves': failed_saves
             }
         except Exception as e:
             self.logger.error(f"搜尋過程中發生錯誤: {e}", exc_info=True)
@@ -194,7 +220,7 @@ class UnifiedClassifierCore:
             if progress_callback: 
                 progress_callback(f"📁 發現 {len(video_files)} 個影片檔案。\n")
             
-            codes_in_db = {v['code'] for v in self.db_manager.get_all_videos()}
+            codes_in_db = set(self._videos_in_db(video_files))
             new_code_file_map = {}
             for file_path in video_files:
                 code = self.code_extractor.extract_code(file_path.name)
@@ -211,35 +237,40 @@ class UnifiedClassifierCore:
                 return {'status': 'success', 'message': '所有番號都已存在於資料庫中'}
             
             # 使用日文網站專用搜尋方法
-            search_results = self.web_searcher.batch_search(
+            def build_records(results: Dict) -> List[Tuple[str, Dict]]:
+                records = []
+                for code, result in results.items():
+                    if result and result.get('actresses'):
+                        for file_path in new_code_file_map[code]:
+                            # 優先使用搜尋結果中的片商資訊，只有當搜尋結果沒有片商資訊時才使用本地識別
+                            studio = result.get('studio')
+                            if not studio or studio == 'UNKNOWN':
+                                studio = self.studio_identifier.identify_studio(code)
+                            
+                            info = {
+                                'actresses': result['actresses'], 
+                                'original_filename': file_path.name, 
+                                'file_path': str(file_path), 
+                                'studio': studio, 
+                                'search_method': result.get('source', '日文網站')
+                            }
+                            records.append((code, info))
+                return records
+            
+            search_results, failed_saves = self._search_and_save(
                 list(new_code_file_map.keys()), 
                 self.web_searcher.search_japanese_sites, 
+                build_records,
                 stop_event, 
                 progress_callback
             )
-            success_count = 0
-            for code, result in search_results.items():
-                if result and result.get('actresses'):
-                    success_count += 1
-                    for file_path in new_code_file_map[code]:
-                        # 優先使用搜尋結果中的片商資訊，只有當搜尋結果沒有片商資訊時才使用本地識別
-                        studio = result.get('studio')
-                        if not studio or studio == 'UNKNOWN':
-                            studio = self.studio_identifier.identify_studio(code)
-                        
-                        info = {
-                            'actresses': result['actresses'], 
-                            'original_filename': file_path.name, 
-                            'file_path': str(file_path), 
-                            'studio': studio, 
-                            'search_method': result.get('source', '日文網站')
-                        }
-                        self.db_manager.add_or_update_video(code, info)
+            success_count = sum(1 for result in search_results.values() if result and result.get('actresses'))
             return {
                 'status': 'success', 
                 'total_files': len(video_files), 
                 'new_codes': len(new_code_file_map), 
-                'success': success_count
+                'success': success_count,
+                'failed_saves': failed_saves
             }
         except Exception as e:
             self.logger.error(f"日文網站搜尋過程中發生錯誤: {e}", exc_info=True)
@@ -258,50 +289,22 @@ class UnifiedClassifierCore:
             if progress_callback: 
                 progress_callback(f"📁 發現 {len(video_files)} 個影片檔案。\n")
             
-            # 改進：獲取所有影片並檢查搜尋狀態
-            from datetime import datetime, timedelta
-            all_videos = self.db_manager.get_all_videos()
-            codes_in_db = {v['code']: v for v in all_videos}
-            
-            new_code_file_map = {}
-            research_code_file_map = {}
-            
+            # 依番號分組檔案
+            code_file_map = {}
             for file_path in video_files:
                 code = self.code_extractor.extract_code(file_path.name)
-                if not code:
-                    continue
-                
-                if code not in codes_in_db:
-                    # 全新番號，需要搜尋
-                    if code not in new_code_file_map:
-                        new_code_file_map[code] = []
-                    new_code_file_map[code].append(file_path)
-                else:
-                    # 番號已在資料庫中，檢查是否需要重新搜尋
-                    video_record = codes_in_db[code]
-                    search_status = video_record.get('search_status', 'not_searched')
-                    last_search_date = video_record.get('last_search_date')
-                    
-                    # 重新搜尋條件：
-                    # 1. 搜尋過但無結果 (searched_not_found)
-                    # 2. 搜尋失敗 (failed)
-                    # 3. 超過 7 天未搜尋
-                    should_research = False
-                    
-                    if search_status in ['searched_not_found', 'failed']:
-                        should_research = True
-                    elif last_search_date:
-                        try:
-                            last_search = datetime.fromisoformat(last_search_date.replace('Z', '+00:00'))
-                            if datetime.now(last_search.tzinfo) - last_search > timedelta(days=7):
-                                should_research = True
-                        except:
-                            pass
-                    
-                    if should_research:
-                        if code not in research_code_file_map:
-                            research_code_file_map[code] = []
-                        research_code_file_map[code].append(file_path)
+                if code:
+                    code_file_map.setdefault(code, []).append(file_path)
+            
+            codes_in_db = set(self._videos_in_db(video_files))
+            new_code_file_map = {code: files for code, files in code_file_map.items() if code not in codes_in_db}
+            
+            # 重新搜尋條件（單一索引查詢）：
+            # 1. 搜尋過但無結果 (searched_not_found)
+            # 2. 搜尋失敗 (failed)
+            # 3. 超過 7 天未搜尋
+            research_codes = self.db_manager.query_videos(research_query(code_file_map).select('id'))
+            research_code_file_map = {video['id']: code_file_map[video['id']] for video in research_codes}
             
             if progress_callback:
                 progress_callback(f"✅ 資料庫中已存在 {len(codes_in_db)} 個影片的番號記錄。\n")
@@ -318,61 +321,64 @@ class UnifiedClassifierCore:
                     progress_callback("🎉 所有影片都已有最新搜尋結果！\n")
                 return {'status': 'success', 'message': '所有番號都已存在於資料庫中'}
             
+            from datetime import datetime, timezone
+            current_time = datetime.now(timezone.utc).strftime(ISO_DATETIME_FORMAT)
+            
+            def build_records(results: Dict) -> List[Tuple[str, Dict]]:
+                records = []
+                for code, result in results.items():
+                    if result and result.get('actresses'):
+                        # 搜尋成功的處理
+                        for file_path in all_codes_to_search.get(code, []):
+                            studio = result.get('studio')
+                            if not studio or studio == 'UNKNOWN':
+                                studio = self.studio_identifier.identify_studio(code)
+                            
+                            info = {
+                                'actresses': result['actresses'], 
+                                'original_filename': file_path.name, 
+                                'file_path': str(file_path), 
+                                'studio': studio, 
+                                'search_method': result.get('source', 'JAVDB'),
+                                'search_status': 'searched_found',
+                                'last_search_date': current_time
+                            }
+                            records.append((code, info))
+                    else:
+                        # 搜尋無結果的處理
+                        for file_path in all_codes_to_search.get(code, []):
+                            studio = self.studio_identifier.identify_studio(code)
+                            
+                            info = {
+                                'actresses': [], 
+                                'original_filename': file_path.name, 
+                                'file_path': str(file_path), 
+                                'studio': studio, 
+                                'search_method': 'JAVDB',
+                                'search_status': 'searched_not_found',
+                                'last_search_date': current_time
+                            }
+                            records.append((code, info))
+                return records
+            
             # 使用 JAVDB 專用搜尋方法
-            search_results = self.web_searcher.batch_search(
+            search_results, failed_saves = self._search_and_save(
                 list(all_codes_to_search.keys()), 
                 self.web_searcher.search_javdb_only, 
+                build_records,
                 stop_event, 
                 progress_callback
             )
-            success_count = 0
-            failed_count = 0
-            from datetime import datetime
-            current_time = datetime.now().isoformat()
-            
-            for code, result in search_results.items():
-                if result and result.get('actresses'):
-                    success_count += 1
-                    # 搜尋成功的處理
-                    for file_path in all_codes_to_search.get(code, []):
-                        studio = result.get('studio')
-                        if not studio or studio == 'UNKNOWN':
-                            studio = self.studio_identifier.identify_studio(code)
-                        
-                        info = {
-                            'actresses': result['actresses'], 
-                            'original_filename': file_path.name, 
-                            'file_path': str(file_path), 
-                            'studio': studio, 
-                            'search_method': result.get('source', 'JAVDB'),
-                            'search_status': 'searched_found',
-                            'last_search_date': current_time
-                        }
-                        self.db_manager.add_or_update_video(code, info)
-                else:
-                    # 搜尋無結果的處理
-                    failed_count += 1
-                    for file_path in all_codes_to_search.get(code, []):
-                        studio = self.studio_identifier.identify_studio(code)
-                        
-                        info = {
-                            'actresses': [], 
-                            'original_filename': file_path.name, 
-                            'file_path': str(file_path), 
-                            'studio': studio, 
-                            'search_method': 'JAVDB',
-                            'search_status': 'searched_not_found',
-                            'last_search_date': current_time
-                        }
-                        self.db_manager.add_or_update_video(code, info)
-            
+            success_count = sum(1 for result in search_results.values() if result and result.get('actresses'))
+            failed_count = len(search_results) - success_count
             return {
                 'status': 'success', 
                 'total_files': len(video_files), 
                 'new_codes': len(new_code_file_map),
                 'research_codes': len(research_code_file_map),
                 'success': success_count,
-                'failed': failed_count
+                'failed': failed_count,
+                'failed_saves': failed_saves
             }
         except Exception as e:
             self.logger.error(f"JAVDB 搜尋過程中發生錯誤: {e}", exc_info=True)
@@ -396,11 +402,12 @@ class UnifiedClassifierCore:
             collaboration_files = []
             single_files = []
             
+            videos_in_db = self._videos_in_db(video_files, with_records=True)
             for file_path in video_files:
                 code = self.code_extractor.extract_code(file_path.name)
                 if not code: 
                     continue
-                info = self.db_manager.get_video_info(code)
+                info = videos_in_db.get(code)
                 if not info or not info.get('actresses'):
                     continue
                 
@@ -520,11 +527,12 @@ class UnifiedClassifierCore:
             collaboration_files = []
             no_data_files = []
             
+            videos_in_db = self._videos_in_db(video_files, with_records=True)
             for file_path in video_files:
                 code = self.code_extractor.extract_code(file_path.name)
                 if not code: 
                     continue 
-                info = self.db_manager.get_video_info(code)
+                info = videos_in_db.get(code)
                 if not info or not info.get('actresses'):
                     no_data_files.append(file_path)
                     continue
@@ -688,7 +696,7 @@ class UnifiedClassifierCore:
             if progress_callback: 
                 progress_callback(f"📁 發現 {len(video_files)} 個影片檔案。\n")
             
-            codes_in_db = {v['code'] for v in self.db_manager.get_all_videos()}
+            codes_in_db = set(self._videos_in_db(video_files))
             new_code_file_map = {}
             for file_path in video_files:
                 code = self.code_extractor.extract_code(file_path.name)
@@ -703,10 +711,30 @@ class UnifiedClassifierCore:
                 if progress_callback: 
                     progress_callback("🎉 所有影片都已在資料庫中！\n")
                 return {'status': 'success', 'message': '所有番號都已存在於資料庫中'}
-              # 使用 JAVDB 專用搜尋方法
-            search_results = self.web_searcher.batch_search(
+            def build_records(results: Dict) -> List[Tuple[str, Dict]]:
+                records = []
+                for code, result in results.items():
+                    if result and result.get('actresses'):
+                        for file_path in new_code_file_map[code]:
+                            # 優先使用搜尋結果中的片商資訊，只有當搜尋結果沒有片商資訊時才使用本地識別
+                            studio = result.get('studio')
+                            if not studio or studio == 'UNKNOWN':
+                                studio = self.studio_identifier.identify_studio(code)
+                            
+                            info = {
+                                'actresses': result['actresses'], 
+                                'original_filename': file_path.name, 
+                                'file_path': str(file_path), 
+                                'studio': studio, 
+                                'search_method': result.get('source', 'JAVDB')                        }
+                            records.append((code, info))
+                return records
+            
+            # 使用 JAVDB 專用搜尋方法
+            search_results, failed_saves = self._search_and_save(
                 list(new_code_file_map.keys()), 
                 self.web_searcher.search_javdb_only, 
+                build_records,
                 stop_event, 
                 progress_callback
             )
@@ -714,20 +742,6 @@ class UnifiedClassifierCore:
             for code, result in search_results.items():
                 if result and result.get('actresses'):
                     success_count += 1
-                    for file_path in new_code_file_map[code]:
-                        # 優先使用搜尋結果中的片商資訊，只有當搜尋結果沒有片商資訊時才使用本地識別
-                        studio = result.get('studio')
-                        if not studio or studio == 'UNKNOWN':
-                            studio = self.studio_identifier.identify_studio(code)
-                        
-                        info = {
-                            'actresses': result['actresses'], 
-                            'original_filename': file_path.name, 
-                            'file_path': str(file_path), 
-                            'studio': studio, 
-                            'search_method': result.get('source', 'JAVDB')                        }
-                        self.db_manager.add_or_update_video(code, info)
-                    success_count += 1
                     if progress_callback: 
                         progress_callback(f"✓ {code}: {', '.join(result['actresses'])}\n")
                 else:
@@ -740,11 +754,86 @@ class UnifiedClassifierCore:
                 progress_callback(f"成功找到: {success_count}/{total_codes} 個番號\n")
                 progress_callback(f"成功率: {success_count/total_codes*100:.1f}%\n")
             
-            return {'status': 'success', 'message': f'成功搜尋 {success_count} 個番號'}
+            return {'status': 'success', 'message': f'成功搜尋 {success_count} 個番號', 'failed_saves': failed_saves}
         except Exception as e:
             logger.error(f"JAVDB 搜尋過程發生錯誤: {e}", exc_info=True)
             return {'status': 'error', 'message': str(e)}
     
+    def _search_and_save(self, codes: List[str], search_func, build_records, stop_event: threading.Event,
+                         progress_callback=None) -> Tuple[Dict, List[str]]:
+        """
+        搜尋番號，每批搜尋完成即寫入結果（不等待全部搜尋結束）
+        
+        Args:
+            codes: 要搜尋的番號
+            search_func: WebSearcher 的搜尋方法
+            build_records: 由一批搜尋結果 {番號: 結果} 產生 (番號, 影片資訊) 清單
+            stop_event: 中止事件
+            progress_callback: 進度訊息回呼
+            
+        Returns:
+            (所有搜尋結果, 寫入資料庫失敗的番號)
+        """
+        failed_saves: List[str] = []
+        
+        def save_batch(results: Dict) -> None:
+            failed_saves.extend(self._save_search_results(build_records(results)))
+        
+        search_results = self.web_searcher.batch_search(
+            codes, search_func, stop_event, progress_callback, batch_callback=save_batch
+        )
+        if failed_saves and progress_callback:
+            progress_callback(f"⚠️ {len(failed_saves)} 個番號的搜尋結果寫入資料庫失敗: {', '.join(failed_saves)}\n")
+        return search_results, failed_saves
+    
+    def _save_search_results(self, records: List[Tuple[str, Dict]]) -> List[str]:
+        """
+        批次寫入搜尋結果
+        
+        每批 (search.batch_size 筆) 只提交一次資料庫交易，
+        缺少的女優記錄會在同一交易中以名稱作為 ID 建立。某批因記錄
+        驗證或完整性錯誤還原時逐筆重試，只略過本身有問題的記錄；
+        其他錯誤（例如無法獲得鎖定）則整批記為失敗。
+        
+        Args:
+            records: (番號, 影片資訊) 清單
+            
+        Returns:
+            寫入失敗的番號（不重複）
+        """
+        batch_size = max(1, self.config.getint('search', 'batch_size', fallback=10))
+        failed: List[str] = []
+        
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            try:
+                self._save_search_batch(batch)
+            except (ValidationError, DataIntegrityError) as e:
+                self.logger.warning(f"⚠️ 搜尋結果批次寫入失敗，逐筆重試: {e}")
+                for record in batch:
+                    try:
+                        self._save_search_batch([record])
+                    except Exception as record_error:
+                        self.logger.error(f"❌ 寫入 {record[0]} 的搜尋結果失敗: {record_error}")
+                        failed.append(record[0])
+            except Exception as e:
+                self.logger.error(f"❌ 搜尋結果批次寫入失敗: {e}")
+                failed.extend(code for code, _ in batch)
+        
+        return list(dict.fromkeys(failed))
+    
+    def _save_search_batch(self, batch: List[Tuple[str, Dict]]) -> None:
+        """以單一資料庫交易寫入一批搜尋結果（失敗時整批還原）"""
+        with self.db_manager.transaction():
+            for code, info in batch:
+                for actress_name in info.get('actresses', []):
+                    if self.db_manager.get_actress_info(actress_name) is None:
+                        self.db_manager.add_or_update_actress({'id': actress_name, 'name': actress_name})
+                
+                video_info = dict(info)
+                video_info['id'] = code
+                self.db_manager.add_or_update_video(video_info)
+    
     def _parse_actresses_list(self, actresses):
         """
         解析女優名單，處理用 # 分隔的多人共演格式
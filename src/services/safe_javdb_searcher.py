@@ -8,12 +8,13 @@ import httpx
 from bs4 import BeautifulSoup
 import logging
 from pathlib import Path
-import json
 from datetime import datetime, date
 from typing import Dict, List, Optional, Any
 import threading
 from urllib.parse import quote, urljoin
 
+from src.models import json_codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,8 +62,7 @@ class SafeJAVDBSearcher:
         """載入快取資料"""
         if self.cache_file.exists():
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
+                self.cache = json_codec.load_file(self.cache_file)
                 logger.debug(f"📦 已載入 {len(self.cache)} 個快取項目")
             except Exception as e:
                 logger.warning(f"載入快取失敗: {e}")
@@ -73,8 +73,7 @@ class SafeJAVDBSearcher:
     def save_cache(self):
         """儲存快取資料"""
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
+            json_codec.dump_file(self.cache, self.cache_file)
             logger.debug(f"💾 已儲存 {len(self.cache)} 個快取項目")
         except Exception as e:
             logger.error(f"儲存快取失敗: {e}")
@@ -83,8 +82,7 @@ class SafeJAVDBSearcher:
         """載入統計資料"""
         if self.stats_file.exists():
             try:
-                with open(self.stats_file, 'r', encoding='utf-8') as f:
-                    self.stats = json.load(f)
+                self.stats = json_codec.load_file(self.stats_file)
             except Exception as e:
                 logger.warning(f"載入統計失敗: {e}")
                 self.stats = {}
@@ -102,8 +100,7 @@ class SafeJAVDBSearcher:
     def save_stats(self):
         """儲存統計資料"""
         try:
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(self.stats, f, ensure_ascii=False, indent=2)
+            json_codec.dump_file(self.stats, self.stats_file)
         except Exception as e:
             logger.error(f"儲存統計失敗: {e}")
 
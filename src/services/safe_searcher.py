@@ -9,10 +9,11 @@ import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Callable, Any
 from pathlib import Path
-import json
 import threading
 from dataclasses import dataclass, asdict
 
+from src.models import json_codec
+
 logger = logging.getLogger(__name__)
 
 
@@ -186,8 +187,7 @@ class SafeSearcher:
         try:
             cache_path = Path(self.cache_file)
             if cache_path.exists():
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
+                cache_data = json_codec.load_file(cache_path)
                     
                 # 轉換為 CacheEntry 物件
                 for key, value in cache_data.items():
@@ -221,14 +221,13 @@ class SafeSearcher:
                     
                 try:
                     # 測試是否可序列化
-                    json.dumps(entry.data, ensure_ascii=False)
+                    json_codec.dumps(entry.data)
                     cache_data[key] = asdict(entry)
                 except (TypeError, ValueError):
                     logger.debug(f"跳過不可序列化資料: {entry.url}")
                     continue
             
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            json_codec.dump_file(cache_data, cache_path)
                 
             logger.debug(f"💾 已儲存 {len(cache_data)} 個快取項目 (跳過 {len(self.cache) - len(cache_data)} 個不可序列化項目)")
         except Exception as e:
@@ -283,7 +282,7 @@ class SafeSearcher:
                 return
             
             # 測試是否可以序列化為 JSON
-            json.dumps(data, ensure_ascii=False)
+            json_codec.dumps(data)
             
         except (TypeError, ValueError) as e:
             logger.debug(f"🚫 資料不可序列化，跳過快取: {url} - {e}")
@@ -169,6 +169,7 @@ class StudioClassificationCore:
         if progress_callback:
             progress_callback("📊 正在使用增強版演算法分析女優片商分佈...\n")
         
+        # 由儲存引擎分析（JSON 以次要索引、SQLite 以 GROUP BY 查詢），不載入整個資料庫
         for i, actress_folder in enumerate(actress_folders, 1):
             actress_name = actress_folder.name
             
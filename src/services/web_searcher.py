@@ -8,7 +8,7 @@ import logging
 import threading
 import concurrent.futures
 import chardet
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import httpx
 from bs4 import BeautifulSoup
 from urllib.parse import quote
@@ -438,7 +438,22 @@ class WebSearcher:
         
         return is_valid
 
-    def batch_search(self, items: List, task_func, stop_event: threading.Event, progress_callback=None) -> Dict:
+    def batch_search(self, items: List, task_func, stop_event: threading.Event, progress_callback=None,
+                     batch_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        分批並行搜尋
+
+        Args:
+            items: 搜尋項目（番號）
+            task_func: 搜尋函式 task_func(item, stop_event)
+            stop_event: 中止事件
+            progress_callback: 進度訊息回呼
+            batch_callback: 每批完成後以該批結果 {項目: 結果} 呼叫（在呼叫端執行緒執行，
+                            可於搜尋進行中即寫入結果）
+
+        Returns:
+            所有項目的結果 {項目: 結果}
+        """
         results = {}
         total_batches = (len(items) + self.batch_size - 1) // self.batch_size
         for i in range(0, len(items), self.batch_size):
@@ -449,6 +464,7 @@ class WebSearcher:
             batch_num = (i // self.batch_size) + 1
             if progress_callback: 
                 progress_callback(f"處理批次 {batch_num}/{total_batches}...\n")
+            batch_results = {}
             with concurrent.futures.ThreadPoolExecutor(max_workers=self.thread_count) as executor:
                 future_to_item = {executor.submit(task_func, item, stop_event): item for item in batch}
                 for future in concurrent.futures.as_completed(future_to_item):
@@ -457,7 +473,7 @@ class WebSearcher:
                     item = future_to_item[future]
                     try:
                         result = future.result()
-                        results[item] = result
+                        batch_results[item] = result
                         if progress_callback:
                             if result and result.get('actresses'): 
                                 progress_callback(f"✅ {item}: 找到資料\n")
@@ -467,6 +483,9 @@ class WebSearcher:
                         logger.error(f"批次處理 {item} 時發生錯誤: {e}")
                         if progress_callback: 
                             progress_callback(f"💥 {item}: 處理失敗 - {e}\n")
+            results.update(batch_results)
+            if batch_callback and batch_results:
+                batch_callback(batch_results)
             if i + self.batch_size < len(items) and total_batches > 1:                time.sleep(self.batch_delay)
         return results
     
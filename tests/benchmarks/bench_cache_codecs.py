@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+快取壓縮編碼效能測試
+
+以三個網站（av-wiki / chiba-f / javdb）風格的 HTML 頁面比較各編碼
+逐一壓縮快取值時的磁碟大小與編碼/解碼時間。基準為原本的 gzip 路徑
+（gzip.compress 預設等級 9）；安裝 zstandard 時另外比較以各網域
+訓練字典壓縮的結果（前半頁面訓練，後半頁面量測）。
+
+執行方式:
+    python tests/benchmarks/bench_cache_codecs.py [每個網域的頁面數]
+"""
+
+import sys
+import gzip
+import time
+import pickle
+import random
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# 添加專案根目錄到系統路徑
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.scrapers.cache_codecs import DictionaryStore, available_codecs, get_codec
+
+DOMAINS = ('av-wiki.net', 'chiba-f.net', 'javdb.com')
+
+
+def build_pages(domain: str, count: int, seed: int = 42) -> List[str]:
+    """建立同網域共用版面、內容各異的 HTML 頁面"""
+    rng = random.Random(f"{seed}-{domain}")
+    header = (
+        f'<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8"><title>{domain}</title>'
+        + ''.join(f'<link rel="stylesheet" href="https://{domain}/static/css/{n}.css">' for n in range(12))
+        + '</head><body><nav class="global-nav">'
+        + ''.join(f'<a class="nav-item" href="/category/{n}">分類{n}</a>' for n in range(60))
+        + '</nav><main>'
+    )
+    footer = (
+        '</main><footer>'
+        + ''.join(f'<a href="/{word}">{word}</a>' for word in ('about', 'contact', 'privacy', 'terms', 'dmca'))
+        + f'<p>© 2024 {domain} All rights reserved.</p></footer>'
+        + ''.join(f'<script src="https://{domain}/static/js/{n}.js"></script>' for n in range(8))
+        + '</body></html>'
+    )
+
+    pages = []
+    for i in range(count):
+        rows = ''.join(
+            f'<tr><td class="code">{rng.choice(("SNIS", "MIDE", "IPX", "PGD"))}-{rng.randint(1, 999):03d}</td>'
+            f'<td class="title">作品タイトル {rng.randint(1, 10 ** 6)}</td>'
+            f'<td class="date">20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}</td></tr>'
+            for _ in range(rng.randint(5, 40))
+        )
+        pages.append(f'{header}<h1>女優{i}</h1><table class="works">{rows}</table>{footer}')
+    return pages
+
+
+def measure(values: List[bytes], compress: Callable[[bytes], bytes],
+            decompress: Callable[[bytes], bytes]) -> Dict[str, Any]:
+    """逐一壓縮/解壓縮並返回大小與時間"""
+    start = time.perf_counter()
+    encoded = [compress(value) for value in values]
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for data in encoded:
+        decompress(data)
+    decode_ms = (time.perf_counter() - start) * 1000
+
+    return {'bytes': sum(len(data) for data in encoded), 'encode_ms': encode_ms, 'decode_ms': decode_ms}
+
+
+def main() -> None:
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pages = {domain: [pickle.dumps(page) for page in build_pages(domain, page_count)] for domain in DOMAINS}
+    # 字典以各網域前半頁面訓練，所有編碼都以後半頁面量測
+    training = {domain: values[:page_count // 2] for domain, values in pages.items()}
+    values = [value for domain in DOMAINS for value in pages[domain][page_count // 2:]]
+    raw_bytes = sum(len(value) for value in values)
+
+    results = {
+        'gzip-9 (原路徑)': measure(values, gzip.compress, gzip.decompress),
+    }
+    for name in available_codecs():
+        codec = get_codec(name)
+        results[f'{name} v{codec.version}'] = measure(values, codec.compress, codec.decompress)
+
+    if 'zstd' in available_codecs():
+        codec = get_codec('zstd')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = DictionaryStore(Path(temp_dir), 112 * 1024, page_count // 2)
+            for domain, samples in training.items():
+                for sample in samples:
+                    store.for_domain(domain, sample)
+            by_value = {
+                id(value): store.for_domain(domain, value)
+                for domain in DOMAINS for value in pages[domain][page_count // 2:]
+            }
+            results['zstd + 網域字典'] = measure(
+                values,
+                lambda value: codec.compress(value, by_value[id(value)]),
+                lambda data: codec.decompress(data, store.get(_frame_dict_id(data))),
+            )
+    else:
+        print("zstandard 未安裝，略過 zstd 與字典壓縮")
+
+    print(f"資料集: {len(values)} 個頁面 / {raw_bytes / 1024:.0f} KB (pickle 後)")
+    print(f"{'編碼':<18}{'磁碟大小(KB)':>14}{'壓縮率':>10}{'編碼(ms)':>12}{'解碼(ms)':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:<18}"
+            f"{result['bytes'] / 1024:>14.0f}"
+            f"{result['bytes'] / raw_bytes:>10.1%}"
+            f"{result['encode_ms']:>12.1f}"
+            f"{result['decode_ms']:>12.1f}"
+        )
+
+
+def _frame_dict_id(data: bytes) -> int:
+    """讀取 zstd 框架標頭記錄的字典 ID"""
+    import zstandard
+    return zstandard.get_frame_parameters(data).dict_id
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 序列化後端效能測試
+
+以 50,000 部影片的資料庫比較各後端的編碼/解碼時間，
+以及 JSONDBManager 保存/載入 data.json 的端到端時間。
+
+執行方式:
+    python tests/benchmarks/bench_json_codec.py [影片數]
+"""
+
+import sys
+import time
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+# 添加專案根目錄到系統路徑
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.models import json_codec
+from src.models.json_database import JSONDBManager
+from src.models.json_types import get_empty_json_database
+
+
+def build_library(video_count: int, seed: int = 42) -> dict:
+    """建立測試用資料庫（每部影片 1~3 位女優）"""
+    rng = random.Random(seed)
+    data = get_empty_json_database()
+    actress_count = max(1, video_count // 10)
+    studios = [('S1', 'SNIS'), ('MOODYZ', 'MIDE'), ('PREMIUM', 'PGD'), ('IDEAPOCKET', 'IPX')]
+
+    for i in range(actress_count):
+        data['actresses'][f'actress_{i}'] = {
+            'id': f'actress_{i}', 'name': f'女優{i}', 'aliases': [], 'video_count': 0,
+            'created_at': '2024-01-01T00:00:00Z', 'updated_at': '2024-01-01T00:00:00Z',
+        }
+
+    for i in range(video_count):
+        studio, code = rng.choice(studios)
+        video_id = f'{code}-{i:05d}'
+        cast = rng.sample(range(actress_count), min(actress_count, rng.randint(1, 3)))
+        data['videos'][video_id] = {
+            'id': video_id, 'title': f'測試影片 {i}', 'studio': studio, 'studio_code': code,
+            'release_date': f'20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            'url': f'https://example.com/v/{video_id}', 'actresses': [f'actress_{a}' for a in cast],
+            'search_status': 'success', 'last_search_date': '2024-01-01T00:00:00Z',
+            'created_at': '2024-01-01T00:00:00Z', 'updated_at': '2024-01-01T00:00:00Z',
+            'metadata': {'source': 'javdb', 'confidence': 0.9},
+        }
+        for a in cast:
+            data['links'].append({
+                'video_id': video_id, 'actress_id': f'actress_{a}',
+                'role_type': '主演', 'timestamp': '2024-01-01T00:00:00Z',
+            })
+
+    return data
+
+
+def timed(func, repeat: int = 3) -> float:
+    """取得最佳執行時間（毫秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    video_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    data = build_library(video_count)
+    print(f"資料集: {len(data['videos'])} 部影片 / {len(data['actresses'])} 位女優 / {len(data['links'])} 筆關聯")
+    print(f"{'後端':<10}{'dumps':>12}{'dumps(縮排)':>14}{'loads':>12}{'保存':>12}{'載入':>12}  (ms)")
+
+    for backend in json_codec.available_backends():
+        json_codec.set_backend(backend)
+        encoded = json_codec.dumps(data)
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            db = JSONDBManager(data_dir=temp_dir)
+            db.data = data
+            save_ms = timed(lambda: db._save_all_data(db.data, validate=False))
+            load_ms = timed(lambda: db._load_data_internal(force=True))
+        finally:
+            shutil.rmtree(temp_dir)
+
+        print(
+            f"{backend:<10}"
+            f"{timed(lambda: json_codec.dumps(data)):>12.1f}"
+            f"{timed(lambda: json_codec.dumps(data, indent=True)):>14.1f}"
+            f"{timed(lambda: json_codec.loads(encoded)):>12.1f}"
+            f"{save_ms:>12.1f}"
+            f"{load_ms:>12.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫記錄表示記憶體測試
+
+比較影片/女優記錄以 dict 與精簡記錄 (CompactVideo / CompactActress)
+存放時的常駐記憶體（tracemalloc 量測，包含記錄值本身）。資料以
+JSON 解碼建立，與從 data.json 載入時相同：每筆記錄的字串各自配置。
+
+執行方式:
+    python tests/benchmarks/bench_json_records.py [影片數 ...]
+"""
+
+import gc
+import sys
+import json
+import random
+import tracemalloc
+from pathlib import Path
+
+# 添加專案根目錄到系統路徑
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.models.json_records import compact_containers
+from src.models.json_types import get_empty_video, get_empty_actress
+
+
+def build_document(video_count: int, seed: int = 42) -> bytes:
+    """建立測試用 JSON 內容（分類器寫入的常見欄位）"""
+    rng = random.Random(seed)
+    actress_count = max(1, video_count // 10)
+    studios = [(f'STUDIO{i}', f'CODE{i}') for i in range(200)]
+    data = {'videos': {}, 'actresses': {}}
+
+    for i in range(actress_count):
+        actress = get_empty_actress()
+        actress.update(id=f'actress_{i}', name=f'女優{i}')
+        data['actresses'][actress['id']] = actress
+    for i in range(video_count):
+        studio, code = rng.choice(studios)
+        video = get_empty_video()
+        video.update(
+            id=f'{code}-{i:06d}', studio=studio, studio_code=code,
+            actresses=[f'actress_{rng.randrange(actress_count)}' for _ in range(rng.randint(1, 3))],
+            search_status=rng.choice(['searched_found', 'searched_not_found']),
+            search_method='JAVDB', original_filename=f'{code}-{i:06d}.mp4',
+        )
+        data['videos'][video['id']] = video
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def measure(document: bytes, compact: bool) -> int:
+    """載入並（可選）轉換後的常駐位元組數"""
+    gc.collect()
+    tracemalloc.start()
+    data = json.loads(document)
+    if compact:
+        compact_containers(data)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+
+    print(f"{'影片數':>10}{'dict (MB)':>12}{'精簡 (MB)':>12}{'每筆 dict':>12}{'每筆精簡':>12}{'節省':>8}")
+    for video_count in sizes:
+        document = build_document(video_count)
+        plain = measure(document, compact=False)
+        compact = measure(document, compact=True)
+        records = video_count + max(1, video_count // 10)
+        print(
+            f"{video_count:>10,}{plain / 2**20:>12.1f}{compact / 2**20:>12.1f}"
+            f"{plain // records:>12,}{compact // records:>12,}{1 - compact / plain:>7.0%}"
+        )
+
+
+if __name__ == '__main__':
+    main()
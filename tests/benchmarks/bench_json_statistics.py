@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 資料庫統計計算效能測試
+
+比較完整統計計算的三種方式：
+- 迴圈: 以 dict 逐筆計算（重構前的作法，保留於此作為基準）
+- 欄式(Python): ColumnarStatistics 未使用 NumPy
+- 欄式(NumPy): ColumnarStatistics 使用 NumPy 向量化運算（已安裝時）
+
+「建立」為掃描資料建立欄位的時間，「統計」為在已建立的欄位上
+計算女優、片商與交叉統計的時間（欄位於資料變更前可重複使用），
+「加速」與「含建立」分別為不含/包含建立時間相對於迴圈的倍數。
+
+執行方式:
+    python tests/benchmarks/bench_json_statistics.py [關聯數 ...]
+"""
+
+import sys
+import time
+import random
+from pathlib import Path
+
+# 添加專案根目錄到系統路徑
+project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(project_root))
+
+from src.models.json_columnar import ColumnarStatistics, NUMPY_AVAILABLE
+from src.models.json_indexes import SecondaryIndexes
+from src.models.json_types import get_empty_json_database
+
+
+def build_library(link_count: int, seed: int = 42) -> dict:
+    """建立測試用資料庫（平均每部影片 2 筆關聯，女優集中在少數片商）"""
+    rng = random.Random(seed)
+    data = get_empty_json_database()
+    video_count = max(1, link_count // 2)
+    actress_count = max(1, video_count // 10)
+    studios = [(f'STUDIO{i}', f'CODE{i}') for i in range(200)] + [('UNKNOWN', '')]
+
+    home_studios = []
+    for i in range(actress_count):
+        data['actresses'][f'actress_{i}'] = {'id': f'actress_{i}', 'name': f'女優{i}'}
+        home_studios.append(rng.sample(studios, 3))
+    for i in range(video_count):
+        video_id = f'V-{i:07d}'
+        lead = rng.randrange(actress_count)
+        studio, code = rng.choice(home_studios[lead])
+        data['videos'][video_id] = {'id': video_id, 'studio': studio, 'studio_code': code}
+        cast = [lead] + [rng.randrange(actress_count) for _ in range(1 if i % 2 else 2)]
+        for position, actress in enumerate(cast):
+            if len(data['links']) < link_count:
+                data['links'].append({
+                    'video_id': video_id,
+                    'actress_id': f'actress_{actress}',
+                    'role_type': '主演' if position == 0 else '共演',
+                    'timestamp': f'20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-01T00:00:00Z',
+                })
+    return data
+
+
+def loop_statistics(data: dict, indexes: SecondaryIndexes) -> None:
+    """以 dict 逐筆計算（重構前的演算法；索引於資料庫中常駐，不計入時間）"""
+    videos, actresses, links = data['videos'], data['actresses'], data['links']
+
+    actress_stats = []
+    for actress_id, actress in actresses.items():
+        video_ids = [links[p].get('video_id') for p in indexes.actress_links.get(actress_id, ())
+                     if links[p].get('video_id')]
+        studios, codes = set(), set()
+        for video_id in video_ids:
+            video = videos.get(video_id)
+            if video:
+                if video.get('studio'):
+                    studios.add(video['studio'])
+                if video.get('studio_code'):
+                    codes.add(video['studio_code'])
+        actress_stats.append({'actress_name': actress.get('name', ''), 'video_count': len(video_ids),
+                              'studios': sorted(studios), 'studio_codes': sorted(codes)})
+    actress_stats.sort(key=lambda x: x['video_count'], reverse=True)
+
+    studio_stats = {}
+    for video_id, video in videos.items():
+        if not video.get('studio'):
+            continue
+        stats = studio_stats.setdefault((video['studio'], video.get('studio_code', '')), [0, set()])
+        stats[0] += 1
+        for p in indexes.video_links.get(video_id, ()):
+            if links[p].get('actress_id'):
+                stats[1].add(links[p]['actress_id'])
+    studio_rows = [{'studio': studio, 'studio_code': code, 'video_count': count, 'actress_count': len(ids)}
+                   for (studio, code), (count, ids) in studio_stats.items()]
+    studio_rows.sort(key=lambda x: x['video_count'], reverse=True)
+
+    names = {actress_id: actress.get('name', '') for actress_id, actress in actresses.items()}
+    cross = {}
+    for link in links:
+        actress_id, video_id = link.get('actress_id'), link.get('video_id')
+        video = videos.get(video_id) if actress_id and video_id else None
+        if not video or not video.get('studio') or video['studio'] == 'UNKNOWN':
+            continue
+        role_type, timestamp = link.get('role_type', 'primary'), link.get('timestamp', '')
+        key = (actress_id, video['studio'], video.get('studio_code', ''), role_type)
+        if key not in cross:
+            cross[key] = {'actress_name': names.get(actress_id, ''), 'studio': video['studio'],
+                          'studio_code': video.get('studio_code', ''), 'association_type': role_type,
+                          'video_count': 0, 'video_codes': [],
+                          'first_appearance': timestamp, 'latest_appearance': timestamp}
+        stats = cross[key]
+        stats['video_count'] += 1
+        stats['video_codes'].append(video.get('id', ''))
+        if timestamp:
+            if not stats['first_appearance'] or timestamp < stats['first_appearance']:
+                stats['first_appearance'] = timestamp
+            if not stats['latest_appearance'] or timestamp > stats['latest_appearance']:
+                stats['latest_appearance'] = timestamp
+    enhanced = list(cross.values())
+    enhanced.sort(key=lambda x: (x['actress_name'], -x['video_count']))
+
+
+def columnar_statistics(columns: ColumnarStatistics) -> None:
+    columns.actress_statistics()
+    columns.studio_statistics()
+    columns.enhanced_statistics()
+
+
+def timed(func, repeat: int = 3) -> float:
+    """取得最佳執行時間（毫秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    modes = [('欄式(Python)', False)] + ([('欄式(NumPy)', True)] if NUMPY_AVAILABLE else [])
+    if not NUMPY_AVAILABLE:
+        print("未安裝 NumPy，僅比較純 Python 欄式計算")
+
+    print(f"{'關聯數':>10}  {'方式':<14}{'建立':>10}{'統計':>10}{'加速':>8}{'含建立':>8}  (ms)")
+    for link_count in sizes:
+        data = build_library(link_count)
+        repeat = 1 if link_count >= 1_000_000 else 3
+        indexes = SecondaryIndexes(data)
+        baseline = timed(lambda: loop_statistics(data, indexes), repeat)
+        print(f"{link_count:>10,}  {'迴圈':<14}{'-':>10}{baseline:>10.1f}{1:>7.1f}x{1:>7.1f}x")
+
+        for label, use_numpy in modes:
+            build_ms = timed(lambda: ColumnarStatistics(data, use_numpy=use_numpy), repeat)
+            columns = ColumnarStatistics(data, use_numpy=use_numpy)
+            compute_ms = timed(lambda: columnar_statistics(columns), repeat)
+            print(
+                f"{'':>10}  {label:<14}{build_ms:>10.1f}{compute_ms:>10.1f}"
+                f"{baseline / compute_ms:>7.1f}x{baseline / (build_ms + compute_ms):>7.1f}x"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+測試共用輔助函式
+
+臨時目錄使用 pytest 內建的 tmp_path fixture。
+"""
+
+import threading
+
+
+def in_thread(func):
+    """在另一個執行緒執行 func 並回傳結果（例外會在呼叫端重新拋出）"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome['result'] = func()
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(timeout=5)
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+
+def without_computed_at(statistics):
+    """去除統計的計算時間（比較不同時間計算的統計）"""
+    return {key: value for key, value in statistics.items() if key != 'computed_at'}
@@ -0,0 +1,516 @@
+# -*- coding: utf-8 -*-
+"""
+測試快取管理器
+
+此模組測試：
+1. 磁碟快取的索引以 SQLite 逐條目讀寫
+2. 訪問統計批次寫入
+3. 以過期時間索引清理過期條目
+4. 匯入舊版 JSON 索引，並將每個條目一個檔案的值搬入區段檔
+5. 區段檔切換與壓縮回收失效資料
+6. 記憶體快取淘汰策略 (LRU / LFU / W-TinyLFU) 與各策略統計
+7. 非同步介面不阻塞事件迴圈，並行讀取同一鍵時合併查詢
+8. 壓縮編碼記錄於條目中，更換編碼後舊條目仍可讀取；網域字典壓縮
+"""
+
+import asyncio
+import hashlib
+import json
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+from src.scrapers import cache_manager as cache_module
+from src.scrapers.cache_manager import CacheManager, CacheConfig, CacheEntry
+from src.scrapers.cache_codecs import available_codecs
+from src.scrapers.cache_segments import SegmentStore
+from src.scrapers.cache_policies import POLICIES, create_policy
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    """只啟用磁碟快取，每次 get 都經過索引"""
+    cache = CacheManager(CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False))
+    yield cache
+    cache.close()
+
+
+class TestDiskIndex:
+    """測試磁碟快取索引"""
+
+    def test_set_get_delete(self, disk_cache):
+        page = '<html>' + 'av-wiki ' * 500 + '</html>'
+        assert disk_cache.set('https://example.com/a', page)
+        assert disk_cache.set('https://example.com/b', {'title': 'SNIS-001'})
+
+        assert disk_cache.get('https://example.com/a') == page
+        assert disk_cache.get('https://example.com/b') == {'title': 'SNIS-001'}
+        assert disk_cache.get_stats()['disk_cache_entries'] == 2
+
+        assert disk_cache.delete('https://example.com/a')
+        assert disk_cache.get('https://example.com/a') is None
+        assert disk_cache.stats['disk_hits'] == 2 and disk_cache.stats['misses'] == 1
+
+    def test_access_stats_are_batched(self, disk_cache):
+        disk_cache.set('key', 'value')
+        cache_key = disk_cache._generate_cache_key('key')
+        for _ in range(3):
+            assert disk_cache.get('key') == 'value'
+
+        assert disk_cache.index.get(cache_key)['access_count'] == 0
+        assert disk_cache.index.flush_access() == 1
+        entry = disk_cache.index.get(cache_key)
+        assert entry['access_count'] == 3 and entry['last_accessed'] >= entry['created_at']
+
+        # 重新寫入的條目不套用尚未寫入的舊統計
+        disk_cache.get('key')
+        disk_cache.set('key', 'new value')
+        disk_cache.index.flush_access()
+        assert disk_cache.index.get(cache_key)['access_count'] == 0
+
+    def test_cleanup_uses_expiry_index(self, disk_cache, monkeypatch):
+        disk_cache.set('short', 'x', ttl_hours=1)
+        disk_cache.set('long', 'y', ttl_hours=48)
+
+        query_plan = disk_cache.index._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT cache_key FROM entries WHERE expires_at < ?", (0,)
+        ).fetchall()
+        assert any('idx_entries_expires_at' in row[-1] for row in query_plan)
+
+        now = time.time()
+        monkeypatch.setattr(cache_module.time, 'time', lambda: now + 2 * 3600)
+        disk_cache._cleanup_expired_cache()
+
+        assert disk_cache.get('short') is None
+        assert disk_cache.get('long') == 'y'
+        assert disk_cache.index.summary()[0] == 1
+
+    def test_imports_legacy_json_index(self, tmp_path):
+        cache_key = hashlib.sha256(b'legacy').hexdigest()
+        legacy_dir = tmp_path / cache_key[:2] / cache_key[2:4]
+        legacy_dir.mkdir(parents=True)
+        value_file = legacy_dir / f'{cache_key}.cache'
+        value_file.write_bytes(pickle.dumps({'id': 'SNIS-001'}))
+        now = time.time()
+        legacy_file = tmp_path / 'cache_index.json'
+        legacy_file.write_text(json.dumps({'_metadata': {'version': '1.0'}, 'entries': {cache_key: {
+            'file_path': str(value_file), 'created_at': now, 'ttl_seconds': 3600,
+            'last_accessed': now, 'access_count': 2, 'compressed': False,
+            'size_bytes': value_file.stat().st_size,
+        }}}))
+
+        cache = CacheManager(CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False))
+        try:
+            assert not legacy_file.exists()
+            assert not (tmp_path / cache_key[:2]).exists()
+            assert cache.index.get(cache_key)['access_count'] == 2
+            assert cache.get('legacy') == {'id': 'SNIS-001'}
+        finally:
+            cache.close()
+
+    def test_upgrades_file_per_key_sqlite_index(self, tmp_path):
+        value_file = tmp_path / 'ab' / 'cd' / 'abcd.cache'
+        value_file.parent.mkdir(parents=True)
+        value_file.write_bytes(pickle.dumps('old value'))
+        cache_key = hashlib.sha256(b'old').hexdigest()
+        conn = sqlite3.connect(str(tmp_path / 'cache_index.sqlite'))
+        conn.execute(
+            "CREATE TABLE entries (cache_key TEXT PRIMARY KEY, file_path TEXT, created_at REAL, "
+            "ttl_seconds INTEGER, expires_at REAL, last_accessed REAL, access_count INTEGER, "
+            "compressed INTEGER, size_bytes INTEGER)"
+        )
+        now = time.time()
+        conn.execute("INSERT INTO entries VALUES (?, ?, ?, 3600, ?, ?, 0, 0, 0)",
+                     (cache_key, str(value_file), now, now + 3600, now))
+        conn.commit()
+        conn.close()
+
+        cache = CacheManager(CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False))
+        try:
+            assert cache.get('old') == 'old value'
+            assert not value_file.exists()
+        finally:
+            cache.close()
+
+
+class TestSegments:
+    """測試區段檔儲存與壓縮"""
+
+    @pytest.fixture
+    def segment_cache(self, tmp_path):
+        config = CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False, enable_compression=False)
+        cache = CacheManager(config)
+        # 以小區段測試切換（約 4KB 一個區段）
+        cache.segments.max_segment_bytes = 4096
+        yield cache
+        cache.close()
+
+    def test_values_roll_across_segments(self, segment_cache):
+        for i in range(40):
+            assert segment_cache.set(f'page-{i}', f'SNIS-{i:03d} ' * 50)
+
+        stats = segment_cache.get_stats()
+        assert stats['disk_segments'] > 1
+        assert not list(segment_cache.cache_dir.rglob('*.cache'))
+        for i in range(40):
+            assert segment_cache.get(f'page-{i}') == f'SNIS-{i:03d} ' * 50
+
+    def test_compaction_reclaims_overwritten_and_deleted(self, segment_cache):
+        for i in range(40):
+            segment_cache.set(f'page-{i}', 'v1 ' * 200)
+        for i in range(0, 40, 2):
+            segment_cache.delete(f'page-{i}')
+        for i in range(1, 40, 4):
+            segment_cache.set(f'page-{i}', 'v2 ' * 200)
+        before = sum(segment_cache.segments.segment_sizes().values())
+
+        result = segment_cache.compact_segments()
+
+        after = sum(segment_cache.segments.segment_sizes().values())
+        assert result['segments'] > 0 and after < before
+        assert result['reclaimed_bytes'] > 0
+        for i in range(40):
+            expected = None if i % 2 == 0 else ('v2 ' if i % 4 == 1 else 'v1 ') * 200
+            assert segment_cache.get(f'page-{i}') == expected
+        # 只剩有效資料的區段不再壓縮
+        assert segment_cache.compact_segments()['segments'] == 0
+
+    def test_relocate_skips_rewritten_entries(self, segment_cache):
+        segment_cache.set('key', 'old')
+        cache_key = segment_cache._generate_cache_key('key')
+        old = segment_cache.index.get(cache_key)
+        segment_cache.set('key', 'new')
+
+        moved = segment_cache.index.relocate([(cache_key, old['segment'], old['offset'], 99, 0)])
+
+        assert moved == 0 and segment_cache.get('key') == 'new'
+
+    def test_missing_segment_is_a_miss(self, segment_cache):
+        segment_cache.set('key', 'value')
+        segment_cache.segments.clear()
+
+        assert segment_cache.get('key') is None
+        assert segment_cache.get_stats()['disk_cache_entries'] == 0
+        assert segment_cache.set('key', 'value 2') and segment_cache.get('key') == 'value 2'
+
+    def test_append_does_not_rescan_directory(self, tmp_path, monkeypatch):
+        store = SegmentStore(tmp_path / 'segments', max_segment_bytes=50)
+        store.append(b'x' * 10)
+        scans = []
+        original = store.segment_sizes
+        monkeypatch.setattr(store, 'segment_sizes', lambda: scans.append(1) or original())
+
+        for _ in range(4):
+            assert store.append(b'x' * 10)[0] == 1
+        assert not scans
+
+        # 超過大小上限時才掃描並換到下一個區段
+        assert store.append(b'x' * 10)[0] == 2
+        assert scans
+        store.close()
+
+    def test_append_follows_other_process(self, tmp_path):
+        """測試目前的區段被其他程序（另一個 SegmentStore）刪除時換到新的區段"""
+        first = SegmentStore(tmp_path / 'segments', max_segment_bytes=64)
+        second = SegmentStore(tmp_path / 'segments', max_segment_bytes=64)
+        assert first.append(b'a') == (1, 0)
+        assert second.append(b'b') == (1, 1)
+
+        second.remove(1)
+        assert first.append(b'c') == (2, 0)
+        assert first.read(2, 0, 1) == b'c'
+        assert second.append(b'd') == (2, 1)
+        first.close()
+        second.close()
+
+
+def _entry(key, size_bytes=1):
+    return CacheEntry(key=key, value=key, created_at=time.time(), ttl_seconds=3600, size_bytes=size_bytes)
+
+
+class TestEvictionPolicies:
+    """測試記憶體快取淘汰策略"""
+
+    @pytest.mark.parametrize('name', list(POLICIES))
+    def test_bounded_by_entries_and_bytes(self, name):
+        policy = create_policy(name, max_entries=50, max_bytes=1000)
+        for i in range(500):
+            policy.put(f'k{i}', _entry(f'k{i}', size_bytes=1 + i % 40))
+            if i % 3 == 0:
+                policy.get(f'k{i // 2}')
+            assert len(policy) <= 50 and policy.total_bytes <= 1000
+            assert policy.total_bytes == sum(entry.size_bytes for _, entry in policy.items())
+
+        policy.put('huge', _entry('huge', size_bytes=2000))
+        assert 'huge' not in policy
+
+        stats = policy.stats()
+        assert stats['policy'] == name and stats['evictions'] > 0
+        assert stats['hits'] + stats['misses'] == 167
+
+        for key, _ in policy.items():
+            policy.pop(key)
+        assert len(policy) == 0 and policy.total_bytes == 0
+
+    def test_lru_keeps_recently_used(self):
+        policy = create_policy('lru', max_entries=3, max_bytes=100)
+        for key in 'abc':
+            policy.put(key, _entry(key))
+        policy.get('a')
+        policy.put('d', _entry('d'))
+
+        assert 'a' in policy and 'b' not in policy
+
+    def test_lfu_keeps_frequently_used(self):
+        policy = create_policy('lfu', max_entries=3, max_bytes=100)
+        for key in 'abc':
+            policy.put(key, _entry(key))
+        for _ in range(3):
+            policy.get('a')
+        policy.get('b')
+        policy.put('d', _entry('d'))
+        policy.put('e', _entry('e'))
+
+        assert {'a', 'b'} <= {key for key, _ in policy.items()}
+
+    def test_tinylfu_resists_scans(self):
+        results = {}
+        for name in ('lru', 'tinylfu'):
+            policy = create_policy(name, max_entries=100, max_bytes=10 ** 6)
+            hot = [f'hot{i}' for i in range(50)]
+            for _ in range(5):
+                for key in hot:
+                    if policy.get(key) is None:
+                        policy.put(key, _entry(key))
+            for i in range(1000):
+                policy.put(f'scan{i}', _entry(f'scan{i}'))
+            results[name] = sum(key in policy for key in hot)
+
+        assert results['lru'] == 0
+        assert results['tinylfu'] >= 45
+
+    def test_manager_reports_per_policy_stats(self, tmp_path):
+        cache = CacheManager(CacheConfig(
+            cache_dir=str(tmp_path), enable_disk_cache=False, max_memory_entries=2,
+            memory_policy='tinylfu', compare_memory_policies=True
+        ))
+        try:
+            for key in ('a', 'b', 'c', 'a', 'b'):
+                if cache.get(key) is None:
+                    cache.set(key, key.upper())
+
+            stats = cache.get_stats()
+            assert stats['memory_policy'] == 'tinylfu'
+            assert set(stats['memory_policies']) == set(POLICIES)
+            assert all(p['hits'] + p['misses'] == 5 for p in stats['memory_policies'].values())
+            assert stats['memory_cache_entries'] <= 2
+            assert all(entry.value is None for policy in cache.shadow_policies for _, entry in policy.items())
+        finally:
+            cache.close()
+
+        with pytest.raises(ValueError):
+            CacheManager(CacheConfig(cache_dir=str(tmp_path), memory_policy='fifo'))
+
+
+class TestAsyncAPI:
+    """測試非同步介面"""
+
+    def test_concurrent_gets_are_coalesced(self, disk_cache, monkeypatch):
+        disk_cache.set('page', 'SNIS-001')
+        calls = []
+        original = disk_cache._get_from_disk
+
+        def slow_get_from_disk(key, cache_key):
+            calls.append(threading.current_thread().name)
+            time.sleep(0.05)
+            return original(key, cache_key)
+
+        monkeypatch.setattr(disk_cache, '_get_from_disk', slow_get_from_disk)
+
+        async def main():
+            return await asyncio.gather(*(disk_cache.get_async('page') for _ in range(10)))
+
+        assert asyncio.run(main()) == ['SNIS-001'] * 10
+        assert len(calls) == 1 and calls[0].startswith('cache-io')
+        assert disk_cache.stats['coalesced_gets'] == 9
+        assert disk_cache._pending_gets == {}
+
+    def test_cancelled_waiter_does_not_cancel_shared_get(self, disk_cache, monkeypatch):
+        disk_cache.set('page', 'SNIS-001')
+        original = disk_cache._get_from_disk
+        monkeypatch.setattr(disk_cache, '_get_from_disk',
+                            lambda key, cache_key: time.sleep(0.05) or original(key, cache_key))
+
+        async def main():
+            first = asyncio.ensure_future(disk_cache.get_async('page'))
+            second = asyncio.ensure_future(disk_cache.get_async('page'))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(main()) == 'SNIS-001'
+
+    def test_stats_are_exact_under_concurrency(self, tmp_path):
+        """測試執行緒池同時更新統計時計數不遺失"""
+        cache = CacheManager(CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False, async_io_workers=8))
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            async def main():
+                await asyncio.gather(*(cache.set_async(f'page-{i}', i) for i in range(200)))
+                await asyncio.gather(*(cache.get_async(f'page-{i}') for i in range(300)))
+
+            asyncio.run(main())
+        finally:
+            sys.setswitchinterval(interval)
+            cache.close()
+
+        stats = cache.get_stats()
+        assert (stats['sets'], stats['disk_hits'], stats['misses']) == (200, 200, 100)
+
+    def test_event_loop_latency_under_load(self, tmp_path):
+        config = CacheConfig(cache_dir=str(tmp_path), max_memory_entries=8, max_memory_mb=1)
+        cache = CacheManager(config)
+        pages = {f'https://example.com/{i}': ('<tr><td>SNIS-%03d</td></tr>' % i) * 40000 for i in range(48)}
+
+        # 參考值：在迴圈上同步執行相同負載（兩輪寫入並讀回所有頁面）所需時間
+        start = time.perf_counter()
+        for _ in range(2):
+            for url, page in pages.items():
+                cache.set(f'{url}?sync', page)
+            for url in pages:
+                cache.get(f'{url}?sync')
+        blocking_time = time.perf_counter() - start
+
+        async def main():
+            lags = []
+            done = asyncio.Event()
+
+            async def ticker():
+                while not done.is_set():
+                    start = time.perf_counter()
+                    await asyncio.sleep(0.001)
+                    lags.append(time.perf_counter() - start - 0.001)
+
+            async def load():
+                for _ in range(2):
+                    await asyncio.gather(*(cache.set_async(url, page) for url, page in pages.items()))
+                    values = await asyncio.gather(*(cache.get_async(url) for url in pages))
+                    assert values == list(pages.values())
+                done.set()
+
+            await asyncio.gather(ticker(), load())
+            return lags
+
+        try:
+            lags = asyncio.run(main())
+        finally:
+            cache.close()
+
+        # 事件迴圈在整個負載期間持續運轉：最長停頓只受 GIL 切換影響，
+        # 遠小於在迴圈上同步執行同一負載所需的時間
+        assert len(lags) > 10
+        assert max(lags) < blocking_time / 2
+
+
+def _html_page(domain, i):
+    """同網域共用版面的 HTML 頁面"""
+    return (
+        f'<html><head><title>{domain} SNIS-{i:03d}</title></head><body>'
+        f'<div class="nav">{"".join(f"<a href=/{domain}/menu/{n}>選單{n}</a>" for n in range(40))}</div>'
+        f'<table><tr><th>品番</th><td>SNIS-{i:03d}</td></tr><tr><th>女優</th><td>女優{i % 7}</td></tr></table>'
+        f'<div class="footer">{domain} © 2024 ' + 'footer ' * 20 + '</div></body></html>'
+    )
+
+
+class TestCodecs:
+    """測試壓縮編碼"""
+
+    @pytest.mark.parametrize('codec', available_codecs())
+    def test_codec_is_recorded_and_switchable(self, tmp_path, codec):
+        page = _html_page('av-wiki.net', 1) * 3
+        writer = CacheManager(CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False, compression_codec='gzip'))
+        writer.set('https://av-wiki.net/old', page)
+        writer.close()
+
+        cache = CacheManager(CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False, compression_codec=codec))
+        try:
+            cache.set('https://av-wiki.net/new', page)
+            entry = cache.index.get(cache._generate_cache_key('https://av-wiki.net/new'))
+            assert entry['compressed'] and entry['codec'] == codec and entry['codec_version'] == 1
+            assert cache.get('https://av-wiki.net/old') == page
+            assert cache.get('https://av-wiki.net/new') == page
+        finally:
+            cache.close()
+
+    def test_unknown_codec_is_a_miss(self, disk_cache):
+        page = _html_page('javdb.com', 1) * 3
+        disk_cache.set('https://javdb.com/v/1', page)
+        cache_key = disk_cache._generate_cache_key('https://javdb.com/v/1')
+        disk_cache.index.put(cache_key, {**disk_cache.index.get(cache_key), 'codec': 'brotli'})
+
+        assert disk_cache.get('https://javdb.com/v/1') is None
+
+        with pytest.raises(ValueError):
+            CacheManager(CacheConfig(cache_dir=str(disk_cache.cache_dir), compression_codec='brotli'))
+
+    def test_adds_codec_columns_to_segment_index(self, tmp_path):
+        page = _html_page('chiba-f.net', 1) * 3
+        writer = CacheManager(CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False, compression_codec='gzip'))
+        writer.set('https://chiba-f.net/1', page)
+        cache_key = writer._generate_cache_key('https://chiba-f.net/1')
+        segment, offset, size = (writer.index.get(cache_key)[field] for field in ('segment', 'offset', 'size_bytes'))
+        writer.close()
+
+        # 重建未含編碼欄位的索引（前一版的區段格式）
+        index_path = tmp_path / 'cache_index.sqlite'
+        index_path.unlink()
+        conn = sqlite3.connect(str(index_path))
+        conn.execute(
+            "CREATE TABLE entries (cache_key TEXT PRIMARY KEY, segment INTEGER, offset INTEGER, "
+            "created_at REAL, ttl_seconds INTEGER, expires_at REAL, last_accessed REAL, "
+            "access_count INTEGER, compressed INTEGER, size_bytes INTEGER)"
+        )
+        now = time.time()
+        conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?, 3600, ?, ?, 0, 1, ?)",
+                     (cache_key, segment, offset, now, now + 3600, now, size))
+        conn.commit()
+        conn.close()
+
+        cache = CacheManager(CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False))
+        try:
+            assert cache.index.get(cache_key)['codec'] == 'gzip'
+            assert cache.get('https://chiba-f.net/1') == page
+        finally:
+            cache.close()
+
+    def test_domain_dictionary(self, tmp_path):
+        pytest.importorskip('zstandard')
+        config = CacheConfig(
+            cache_dir=str(tmp_path), enable_memory_cache=False, compression_codec='zstd',
+            enable_dictionary_compression=True, dictionary_training_samples=50,
+        )
+        cache = CacheManager(config)
+        for i in range(60):
+            cache.set(f'https://av-wiki.net/{i}', _html_page('av-wiki.net', i))
+        cache.set('search:SNIS-001', _html_page('av-wiki.net', 1))
+
+        def dictionary_id(key):
+            return cache.index.get(cache._generate_cache_key(key))['dictionary_id']
+
+        assert cache.get_stats()['compression_dictionaries'] == 1
+        assert dictionary_id('https://av-wiki.net/10') == 0
+        assert dictionary_id('https://av-wiki.net/55') != 0
+        assert dictionary_id('search:SNIS-001') == 0
+        cache.close()
+
+        # 停用字典壓縮後仍可讀取以字典壓縮的條目
+        reopened = CacheManager(CacheConfig(cache_dir=str(tmp_path), enable_memory_cache=False))
+        try:
+            assert reopened.get('https://av-wiki.net/55') == _html_page('av-wiki.net', 55)
+        finally:
+            reopened.close()
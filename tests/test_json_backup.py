@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 資料庫增量備份
+
+此模組測試：
+1. 備份由內容定址的區塊重建，未變更的區塊不重複寫入
+2. 可還原任一時間點的備份（含舊格式完整備份檔）
+3. 保留策略一次清除過期與超量備份及不再被引用的區塊
+"""
+
+import gzip
+import json
+import shutil
+
+import pytest
+
+from src.models import json_codec
+from src.models.json_database import JSONDBManager
+from src.models.json_types import BackupError
+
+
+def _populate(db: JSONDBManager, count: int = 50) -> None:
+    with db.transaction():
+        db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+        db.add_or_update_actress({'id': 'actress_2', 'name': '佐藤愛'})
+        for i in range(count):
+            db.add_or_update_video({
+                'id': f'SNIS-{i:03d}',
+                'studio': 'S1',
+                'release_date': '2023-01-01',
+                'actresses': ['actress_1'] if i % 2 else ['actress_2', 'actress_1'],
+            })
+    db.data['links'] = [
+        {'video_id': f'SNIS-{i:03d}', 'actress_id': 'actress_1', 'role_type': '主演'}
+        for i in range(count)
+    ]
+    db.add_or_update_actress({'id': 'actress_3', 'name': '鈴木花'})
+
+
+def _objects(db: JSONDBManager):
+    return sorted(path for path in db.backups.object_dir.glob('*/*'))
+
+
+def _content(db: JSONDBManager):
+    return json.loads(json.dumps((
+        list(db.data['videos'].items()), db.data['actresses'], sorted(map(json.dumps, db.data['links']))
+    )))
+
+
+class TestIncrementalBackup:
+    """測試增量備份建立與還原"""
+
+    @pytest.mark.parametrize('storage_mode', ['snapshot', 'journal', 'sharded'])
+    def test_round_trip(self, tmp_path, storage_mode):
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode=storage_mode)
+        _populate(db)
+        expected = _content(db)
+
+        backup = db.create_backup()
+        db.delete_video('SNIS-001')
+        db.delete_actress('actress_3')
+
+        assert db.restore_from_backup(backup)
+        assert _content(db) == expected
+        assert _content(JSONDBManager(data_dir=str(tmp_path), storage_mode=storage_mode)) == expected
+
+    def test_unchanged_chunks_are_shared(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+
+        db.create_backup()
+        first_objects = _objects(db)
+        db.create_backup()
+        assert _objects(db) == first_objects
+
+        db.add_or_update_video({'id': 'SNIS-000', 'studio': 'MOODYZ'})
+        db.create_backup()
+        entries = db.backups.read_manifest()['backups']
+        changed = {name for name, digest in entries[2]['chunks'].items()
+                   if entries[1]['chunks'].get(name) != digest}
+
+        # 只有該影片所在的分桶、順序與統計區塊改變
+        assert changed <= {'order', 'statistics', f"videos-{db.backups._bucket('SNIS-000')}"}
+        assert 0 < entries[2]['stored_bytes'] < entries[0]['stored_bytes']
+        assert all(path.name.endswith('.json.gz') for path in _objects(db))
+
+    def test_point_in_time_restore(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        first = db.create_backup()
+        db.add_or_update_video({'id': 'NEW-001', 'studio': 'S1'})
+        second = db.create_backup()
+        db.delete_video('SNIS-010')
+
+        db.restore_from_backup(first)
+        assert 'NEW-001' not in db.data['videos']
+        db.restore_from_backup(second)
+        assert 'NEW-001' in db.data['videos']
+        assert 'SNIS-010' in db.data['videos']
+        assert db.get_backup_list() == [first, second]
+
+    def test_corrupted_chunk_is_detected(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        backup = db.create_backup()
+
+        victim = _objects(db)[0]
+        victim.write_bytes(gzip.compress(b'{}'))
+        with pytest.raises(BackupError):
+            db.restore_from_backup(backup)
+
+    def test_legacy_backup_file_is_restorable(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        legacy = db.backup_dir / 'backup_2020-01-01_00-00-00.json'
+        shutil.copy(db.data_file, legacy)
+        db.delete_video('SNIS-001')
+
+        assert str(legacy) in db.get_backup_list()
+        db.restore_from_backup(str(legacy))
+        assert 'SNIS-001' in db.data['videos']
+
+
+class TestBackupRetention:
+    """測試備份保留策略"""
+
+    def test_cleanup_removes_overflow_and_orphan_chunks(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        backups = []
+        for i in range(5):
+            db.add_or_update_video({'id': f'NEW-{i:03d}', 'studio': 'S1'})
+            backups.append(db.create_backup())
+
+        assert db.cleanup_old_backups(days=30, max_count=2) == 3
+        assert db.get_backup_list() == backups[-2:]
+
+        referenced = {digest for entry in db.backups.read_manifest()['backups']
+                      for digest in entry['chunks'].values()}
+        assert {path.name.split('.')[0] for path in _objects(db)} == referenced
+
+        db.restore_from_backup(backups[-2])
+        assert 'NEW-003' in db.data['videos'] and 'NEW-004' not in db.data['videos']
+
+    def test_cleanup_removes_expired_legacy_files(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db, count=5)
+        legacy = db.backup_dir / 'backup_2020-01-01_00-00-00.json'
+        shutil.copy(db.data_file, legacy)
+        recent = db.create_backup()
+
+        assert db.cleanup_old_backups(days=30, max_count=10) == 1
+        assert not legacy.exists()
+        assert db.get_backup_list() == [recent]
+
+
+class TestBackupDiff:
+    """測試備份比較與選擇性還原"""
+
+    @staticmethod
+    def _summary(changes):
+        return sorted((change.kind, str(change.key), change.change) for change in changes)
+
+    def test_diff_between_backups_reads_only_changed_buckets(self, tmp_path, monkeypatch):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        first = db.create_backup()
+        db.add_or_update_video({'id': 'SNIS-000', 'studio': 'MOODYZ'})
+        db.add_or_update_video({'id': 'NEW-001', 'studio': 'S1'})
+        db.delete_video('SNIS-001')
+        db.add_or_update_actress({'id': 'actress_4', 'name': '高橋'})
+        second = db.create_backup()
+
+        reads = []
+        original = db.backups._get_object
+        monkeypatch.setattr(db.backups, '_get_object', lambda digest: reads.append(digest) or original(digest))
+
+        changes = list(db.diff_backups(first, second))
+        assert self._summary(changes) == [
+            ('actresses', 'actress_4', 'added'),
+            ('links', "('SNIS-001', 'actress_1')", 'removed'),
+            ('videos', 'NEW-001', 'added'),
+            ('videos', 'SNIS-000', 'changed'),
+            ('videos', 'SNIS-001', 'removed'),
+        ]
+        changed = next(change for change in changes if change.change == 'changed')
+        assert (changed.old['studio'], changed.new['studio']) == ('S1', 'MOODYZ')
+
+        buckets = len(db.backups.read_manifest()['backups'][0]['chunks'])
+        assert len(reads) < buckets
+
+    def test_diff_against_live_data(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        backup = db.create_backup()
+        assert list(db.diff_backups(backup)) == []
+
+        db.delete_actress('actress_3')
+        assert self._summary(db.diff_backups(backup)) == [('actresses', 'actress_3', 'removed')]
+
+    def test_restore_selected_records(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        backup = db.create_backup()
+        db.add_or_update_video({'id': 'SNIS-000', 'studio': 'MOODYZ'})
+        db.add_or_update_video({'id': 'SNIS-002', 'studio': 'MOODYZ'})
+        db.add_or_update_video({'id': 'NEW-001', 'studio': 'S1'})
+
+        result = db.restore_records(backup, video_ids=['SNIS-000', 'NEW-001'])
+
+        assert result == {'restored': 1, 'deleted': 1}
+        assert db.get_video_info('SNIS-000')['studio'] == 'S1'
+        assert db.get_video_info('SNIS-002')['studio'] == 'MOODYZ'
+        assert db.get_video_info('NEW-001') is None
+        assert self._summary(db.diff_backups(backup)) == [('videos', 'SNIS-002', 'changed')]
+
+    def test_legacy_backup_file_can_be_compared(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db, count=5)
+        legacy = db.backup_dir / 'backup_2020-01-01_00-00-00.json'
+        shutil.copy(db.data_file, legacy)
+        db.delete_video('SNIS-004')
+
+        assert ('videos', 'SNIS-004', 'removed') in self._summary(db.diff_backups(str(legacy)))
+        with pytest.raises(BackupError):
+            list(db.diff_backups(str(db.backup_dir / 'missing')))
+
+    def test_legacy_backup_is_not_loaded_whole(self, tmp_path, monkeypatch):
+        """測試縮排格式的舊備份以位移索引逐筆比較，緊湊格式才整份載入"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db, count=5)
+        legacy = db.backup_dir / 'backup_2020-01-01_00-00-00.json'
+        shutil.copy(db.data_file, legacy)
+        compact = db.backup_dir / 'backup_2020-01-02_00-00-00.json'
+        compact.write_bytes(json_codec.dumps(json_codec.load_file(legacy)))
+        db.add_or_update_video({**db.get_video_info('SNIS-001'), 'studio': 'MOODYZ'})
+
+        loaded = []
+        original = json_codec.load_file
+        monkeypatch.setattr(json_codec, 'load_file', lambda path: loaded.append(path) or original(path))
+
+        assert self._summary(db.diff_backups(str(legacy))) == [('videos', 'SNIS-001', 'changed')]
+        assert loaded == []
+        assert self._summary(db.diff_backups(str(compact))) == [('videos', 'SNIS-001', 'changed')]
+        assert loaded == [compact]
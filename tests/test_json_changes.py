@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 資料庫變更通知
+
+此模組測試：
+1. 提交時寫入世代編號與變更 ID，訂閱者收到本地通知
+2. 其他程序（以另一個管理器模擬）的變更只重新讀取變更的記錄
+3. 沒有變更記錄或落後於輪替範圍時完整重新載入並送出 reset 通知
+4. 變更監看執行緒主動同步並通知
+"""
+
+import json
+import threading
+
+import pytest
+
+from src.models.json_changes import ChangeFeed
+from src.models.json_database import JSONDBManager
+
+
+def _open_pair(tmp_path, storage_mode='snapshot'):
+    """開啟同一目錄的兩個管理器（模擬兩個程序）"""
+    writer = JSONDBManager(data_dir=str(tmp_path), storage_mode=storage_mode)
+    writer.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+    with writer.transaction():
+        for i in range(10):
+            writer.add_or_update_video({'id': f'SNIS-{i:03d}', 'studio': 'S1', 'actresses': ['actress_1']})
+    reader = JSONDBManager(data_dir=str(tmp_path), storage_mode=storage_mode)
+    return writer, reader
+
+
+class TestLocalChanges:
+    """測試本地提交的變更通知"""
+
+    def test_commit_notifies_subscribers(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        events = []
+        unsubscribe = db.subscribe(events.append)
+
+        with db.transaction():
+            db.add_or_update_video({'id': 'SNIS-001', 'studio': 'S1'})
+            db.add_or_update_video({'id': 'SNIS-002', 'studio': 'S1'})
+            assert events == []
+        db.delete_video('SNIS-001')
+
+        assert [(e.source, e.videos, e.actresses) for e in events] == [
+            ('local', {'SNIS-001', 'SNIS-002'}, set()),
+            ('local', {'SNIS-001'}, set()),
+        ]
+        assert events[1].generation == events[0].generation + 1 == db.changes.generation
+
+        unsubscribe()
+        db.delete_video('SNIS-002')
+        assert len(events) == 2
+
+    def test_failing_callback_does_not_block_others(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        received = []
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        db.subscribe(broken)
+        db.subscribe(received.append)
+        db.add_or_update_video({'id': 'SNIS-001'})
+
+        assert len(received) == 1
+        assert db.get_video_info('SNIS-001') is not None
+
+
+class TestRemoteChanges:
+    """測試同步其他程序的變更"""
+
+    def test_only_changed_records_are_read(self, tmp_path, monkeypatch):
+        writer, reader = _open_pair(tmp_path)
+        events = []
+        reader.subscribe(events.append)
+        assert reader.poll_changes() == []
+
+        writer.add_or_update_video({'id': 'MIDE-001', 'studio': 'MOODYZ', 'actresses': ['actress_1']})
+        writer.add_or_update_video({**writer.get_video_info('SNIS-001'), 'studio': 'MOODYZ'})
+        writer.delete_video('SNIS-002')
+
+        def no_full_reload(*args, **kwargs):
+            raise AssertionError("不應完整重新載入")
+
+        monkeypatch.setattr(reader, '_parse_snapshot', no_full_reload)
+        synced = reader.poll_changes()
+
+        assert [e.videos for e in synced] == [{'MIDE-001'}, {'SNIS-001'}, {'SNIS-002'}]
+        assert all(e.source == 'remote' and not e.reset for e in synced) and events == synced
+        assert reader.get_video_info('SNIS-002') is None
+        assert reader.get_video_info('SNIS-001')['studio'] == 'MOODYZ'
+        assert reader.get_video_links('SNIS-002') == []
+        assert reader.get_all_videos({'studio': 'MOODYZ'}) == writer.get_all_videos({'studio': 'MOODYZ'})
+        assert reader.get_cached_statistics() == writer.get_cached_statistics()
+        assert reader.snapshot().get_video('MIDE-001') is not None
+
+        # 同步後寫入不需重新載入，且寫入結果對原寫入者可見
+        reader.add_or_update_video({'id': 'PGD-001', 'studio': 'PGD'})
+        monkeypatch.undo()
+        assert [e.videos for e in writer.poll_changes()] == [{'PGD-001'}]
+        assert writer.get_video_info('PGD-001') is not None
+
+    def test_journal_mode(self, tmp_path):
+        writer, reader = _open_pair(tmp_path, storage_mode='journal')
+
+        writer.add_or_update_actress({'id': 'actress_2', 'name': '三上悠亞'})
+        writer.delete_video('SNIS-003')
+        synced = reader.poll_changes()
+
+        assert [(e.videos, e.actresses) for e in synced] == [(set(), {'actress_2'}), ({'SNIS-003'}, set())]
+        assert reader.get_actress_info('actress_2')['name'] == '三上悠亞'
+        assert reader.get_video_info('SNIS-003') is None
+
+    def test_write_without_change_record_reloads(self, tmp_path):
+        writer, reader = _open_pair(tmp_path)
+        data_file = tmp_path / 'data.json'
+        content = json.loads(data_file.read_text(encoding='utf-8'))
+        content['videos'].pop('SNIS-004')
+        data_file.write_text(json.dumps(content, ensure_ascii=False, indent=2), encoding='utf-8')
+
+        synced = reader.poll_changes()
+
+        assert len(synced) == 1 and synced[0].reset
+        assert reader.get_video_info('SNIS-004') is None
+
+    def test_restore_is_reset(self, tmp_path):
+        writer, reader = _open_pair(tmp_path)
+        backup_path = writer.create_backup()
+        writer.delete_video('SNIS-005')
+        writer.restore_from_backup(backup_path)
+
+        synced = reader.poll_changes()
+
+        assert synced[-1].reset
+        assert reader.get_video_info('SNIS-005') is not None
+
+    def test_lagging_reader_after_rotation(self, tmp_path):
+        writer, reader = _open_pair(tmp_path)
+        writer.changes.max_entries = 4
+        for i in range(10):
+            writer.add_or_update_video({'id': f'MIDE-{i:03d}'})
+
+        synced = reader.poll_changes()
+
+        assert len(synced) == 1 and synced[0].reset
+        assert synced[0].generation == writer.changes.generation
+        assert len(reader.get_all_videos()) == 20
+
+        writer.delete_video('MIDE-000')
+        assert [e.videos for e in reader.poll_changes()] == [{'MIDE-000'}]
+
+    def test_watcher_delivers_remote_changes(self, tmp_path):
+        writer, reader = _open_pair(tmp_path)
+        received = threading.Event()
+        reader.subscribe(lambda event: received.set())
+        reader.start_change_watcher(interval=0.01)
+        try:
+            writer.add_or_update_video({'id': 'MIDE-001'})
+            assert received.wait(timeout=5)
+            assert reader.get_video_info('MIDE-001') is not None
+        finally:
+            reader.stop_change_watcher(timeout=5)
+
+
+class TestChangeFeed:
+    """測試變更記錄檔"""
+
+    def test_torn_tail_is_ignored_and_truncated(self, tmp_path):
+        writer = ChangeFeed(tmp_path / 'changes.log')
+        reader = ChangeFeed(tmp_path / 'changes.log')
+        writer.append(videos=['SNIS-001'])
+        with open(writer.path, 'ab') as f:
+            f.write(b'{"gen": 2, "video_')
+
+        assert [e['video_ids'] for e in reader.read_new()] == [['SNIS-001']]
+        assert reader.read_new() == []
+
+        writer.append(actresses=['actress_1'])
+        assert [e['gen'] for e in reader.read_new()] == [2]
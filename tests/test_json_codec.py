@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 序列化後端
+
+此模組測試 json_codec：
+1. 所有可用後端輸出相同的位元組
+2. 解碼錯誤一律為 json.JSONDecodeError
+3. 快速後端不支援的型別改用標準函式庫
+"""
+
+import json
+import pytest
+
+from src.models import json_codec
+
+
+SAMPLE = {
+    'videos': {'SNIS-001': {'id': 'SNIS-001', 'title': '測試影片', 'actresses': ['actress_1']}},
+    'links': [],
+    'empty': {},
+    'numbers': [0, -1, 1.5, True, None],
+}
+
+
+@pytest.fixture(params=json_codec.available_backends())
+def backend(request):
+    """切換至各可用後端"""
+    original = json_codec.get_backend()
+    json_codec.set_backend(request.param)
+    yield request.param
+    json_codec.set_backend(original)
+
+
+class TestJsonCodec:
+    """測試序列化後端"""
+
+    @pytest.mark.parametrize('indent', [False, True])
+    def test_output_matches_stdlib(self, backend, indent):
+        """測試輸出與標準函式庫格式相同"""
+        if indent:
+            expected = json.dumps(SAMPLE, ensure_ascii=False, indent=2)
+        else:
+            expected = json.dumps(SAMPLE, ensure_ascii=False, separators=(',', ':'))
+
+        assert json_codec.dumps(SAMPLE, indent=indent) == expected.encode('utf-8')
+        assert json_codec.loads(json_codec.dumps(SAMPLE, indent=indent)) == SAMPLE
+
+    def test_decode_error_type(self, backend):
+        """測試解碼錯誤型別一致"""
+        with pytest.raises(json.JSONDecodeError):
+            json_codec.loads(b'{"videos": ')
+
+    def test_falls_back_for_unsupported_values(self, backend):
+        """測試超出 64 位元的整數改用標準函式庫"""
+        assert json_codec.loads(json_codec.dumps({'big': 2 ** 70})) == {'big': 2 ** 70}
+
+    def test_file_round_trip(self, backend, tmp_path):
+        """測試檔案讀寫"""
+        path = tmp_path / 'cache.json'
+        json_codec.dump_file(SAMPLE, path)
+
+        assert json_codec.load_file(path) == SAMPLE
+        assert path.read_text(encoding='utf-8') == json.dumps(SAMPLE, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 資料庫欄式統計
+
+此模組測試：
+1. NumPy 與純 Python 計算結果相同
+2. 結果與增量統計累加器一致（含空值、UNKNOWN 與懸空關聯等邊界資料）
+3. JSONDBManager 於 CRUD 後重新建立欄位
+"""
+
+import random
+
+import pytest
+
+from conftest import without_computed_at
+from src.models.json_columnar import ColumnarStatistics, NUMPY_AVAILABLE
+from src.models.json_database import JSONDBManager
+from src.models.json_statistics import IncrementalStatistics
+
+USE_NUMPY = [False, pytest.param(True, marks=pytest.mark.skipif(not NUMPY_AVAILABLE, reason="未安裝 NumPy"))]
+
+
+def _random_data(seed: int, video_count: int = 200) -> dict:
+    """建立含空片商、UNKNOWN、缺少時間戳與重複名稱的資料"""
+    rng = random.Random(seed)
+    data = {'videos': {}, 'actresses': {}, 'links': []}
+    for i in range(30):
+        data['actresses'][f'actress_{i}'] = {'id': f'actress_{i}', 'name': rng.choice([f'女優{i}', '同名', ''])}
+    for i in range(video_count):
+        studio, code = rng.choice([('S1', 'SNIS'), ('MOODYZ', 'MIDE'), ('MOODYZ', ''),
+                                   ('UNKNOWN', ''), ('', ''), (None, None)])
+        data['videos'][f'V-{i:04d}'] = {'id': f'V-{i:04d}', 'studio': studio, 'studio_code': code}
+    for _ in range(video_count * 3):
+        data['links'].append({
+            'video_id': f'V-{rng.randrange(video_count):04d}',
+            'actress_id': f'actress_{rng.randrange(30)}',
+            'role_type': rng.choice(['主演', '共演']),
+            'timestamp': rng.choice(['', '2024-01-05T00:00:00Z', '2023-06-01T00:00:00Z', '2024-11-30T00:00:00Z']),
+        })
+    return data
+
+
+def _normalized(statistics):
+    """交叉統計的同分順序與影片代碼順序依計算方式而異，比較時排序"""
+    statistics = without_computed_at(statistics)
+    statistics['enhanced_actress_studio_statistics'] = sorted(
+        (dict(row, video_codes=sorted(row['video_codes'])) for row in statistics['enhanced_actress_studio_statistics']),
+        key=lambda row: sorted(map(str, row.items()))
+    )
+    return statistics
+
+
+class TestColumnarStatistics:
+    """測試欄式統計結果"""
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_numpy_and_python_agree(self, seed):
+        if not NUMPY_AVAILABLE:
+            pytest.skip("未安裝 NumPy")
+        data = _random_data(seed)
+        vectorized = ColumnarStatistics(data, use_numpy=True)
+        looped = ColumnarStatistics(data, use_numpy=False)
+
+        assert vectorized.materialize('') == looped.materialize('')
+        assert vectorized.enhanced_statistics('同名') == looped.enhanced_statistics('同名')
+
+    @pytest.mark.parametrize('use_numpy', USE_NUMPY)
+    def test_matches_incremental_statistics(self, use_numpy):
+        data = _random_data(7)
+        expected = IncrementalStatistics(data).materialize(data, '')
+        assert _normalized(ColumnarStatistics(data, use_numpy=use_numpy).materialize('')) == _normalized(expected)
+
+    @pytest.mark.parametrize('use_numpy', USE_NUMPY)
+    def test_dangling_links_and_missing_timestamps(self, use_numpy):
+        data = {
+            'videos': {'SNIS-001': {'id': 'SNIS-001', 'studio': 'S1', 'studio_code': 'SNIS'}},
+            'actresses': {'actress_1': {'id': 'actress_1', 'name': '山田美優'}},
+            'links': [
+                {'video_id': 'SNIS-001', 'actress_id': 'actress_1', 'role_type': '主演', 'timestamp': ''},
+                {'video_id': 'MISSING-001', 'actress_id': 'actress_1', 'role_type': '主演'},
+                {'video_id': 'SNIS-001', 'actress_id': 'actress_9'},
+                {'video_id': '', 'actress_id': 'actress_1'},
+            ],
+        }
+        columns = ColumnarStatistics(data, use_numpy=use_numpy)
+
+        # 懸空關聯計入出演部數，但不提供片商
+        assert columns.actress_statistics() == [
+            {'actress_name': '山田美優', 'video_count': 2, 'studios': ['S1'], 'studio_codes': ['SNIS']}
+        ]
+        assert columns.studio_statistics() == [
+            {'studio': 'S1', 'studio_code': 'SNIS', 'video_count': 1, 'actress_count': 2}
+        ]
+        enhanced = columns.enhanced_statistics()
+        assert [(row['actress_name'], row['association_type'], row['first_appearance']) for row in enhanced] == [
+            ('', 'primary', ''), ('山田美優', '主演', ''),
+        ]
+        assert columns.enhanced_statistics('不存在') == []
+
+
+class TestManagerColumns:
+    """測試 JSONDBManager 使用欄式統計"""
+
+    def test_columns_rebuilt_after_changes(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+        db.add_or_update_video({'id': 'SNIS-001', 'studio': 'S1', 'studio_code': 'SNIS', 'actresses': ['actress_1']})
+        db.data['links'] = [{'video_id': 'SNIS-001', 'actress_id': 'actress_1', 'role_type': '主演'}]
+        assert db.get_studio_statistics()[0]['actress_count'] == 1
+        columns = db._get_columns()
+        assert db._get_columns() is columns
+
+        db.add_or_update_video({'id': 'SNIS-001', 'studio': 'MOODYZ', 'studio_code': 'MIDE', 'actresses': ['actress_1']})
+        assert db._get_columns() is not columns
+        assert [row['studio'] for row in db.get_studio_statistics()] == ['MOODYZ']
+        assert db.get_actress_statistics()[0]['studios'] == ['MOODYZ']
+
+        expected = db._get_statistics_engine().materialize(db.data, '')
+        assert _normalized(db._compute_statistics()) == _normalized(expected)
@@ -0,0 +1,524 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 資料庫寫入路徑
+
+此模組測試 JSONDBManager 的寫入相關功能：
+1. transaction() / bulk_upsert_videos() 批次交易
+2. 增量統計與完整重新計算結果一致
+3. 檔案未變更時略過寫入前的重新載入
+4. 次要索引與資料同步
+5. 完整與增量完整性驗證
+6. 快照寫入格式與資料雜湊
+7. 分片模式只重寫變更的分片與單一檔案遷移
+"""
+
+import copy
+import hashlib
+import json
+import random
+import pytest
+
+from src.models import json_codec
+from src.models.json_database import JSONDBManager
+from src.models.json_indexes import SecondaryIndexes
+from src.models.json_shards import ShardedStore
+from src.models.json_types import DataIntegrityError, STORAGE_MODES
+
+
+@pytest.fixture(params=[STORAGE_MODES["SNAPSHOT"], STORAGE_MODES["JOURNAL"], STORAGE_MODES["SHARDED"]])
+def db_manager(request, tmp_path):
+    """建立臨時測試資料庫（所有儲存模式）"""
+    db = JSONDBManager(data_dir=str(tmp_path), storage_mode=request.param)
+    db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+    db.add_or_update_actress({'id': 'actress_2', 'name': '佐藤愛'})
+    return db
+
+
+def _reopen(db):
+    return JSONDBManager(data_dir=str(db.data_dir), storage_mode=db.storage_mode)
+
+
+class TestTransaction:
+    """測試批次交易"""
+
+    def test_transaction_persists_once(self, db_manager, monkeypatch):
+        """測試交易內多次寫入只保存一次"""
+        persisted = []
+        original = db_manager._persist_operations
+        monkeypatch.setattr(
+            db_manager, '_persist_operations',
+            lambda ops: (persisted.append(len(ops)), original(ops))
+        )
+
+        with db_manager.transaction():
+            for i in range(5):
+                db_manager.add_or_update_video({'id': f'video_{i}', 'actresses': ['actress_1']})
+
+        assert persisted == [5]
+        assert len(_reopen(db_manager).data['videos']) == 5
+
+    def test_transaction_rolls_back_on_error(self, db_manager):
+        """測試交易失敗時全部還原"""
+        with pytest.raises(RuntimeError):
+            with db_manager.transaction():
+                db_manager.add_or_update_video({'id': 'video_1', 'actresses': ['actress_1']})
+                db_manager.delete_actress('actress_2')
+                raise RuntimeError("中斷")
+
+        assert 'video_1' not in db_manager.data['videos']
+        assert 'actress_2' in db_manager.data['actresses']
+        assert 'video_1' not in _reopen(db_manager).data['videos']
+
+    def test_transaction_validates_at_commit(self, db_manager):
+        """測試交易在提交時驗證完整性"""
+        with pytest.raises(DataIntegrityError):
+            with db_manager.transaction():
+                db_manager.add_or_update_video({'id': 'video_1', 'actresses': ['actress_1']})
+                db_manager.add_or_update_video({'id': 'video_2', 'actresses': ['missing']})
+
+        assert db_manager.data['videos'] == {}
+
+    def test_reads_inside_transaction(self, db_manager):
+        """測試交易內可讀取未提交的變更"""
+        with db_manager.transaction():
+            db_manager.add_or_update_video({'id': 'video_1', 'actresses': ['actress_1']})
+            assert db_manager.get_video_info('video_1') is not None
+            assert db_manager.get_actress_info('actress_1')['name'] == '山田美優'
+
+    def test_bulk_upsert_videos(self, db_manager):
+        """測試批次寫入影片"""
+        count = db_manager.bulk_upsert_videos(
+            {'id': f'video_{i}', 'studio': 'S1', 'actresses': ['actress_2']} for i in range(10)
+        )
+
+        assert count == 10
+        reopened = _reopen(db_manager)
+        assert len(reopened.data['videos']) == 10
+        assert reopened.get_cached_statistics()['total_videos'] == 10
+
+
+def _normalize_statistics(statistics):
+    """將統計轉為與排序無關的形式以便比較"""
+    def rows(key, fields):
+        return sorted(
+            tuple(sorted(row[f]) if isinstance(row[f], list) else row[f] for f in fields)
+            for row in statistics[key]
+        )
+
+    return {
+        'actress': rows('actress_statistics', ['actress_name', 'video_count', 'studios', 'studio_codes']),
+        'studio': rows('studio_statistics', ['studio', 'studio_code', 'video_count', 'actress_count']),
+        'enhanced': rows('enhanced_actress_studio_statistics', [
+            'actress_name', 'studio', 'studio_code', 'association_type', 'video_count',
+            'video_codes', 'first_appearance', 'latest_appearance',
+        ]),
+        'totals': (statistics['total_videos'], statistics['total_actresses'], statistics['total_studios']),
+    }
+
+
+class TestIncrementalStatistics:
+    """測試增量統計維護"""
+
+    def test_incremental_matches_full_recompute(self, db_manager):
+        """測試隨機變更後增量統計與完整計算一致"""
+        rng = random.Random(42)
+        studios = [('S1', 'SNIS'), ('PREMIUM', 'PGD'), ('UNKNOWN', ''), ('', '')]
+
+        for i in range(3, 8):
+            db_manager.add_or_update_actress({'id': f'actress_{i}', 'name': f'女優{i}'})
+        for i in range(30):
+            studio, code = rng.choice(studios)
+            db_manager.add_or_update_video({'id': f'video_{i}', 'studio': studio, 'studio_code': code})
+
+        # 直接修改關聯後保存（與既有測試相同的使用方式）
+        db_manager.data['links'] = [
+            {
+                'video_id': f'video_{i}',
+                'actress_id': f'actress_{rng.randint(1, 7)}',
+                'role_type': rng.choice(['主演', '配角']),
+                'timestamp': f'2023-0{rng.randint(1, 9)}-01T00:00:00Z',
+            }
+            for i in range(30) for _ in range(rng.randint(0, 2))
+        ]
+        db_manager._save_all_data(db_manager.data)
+
+        for _ in range(40):
+            action = rng.random()
+            video_id = f'video_{rng.randint(0, 34)}'
+            if action < 0.5:
+                studio, code = rng.choice(studios)
+                db_manager.add_or_update_video({'id': video_id, 'studio': studio, 'studio_code': code})
+            elif action < 0.8:
+                db_manager.delete_video(video_id)
+            elif action < 0.9:
+                db_manager.add_or_update_actress({'id': f'actress_{rng.randint(1, 7)}', 'name': f'改名{rng.randint(0, 9)}'})
+            else:
+                db_manager.delete_actress(f'actress_{rng.randint(3, 7)}')
+
+        incremental = db_manager.get_cached_statistics()
+        full = db_manager._compute_statistics()
+
+        assert _normalize_statistics(incremental) == _normalize_statistics(full)
+
+
+class TestReloadOnWrite:
+    """測試寫入前的重新載入"""
+
+    def test_skips_reload_when_file_unchanged(self, db_manager, monkeypatch):
+        """測試檔案未變更時不重新解析"""
+        parsed = []
+        original_loads = json_codec.loads
+
+        def counting_loads(content):
+            if 'schema_version' in str(content):
+                parsed.append(1)
+            return original_loads(content)
+
+        monkeypatch.setattr(json_codec, 'loads', counting_loads)
+
+        db_manager.add_or_update_video({'id': 'video_1', 'actresses': ['actress_1']})
+        db_manager.add_or_update_video({'id': 'video_2', 'actresses': ['actress_2']})
+
+        assert parsed == []
+
+    def test_reloads_after_external_write(self, db_manager):
+        """測試其他實例修改檔案後會重新載入"""
+        other = _reopen(db_manager)
+        other.add_or_update_video({'id': 'video_other', 'actresses': ['actress_1']})
+
+        db_manager.add_or_update_video({'id': 'video_1', 'actresses': ['actress_2']})
+
+        assert 'video_other' in db_manager.data['videos']
+        reopened = _reopen(db_manager)
+        assert {'video_other', 'video_1'} <= set(reopened.data['videos'])
+
+
+class TestSecondaryIndexes:
+    """測試次要索引"""
+
+    def _seed(self, db_manager):
+        for i in range(6):
+            db_manager.add_or_update_video({
+                'id': f'video_{i}',
+                'studio': 'S1' if i % 2 else 'PREMIUM',
+                'release_date': f'2023-0{i + 1}-01',
+            })
+        db_manager.data['links'] = [
+            {'video_id': f'video_{i}', 'actress_id': f'actress_{i % 2 + 1}', 'role_type': '主演'}
+            for i in range(6)
+        ] + [{'video_id': 'video_0', 'actress_id': 'actress_2', 'role_type': '配角'}]
+        db_manager._save_all_data(db_manager.data)
+
+    def _assert_in_sync(self, db_manager):
+        expected = SecondaryIndexes(db_manager.data)
+        indexes = db_manager._get_indexes()
+        assert indexes.video_links == expected.video_links
+        assert indexes.actress_links == expected.actress_links
+        assert {k: list(v) for k, v in indexes.studio_videos.items()} == \
+            {k: list(v) for k, v in expected.studio_videos.items()}
+        assert indexes.actress_names == expected.actress_names
+        assert indexes.video_ids_by_release_date() == expected.video_ids_by_release_date()
+
+    def test_delete_removes_only_related_links(self, db_manager):
+        """測試刪除只移除相關關聯並保持索引同步"""
+        self._seed(db_manager)
+
+        db_manager.delete_video('video_0')
+        db_manager.delete_actress('actress_1')
+
+        remaining = {(l['video_id'], l['actress_id']) for l in db_manager.data['links']}
+        assert remaining == {('video_1', 'actress_2'), ('video_3', 'actress_2'), ('video_5', 'actress_2')}
+        assert [l['video_id'] for l in db_manager.get_actress_links('actress_2')] == \
+            [l['video_id'] for l in db_manager.data['links'] if l['actress_id'] == 'actress_2']
+        assert db_manager.get_video_links('video_0') == []
+        self._assert_in_sync(db_manager)
+
+    def test_delete_preserves_link_order(self, db_manager):
+        """測試刪除後其餘關聯保持原本順序（與重新載入/WAL 重播結果相同）"""
+        self._seed(db_manager)
+        expected = [l for l in db_manager.data['links'] if l['video_id'] != 'video_1']
+
+        db_manager.delete_video('video_1')
+
+        assert db_manager.data['links'] == expected
+        if db_manager.storage_mode != STORAGE_MODES["SHARDED"]:
+            # 分片模式載入時依分片重新排列關聯
+            assert _reopen(db_manager).data['links'] == expected
+        self._assert_in_sync(db_manager)
+
+    def test_bulk_upsert_keeps_sorted_indexes(self, db_manager):
+        """測試大量新增後排序索引與完整重建一致"""
+        rng = random.Random(7)
+        db_manager.bulk_upsert_videos([
+            {'id': f'bulk_{i}', 'release_date': f'20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-01'}
+            for i in range(200)
+        ])
+        db_manager.delete_video('bulk_5')
+
+        dates = [db_manager.data['videos'][video_id].get('release_date') or ''
+                 for video_id in db_manager._get_indexes().video_ids_by_release_date()]
+        assert dates == sorted(dates) and len(dates) == 199
+        self._assert_in_sync(db_manager)
+
+    def test_filters_match_full_scan(self, db_manager):
+        """測試索引查詢結果與完整掃描一致"""
+        self._seed(db_manager)
+        db_manager.add_or_update_video({'id': 'video_2', 'studio': 'S1', 'release_date': '2024-01-01'})
+        all_videos = list(db_manager.data['videos'].values())
+
+        for filter_dict in [
+            {'studio': 'S1'},
+            {'studio': 'S1', 'release_date_before': '2023-12-31'},
+            {'release_date_after': '2023-03-01'},
+            {'release_date_after': '2023-02-01', 'release_date_before': '2023-05-01'},
+        ]:
+            expected = JSONDBManager._apply_video_filters(all_videos, filter_dict)
+            actual = db_manager.get_all_videos(filter_dict)
+            assert sorted(v['id'] for v in actual) == sorted(v['id'] for v in expected)
+
+        dates = [v['release_date'] for v in db_manager.get_all_videos({'release_date_after': '2023-01-01'})]
+        assert dates == sorted(dates)
+
+    def test_find_actress_by_name(self, db_manager):
+        """測試依名稱查詢女優"""
+        assert db_manager.find_actress_by_name('佐藤愛')['id'] == 'actress_2'
+
+        db_manager.add_or_update_actress({'id': 'actress_2', 'name': '佐藤愛子'})
+
+        assert db_manager.find_actress_by_name('佐藤愛') is None
+        assert db_manager.find_actress_by_name('佐藤愛子')['id'] == 'actress_2'
+
+    def test_index_follows_external_write(self, db_manager):
+        """測試其他實例寫入後索引同步"""
+        self._seed(db_manager)
+        other = _reopen(db_manager)
+        other.delete_video('video_1')
+        other.add_or_update_video({'id': 'video_9', 'studio': 'S1', 'release_date': '2022-01-01'})
+
+        db_manager.add_or_update_actress({'id': 'actress_3', 'name': '新人'})
+
+        assert [v['id'] for v in db_manager.get_all_videos({'studio': 'S1'})] == ['video_3', 'video_5', 'video_9']
+        self._assert_in_sync(db_manager)
+
+
+class TestIntegrityValidation:
+    """測試完整與增量完整性驗證"""
+
+    def _full_error(self, db_manager, operations):
+        data = copy.deepcopy(db_manager.data)
+        for operation in operations:
+            JSONDBManager._apply_operation(data, operation)
+        try:
+            db_manager._validate_referential_integrity(data)
+        except DataIntegrityError as e:
+            return str(e)
+        return None
+
+    def _incremental_error(self, db_manager, operations):
+        try:
+            with db_manager.transaction():
+                for operation in operations:
+                    db_manager._commit_operations([operation])
+        except DataIntegrityError as e:
+            return str(e)
+        return None
+
+    def test_modes_report_identical_errors(self, db_manager):
+        """測試隨機變更下兩種模式的錯誤回報一致"""
+        rng = random.Random(7)
+        actress_ids = ['actress_1', 'actress_2', 'actress_3']
+        db_manager.add_or_update_actress({'id': 'actress_3', 'name': '女優3'})
+        for i in range(6):
+            db_manager.add_or_update_video({'id': f'video_{i}', 'actresses': rng.sample(actress_ids, 2)})
+        db_manager.data['links'] = [
+            {'video_id': f'video_{i}', 'actress_id': rng.choice(actress_ids)} for i in range(6)
+        ]
+        db_manager._save_all_data(db_manager.data)
+
+        failures = 0
+        for _ in range(30):
+            operations = []
+            for _ in range(rng.randint(1, 3)):
+                action = rng.random()
+                if action < 0.4:
+                    operations.append({'op': 'put_video', 'record': {
+                        'id': f'video_{rng.randint(0, 8)}',
+                        'actresses': rng.sample(actress_ids + ['missing'], 2),
+                    }})
+                elif action < 0.6:
+                    operations.append({'op': 'delete_video', 'id': f'video_{rng.randint(0, 8)}'})
+                elif action < 0.8:
+                    operations.append({'op': 'delete_actress', 'id': rng.choice(actress_ids)})
+                else:
+                    actress_id = rng.choice(actress_ids + ['missing'])
+                    operations.append({'op': 'put_actress', 'record': {'id': actress_id, 'name': actress_id}})
+
+            expected = self._full_error(db_manager, operations)
+            assert self._incremental_error(db_manager, operations) == expected
+            failures += expected is not None
+
+        assert failures > 0
+
+    def test_trusted_snapshot_skips_full_validation(self, db_manager, monkeypatch):
+        """測試 data_hash 相符的快照載入時略過完整驗證"""
+        db_manager.add_or_update_video({'id': 'video_1', 'actresses': ['actress_1']})
+        db_manager.compact_journal()
+        calls = []
+        original = JSONDBManager._validate_referential_integrity
+        monkeypatch.setattr(
+            JSONDBManager, '_validate_referential_integrity',
+            lambda self, data: (calls.append(1), original(self, data))
+        )
+
+        _reopen(db_manager)
+
+        assert calls == []
+
+    def test_tampered_snapshot_is_validated(self, db_manager):
+        """測試內容與 data_hash 不符時執行完整驗證"""
+        if db_manager.storage_mode == STORAGE_MODES["SHARDED"]:
+            pytest.skip("分片模式沒有單一快照檔")
+        db_manager.add_or_update_video({'id': 'video_1', 'actresses': ['actress_1']})
+        db_manager.compact_journal()
+        with open(db_manager.data_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data['videos']['video_1']['actresses'] = ['missing']
+        with open(db_manager.data_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+        with pytest.raises(Exception, match='missing'):
+            _reopen(db_manager)
+
+
+class TestSnapshotFormat:
+    """測試快照寫入格式與資料雜湊"""
+
+    @pytest.mark.parametrize('compact_json', [False, True])
+    def test_hash_covers_written_bytes(self, tmp_path, compact_json):
+        """測試雜湊涵蓋 data_hash 欄位之前的位元組"""
+        db = JSONDBManager(data_dir=str(tmp_path), compact_json=compact_json)
+        db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+        db.add_or_update_video({'id': 'video_1', 'title': '測試', 'actresses': ['actress_1']})
+
+        raw = db.data_file.read_bytes()
+        prefix, _, _ = raw.rpartition(b'"data_hash"')
+        prefix = prefix.rstrip()[:-1]  # 去除欄位前的逗號
+
+        assert hashlib.sha256(prefix).hexdigest() == db.data['data_hash']
+        assert json.loads(raw)['data_hash'] == db.data['data_hash']
+        assert (b'\n' in raw) != compact_json
+        assert db._is_trusted_snapshot(raw)
+        assert _reopen(db).get_video_info('video_1')['title'] == '測試'
+
+    def test_single_serialization_per_save(self, db_manager, monkeypatch):
+        """測試保存時不再為計算雜湊額外序列化"""
+        if db_manager.storage_mode == STORAGE_MODES["SHARDED"]:
+            pytest.skip("分片模式沒有單一快照檔")
+        calls = []
+
+        def counting(original):
+            def wrapper(obj, *args, **kwargs):
+                if isinstance(obj, dict) and 'videos' in obj:
+                    calls.append(1)
+                return original(obj, *args, **kwargs)
+            return wrapper
+
+        monkeypatch.setattr(json, 'dumps', counting(json.dumps))
+        monkeypatch.setattr(json_codec, 'dumps', counting(json_codec.dumps))
+
+        db_manager._save_all_data(db_manager.data)
+
+        assert len(calls) == (1 if json_codec.is_native() else 0)
+
+
+class TestShardedStorage:
+    """測試分片儲存模式"""
+
+    @pytest.fixture
+    def sharded_db(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode=STORAGE_MODES["SHARDED"], shard_count=4)
+        db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+        db.add_or_update_actress({'id': 'actress_2', 'name': '佐藤愛'})
+        with db.transaction():
+            for i in range(12):
+                db.add_or_update_video({
+                    'id': f'video_{i}', 'studio': 'S1', 'actresses': ['actress_1', 'actress_2'],
+                })
+        db.data['links'] = [
+            {'video_id': f'video_{i}', 'actress_id': f'actress_{i % 2 + 1}'} for i in range(12)
+        ]
+        db._save_all_data(db.data)
+        return db
+
+    def _shard_files(self, db):
+        return {name: entry['file'] for name, entry in db.shards.read_manifest()['shards'].items()}
+
+    def test_only_dirty_shard_is_rewritten(self, sharded_db):
+        """測試單筆寫入只重寫該影片所在的分片"""
+        before = self._shard_files(sharded_db)
+
+        sharded_db.add_or_update_video({'id': 'video_3', 'title': '更新', 'actresses': ['actress_1']})
+
+        after = self._shard_files(sharded_db)
+        changed = {name for name in after if after[name] != before[name]}
+        assert changed == {sharded_db.shards.shard_for_video('video_3')}
+        assert sorted(p.name for p in sharded_db.shards.shard_dir.glob('*.json')) == \
+            sorted(list(after.values()) + ['manifest.json'])
+
+    def test_reopen_preserves_data_and_order(self, sharded_db):
+        """測試重新開啟後資料、影片順序與統計一致"""
+        sharded_db.delete_video('video_4')
+        sharded_db.add_or_update_video({'id': 'video_new', 'actresses': ['actress_2']})
+        sharded_db.add_or_update_video({'id': 'video_0', 'title': '更新', 'actresses': ['actress_1']})
+
+        reopened = _reopen(sharded_db)
+
+        assert list(reopened.data['videos']) == list(sharded_db.data['videos'])
+        assert reopened.data['videos'] == sharded_db.data['videos']
+        assert reopened.data['actresses'] == sharded_db.data['actresses']
+        assert sorted(map(str, reopened.data['links'])) == sorted(map(str, sharded_db.data['links']))
+        assert _normalize_statistics(reopened.get_cached_statistics()) == \
+            _normalize_statistics(sharded_db._compute_statistics())
+
+    def test_delete_actress_rewrites_link_shards(self, sharded_db):
+        """測試刪除女優時一併重寫其關聯所在的影片分片"""
+        with sharded_db.transaction():
+            for i in range(12):
+                sharded_db.add_or_update_video({'id': f'video_{i}', 'actresses': ['actress_1']})
+            sharded_db.delete_actress('actress_2')
+
+        reopened = _reopen(sharded_db)
+
+        assert all(link['actress_id'] == 'actress_1' for link in reopened.data['links'])
+        assert len(reopened.data['links']) == 6
+
+    def test_tampered_shard_is_validated(self, sharded_db):
+        """測試分片內容與 manifest 雜湊不符時執行完整驗證"""
+        name = sharded_db.shards.shard_for_video('video_1')
+        path = sharded_db.shards.shard_dir / self._shard_files(sharded_db)[name]
+        shard = json.loads(path.read_bytes())
+        shard['videos']['video_1']['actresses'] = ['missing']
+        path.write_text(json.dumps(shard, ensure_ascii=False), encoding='utf-8')
+
+        with pytest.raises(Exception, match='missing'):
+            _reopen(sharded_db)
+
+    def test_migrates_single_file_database(self, tmp_path):
+        """測試以分片模式開啟既有 data.json 時自動遷移"""
+        source = JSONDBManager(data_dir=str(tmp_path), storage_mode=STORAGE_MODES["JOURNAL"])
+        source.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+        for i in range(5):
+            source.add_or_update_video({'id': f'video_{i}', 'actresses': ['actress_1']})
+
+        sharded = JSONDBManager(data_dir=str(tmp_path), storage_mode=STORAGE_MODES["SHARDED"])
+
+        assert sharded.shards.exists()
+        assert source.data_file.exists()
+        assert list(sharded.data['videos']) == list(source.data['videos'])
+        assert sharded.data['actresses'] == source.data['actresses']
+        assert set(sharded.shards.read_manifest()['shards']) == set(ShardedStore(
+            sharded.shards.shard_dir).shard_names())
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 資料庫日誌模式 (WAL)
+
+此模組測試 JSONDBManager 的 journal 儲存模式：
+1. 變更只附加到 data.wal，不重寫 data.json
+2. 重新開啟時重放日誌（崩潰復原）
+3. 殘缺尾端記錄會被忽略
+4. 達到門檻時壓縮為快照
+"""
+
+import json
+import pytest
+
+from src.models.json_database import JSONDBManager
+from src.models.json_types import STORAGE_MODES, JOURNAL_FILE_NAME
+
+
+JOURNAL = STORAGE_MODES["JOURNAL"]
+
+
+class TestJournalMode:
+    """測試日誌儲存模式"""
+
+    def _seed(self, db):
+        db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+        db.add_or_update_video({
+            'id': 'video_1',
+            'title': 'Test Video 1',
+            'studio': 'S1',
+            'release_date': '2023-01-15',
+            'actresses': ['actress_1'],
+        })
+
+    def test_writes_do_not_rewrite_snapshot(self, tmp_path):
+        """測試變更不會重寫 data.json"""
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode=JOURNAL)
+        snapshot = tmp_path / "data.json"
+        before = snapshot.read_bytes()
+
+        self._seed(db)
+
+        assert snapshot.read_bytes() == before
+        assert db.journal.record_count == 2
+        assert db.get_video_info('video_1')['studio'] == 'S1'
+
+    def test_reopen_replays_journal(self, tmp_path):
+        """測試重新開啟時重放日誌"""
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode=JOURNAL)
+        self._seed(db)
+        db.delete_video('video_1')
+        db.add_or_update_video({'id': 'video_2', 'title': 'Test Video 2', 'actresses': []})
+
+        reopened = JSONDBManager(data_dir=str(tmp_path), storage_mode=JOURNAL)
+
+        assert 'video_1' not in reopened.data['videos']
+        assert reopened.get_video_info('video_2')['title'] == 'Test Video 2'
+        assert reopened.get_actress_info('actress_1')['name'] == '山田美優'
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        """測試殘缺的尾端記錄會被忽略"""
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode=JOURNAL)
+        self._seed(db)
+
+        wal_path = tmp_path / JOURNAL_FILE_NAME
+        with open(wal_path, 'ab') as f:
+            f.write(b'{"seq":3,"ops":[{"op":"delete_vi')
+
+        reopened = JSONDBManager(data_dir=str(tmp_path), storage_mode=JOURNAL)
+
+        assert 'video_1' in reopened.data['videos']
+        assert wal_path.read_bytes().endswith(b"\n")
+
+    def test_compaction_at_threshold(self, tmp_path):
+        """測試達到門檻時壓縮為快照"""
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode=JOURNAL, journal_compact_threshold=3)
+        self._seed(db)
+        db.add_or_update_actress({'id': 'actress_2', 'name': '佐藤愛'})
+
+        assert db.journal.record_count == 0
+        with open(tmp_path / "data.json", 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        assert set(snapshot['actresses']) == {'actress_1', 'actress_2'}
+        assert snapshot['statistics']['total_videos'] == 1
+
+        reopened = JSONDBManager(data_dir=str(tmp_path), storage_mode=JOURNAL)
+        assert set(reopened.data['actresses']) == {'actress_1', 'actress_2'}
+
+    def test_statistics_refreshed_from_journal(self, tmp_path):
+        """測試日誌模式下統計快取會在讀取時重新計算"""
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode=JOURNAL)
+        self._seed(db)
+
+        stats = db.get_cached_statistics()
+
+        assert stats['total_videos'] == 1
+        assert stats['total_actresses'] == 1
+
+    def test_failed_commit_restores_memory(self, tmp_path):
+        """測試提交失敗時還原記憶體狀態"""
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode=JOURNAL)
+        self._seed(db)
+
+        with pytest.raises(Exception):
+            db.add_or_update_video({'id': 'video_2', 'actresses': ['missing']})
+
+        assert 'video_2' not in db.data['videos']
+        assert db.journal.record_count == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
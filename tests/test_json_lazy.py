@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 資料庫延遲載入
+
+此模組測試：
+1. 初始化不解析 data.json，背景載入完成前點查詢透過位移索引回傳
+2. 延遲載入的資料與立即載入相同，載入後可照常寫入
+3. 損壞或驗證失敗的檔案於存取資料時回報錯誤
+4. 緊湊格式 (無位移索引) 與非快照模式改用完整載入
+"""
+
+import configparser
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.models.json_database import JSONDBManager
+from src.models.json_lazy import LazySnapshotReader, UNAVAILABLE
+from src.models.json_types import CorruptedDataError
+from src.models.storage_engine import create_storage_engine
+
+
+def _populate(tmp_path: Path, **kwargs) -> JSONDBManager:
+    db = JSONDBManager(data_dir=str(tmp_path), **kwargs)
+    with db.transaction():
+        db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+        db.add_or_update_actress({'id': 'actress_"2"', 'name': '佐藤\n愛'})
+        for i in range(20):
+            db.add_or_update_video({
+                'id': f'SNIS-{i:03d}',
+                'title': f'標題 "{i}"\n',
+                'studio': 'S1',
+                'release_date': '2023-01-01',
+                'actresses': ['actress_1'],
+            })
+    db.refresh_statistics_cache()
+    return db
+
+
+@pytest.fixture
+def blocked_parse(monkeypatch):
+    """讓背景完整解析等待，直到測試設定 release"""
+    release = threading.Event()
+    original = JSONDBManager._parse_snapshot
+
+    def parse(self, file_content):
+        if threading.current_thread() is self._lazy_thread:
+            assert release.wait(timeout=5)
+        return original(self, file_content)
+
+    monkeypatch.setattr(JSONDBManager, '_parse_snapshot', parse)
+    yield release
+    release.set()
+
+
+class TestLazyLoad:
+    """測試延遲載入"""
+
+    def test_point_reads_before_full_parse(self, tmp_path, blocked_parse):
+        expected = _populate(tmp_path)
+        db = JSONDBManager(data_dir=str(tmp_path), lazy_load=True)
+
+        assert not db.wait_until_loaded(timeout=0.05)
+        assert db.get_video_info('SNIS-007') == expected.get_video_info('SNIS-007')
+        assert db.get_video_info('MISSING-001') is None
+        assert db.get_actress_info('actress_"2"')['name'] == '佐藤\n愛'
+        assert db.get_cached_statistics()['total_videos'] == 20
+        assert not db.wait_until_loaded(timeout=0)
+
+        blocked_parse.set()
+        assert db.wait_until_loaded(timeout=5)
+        assert 'SNIS-007' in db.snapshot().videos
+
+    def test_lazy_matches_eager(self, tmp_path):
+        _populate(tmp_path)
+        eager = JSONDBManager(data_dir=str(tmp_path))
+        lazy = JSONDBManager(data_dir=str(tmp_path), lazy_load=True)
+
+        assert lazy.data == eager.data
+        assert dict(lazy.snapshot().statistics) == dict(eager.snapshot().statistics)
+
+    def test_writes_after_load(self, tmp_path):
+        _populate(tmp_path)
+        db = JSONDBManager(data_dir=str(tmp_path), lazy_load=True)
+
+        db.add_or_update_video({'id': 'NEW-001', 'studio': 'MOODYZ'})
+        db.delete_video('SNIS-000')
+
+        reopened = JSONDBManager(data_dir=str(tmp_path), lazy_load=True)
+        assert reopened.get_video_info('NEW-001')['studio'] == 'MOODYZ'
+        assert reopened.get_video_info('SNIS-000') is None
+        assert len(reopened.get_all_videos()) == 20
+
+    def test_corrupted_file_fails_on_access(self, tmp_path):
+        _populate(tmp_path)
+        data_file = tmp_path / 'data.json'
+        data_file.write_bytes(data_file.read_bytes()[:-20])
+
+        db = JSONDBManager(data_dir=str(tmp_path), lazy_load=True)
+        with pytest.raises(CorruptedDataError):
+            db.get_all_videos()
+        with pytest.raises(CorruptedDataError):
+            db.snapshot()
+
+    def test_integrity_failure_fails_on_access(self, tmp_path):
+        _populate(tmp_path)
+        data_file = tmp_path / 'data.json'
+        content = json.loads(data_file.read_text(encoding='utf-8'))
+        content['videos']['SNIS-001']['actresses'] = ['actress_missing']
+        data_file.write_text(json.dumps(content, ensure_ascii=False, indent=2), encoding='utf-8')
+
+        db = JSONDBManager(data_dir=str(tmp_path), lazy_load=True)
+        assert db.wait_until_loaded(timeout=5)
+        with pytest.raises(CorruptedDataError):
+            db.data
+
+    def test_compact_file_falls_back_to_full_load(self, tmp_path, blocked_parse):
+        _populate(tmp_path, compact_json=True)
+        reader = LazySnapshotReader(tmp_path / 'data.json')
+        assert not reader.build_index()
+        assert reader.lookup('videos', 'SNIS-001') is UNAVAILABLE
+
+        db = JSONDBManager(data_dir=str(tmp_path), compact_json=True, lazy_load=True)
+        threading.Timer(0.05, blocked_parse.set).start()
+        assert db.get_video_info('SNIS-001')['studio'] == 'S1'
+
+    def test_other_storage_modes_load_eagerly(self, tmp_path):
+        _populate(tmp_path, storage_mode='journal')
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode='journal', lazy_load=True)
+
+        assert db._lazy is None
+        assert len(db.get_all_videos()) == 20
+
+    def test_factory_honours_lazy_load(self, tmp_path):
+        _populate(tmp_path)
+        config = configparser.ConfigParser()
+        config['database'] = {'json_data_dir': str(tmp_path), 'lazy_load': 'true'}
+
+        db = create_storage_engine(config)
+        assert db._lazy_thread is not None
+        assert db.get_video_info('SNIS-003')['studio'] == 'S1'
+        assert db.wait_until_loaded(timeout=5)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 資料庫鎖定
+
+此模組測試：
+1. RWLock 讀取並行、寫入獨佔與重入
+2. SharedFileLock 共享/獨佔檔案鎖定
+3. JSONDBManager 讀取記憶體資料時不取得檔案鎖定
+"""
+
+import time
+import threading
+
+import pytest
+
+from conftest import in_thread
+from src.models.json_database import JSONDBManager
+from src.models.json_locks import RWLock, SharedFileLock, fcntl
+from src.models.json_types import LockError
+
+
+class TestRWLock:
+    """測試程序內讀寫鎖"""
+
+    def test_readers_share_lock(self):
+        """測試多個執行緒可同時持有讀鎖定"""
+        lock = RWLock()
+        barrier = threading.Barrier(3, timeout=5)
+
+        def reader():
+            assert lock.acquire_read(timeout=1)
+            barrier.wait()
+            lock.release_read()
+
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert lock.reader_count == 0
+
+    def test_writer_excludes_readers(self):
+        """測試寫鎖定期間其他執行緒無法讀取"""
+        lock = RWLock()
+        assert lock.acquire_write()
+
+        assert in_thread(lambda: lock.acquire_read(timeout=0.1)) is False
+
+        lock.release_write()
+        assert in_thread(lambda: lock.acquire_read(timeout=0.1)) is True
+
+    def test_waiting_writer_blocks_new_readers(self):
+        """測試有寫入者等待時新讀取者需等待（寫入優先）"""
+        lock = RWLock()
+        assert lock.acquire_read()
+        writer = threading.Thread(target=lambda: lock.acquire_write(timeout=5) and lock.release_write())
+        writer.start()
+        while not lock._waiting_writers:
+            pass
+
+        assert in_thread(lambda: lock.acquire_read(timeout=0.1)) is False
+
+        lock.release_read()
+        writer.join(timeout=5)
+        assert not lock.write_locked
+
+    def test_reentrancy(self):
+        """測試寫入者可重入讀寫，讀取者不可升級"""
+        lock = RWLock()
+        assert lock.acquire_write()
+        assert lock.acquire_read()
+        assert lock.acquire_write()
+        lock.release_write()
+        lock.release_read()
+        assert lock.write_locked
+        lock.release_write()
+        assert not lock.write_locked
+
+        assert lock.acquire_read()
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+        lock.release_read()
+
+
+@pytest.mark.skipif(fcntl is None, reason="需要 flock 支援共享鎖定")
+class TestSharedFileLock:
+    """測試跨程序檔案鎖（同一程序內的不同物件等同不同程序）"""
+
+    def test_shared_locks_coexist(self, tmp_path):
+        first = SharedFileLock(tmp_path / 'db.lock')
+        second = SharedFileLock(tmp_path / 'db.lock')
+
+        first.acquire(shared=True)
+        second.acquire(shared=True, timeout=0.1)
+        with pytest.raises(LockError):
+            SharedFileLock(tmp_path / 'db.lock').acquire(timeout=0.1)
+
+        first.release()
+        second.release()
+        assert not first.is_locked
+
+    def test_exclusive_lock_blocks_shared(self, tmp_path):
+        writer = SharedFileLock(tmp_path / 'db.lock')
+        reader = SharedFileLock(tmp_path / 'db.lock')
+
+        writer.acquire()
+        with pytest.raises(LockError):
+            reader.acquire(shared=True, timeout=0.1)
+        writer.release()
+
+        reader.acquire(shared=True, timeout=0.1)
+        reader.release()
+
+    def test_nested_upgrade_keeps_exclusive_until_outer_release(self, tmp_path):
+        lock = SharedFileLock(tmp_path / 'db.lock')
+        other = SharedFileLock(tmp_path / 'db.lock')
+
+        lock.acquire(shared=True)
+        lock.acquire()
+        assert lock.mode == SharedFileLock.EXCLUSIVE
+        lock.release()
+        # 不降級：降級同樣不是原子操作
+        assert lock.mode == SharedFileLock.EXCLUSIVE
+        with pytest.raises(LockError):
+            other.acquire(shared=True, timeout=0.1)
+
+        lock.release()
+        assert lock.mode is None
+        other.acquire(shared=True, timeout=0.1)
+        other.release()
+
+    def test_concurrent_upgrades_do_not_starve(self, tmp_path):
+        """測試兩個持有共享鎖定者同時升級時依序取得獨佔鎖定"""
+        first = SharedFileLock(tmp_path / 'db.lock')
+        second = SharedFileLock(tmp_path / 'db.lock')
+        first.acquire(shared=True)
+        second.acquire(shared=True)
+
+        def upgrade(lock):
+            lock.acquire(timeout=2)
+            time.sleep(0.1)
+            lock.release()
+            lock.release()
+
+        threads = [threading.Thread(target=upgrade, args=(lock,)) for lock in (first, second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert not first.is_locked and not second.is_locked
+
+    def test_failed_upgrade_restores_shared_lock(self, tmp_path):
+        lock = SharedFileLock(tmp_path / 'db.lock')
+        other = SharedFileLock(tmp_path / 'db.lock')
+        lock.acquire(shared=True)
+        other.acquire(shared=True)
+
+        with pytest.raises(LockError):
+            lock.acquire(timeout=0.1)
+        assert lock.mode == SharedFileLock.SHARED
+
+        other.release()
+        lock.release()
+        assert lock.mode is None
+
+
+class TestManagerLocking:
+    """測試 JSONDBManager 的讀寫鎖定"""
+
+    def test_memory_reads_skip_file_lock(self, tmp_path, monkeypatch):
+        """測試讀取記憶體資料時不取得檔案鎖定"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        db.add_or_update_video({'id': 'SNIS-001', 'studio': 'S1'})
+
+        def fail(*args, **kwargs):
+            raise AssertionError("讀取不應取得檔案鎖定")
+
+        monkeypatch.setattr(db.file_lock, 'acquire', fail)
+        assert db.get_video_info('SNIS-001')['studio'] == 'S1'
+        assert len(db.get_all_videos({'studio': 'S1'})) == 1
+        assert db.get_actress_statistics() == []
+
+    def test_concurrent_readers(self, tmp_path):
+        """測試其他執行緒持有讀鎖定時仍可讀取"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        db.add_or_update_video({'id': 'SNIS-001'})
+
+        db._acquire_read_lock()
+        try:
+            assert in_thread(lambda: db.get_video_info('SNIS-001'))['id'] == 'SNIS-001'
+            # 寫入需等待讀取者釋放
+            with pytest.raises(LockError):
+                in_thread(lambda: db._acquire_write_lock(timeout=0.1))
+        finally:
+            db._release_locks()
+
+        db.add_or_update_video({'id': 'SNIS-002'})
+        assert len(db.get_all_videos()) == 2
+
+    def test_reads_inside_write_are_reentrant(self, tmp_path):
+        """測試交易中的讀取以重入方式取得鎖定"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        with db.transaction():
+            db.add_or_update_video({'id': 'SNIS-001'})
+            assert db.get_video_info('SNIS-001') is not None
+            assert db.file_lock.mode == SharedFileLock.EXCLUSIVE
+
+        assert not db.file_lock.is_locked
+        assert not db.rw_lock.write_locked
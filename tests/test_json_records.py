@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+測試精簡記錄表示
+
+此模組測試：
+1. CompactVideo / CompactActress 的 Mapping 介面與 dict 相容
+2. 重複字串共用與 JSON 編碼（所有可用後端）
+3. JSONDBManager 精簡記錄模式的 CRUD、重新載入與統計
+"""
+
+import pickle
+
+import pytest
+
+from src.models import json_codec
+from src.models.json_database import JSONDBManager
+from src.models.json_records import CompactVideo, CompactActress
+from src.models.json_types import get_empty_video
+from src.models.video_query import VideoQuery
+
+
+def _video(**fields):
+    video = get_empty_video()
+    video.update({'id': 'SNIS-001', 'studio': 'S1', 'actresses': ['actress_1'], **fields})
+    return video
+
+
+def _without_timestamps(records):
+    """兩個資料庫的寫入時間可能相差一秒，比較時略過"""
+    return [{k: v for k, v in record.items() if k not in ('created_at', 'updated_at')} for record in records]
+
+
+class TestCompactRecord:
+    """測試精簡記錄"""
+
+    def test_mapping_interface(self):
+        video = _video(file_path='/a.mp4', custom={'x': 1})
+        del video['url']
+        compact = CompactVideo(video)
+
+        assert compact == video and video == compact
+        assert list(compact) == list(video) and len(compact) == len(video)
+        assert compact['custom'] == {'x': 1} and compact.get('url', '-') == '-'
+        assert 'url' not in compact and 'custom' in compact
+        with pytest.raises(KeyError):
+            compact['url']
+        assert dict(compact) == {**compact} == compact.copy() == video
+        assert pickle.loads(pickle.dumps(compact)) == compact
+        assert compact != dict(video, studio='MOODYZ')
+
+    def test_read_only(self):
+        compact = CompactActress({'id': 'actress_1', 'name': '山田美優'})
+        with pytest.raises(TypeError):
+            compact['name'] = '改名'
+        assert not hasattr(compact, '__dict__')
+
+    def test_strings_are_shared(self):
+        first = CompactVideo(_video(studio=''.join(['S', '1']), search_status=''.join(['fail', 'ed'])))
+        second = CompactVideo(_video(studio=''.join(['S', '1']), search_status=''.join(['fail', 'ed'])))
+
+        assert first['studio'] is second['studio']
+        assert first['search_status'] is second['search_status']
+        assert first['actresses'][0] is second['actresses'][0]
+
+    @pytest.mark.parametrize('backend', json_codec.available_backends())
+    def test_encodes_like_dict(self, backend):
+        previous = json_codec.get_backend()
+        json_codec.set_backend(backend)
+        try:
+            video = _video(custom=[1, 2])
+            for indent in (False, True):
+                assert json_codec.dumps({'v': CompactVideo(video)}, indent) == json_codec.dumps({'v': video}, indent)
+        finally:
+            json_codec.set_backend(previous)
+
+
+class TestCompactManager:
+    """測試 JSONDBManager 精簡記錄模式"""
+
+    @pytest.mark.parametrize('storage_mode', ['snapshot', 'journal', 'sharded'])
+    def test_matches_dict_records(self, tmp_path, storage_mode):
+        databases = [
+            JSONDBManager(data_dir=str(tmp_path / name), storage_mode=storage_mode, compact_records=compact)
+            for name, compact in (('dict', False), ('compact', True))
+        ]
+        for db in databases:
+            db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+            with db.transaction():
+                for i in range(10):
+                    db.add_or_update_video({'id': f'SNIS-{i:03d}', 'studio': 'S1' if i % 2 else 'MOODYZ',
+                                            'actresses': ['actress_1'], 'file_path': f'/{i}.mp4'})
+            db.delete_video('SNIS-003')
+
+        plain, compact = databases
+        assert isinstance(compact.data['videos']['SNIS-001'], CompactVideo)
+        assert isinstance(compact.get_actress_info('actress_1'), CompactActress)
+        assert _without_timestamps(compact.get_all_videos()) == _without_timestamps(plain.get_all_videos())
+        query = VideoQuery().where('studio', 'S1').with_actress('actress_1').select('id', 'studio', 'file_path')
+        assert list(compact.query_videos(query)) == list(plain.query_videos(query))
+
+        reopened = JSONDBManager(data_dir=str(tmp_path / 'compact'), storage_mode=storage_mode, compact_records=True)
+        assert isinstance(reopened.get_video_info('SNIS-001'), CompactVideo)
+        assert reopened.data['videos'] == compact.data['videos']
+        assert reopened.get_actress_statistics() == plain.get_actress_statistics()
+        assert reopened.get_studio_statistics() == plain.get_studio_statistics()
+
+    def test_update_from_returned_record(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path), compact_records=True)
+        db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+        db.add_or_update_video(_video())
+
+        db.add_or_update_video({**db.get_video_info('SNIS-001'), 'studio': 'MOODYZ'})
+        db.add_or_update_video(db.get_video_info('SNIS-001'))
+
+        assert db.get_video_info('SNIS-001')['studio'] == 'MOODYZ'
+        assert db.get_all_videos({'studio': 'MOODYZ'})[0]['id'] == 'SNIS-001'
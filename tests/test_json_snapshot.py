@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 資料庫唯讀快照
+
+此模組測試：
+1. 提交後發佈快照，已取得的快照不受後續寫入影響
+2. 未變更的容器在版本間共用
+3. 交易中的變更在提交前不會發佈
+4. 快照的統計與片商分析結果與資料庫一致
+"""
+
+import pytest
+
+from conftest import in_thread
+from src.models.json_database import JSONDBManager
+from src.models.json_snapshot import DatabaseSnapshot
+
+
+def _populate(db: JSONDBManager) -> None:
+    with db.transaction():
+        db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+        db.add_or_update_actress({'id': 'actress_2', 'name': '佐藤愛'})
+        for i, studio in enumerate(['S1', 'S1', 'S1', 'MOODYZ']):
+            db.add_or_update_video({
+                'id': f'SNIS-00{i}',
+                'studio': studio,
+                'studio_code': 'SNIS' if studio == 'S1' else 'MIDE',
+                'release_date': f'2023-0{i + 1}-01',
+                'actresses': ['actress_1', 'actress_2'] if i == 3 else ['actress_1'],
+            })
+
+
+class TestSnapshotPublishing:
+    """測試快照發佈"""
+
+    def test_snapshot_unchanged_by_later_commits(self, tmp_path):
+        """測試已取得的快照不受之後的提交影響"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+
+        before = db.snapshot()
+        db.add_or_update_video({'id': 'SNIS-100', 'studio': 'S1'})
+        db.delete_video('SNIS-000')
+
+        assert 'SNIS-100' not in before.videos
+        assert 'SNIS-000' in before.videos
+        after = db.snapshot()
+        assert after.version > before.version
+        assert 'SNIS-100' in after.videos
+        assert 'SNIS-000' not in after.videos
+        with pytest.raises(TypeError):
+            after.videos['SNIS-200'] = {}
+
+    def test_unchanged_containers_are_shared(self, tmp_path):
+        """測試只複製變更的容器"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+
+        before = db.snapshot()
+        db.add_or_update_video({'id': 'SNIS-100', 'studio': 'S1'})
+        after = db.snapshot()
+
+        assert after._videos is not before._videos
+        assert after._actresses is before._actresses
+        assert after.links is before.links
+        # 記錄本身不複製
+        assert after.videos['SNIS-001'] is before.videos['SNIS-001']
+
+    def test_commits_publish_lazily(self, tmp_path, monkeypatch):
+        """測試提交只標記快照落後，取得快照時才複製容器"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        before = db.snapshot()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("提交不應建立快照")
+
+        monkeypatch.setattr(DatabaseSnapshot, 'derive', fail)
+        for number in range(100, 110):
+            db.add_or_update_video({'id': f'SNIS-{number}', 'studio': 'S1'})
+        # 快照落後時改由記憶體資料讀取最新的提交
+        assert db.get_video_info('SNIS-109') is not None
+        monkeypatch.undo()
+
+        after = db.snapshot()
+        assert after.version == before.version + 1
+        assert 'SNIS-109' in after.videos
+        assert db.snapshot() is after
+
+    def test_reads_skip_locks(self, tmp_path, monkeypatch):
+        """測試點查詢與完整清單直接讀取快照"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        db.snapshot()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("快照讀取不應取得鎖定")
+
+        monkeypatch.setattr(db.rw_lock, 'acquire_read', fail)
+        assert db.get_video_info('SNIS-001')['studio'] == 'S1'
+        assert db.get_actress_info('actress_2')['name'] == '佐藤愛'
+        assert len(db.get_all_videos()) == 4
+
+    def test_transaction_publishes_on_commit(self, tmp_path):
+        """測試交易中的變更只對交易本身可見，提交後才發佈"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+
+        with db.transaction():
+            db.add_or_update_video({'id': 'SNIS-100', 'studio': 'S1'})
+            assert db.get_video_info('SNIS-100') is not None
+            # 其他執行緒不需等待寫入者，讀到的是已提交的版本
+            assert in_thread(lambda: db.get_video_info('SNIS-100')) is None
+            assert 'SNIS-100' not in db.snapshot().videos
+
+        assert db.snapshot().get_video('SNIS-100') is not None
+
+    def test_rollback_keeps_committed_snapshot(self, tmp_path):
+        """測試交易還原後快照仍為已提交的資料"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.delete_video('SNIS-001')
+                raise RuntimeError("中止")
+
+        snapshot = db.snapshot()
+        assert 'SNIS-001' in snapshot.videos
+        assert db.get_video_info('SNIS-001') is not None
+
+    def test_restore_republishes(self, tmp_path):
+        """測試從備份還原後發佈還原的資料"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        backup = db.create_backup()
+        db.delete_video('SNIS-001')
+
+        db.restore_from_backup(backup)
+        assert 'SNIS-001' in db.snapshot().videos
+
+
+class TestSnapshotQueries:
+    """測試快照查詢與資料庫結果一致"""
+
+    @pytest.mark.parametrize('storage_mode', ['snapshot', 'journal'])
+    def test_statistics_match_manager(self, tmp_path, storage_mode):
+        db = JSONDBManager(data_dir=str(tmp_path), storage_mode=storage_mode)
+        _populate(db)
+        db.data['links'] = [
+            {'video_id': 'SNIS-000', 'actress_id': 'actress_1', 'role_type': '主演'},
+            {'video_id': 'SNIS-003', 'actress_id': 'actress_2', 'role_type': '共演'},
+        ]
+        db.add_or_update_actress({'id': 'actress_3', 'name': '鈴木花'})
+
+        expected = dict(db.get_cached_statistics())
+        actual = dict(db.snapshot().statistics)
+        assert expected.pop('stale') is False
+        expected.pop('computed_at')
+        actual.pop('computed_at')
+        assert actual == expected
+
+    def test_queries_match_manager(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        snapshot = db.snapshot()
+
+        assert snapshot.find_actress_by_name('佐藤愛') == db.find_actress_by_name('佐藤愛')
+        for filter_dict in ({'studio': 'S1'}, {'release_date_after': '2023-02-01'},
+                            {'studio': 'S1', 'release_date_before': '2023-02-01'}):
+            assert snapshot.get_all_videos(filter_dict) == db.get_all_videos(filter_dict)
+        for name in ('山田美優', '佐藤愛', '不存在'):
+            assert (snapshot.analyze_actress_primary_studio(name, {'S1'}) ==
+                    db.analyze_actress_primary_studio(name, {'S1'}))
+
+    def test_derive_without_changes_returns_self(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        _populate(db)
+        snapshot = DatabaseSnapshot.from_data(db.data)
+
+        assert snapshot.derive(db.data) is snapshot
+        assert snapshot.derive(db.data, ['videos']).version == snapshot.version + 1
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+測試 JSON 資料庫背景統計重新計算
+
+此模組測試：
+1. 重新計算期間立即回傳上次的統計並標示 stale
+2. 重新計算期間的多次要求合併為一次
+3. 計算期間有寫入時發佈目前資料的統計
+4. 快取不存在時直接由累加器輸出完整統計
+5. 日誌模式重新計算後不重寫快照、不清空日誌
+"""
+
+import json
+import threading
+
+import pytest
+
+from src.models.json_database import JSONDBManager
+from src.models.json_snapshot import DatabaseSnapshot
+from src.models.json_types import STORAGE_MODES
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = JSONDBManager(data_dir=str(tmp_path))
+    with db.transaction():
+        for i in range(5):
+            db.add_or_update_video({'id': f'SNIS-{i:03d}', 'studio': 'S1'})
+    yield db
+    assert db.wait_for_statistics_refresh(timeout=5)
+
+
+@pytest.fixture
+def blocked_compute(monkeypatch):
+    """讓背景完整計算等待，直到測試設定 release；記錄計算次數"""
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+    original = DatabaseSnapshot.compute_statistics
+
+    def compute(self):
+        calls.append(self)
+        started.set()
+        assert release.wait(timeout=5)
+        return original(self)
+
+    monkeypatch.setattr(DatabaseSnapshot, 'compute_statistics', compute)
+    yield release, started, calls
+    release.set()
+
+
+class TestBackgroundRefresh:
+    """測試背景統計重新計算"""
+
+    def test_serves_previous_result_while_refreshing(self, db, blocked_compute):
+        release, started, _ = blocked_compute
+        previous = db.get_cached_statistics()
+        assert previous['stale'] is False
+
+        refreshing = db.get_cached_statistics(force_refresh=True)
+        assert started.wait(timeout=5)
+        assert refreshing['stale'] is True
+        assert refreshing['computed_at'] == previous['computed_at']
+        assert db.get_cached_statistics()['total_videos'] == 5
+
+        release.set()
+        assert db.wait_for_statistics_refresh(timeout=5)
+        assert db.get_cached_statistics()['stale'] is False
+
+    def test_requests_are_coalesced(self, db, blocked_compute):
+        release, started, calls = blocked_compute
+        db.get_cached_statistics(force_refresh=True)
+        assert started.wait(timeout=5)
+        for _ in range(5):
+            db.get_cached_statistics(force_refresh=True)
+
+        release.set()
+        assert db.wait_for_statistics_refresh(timeout=5)
+        assert len(calls) == 2
+
+    def test_writes_during_refresh_are_reflected(self, db, blocked_compute):
+        release, started, _ = blocked_compute
+        db.get_cached_statistics(force_refresh=True)
+        assert started.wait(timeout=5)
+
+        db.add_or_update_video({'id': 'MIDE-001', 'studio': 'MOODYZ'})
+        release.set()
+
+        statistics = db.get_cached_statistics(wait=True)
+        assert statistics['total_videos'] == 6
+        assert statistics['total_studios'] == 2
+        assert statistics == dict(db.snapshot().statistics, stale=False)
+
+    def test_missing_cache_returns_full_statistics(self, tmp_path, db, blocked_compute):
+        _, started, _ = blocked_compute
+        data_file = tmp_path / 'data.json'
+        content = json.loads(data_file.read_text(encoding='utf-8'))
+        content['statistics'] = {}
+        data_file.write_text(json.dumps(content, ensure_ascii=False, indent=2), encoding='utf-8')
+
+        reopened = JSONDBManager(data_dir=str(tmp_path))
+        statistics = reopened.get_cached_statistics()
+        assert statistics['total_videos'] == 5 and statistics['total_studios'] == 1
+        assert statistics['stale'] is False
+        # 由增量累加器輸出，不需背景完整計算
+        assert not started.is_set()
+
+    def test_journal_refresh_keeps_wal(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path / 'journal'), storage_mode=STORAGE_MODES["JOURNAL"])
+        db.add_or_update_video({'id': 'SNIS-001', 'studio': 'S1'})
+        generation, records = db._journal_generation, db.journal.record_count
+
+        statistics = db.get_cached_statistics(force_refresh=True, wait=True)
+
+        assert statistics['total_videos'] == 1
+        assert (db._journal_generation, db.journal.record_count) == (generation, records)
+        reopened = JSONDBManager(data_dir=str(tmp_path / 'journal'), storage_mode=STORAGE_MODES["JOURNAL"])
+        assert reopened.get_cached_statistics()['total_videos'] == 1
+
+    def test_wait_inside_transaction(self, db):
+        with db.transaction():
+            db.add_or_update_video({'id': 'MIDE-001', 'studio': 'MOODYZ'})
+            statistics = db.get_cached_statistics(force_refresh=True, wait=True)
+        assert statistics['total_videos'] == 6
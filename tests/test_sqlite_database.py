@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+測試 SQLite 儲存引擎
+
+此模組測試 SQLiteStorageEngine 與 JSONDBManager 的行為一致性：
+1. 交易、還原與完整性錯誤訊息
+2. 隨機變更後查詢、統計與片商分析結果相同
+3. JSON ↔ SQLite 批次遷移
+4. create_storage_engine() 依設定選擇引擎
+"""
+
+import configparser
+import random
+
+import pytest
+
+from conftest import without_computed_at
+from src.models.json_database import JSONDBManager
+from src.models.json_types import DataIntegrityError, ValidationError, STORAGE_MODES
+from src.models.sqlite_database import (
+    SQLiteStorageEngine,
+    migrate_json_to_sqlite,
+    migrate_sqlite_to_json,
+)
+from src.models.storage_engine import create_storage_engine
+
+MAJOR_STUDIOS = {'S1', 'PREMIUM'}
+STUDIOS = [('S1', 'SNIS'), ('PREMIUM', 'PGD'), ('MOODYZ', 'MIDE'), ('UNKNOWN', ''), ('', '')]
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """建立內容相同的 JSON 與 SQLite 引擎"""
+    json_db = JSONDBManager(data_dir=str(tmp_path / 'json'))
+    sqlite_db = SQLiteStorageEngine(str(tmp_path / 'data.sqlite'))
+
+    yield json_db, sqlite_db
+
+    sqlite_db.close()
+
+
+def _populate(engines, seed):
+    """對兩個引擎套用相同的隨機資料（含關聯）"""
+    json_db, sqlite_db = engines
+    rng = random.Random(seed)
+    actress_ids = [f'actress_{i}' for i in range(6)]
+
+    for actress_id in actress_ids:
+        json_db.add_or_update_actress({'id': actress_id, 'name': f'女優{actress_id[-1]}'})
+    for i in range(40):
+        studio, code = rng.choice(STUDIOS)
+        json_db.add_or_update_video({
+            'id': f'{code or "X"}-{i:03d}',
+            'studio': studio,
+            'studio_code': code,
+            'release_date': f'2023-{rng.randint(1, 12):02d}-01' if rng.random() < 0.8 else '',
+            'actresses': rng.sample(actress_ids, rng.randint(0, 3)),
+        })
+
+    json_db.data['links'] = [
+        {
+            'video_id': video_id,
+            'actress_id': actress_id,
+            'role_type': rng.choice(['主演', '配角']),
+            'timestamp': f'2023-0{rng.randint(1, 9)}-01T00:00:00Z',
+        }
+        for video_id, video in json_db.data['videos'].items()
+        for actress_id in video['actresses']
+    ]
+    json_db._save_all_data(json_db.data)
+    json_db._invalidate_derived_state()
+
+    sqlite_db.import_data(json_db.export_data())
+
+
+def _strip_timestamps(records):
+    return [
+        {key: value for key, value in record.items() if key not in ('created_at', 'updated_at', 'last_search_date')}
+        for record in records
+    ]
+
+
+def _sorted_by_id(records):
+    return sorted(_strip_timestamps(records), key=lambda record: record['id'])
+
+
+def _sorted_rows(rows):
+    normalized = [
+        {key: sorted(value) if isinstance(value, list) else value for key, value in row.items()}
+        for row in rows
+    ]
+    return sorted(normalized, key=lambda row: repr(sorted(row.items())))
+
+
+class TestSQLiteEngine:
+    """測試 SQLite 引擎基本行為"""
+
+    def test_uses_wal_mode(self, engines):
+        """測試資料庫以 WAL 模式開啟"""
+        _, sqlite_db = engines
+        assert sqlite_db._conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+    def test_transaction_rolls_back_on_error(self, engines):
+        """測試交易中發生例外時全部還原"""
+        _, sqlite_db = engines
+        sqlite_db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+
+        with pytest.raises(RuntimeError):
+            with sqlite_db.transaction():
+                sqlite_db.add_or_update_video({'id': 'SNIS-001', 'actresses': ['actress_1']})
+                raise RuntimeError("中斷")
+
+        assert sqlite_db.get_video_info('SNIS-001') is None
+        assert sqlite_db.bulk_upsert_videos({'id': f'SNIS-{i:03d}'} for i in range(5)) == 5
+        assert len(sqlite_db.get_all_videos()) == 5
+
+    def test_integrity_errors_match_json(self, engines):
+        """測試完整性錯誤訊息與 JSON 引擎相同"""
+        messages = []
+        for db in engines:
+            db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優'})
+            db.add_or_update_video({'id': 'SNIS-001', 'actresses': ['actress_1']})
+            with pytest.raises(DataIntegrityError) as error:
+                db.delete_actress('actress_1')
+            messages.append(str(error.value))
+            assert db.get_actress_info('actress_1') is not None
+
+        assert messages[0] == messages[1]
+
+    def test_reopen_preserves_data_and_order(self, engines):
+        """測試重新開啟後資料與插入順序不變"""
+        _populate(engines, seed=3)
+        _, sqlite_db = engines
+        sqlite_db.add_or_update_video({'id': 'SNIS-000', 'studio': 'S1'})
+        expected = sqlite_db.get_all_videos()
+        sqlite_db.close()
+
+        with SQLiteStorageEngine(str(sqlite_db.db_path)) as reopened:
+            assert reopened.get_all_videos() == expected
+
+    def test_backup_round_trip(self, engines):
+        """測試備份匯出後可還原"""
+        _populate(engines, seed=5)
+        _, sqlite_db = engines
+        expected = sqlite_db.get_all_videos()
+        expected_links = sqlite_db.get_video_links(expected[0]['id'])
+        backup_path = sqlite_db.create_backup()
+
+        sqlite_db.delete_video(expected[0]['id'])
+        assert sqlite_db.restore_from_backup(backup_path)
+        assert sqlite_db.get_all_videos() == expected
+        assert sqlite_db.get_video_links(expected[0]['id']) == expected_links
+
+
+class TestEngineParity:
+    """測試兩種引擎在相同變更下結果一致"""
+
+    @pytest.mark.parametrize('seed', [1, 2])
+    def test_queries_and_statistics_match(self, engines, seed):
+        """測試隨機變更後查詢與統計結果相同"""
+        _populate(engines, seed)
+        rng = random.Random(seed)
+        json_db, sqlite_db = engines
+
+        for _ in range(30):
+            action = rng.random()
+            video_id = rng.choice(list(json_db.data['videos']) + ['NEW-001'])
+            studio, code = rng.choice(STUDIOS)
+            for db in engines:
+                if action < 0.6:
+                    db.add_or_update_video({
+                        'id': video_id, 'studio': studio, 'studio_code': code,
+                        'actresses': (json_db.get_video_info(video_id) or {}).get('actresses', []),
+                    })
+                elif action < 0.9:
+                    db.delete_video(video_id)
+                else:
+                    db.add_or_update_actress({'id': 'actress_1', 'name': '改名'})
+
+        assert _strip_timestamps(sqlite_db.get_all_videos()) == _strip_timestamps(json_db.get_all_videos())
+
+        # 索引查詢中同片商/同日期影片的先後順序取決於 JSON 索引的更新歷程，只比較內容
+        filters = [
+            {'studio': 'S1'},
+            {'release_date_after': '2023-04-01'},
+            {'release_date_after': '2023-03-01', 'release_date_before': '2023-08-01'},
+            {'studio': 'PREMIUM', 'release_date_before': '2023-06-01'},
+        ]
+        for filter_dict in filters:
+            assert (_sorted_by_id(sqlite_db.get_all_videos(filter_dict)) ==
+                    _sorted_by_id(json_db.get_all_videos(filter_dict)))
+
+        # JSON 引擎刪除關聯時不保留關聯順序，交叉統計與關聯只比較內容
+        sqlite_statistics = sqlite_db.get_cached_statistics()
+        assert sqlite_statistics.pop('stale') is False
+        sqlite_statistics = without_computed_at(sqlite_statistics)
+        json_statistics = without_computed_at(json_db._compute_statistics())
+        key = 'enhanced_actress_studio_statistics'
+        assert _sorted_rows(sqlite_statistics.pop(key)) == _sorted_rows(json_statistics.pop(key))
+        assert sqlite_statistics == json_statistics
+        assert (_sorted_rows(sqlite_db.get_enhanced_actress_studio_statistics('女優2')) ==
+                _sorted_rows(json_db.get_enhanced_actress_studio_statistics('女優2')))
+        assert (_sorted_rows(sqlite_db.get_actress_links('actress_2')) ==
+                _sorted_rows(json_db.get_actress_links('actress_2')))
+
+    def test_primary_studio_analysis_matches(self, engines):
+        """測試女優主要片商分析結果相同"""
+        _populate(engines, seed=11)
+        json_db, sqlite_db = engines
+
+        for actress in json_db.data['actresses'].values():
+            assert (sqlite_db.analyze_actress_primary_studio(actress['name'], MAJOR_STUDIOS) ==
+                    json_db.analyze_actress_primary_studio(actress['name'], MAJOR_STUDIOS))
+
+    def test_incremental_integrity_matches_json(self, engines):
+        """測試交易完整性檢查的錯誤回報與 JSON 引擎相同"""
+        rng = random.Random(7)
+        actress_ids = ['actress_1', 'actress_2', 'actress_3']
+        for db in engines:
+            for actress_id in actress_ids:
+                db.add_or_update_actress({'id': actress_id, 'name': actress_id})
+        for i in range(6):
+            record = {'id': f'video_{i}', 'actresses': rng.sample(actress_ids, 2)}
+            for db in engines:
+                db.add_or_update_video(record)
+
+        failures = 0
+        for _ in range(30):
+            operations = []
+            for _ in range(rng.randint(1, 3)):
+                action = rng.random()
+                if action < 0.4:
+                    operations.append({'op': 'put_video', 'record': {
+                        'id': f'video_{rng.randint(0, 8)}',
+                        'actresses': rng.sample(actress_ids + ['missing'], 2),
+                    }})
+                elif action < 0.6:
+                    operations.append({'op': 'delete_video', 'id': f'video_{rng.randint(0, 8)}'})
+                elif action < 0.8:
+                    operations.append({'op': 'delete_actress', 'id': rng.choice(actress_ids)})
+                else:
+                    actress_id = rng.choice(actress_ids + ['missing'])
+                    operations.append({'op': 'put_actress', 'record': {'id': actress_id, 'name': actress_id}})
+
+            errors = []
+            for db in engines:
+                try:
+                    db._commit_operations(operations)
+                    errors.append(None)
+                except DataIntegrityError as e:
+                    errors.append(str(e))
+            assert errors[0] == errors[1]
+            failures += errors[0] is not None
+
+        assert failures > 0
+
+
+class TestMigration:
+    """測試 JSON ↔ SQLite 批次遷移"""
+
+    def test_round_trip(self, tmp_path):
+        """測試分片 JSON → SQLite → JSON 後資料不變"""
+        json_db = JSONDBManager(data_dir=str(tmp_path / 'source'), storage_mode=STORAGE_MODES["SHARDED"])
+        json_db.add_or_update_actress({'id': 'actress_1', 'name': '山田美優', 'video_count': 1})
+        json_db.bulk_upsert_videos(
+            {'id': f'SNIS-{i:03d}', 'studio': 'S1', 'actresses': ['actress_1']} for i in range(20)
+        )
+        json_db.data['links'] = [{'video_id': 'SNIS-001', 'actress_id': 'actress_1', 'role_type': '主演'}]
+        json_db._save_all_data(json_db.data)
+
+        sqlite_path = migrate_json_to_sqlite(str(tmp_path / 'source'))
+        with SQLiteStorageEngine(str(sqlite_path)) as sqlite_db:
+            assert sqlite_db.get_all_videos() == json_db.get_all_videos()
+            assert sqlite_db.get_video_links('SNIS-001') == json_db.get_video_links('SNIS-001')
+
+        migrate_sqlite_to_json(str(sqlite_path), str(tmp_path / 'target'))
+        target = JSONDBManager(data_dir=str(tmp_path / 'target'))
+        assert target.get_all_videos() == json_db.get_all_videos()
+        assert target.data['links'] == json_db.data['links']
+        assert target.validate_data()['valid']
+
+    @pytest.mark.parametrize('storage_mode', list(STORAGE_MODES.values()))
+    def test_replaces_existing_target(self, tmp_path, storage_mode):
+        """測試匯出到已有資料的 JSON 資料庫時取代全部內容（各儲存模式）"""
+        target_dir = str(tmp_path / 'target')
+        existing = JSONDBManager(data_dir=target_dir, storage_mode=storage_mode)
+        existing.add_or_update_video({'id': 'OLD-001', 'studio': 'S1'})
+
+        with SQLiteStorageEngine(str(tmp_path / 'data.sqlite')) as sqlite_db:
+            sqlite_db.add_or_update_video({'id': 'SNIS-001', 'studio': 'S1'})
+        migrate_sqlite_to_json(str(tmp_path / 'data.sqlite'), target_dir, storage_mode)
+
+        # 重新開啟時不會重放舊的日誌或讀到舊的分片
+        reopened = JSONDBManager(data_dir=target_dir, storage_mode=storage_mode)
+        assert [video['id'] for video in reopened.get_all_videos()] == ['SNIS-001']
+        assert reopened.validate_data()['valid']
+
+    def test_invalid_source_is_not_imported(self, tmp_path):
+        """測試完整性錯誤的資料不會寫入 SQLite"""
+        with SQLiteStorageEngine(str(tmp_path / 'data.sqlite')) as sqlite_db:
+            data = sqlite_db.export_data()
+            data['videos'] = {'SNIS-001': {'id': 'SNIS-001', 'actresses': ['missing']}}
+
+            with pytest.raises(DataIntegrityError):
+                sqlite_db.import_data(data)
+            assert sqlite_db.get_all_videos() == []
+
+
+class TestCreateStorageEngine:
+    """測試依設定建立儲存引擎"""
+
+    def _config(self, tmp_path, **options):
+        config = configparser.ConfigParser()
+        config['database'] = {'json_data_dir': str(tmp_path), **options}
+        return config
+
+    def test_defaults_to_json(self, tmp_path):
+        assert isinstance(create_storage_engine(self._config(tmp_path)), JSONDBManager)
+
+    def test_selects_sqlite(self, tmp_path):
+        engine = create_storage_engine(self._config(tmp_path, engine='sqlite'))
+        try:
+            assert isinstance(engine, SQLiteStorageEngine)
+            assert engine.db_path == tmp_path / 'data.sqlite'
+        finally:
+            engine.close()
+
+    def test_rejects_unknown_engine(self, tmp_path):
+        with pytest.raises(ValidationError):
+            create_storage_engine(self._config(tmp_path, engine='mongodb'))
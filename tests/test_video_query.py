@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+測試影片查詢 (VideoQuery)
+
+此模組測試：
+1. JSON 與 SQLite 引擎的查詢結果與逐筆比對相同
+2. JSON 引擎以最具選擇性的次要索引作為候選來源
+3. 排序、分頁、投影與延遲迭代
+4. 重新搜尋查詢 (research_query)
+"""
+
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from src.models.json_database import JSONDBManager
+from src.models.json_indexes import SecondaryIndexes
+from src.models.sqlite_database import SQLiteStorageEngine
+from src.models.video_query import VideoQuery, In, Range, Prefix, normalize_search_date, research_query
+
+STATUSES = ['searched_found', 'searched_not_found', 'failed', None]
+SEARCH_DATES = ['2024-01-01T00:00:00Z', '2024-03-01T10:00:00.123456', '2024-03-08T00:00:00', '', None]
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """建立內容相同的 JSON 與 SQLite 引擎"""
+    json_db = JSONDBManager(data_dir=str(tmp_path / 'json'))
+    sqlite_db = SQLiteStorageEngine(str(tmp_path / 'data.sqlite'))
+    rng = random.Random(3)
+
+    for engine in (json_db, sqlite_db):
+        for i in range(4):
+            engine.add_or_update_actress({'id': f'actress_{i}', 'name': f'女優{i}'})
+    for i in range(60):
+        video = {
+            'id': f"{rng.choice(['SNIS', 'MIDE', 'PGD'])}-{i:03d}",
+            'studio': rng.choice(['S1', 'MOODYZ', '']),
+            'release_date': rng.choice(['2023-01-01', '2023-06-15', '2024-02-01', '']),
+            'actresses': rng.sample([f'actress_{a}' for a in range(4)], rng.randint(0, 2)),
+            'search_status': rng.choice(STATUSES),
+            'last_search_date': rng.choice(SEARCH_DATES),
+        }
+        for engine in (json_db, sqlite_db):
+            engine.add_or_update_video(dict(video))
+
+    yield json_db, sqlite_db
+
+    sqlite_db.close()
+
+
+QUERIES = [
+    VideoQuery(),
+    VideoQuery().where('studio', 'S1'),
+    VideoQuery().where_in('id', ['SNIS-001', 'MIDE-002', 'PGD-003', 'NONE-000', 'SNIS-001']),
+    VideoQuery().where_prefix('id', 'MIDE-'),
+    VideoQuery().released_between('2023-02-01', '2024-02-01'),
+    VideoQuery().released_between(before='2023-06-15'),
+    VideoQuery().with_search_status('failed', 'searched_not_found'),
+    VideoQuery().searched_before('2024-03-01T10:00:00.123456'),
+    VideoQuery().with_actress('actress_1').where('studio', 'MOODYZ'),
+    VideoQuery().any_of(In('studio', ['S1']), Range('release_date', low='2024-01-01')),
+    VideoQuery().any_of(In('search_status', ['failed']), Prefix('id', 'PGD')),
+    VideoQuery().where_between('title', low='a'),
+]
+
+
+class TestQueryResults:
+    """測試查詢結果"""
+
+    @pytest.mark.parametrize('query', QUERIES, ids=range(len(QUERIES)))
+    def test_engines_match_brute_force(self, engines, query):
+        json_db, sqlite_db = engines
+        expected = sorted(v['id'] for v in json_db.get_all_videos() if query.matches(v))
+
+        assert sorted(v['id'] for v in json_db.query_videos(query)) == expected
+        assert sorted(v['id'] for v in sqlite_db.query_videos(query)) == expected
+
+    def test_ordering_paging_and_projection(self, engines):
+        query = VideoQuery().where('studio', 'S1').order_by('release_date', descending=True).offset(2).limit(5)
+        results = [list(engine.query_videos(query.select('id', 'release_date'))) for engine in engines]
+
+        dated = [v for v in engines[0].get_all_videos({'studio': 'S1'}) if v.get('release_date')]
+        assert [v['release_date'] for v in results[0]] == sorted((v['release_date'] for v in dated), reverse=True)[2:7]
+        assert all(set(video) == {'id', 'release_date'} for video in results[0])
+        assert [v['release_date'] for v in results[1]] == [v['release_date'] for v in results[0]]
+
+    def test_query_is_immutable(self):
+        base = VideoQuery().where('studio', 'S1')
+        extended = base.with_actress('actress_1').limit(3)
+
+        assert len(base.predicates) == 1 and base.count is None
+        assert len(extended.predicates) == 2 and extended.count == 3
+        with pytest.raises(ValueError):
+            base.limit(-1)
+
+    def test_iteration_unaffected_by_later_writes(self, engines):
+        json_db, _ = engines
+        results = json_db.query_videos(VideoQuery().where('studio', 'S1'))
+        first = next(results)
+
+        json_db.add_or_update_video({'id': 'NEW-001', 'studio': 'S1'})
+        json_db.add_or_update_video(dict(first, studio='MOODYZ'))
+
+        remaining = list(results)
+        assert first['studio'] == 'S1'
+        assert 'NEW-001' not in {v['id'] for v in remaining}
+
+
+class TestQueryPlan:
+    """測試 JSON 引擎的索引選擇"""
+
+    def test_plan_picks_smallest_index(self):
+        data = {'videos': {f'V-{i}': {'id': f'V-{i}', 'studio': 'S1', 'search_status': 'failed' if i < 3 else None}
+                           for i in range(100)}}
+        indexes = SecondaryIndexes(data)
+        by_id = In('id', ['V-1', 'V-50'])
+
+        driver, video_ids = indexes.plan(VideoQuery().where('studio', 'S1').filter(by_id).predicates, data['videos'])
+        assert driver is by_id and list(video_ids) == ['V-1', 'V-50']
+
+        driver, video_ids = indexes.plan(VideoQuery().with_search_status('failed').predicates, data['videos'])
+        assert list(video_ids) == ['V-0', 'V-1', 'V-2']
+
+        assert indexes.plan(VideoQuery().where('title', 'x').predicates, data['videos']) == (None, None)
+
+    def test_search_date_index_follows_updates(self, engines):
+        json_db, _ = engines
+        query = VideoQuery().searched_before('2024-02-01')
+        before = {v['id'] for v in json_db.query_videos(query)}
+        assert before
+
+        video_id = sorted(before)[0]
+        json_db.add_or_update_video({**json_db.get_video_info(video_id), 'last_search_date': '2024-05-01T00:00:00Z'})
+        json_db.delete_video(sorted(before)[-1])
+
+        assert {v['id'] for v in json_db.query_videos(query)} == before - {video_id, sorted(before)[-1]}
+
+
+class TestResearchQuery:
+    """測試重新搜尋查詢"""
+
+    def test_research_query(self, tmp_path):
+        db = JSONDBManager(data_dir=str(tmp_path))
+        db.add_or_update_video({'id': 'A-001', 'search_status': 'searched_not_found', 'last_search_date': '2024-03-09T00:00:00'})
+        db.add_or_update_video({'id': 'A-002', 'search_status': 'searched_found', 'last_search_date': '2024-03-01T00:00:00Z'})
+        db.add_or_update_video({'id': 'A-003', 'search_status': 'searched_found', 'last_search_date': '2024-03-09T11:00:00.5'})
+        db.add_or_update_video({'id': 'A-004', 'search_status': 'failed', 'last_search_date': '2024-03-09T00:00:00'})
+
+        query = research_query(['A-001', 'A-002', 'A-003', 'NEW-001'], now=datetime(2024, 3, 10))
+        assert sorted(v['id'] for v in db.query_videos(query.select('id'))) == ['A-001', 'A-002']
+
+    def test_research_query_compares_search_dates_in_utc(self, tmp_path):
+        """測試 '...Z'、帶時差與本地時間的 last_search_date 以 UTC 比較"""
+        db = JSONDBManager(data_dir=str(tmp_path))
+        db.add_or_update_video({'id': 'A-001', 'last_search_date': '2024-03-03T01:00:00+02:00'})
+        db.add_or_update_video({'id': 'A-002', 'last_search_date': '2024-03-02T23:30:00-02:00'})
+        db.add_or_update_video({'id': 'A-003', 'last_search_date': '2024-03-02T23:59:59Z'})
+        local = datetime(2024, 3, 2, 12, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        db.add_or_update_video({'id': 'A-004', 'last_search_date': local.isoformat()})
+
+        query = research_query(['A-001', 'A-002', 'A-003', 'A-004'], now=datetime(2024, 3, 10, tzinfo=timezone.utc))
+        assert sorted(v['id'] for v in db.query_videos(query.select('id'))) == ['A-001', 'A-003', 'A-004']
+        assert sorted(v['id'] for v in query.execute(db.get_all_videos())) == ['A-001', 'A-003', 'A-004']
+
+    def test_normalize_search_date(self):
+        assert normalize_search_date('2024-03-09T11:00:00.5Z') == '2024-03-09T11:00:00Z'
+        assert normalize_search_date('2024-03-09T11:00:00+0800') == '2024-03-09T03:00:00Z'
+        assert normalize_search_date(datetime(2024, 3, 9, tzinfo=timezone.utc)) == '2024-03-09T00:00:00Z'
+        assert normalize_search_date('not a date') is None
+        assert normalize_search_date('') is None
+        with pytest.raises(ValueError):
+            VideoQuery().searched_before('yesterday')